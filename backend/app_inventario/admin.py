@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Proveedores, Marcas, Categorias, Modelos, Estados, Productos, Usuarios, Asignaciones, Mantenciones, HistorialEstados, Documentaciones, Notificaciones, LogAcceso, Sucursales, CodigoQR
+from .models import Proveedores, Marcas, Categorias, Modelos, Estados, Productos, Usuarios, Asignaciones, Mantenciones, HistorialEstados, Documentaciones, Notificaciones, LogAcceso, Sucursales, CodigoQR, MovimientosDiarios, MovimientosMensuales, PlanMantencion, Auditorias, SnapshotsInventario
 # Register your models here.
 
 
@@ -9,7 +9,6 @@ admin.site.register(Categorias)
 admin.site.register(Modelos)
 admin.site.register(Estados)
 admin.site.register(Productos)
-admin.site.register(Usuarios)
 admin.site.register(Asignaciones)
 admin.site.register(Mantenciones)
 admin.site.register(HistorialEstados)
@@ -18,10 +17,21 @@ admin.site.register(Notificaciones)
 admin.site.register(LogAcceso)
 admin.site.register(Sucursales)
 admin.site.register(CodigoQR)
+admin.site.register(MovimientosDiarios)
+admin.site.register(MovimientosMensuales)
+admin.site.register(PlanMantencion)
+admin.site.register(Auditorias)
+admin.site.register(SnapshotsInventario)
 
 
 class NotificacionAdmin(admin.ModelAdmin):
     list_display = ['titulo', 'categoria', 'producto', 'leido', 'prioridad', 'fecha_creacion']
     list_filter = ['categoria', 'leido', 'prioridad', 'fecha_creacion']
     search_fields = ['titulo', 'mensaje']
-    date_hierarchy = 'fecha_creacion'
\ No newline at end of file
+    date_hierarchy = 'fecha_creacion'
+
+
+@admin.register(Usuarios)
+class UsuariosAdmin(admin.ModelAdmin):
+    # Alcance por sucursal (vacío = todas)
+    filter_horizontal = ("sucursales",)
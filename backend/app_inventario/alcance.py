@@ -0,0 +1,99 @@
+# app_inventario/alcance.py
+"""
+Alcance por sucursal: qué parte del inventario ve cada usuario.
+
+- `Usuarios.sucursales` vacío, rol ADMIN o `is_staff` = sin restricción.
+- Con el token JWT las sucursales vienen como claim (`agregar_claims`):
+  acotar no agrega consultas. Con sesión (vistas HTML) se leen una vez
+  por request.
+- Los querysets se acotan con `sucursal_id IN (...)` (o
+  `producto__sucursal_id IN (...)`), que en Productos usa el índice
+  (sucursal, fecha_compra, id): un usuario de sucursal recorre sólo su parte.
+- Escrituras: no se puede crear ni mover nada a una sucursal ajena.
+"""
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.permissions import BasePermission
+
+from .autenticacion import UsuarioToken
+from .models import Usuarios
+
+
+def sucursales_de(user):
+    """None = todas; si no, lista de ids de sucursal permitidas"""
+    if isinstance(user, UsuarioToken):
+        return None if user.es_admin or not user.sucursales else user.sucursales
+    if user is None or not user.is_authenticated or user.is_staff:
+        return None
+    if "_alcance_sucursales" not in user.__dict__:
+        # Una consulta: (rol, sucursal_id) por sucursal asignada, (rol, None) si no tiene
+        filas = list(Usuarios.objects.filter(user_id=user.pk).values_list("rol", "sucursales"))
+        ids = sorted(s for _, s in filas if s is not None)
+        user._alcance_sucursales = None if any(rol == "ADMIN" for rol, _ in filas) else ids or None
+    return user._alcance_sucursales
+
+
+def acotar(queryset, user, campo="sucursal"):
+    """`queryset` filtrado a las sucursales de `user` (`campo`: ruta hasta la FK)"""
+    ids = sucursales_de(user)
+    if ids is None:
+        return queryset
+    return queryset.filter(**{f"{campo}_id__in": ids})
+
+
+def permitida(user, sucursal_id):
+    ids = sucursales_de(user)
+    return ids is None or sucursal_id in ids
+
+
+def verificar(user, sucursal_id):
+    if not permitida(user, sucursal_id):
+        raise PermissionDenied("La sucursal no está dentro de su alcance")
+
+
+class AlcanceSucursalMixin:
+    """
+    Para ViewSets: `acotar()` en get_queryset y verificación de la sucursal
+    al crear/editar. `campo_sucursal` es la ruta desde el modelo hasta la FK
+    (p. ej. "producto__sucursal").
+    """
+    campo_sucursal = "sucursal"
+
+    @property
+    def sucursales(self):
+        return sucursales_de(self.request.user)
+
+    def acotar(self, queryset):
+        return acotar(queryset, self.request.user, self.campo_sucursal)
+
+    def _sucursal_de(self, datos):
+        """Id de sucursal al que apunta `validated_data` (o False si no lo toca)"""
+        partes = self.campo_sucursal.split("__")
+        if partes[0] not in datos:
+            return False
+        objeto = datos[partes[0]]
+        for parte in partes[1:]:
+            objeto = getattr(objeto, parte, None) if objeto is not None else None
+        return objeto.pk if objeto is not None else None
+
+    def _verificar(self, serializer):
+        sucursal_id = self._sucursal_de(serializer.validated_data)
+        if sucursal_id is False and serializer.instance is None:
+            sucursal_id = None  # crear sin sucursal: quedaría fuera de su alcance
+        if sucursal_id is not False:
+            verificar(self.request.user, sucursal_id)
+
+    def perform_create(self, serializer):
+        self._verificar(serializer)
+        super().perform_create(serializer)
+
+    def perform_update(self, serializer):
+        self._verificar(serializer)
+        super().perform_update(serializer)
+
+
+class SinRestriccionSucursal(BasePermission):
+    """Sólo usuarios sin restricción de sucursal (datos de todo el inventario)"""
+    message = "Disponible sólo para usuarios con acceso a todas las sucursales"
+
+    def has_permission(self, request, view):
+        return sucursales_de(request.user) is None
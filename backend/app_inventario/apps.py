@@ -9,3 +9,9 @@ class InventarioConfig(AppConfig):
     def ready(self):
         # importa las señales una sola vez
         import app_inventario.signals
+
+        # mide receptores de señales y serializers en los requests perfilados
+        from django.conf import settings
+        from app_inventario import perfilado
+        if settings.PERFIL_ACTIVO:
+            perfilado.instalar()
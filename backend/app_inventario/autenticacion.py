@@ -0,0 +1,193 @@
+# app_inventario/autenticacion.py
+"""
+Autenticación JWT sin consultar la BD en cada request.
+
+- El token lleva los datos que usan las vistas (`agregar_claims`): username,
+  is_staff, is_superuser, rol, el id del perfil (`Usuarios`) y sus sucursales
+  (alcance, ver alcance.py).
+- `JWTClaimsAuthentication` arma un `UsuarioToken` con esos claims en vez de
+  cargar el `User`. Para lo que sí necesita la fila (cambiar contraseña)
+  está `UsuarioToken.cargar()`.
+- Revocación: al desactivar/borrar un usuario, cambiar su contraseña, sus
+  permisos, su rol o sus sucursales, las señales llaman a `revocar()`. Los tokens emitidos
+  antes de ese momento se rechazan (access y refresh). El corte se guarda en
+  la BD (`RevocacionesToken`); la consulta se resuelve contra una cache local
+  del proceso que se refresca cada REVOCACION_CACHE_LOCAL_SEGUNDOS desde la
+  cache compartida, y ésta desde la BD cuando la clave no está (expulsada, o
+  una cache por proceso que no vio la revocación).
+- Al renovar (`TokenRefreshClaimsSerializer`) los claims se vuelven a leer de
+  la BD: un cambio de rol llega a más tardar en ACCESS_TOKEN_LIFETIME.
+"""
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils.functional import cached_property
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTStatelessUserAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import RevocacionesToken
+
+CLAIM_ROL = "rol"
+CLAIM_PERFIL = "perfil"
+CLAIM_SUCURSALES = "sucursales"
+
+
+def agregar_claims(token, user):
+    """Claims que permiten autenticar sin cargar el usuario"""
+    perfil = getattr(user, "perfil_usuario", None)
+    token["username"] = user.username
+    token["is_staff"] = user.is_staff
+    token["is_superuser"] = user.is_superuser
+    token[CLAIM_ROL] = perfil.rol if perfil else None
+    token[CLAIM_PERFIL] = perfil.pk if perfil else None
+    # .all() y no values_list: aprovecha el prefetch del refresh
+    token[CLAIM_SUCURSALES] = sorted(s.pk for s in perfil.sucursales.all()) if perfil else []
+    # Al emitir se carga el corte de revocación: el primer request no lo consulta
+    _corte(user.pk)
+    return token
+
+
+class UsuarioToken(TokenUser):
+    """`request.user` de la API: sólo claims, sin fila de `User` detrás"""
+
+    @cached_property
+    def id(self):
+        # simplejwt guarda el id como texto; como entero se compara con las FK
+        return int(self.token[api_settings.USER_ID_CLAIM])
+
+    @cached_property
+    def rol(self):
+        return self.token.get(CLAIM_ROL)
+
+    @cached_property
+    def perfil_id(self):
+        return self.token.get(CLAIM_PERFIL)
+
+    @cached_property
+    def sucursales(self):
+        # Tokens emitidos antes del claim: sin sucursales asignadas (asignarlas revoca el token)
+        return self.token.get(CLAIM_SUCURSALES) or []
+
+    @property
+    def es_admin(self):
+        return self.is_staff or self.rol == "ADMIN"
+
+    def cargar(self):
+        """El `User` real (una consulta); sólo para operaciones que lo requieren"""
+        # (no hasattr: TokenUser.__getattr__ responde cualquier atributo desde el token)
+        if "_usuario" not in self.__dict__:
+            self._usuario = get_user_model().objects.get(pk=self.pk)
+        return self._usuario
+
+
+def usuario_bd(user):
+    """`request.user` como instancia de `User` (carga la fila si viene del token)"""
+    return user.cargar() if isinstance(user, UsuarioToken) else user
+
+
+# ------------------------------------------------------------------
+# Revocación
+# ------------------------------------------------------------------
+
+# user_id -> (válidos desde o 0, válido hasta)
+_local = {}
+_LOCAL_MAX = 10000
+
+
+def _clave(user_id):
+    return f"jwt:revocado:{user_id}"
+
+
+def _ttl_local():
+    return getattr(settings, "REVOCACION_CACHE_LOCAL_SEGUNDOS", 30)
+
+
+def _ttl_compartida():
+    # Lo que dura un refresh token emitido justo antes de la revocación
+    return int(api_settings.REFRESH_TOKEN_LIFETIME.total_seconds())
+
+
+def revocar(user_id):
+    """Invalida todos los tokens emitidos hasta ahora para el usuario"""
+    # `iat` es entero: un token emitido en este mismo segundo (p. ej. el
+    # nuevo login tras cambiar la contraseña) sigue siendo válido
+    desde = int(time.time())
+    RevocacionesToken.objects.update_or_create(user_id=user_id, defaults={"validos_desde": desde})
+    cache.set(_clave(user_id), desde, _ttl_compartida())
+    _local[user_id] = (desde, time.monotonic() + _ttl_local())
+
+
+def _validos_desde(user_id):
+    desde = cache.get(_clave(user_id))
+    if desde is None:
+        desde = (
+            RevocacionesToken.objects.filter(user_id=user_id)
+            .values_list("validos_desde", flat=True).first()
+        ) or 0
+        cache.set(_clave(user_id), desde, _ttl_compartida())
+    return desde
+
+
+def _corte(user_id):
+    ahora = time.monotonic()
+    entrada = _local.get(user_id)
+    if entrada is None or entrada[1] < ahora:
+        if len(_local) >= _LOCAL_MAX:
+            _local.clear()
+        entrada = (_validos_desde(user_id), ahora + _ttl_local())
+        _local[user_id] = entrada
+    return entrada[0]
+
+
+def revocado(user_id, emitido):
+    """¿El token (claim `iat`) se emitió antes de la última revocación?"""
+    desde = _corte(user_id)
+    return bool(desde) and (emitido is None or emitido < desde)
+
+
+def limpiar_cache_local():
+    _local.clear()
+
+
+# ------------------------------------------------------------------
+# DRF / simplejwt
+# ------------------------------------------------------------------
+
+class JWTClaimsAuthentication(JWTStatelessUserAuthentication):
+    """Ver docstring del módulo. Reemplaza a JWTAuthentication en REST_FRAMEWORK."""
+
+    def get_user(self, validated_token):
+        if api_settings.USER_ID_CLAIM not in validated_token or CLAIM_ROL not in validated_token:
+            # Tokens anteriores a los claims de perfil: el cliente renueva y recibe uno completo
+            raise InvalidToken("El token no tiene los datos del usuario; renuévalo")
+
+        user = UsuarioToken(validated_token)
+        if revocado(user.pk, validated_token.get("iat")):
+            raise AuthenticationFailed("Token revocado", code="token_revoked")
+        return user
+
+
+class TokenRefreshClaimsSerializer(TokenRefreshSerializer):
+    """Renueva el access token con claims leídos de la BD (rol, permisos, perfil, sucursales)"""
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs["refresh"])
+        user_id = refresh.payload.get(api_settings.USER_ID_CLAIM)
+
+        user = (
+            get_user_model().objects.select_related("perfil_usuario")
+            .prefetch_related("perfil_usuario__sucursales")
+            .filter(**{api_settings.USER_ID_FIELD: user_id}).first()
+        )
+        if not api_settings.USER_AUTHENTICATION_RULE(user) or revocado(user.pk, refresh.payload.get("iat")):
+            raise AuthenticationFailed(
+                self.error_messages["no_active_account"], "no_active_account",
+            )
+
+        return {"access": str(agregar_claims(refresh.access_token, user))}
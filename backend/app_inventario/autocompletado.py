@@ -0,0 +1,342 @@
+# app_inventario/autocompletado.py
+"""
+Índice de prefijos en memoria para el endpoint /api/autocomplete/.
+
+Cada campo (nro_serie, modelos, proveedores, usuarios) mantiene una lista
+ordenada de claves normalizadas; una búsqueda es un `bisect` al prefijo y un
+recorrido hasta que la clave deja de coincidir, sin tocar la base de datos.
+
+- Los números de serie se particionan por sucursal (`IndicePorSucursal`):
+  un usuario de sucursal recorre sólo sus particiones y se mezcla el top-k.
+- El índice se construye perezosamente la primera vez que se consulta un campo.
+- Las señales (signals.py) lo mantienen al día dentro del proceso.
+- Con varios workers, cada proceso tiene su copia: se reconstruye cada
+  `AUTOCOMPLETADO_TTL` segundos para acotar el desfase entre procesos. La
+  reconstrucción corre en un hilo aparte mientras las búsquedas siguen
+  usando el índice anterior; los cambios que llegan por señales entretanto
+  se reaplican sobre el nuevo antes de reemplazarlo.
+"""
+import heapq
+import logging
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connection
+
+from . import metricas
+from .models import Modelos, Productos, Proveedores, Usuarios
+
+logger = logging.getLogger(__name__)
+
+
+def normalizar(texto):
+    return " ".join((texto or "").lower().split())
+
+
+def claves_por_palabra(texto):
+    """'HP EliteBook 840' -> ['hp elitebook 840', 'elitebook 840', '840']"""
+    palabras = normalizar(texto).split()
+    return [" ".join(palabras[i:]) for i in range(len(palabras))]
+
+
+class IndicePrefijos:
+    """Lista ordenada de (clave, id) + datos de cada entrada"""
+
+    def __init__(self):
+        self._claves = []
+        self._entradas = {}  # id -> (claves, datos)
+        self._lock = threading.Lock()
+        self.cargado_en = None
+
+    def cargar(self, entradas):
+        claves = []
+        mapa = {}
+        for pk, lista, datos in entradas:
+            mapa[pk] = (lista, datos)
+            claves.extend((c, pk) for c in lista)
+        claves.sort()
+        with self._lock:
+            self._claves = claves
+            self._entradas = mapa
+            self.cargado_en = time.monotonic()
+
+    def upsert(self, pk, lista, datos):
+        with self._lock:
+            self._quitar(pk)
+            self._entradas[pk] = (lista, datos)
+            for c in lista:
+                insort(self._claves, (c, pk))
+
+    def eliminar(self, pk):
+        with self._lock:
+            self._quitar(pk)
+
+    def _quitar(self, pk):
+        anterior = self._entradas.pop(pk, None)
+        if not anterior:
+            return
+        for c in anterior[0]:
+            i = bisect_left(self._claves, (c, pk))
+            if i < len(self._claves) and self._claves[i] == (c, pk):
+                del self._claves[i]
+
+    def buscar(self, prefijo, limite, filtro=None):
+        return [datos for _, _, datos in self.coincidencias(normalizar(prefijo), limite, filtro)]
+
+    def coincidencias(self, prefijo, limite, filtro=None):
+        """[(clave, id, datos)] en orden de clave; `prefijo` ya normalizado"""
+        resultados = []
+        vistos = set()
+        with self._lock:
+            i = bisect_left(self._claves, (prefijo,))
+            while i < len(self._claves) and len(resultados) < limite:
+                clave, pk = self._claves[i]
+                if not clave.startswith(prefijo):
+                    break
+                i += 1
+                if pk in vistos:
+                    continue
+                vistos.add(pk)
+                datos = self._entradas[pk][1]
+                if filtro is None or filtro(datos):
+                    resultados.append((clave, pk, datos))
+        return resultados
+
+    def __len__(self):
+        return len(self._entradas)
+
+
+class IndicePorSucursal:
+    """
+    Un IndicePrefijos por sucursal (`datos["sucursal"]`, None = sin sucursal).
+    `buscar(..., sucursales=[...])` recorre sólo esas particiones y mezcla sus
+    top-k por clave; sin `sucursales`, todas.
+    """
+
+    def __init__(self):
+        self._particiones = {}  # sucursal_id -> IndicePrefijos
+        self._sucursal_de = {}  # id -> sucursal_id
+        self._lock = threading.Lock()
+        self.cargado_en = None
+
+    def cargar(self, entradas):
+        grupos = defaultdict(list)
+        sucursal_de = {}
+        for pk, lista, datos in entradas:
+            grupos[datos["sucursal"]].append((pk, lista, datos))
+            sucursal_de[pk] = datos["sucursal"]
+        particiones = {}
+        for sucursal, grupo in grupos.items():
+            particiones[sucursal] = IndicePrefijos()
+            particiones[sucursal].cargar(grupo)
+        with self._lock:
+            self._particiones = particiones
+            self._sucursal_de = sucursal_de
+            self.cargado_en = time.monotonic()
+
+    def upsert(self, pk, lista, datos):
+        with self._lock:
+            anterior = self._sucursal_de.get(pk, datos["sucursal"])
+            if anterior != datos["sucursal"]:
+                self._particiones[anterior].eliminar(pk)
+            self._sucursal_de[pk] = datos["sucursal"]
+            particion = self._particiones.get(datos["sucursal"])
+            if particion is None:
+                particion = self._particiones[datos["sucursal"]] = IndicePrefijos()
+            particion.upsert(pk, lista, datos)
+
+    def eliminar(self, pk):
+        with self._lock:
+            if pk in self._sucursal_de:
+                self._particiones[self._sucursal_de.pop(pk)].eliminar(pk)
+
+    def buscar(self, prefijo, limite, filtro=None, sucursales=None):
+        prefijo = normalizar(prefijo)
+        with self._lock:
+            ids = self._particiones if sucursales is None else sucursales
+            particiones = [self._particiones[s] for s in ids if s in self._particiones]
+        # Cada partición aporta a lo más `limite`, ya ordenadas: basta mezclar
+        mezcla = heapq.merge(*(p.coincidencias(prefijo, limite, filtro) for p in particiones))
+        resultados = []
+        vistos = set()
+        for _, pk, datos in mezcla:
+            if pk not in vistos:
+                vistos.add(pk)
+                resultados.append(datos)
+                if len(resultados) == limite:
+                    break
+        return resultados
+
+    def __len__(self):
+        return len(self._sucursal_de)
+
+
+# ------------------------------------------------------------------
+# Fuentes: cómo se indexa cada campo
+# ------------------------------------------------------------------
+
+def _entrada_producto(p):
+    return p.pk, [normalizar(p.nro_serie)], {"id": p.pk, "texto": p.nro_serie, "sucursal": p.sucursal_id}
+
+
+def _entrada_modelo(m):
+    texto = f"{m.marca.nombre} {m.nombre}"
+    claves = claves_por_palabra(texto)
+    claves += [c for c in claves_por_palabra(m.nombre) if c not in claves]
+    return m.pk, claves, {"id": m.pk, "texto": texto, "marca": m.marca_id}
+
+
+def _entrada_proveedor(p):
+    rut = normalizar(p.rut)
+    claves = claves_por_palabra(p.nombre) + [rut, rut.replace(".", "").replace("-", "")]
+    return p.pk, claves, {"id": p.pk, "texto": f"{p.nombre} ({p.rut})", "rut": p.rut}
+
+
+def _entrada_usuario(u):
+    user = u.user
+    nombre = user.get_full_name() or user.username
+    claves = [normalizar(user.username)] + claves_por_palabra(user.get_full_name())
+    if user.email:
+        claves.append(normalizar(user.email))
+    return u.pk, claves, {"id": u.pk, "texto": f"{nombre} ({user.username})", "username": user.username}
+
+
+FUENTES = {
+    "nro_serie": (lambda: Productos.objects.only("id", "nro_serie", "sucursal_id"), _entrada_producto),
+    "modelos": (lambda: Modelos.objects.select_related("marca"), _entrada_modelo),
+    "proveedores": (lambda: Proveedores.objects.only("id", "nombre", "rut"), _entrada_proveedor),
+    "usuarios": (lambda: Usuarios.objects.select_related("user"), _entrada_usuario),
+}
+
+CAMPOS = tuple(FUENTES)
+
+
+def _nuevo_indice(campo):
+    return IndicePorSucursal() if campo == "nro_serie" else IndicePrefijos()
+
+
+_indices = {campo: _nuevo_indice(campo) for campo in CAMPOS}
+_carga_lock = threading.Lock()
+# campo -> cambios [(operación, args)] recibidos mientras se reconstruye en segundo plano
+_recargando = {}
+_cambios_lock = threading.Lock()
+
+
+def _ttl():
+    return getattr(settings, "AUTOCOMPLETADO_TTL", 300)
+
+
+def _cargar(campo, indice):
+    queryset, entrada = FUENTES[campo]
+    indice.cargar(entrada(obj) for obj in queryset().iterator(chunk_size=2000))
+
+
+def obtener_indice(campo):
+    """
+    Devuelve el índice del campo. La primera carga es síncrona (no hay nada
+    que servir); si venció el TTL se reconstruye en segundo plano y mientras
+    tanto se responde con el actual.
+    """
+    indice = _indices[campo]
+    if indice.cargado_en is None:
+        metricas.observar_cache("autocompletado", False)
+        with _carga_lock:
+            if indice.cargado_en is None:
+                _cargar(campo, indice)
+        return indice
+    vencido = time.monotonic() - indice.cargado_en > _ttl()
+    metricas.observar_cache("autocompletado", not vencido)
+    if vencido:
+        _recargar_en_segundo_plano(campo)
+    return indice
+
+
+def _recargar_en_segundo_plano(campo):
+    with _cambios_lock:
+        if campo in _recargando:
+            return
+        _recargando[campo] = []
+    threading.Thread(target=_recargar, args=(campo, _indices[campo]), daemon=True,
+                     name=f"autocompletado-{campo}").start()
+
+
+def _recargar(campo, anterior):
+    try:
+        nuevo = _nuevo_indice(campo)
+        _cargar(campo, nuevo)
+        with _cambios_lock:
+            # Si se reinició mientras tanto, el índice nuevo ya no corresponde
+            if _indices[campo] is anterior:
+                for operacion, args in _recargando[campo]:
+                    getattr(nuevo, operacion)(*args)
+                _indices[campo] = nuevo
+    except Exception:
+        # Se reintenta en la próxima búsqueda; mientras tanto sirve el anterior
+        logger.exception("No se pudo reconstruir el índice de autocompletado '%s'", campo)
+    finally:
+        with _cambios_lock:
+            _recargando.pop(campo, None)
+        connection.close()
+
+
+def _aplicar(campo, operacion, *args):
+    """Aplica un cambio al índice cargado (y lo anota si hay una reconstrucción en curso)"""
+    with _cambios_lock:
+        indice = _indices[campo]
+        if indice.cargado_en is None:
+            return
+        getattr(indice, operacion)(*args)
+        if campo in _recargando:
+            _recargando[campo].append((operacion, args))
+
+
+def actualizar(campo, obj):
+    """Indexa `obj` recién guardado (si el índice del campo está cargado)"""
+    _aplicar(campo, "upsert", *FUENTES[campo][1](obj))
+
+
+def sincronizar(campo, pks):
+    """Relee de la BD los objetos indicados y actualiza el índice (si está cargado)"""
+    if _indices[campo].cargado_en is None:
+        return
+    queryset, entrada = FUENTES[campo]
+    encontrados = set()
+    for obj in queryset().filter(pk__in=pks):
+        _aplicar(campo, "upsert", *entrada(obj))
+        encontrados.add(obj.pk)
+    for pk in set(pks) - encontrados:
+        _aplicar(campo, "eliminar", pk)
+
+
+def eliminar(campo, pk):
+    _aplicar(campo, "eliminar", pk)
+
+
+def buscar(q, campos=CAMPOS, limite=10, limites=None, marca=None, sucursales=None):
+    """
+    Top-k por campo. `limites` permite un límite distinto por campo;
+    `marca` restringe los modelos a una marca y `sucursales` (alcance del
+    usuario) los números de serie a esas sucursales.
+    """
+    limites = limites or {}
+    resultados = {}
+    for campo in campos:
+        indice = obtener_indice(campo)
+        if campo == "nro_serie":
+            resultados[campo] = indice.buscar(q, limites.get(campo, limite), sucursales=sucursales)
+            continue
+        filtro = None
+        if campo == "modelos" and marca:
+            filtro = lambda datos: str(datos["marca"]) == str(marca)
+        resultados[campo] = indice.buscar(q, limites.get(campo, limite), filtro)
+    return resultados
+
+
+def reiniciar():
+    """Descarta todos los índices (se recargan en la próxima consulta)"""
+    with _cambios_lock:
+        for campo in CAMPOS:
+            _indices[campo] = _nuevo_indice(campo)
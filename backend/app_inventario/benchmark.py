@@ -0,0 +1,394 @@
+# app_inventario/benchmark.py
+"""
+Banco de pruebas de rendimiento: endpoints clave, señales y comandos.
+
+- Cada escenario se ejecuta `repeticiones` veces (más un calentamiento) y se
+  reporta latencia (p50/p95/p99/máx), consultas SQL por ejecución y el pico
+  de memoria Python (tracemalloc, medido en una pasada aparte para no
+  distorsionar los tiempos).
+- Todo corre dentro de una transacción que se revierte al final: se puede
+  usar sobre una BD sembrada con `seed_inventory` sin ensuciarla.
+- El resultado es un dict serializable a JSON; `comparar` lo contrasta con
+  una corrida anterior (otro commit) y lista las regresiones.
+- `concurrencia_escritura` es aparte: varios hilos guardan productos a la vez
+  (con sus señales) mientras otros leen, y cuenta los "database is locked".
+  Esas escrituras sí se confirman (cada hilo usa su propia conexión).
+"""
+import io
+import os
+import platform
+import random
+import subprocess
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import timedelta
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import OperationalError, connection, connections, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from . import autocompletado
+from .autenticacion import agregar_claims
+from .models import Asignaciones, Estados, Notificaciones, Productos, Usuarios
+from .services import CacheDetalleProductoService
+
+VERSION = 1
+TIPOS = ("endpoint", "senal", "comando")
+
+# Diferencias de latencia menores a esto se consideran ruido
+RUIDO_MS = 2.0
+
+
+class BenchmarkError(Exception):
+    pass
+
+
+def _percentil(ordenados, p):
+    """Percentil por rango más cercano sobre una lista ya ordenada"""
+    if not ordenados:
+        return 0.0
+    indice = max(0, min(len(ordenados) - 1, round(p / 100 * len(ordenados) + 0.5) - 1))
+    return ordenados[indice]
+
+
+def medir(funcion, repeticiones=20, calentamiento=2):
+    """Ejecuta `funcion` y resume latencia, consultas y memoria"""
+    for _ in range(calentamiento):
+        funcion()
+
+    tiempos, consultas = [], []
+    for _ in range(repeticiones):
+        with CaptureQueriesContext(connection) as capturadas:
+            inicio = time.perf_counter()
+            funcion()
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+        consultas.append(len(capturadas))
+
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        funcion()
+        pico = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    tiempos.sort()
+    return {
+        "repeticiones": repeticiones,
+        "p50_ms": round(_percentil(tiempos, 50), 2),
+        "p95_ms": round(_percentil(tiempos, 95), 2),
+        "p99_ms": round(_percentil(tiempos, 99), 2),
+        "max_ms": round(tiempos[-1], 2),
+        "media_ms": round(sum(tiempos) / len(tiempos), 2),
+        "consultas": round(sum(consultas) / len(consultas), 1),
+        "consultas_max": max(consultas),
+        "memoria_kb": round(pico / 1024, 1),
+    }
+
+
+# ------------------------------------------------------------------
+# Escenarios
+# ------------------------------------------------------------------
+
+class Contexto:
+    """Usuario, cliente autenticado y datos de muestra para los escenarios"""
+
+    def __init__(self):
+        User = get_user_model()
+        self.user = User.objects.create_user(username=f"benchmark-{os.getpid()}", password=None, is_staff=True)
+        Usuarios.objects.create(user=self.user, rol="ADMIN")
+        token = str(agregar_claims(RefreshToken.for_user(self.user).access_token, self.user))
+        self.api = Client(HTTP_AUTHORIZATION=f"Bearer {token}")
+        self.web = Client()
+        self.web.force_login(self.user)
+
+        muestra = list(
+            Productos.objects.order_by("id").values_list("id", "nro_serie", "modelo__nombre")[:200]
+        )
+        if not muestra:
+            raise BenchmarkError("No hay productos: siembra la BD con `manage.py seed_inventory`")
+        self.productos = [pk for pk, _, _ in muestra]
+        self.serie = muestra[0][1]
+        self.modelo = muestra[0][2]
+        self.estados = list(Estados.objects.values_list("id", flat=True)[:2])
+        self.usuario_id = self.user.perfil_usuario.id
+        self._ciclo = 0
+
+    def siguiente_producto(self):
+        self._ciclo += 1
+        return self.productos[self._ciclo % len(self.productos)]
+
+    def get(self, cliente, url, **params):
+        response = cliente.get(url, params)
+        if response.status_code >= 400:
+            raise BenchmarkError(f"GET {url} -> {response.status_code}")
+        if getattr(response, "streaming", False):
+            b"".join(response.streaming_content)
+        return response
+
+
+def escenarios(ctx):
+    """[(nombre, tipo, funcion, repeticiones_relativas)]"""
+    api, web = ctx.api, ctx.web
+    hoy = timezone.localdate()
+    metricas_headers = {}
+    if getattr(settings, "METRICAS_TOKEN", ""):
+        metricas_headers["HTTP_AUTHORIZATION"] = f"Bearer {settings.METRICAS_TOKEN}"
+
+    def crear_producto():
+        ultimo = Productos.objects.order_by("-id").only("id", "proveedor", "modelo", "categoria", "estado").first()
+        Productos.objects.create(
+            nro_serie=f"BENCH-{time.perf_counter_ns()}", fecha_compra=hoy,
+            estado_id=ultimo.estado_id, proveedor_id=ultimo.proveedor_id,
+            modelo_id=ultimo.modelo_id, categoria_id=ultimo.categoria_id,
+        )
+
+    def cambiar_estado():
+        producto = Productos.objects.get(pk=ctx.siguiente_producto())
+        producto.estado_id = ctx.estados[-1] if producto.estado_id == ctx.estados[0] else ctx.estados[0]
+        producto.save()
+
+    def asignar():
+        Asignaciones.objects.create(producto_id=ctx.siguiente_producto(), usuario_id=ctx.usuario_id)
+
+    def comando(nombre, *args):
+        return lambda: call_command(nombre, *args, stdout=io.StringIO())
+
+    salida_etiquetas = os.path.join(tempfile.gettempdir(), f"benchmark-etiquetas-{os.getpid()}.pdf")
+    ids_etiquetas = ",".join(map(str, ctx.productos[:48]))
+
+    return [
+        ("productos_listado", "endpoint", lambda: ctx.get(api, reverse("productos-list")), 1),
+        ("productos_busqueda", "endpoint",
+         lambda: ctx.get(api, reverse("productos-list"), search=ctx.modelo.split()[0]), 1),
+        ("producto_detalle", "endpoint",
+         lambda: ctx.get(api, reverse("productos-detail", args=[ctx.siguiente_producto()])), 1),
+        ("producto_detalle_cache", "endpoint",
+         lambda: ctx.get(api, reverse("productos-detail", args=[ctx.productos[0]])), 1),
+        ("producto_timeline", "endpoint",
+         lambda: ctx.get(api, reverse("productos-timeline", args=[ctx.siguiente_producto()])), 1),
+        ("autocompletado", "endpoint",
+         lambda: ctx.get(api, reverse("autocomplete-list"), q=ctx.serie[:6]), 1),
+        ("garantias_calendario", "endpoint", lambda: ctx.get(api, reverse("garantias-calendario")), 1),
+        ("mantenciones_agenda", "endpoint", lambda: ctx.get(api, reverse("mantenciones-agenda")), 1),
+        ("movimientos_tendencia", "endpoint", lambda: ctx.get(
+            api, reverse("movimientos-tendencia"), periodo="mes",
+            desde=(hoy - timedelta(days=365)).isoformat(), hasta=hoy.isoformat(),
+        ), 1),
+        ("metricas", "endpoint", lambda: web.get(reverse("metricas"), **metricas_headers), 1),
+        ("dashboard", "endpoint", lambda: ctx.get(web, reverse("dashboard")), 1),
+        ("senal_producto_creado", "senal", crear_producto, 1),
+        ("senal_cambio_estado", "senal", cambiar_estado, 1),
+        ("senal_asignacion", "senal", asignar, 1),
+        # Los comandos recorren la flota completa: menos repeticiones
+        ("comando_check_garantias", "comando", comando("check_garantias"), 0.25),
+        ("comando_programar_mantenciones", "comando", comando("programar_mantenciones"), 0.25),
+        ("comando_generar_etiquetas", "comando",
+         comando("generar_etiquetas", salida_etiquetas, "--ids", ids_etiquetas, "--workers", "1"), 0.25),
+    ]
+
+
+# ------------------------------------------------------------------
+# Corrida y comparación
+# ------------------------------------------------------------------
+
+def commit_actual():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=settings.BASE_DIR, timeout=5, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def ejecutar(repeticiones=20, calentamiento=2, seleccion=None, progreso=None):
+    """
+    Corre los escenarios (todos, o los cuyo nombre o tipo esté en `seleccion`)
+    y retorna el reporte. `progreso(nombre, resultado)` se llama tras cada uno.
+    """
+    reporte = {
+        "version": VERSION,
+        "commit": commit_actual(),
+        "fecha": timezone.now().isoformat(timespec="seconds"),
+        "bd": connection.vendor,
+        "python": platform.python_version(),
+        "django": django.get_version(),
+        "repeticiones": repeticiones,
+        "escenarios": {},
+    }
+
+    # El cliente de pruebas usa el host "testserver"
+    with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]), transaction.atomic():
+        reporte["productos"] = Productos.objects.count()
+        ctx = Contexto()
+        for nombre, tipo, funcion, factor in escenarios(ctx):
+            if seleccion and nombre not in seleccion and tipo not in seleccion:
+                continue
+            resultado = medir(funcion, max(1, round(repeticiones * factor)), calentamiento if factor >= 1 else 1)
+            resultado["tipo"] = tipo
+            reporte["escenarios"][nombre] = resultado
+            if progreso:
+                progreso(nombre, resultado)
+        transaction.set_rollback(True)
+
+    # Los índices en memoria y la cache pudieron ver datos que ya no existen
+    autocompletado.reiniciar()
+    CacheDetalleProductoService.invalidar_todo()
+    return reporte
+
+
+def comparar(actual, anterior, umbral=0.2):
+    """
+    Regresiones de `actual` frente a `anterior` (reportes de `ejecutar`):
+    p95 o memoria más de `umbral` (relativo) por sobre la corrida anterior,
+    o más consultas SQL (son deterministas, cualquier aumento cuenta).
+    """
+    regresiones = []
+    for nombre, nuevo in actual["escenarios"].items():
+        viejo = anterior.get("escenarios", {}).get(nombre)
+        if not viejo:
+            continue
+        if nuevo["p95_ms"] > viejo["p95_ms"] * (1 + umbral) and nuevo["p95_ms"] - viejo["p95_ms"] > RUIDO_MS:
+            regresiones.append(f"{nombre}: p95 {viejo['p95_ms']}ms -> {nuevo['p95_ms']}ms")
+        if nuevo["consultas"] > viejo["consultas"]:
+            regresiones.append(f"{nombre}: consultas {viejo['consultas']} -> {nuevo['consultas']}")
+        if nuevo["memoria_kb"] > viejo["memoria_kb"] * (1 + umbral) and nuevo["memoria_kb"] - viejo["memoria_kb"] > 64:
+            regresiones.append(f"{nombre}: memoria {viejo['memoria_kb']}KB -> {nuevo['memoria_kb']}KB")
+    return regresiones
+
+
+# ------------------------------------------------------------------
+# Concurrencia de escritura
+# ------------------------------------------------------------------
+
+def configuracion_bd():
+    """Parámetros de la conexión que influyen en la concurrencia"""
+    datos = {
+        "bd": connection.vendor,
+        "conn_max_age": connection.settings_dict.get("CONN_MAX_AGE"),
+        "pool": bool(connection.settings_dict.get("OPTIONS", {}).get("pool")),
+    }
+    if connection.vendor == "sqlite":
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA journal_mode")
+            datos["journal_mode"] = cursor.fetchone()[0]
+        datos["transaction_mode"] = getattr(connection, "transaction_mode", None) or "DEFERRED"
+    return datos
+
+
+def _resumen_latencias(tiempos):
+    tiempos = sorted(tiempos)
+    return {
+        "p50_ms": round(_percentil(tiempos, 50), 2),
+        "p95_ms": round(_percentil(tiempos, 95), 2),
+        "p99_ms": round(_percentil(tiempos, 99), 2),
+        "max_ms": round(tiempos[-1], 2) if tiempos else 0.0,
+    }
+
+
+def concurrencia_escritura(hilos=8, operaciones=50, lectores=2, prefijo="SEED", semilla=42):
+    """
+    `hilos` técnicos guardan `operaciones` productos cada uno (cambio de
+    estado: pre_save, notificación, gauges, índices) al mismo tiempo que
+    `lectores` hilos consultan como lo hace el polling del frontend.
+    Sólo toca productos cuyo número de serie empieza con `prefijo`.
+    """
+    ids = list(
+        Productos.objects.filter(nro_serie__startswith=f"{prefijo}-").order_by("id").values_list("id", flat=True)[:5000]
+    )
+    estados = list(Estados.objects.order_by("id").values_list("id", flat=True)[:2])
+    if not ids or len(estados) < 2:
+        raise BenchmarkError(
+            f"No hay productos '{prefijo}-*' o faltan estados: siembra la BD con `manage.py seed_inventory`"
+        )
+
+    barrera = threading.Barrier(hilos + lectores)
+    fin_escrituras = threading.Event()
+    lock = threading.Lock()
+    escrituras, lecturas = [], []
+    errores = {"bloqueos": 0, "otros": 0}
+    detalle_errores = []
+
+    def escritor(n):
+        rng = random.Random(semilla + n)
+        tiempos = []
+        try:
+            barrera.wait()
+            for _ in range(operaciones):
+                inicio = time.perf_counter()
+                try:
+                    with transaction.atomic():
+                        producto = Productos.objects.get(pk=rng.choice(ids))
+                        producto.estado_id = estados[1] if producto.estado_id == estados[0] else estados[0]
+                        producto.save()
+                    tiempos.append((time.perf_counter() - inicio) * 1000)
+                except OperationalError as e:
+                    with lock:
+                        errores["bloqueos" if "locked" in str(e) else "otros"] += 1
+                        if len(detalle_errores) < 5:
+                            detalle_errores.append(str(e))
+        finally:
+            with lock:
+                escrituras.extend(tiempos)
+            connections.close_all()
+
+    def lector(n):
+        tiempos = []
+        try:
+            barrera.wait()
+            while not fin_escrituras.is_set():
+                inicio = time.perf_counter()
+                try:
+                    Notificaciones.objects.filter(leido=False).count()
+                    list(Productos.objects.order_by("-id").values_list("id", "estado_id")[:50])
+                    tiempos.append((time.perf_counter() - inicio) * 1000)
+                except OperationalError as e:
+                    with lock:
+                        errores["bloqueos" if "locked" in str(e) else "otros"] += 1
+                time.sleep(0.005)
+        finally:
+            with lock:
+                lecturas.extend(tiempos)
+            connections.close_all()
+
+    escritores = [threading.Thread(target=escritor, args=(i,)) for i in range(hilos)]
+    hilos_lectores = [threading.Thread(target=lector, args=(i,)) for i in range(lectores)]
+    inicio = time.perf_counter()
+    for t in escritores + hilos_lectores:
+        t.start()
+    for t in escritores:
+        t.join()
+    duracion = time.perf_counter() - inicio
+    fin_escrituras.set()
+    for t in hilos_lectores:
+        t.join()
+
+    total = hilos * operaciones
+    return {
+        "version": VERSION,
+        "commit": commit_actual(),
+        "fecha": timezone.now().isoformat(timespec="seconds"),
+        "configuracion": configuracion_bd(),
+        "hilos": hilos,
+        "lectores": lectores,
+        "operaciones": total,
+        "exitosas": len(escrituras),
+        "bloqueos": errores["bloqueos"],
+        "otros_errores": errores["otros"],
+        "ejemplos_error": detalle_errores,
+        "duracion_s": round(duracion, 2),
+        "escrituras_por_segundo": round(len(escrituras) / duracion, 1) if duracion else 0.0,
+        "escritura": _resumen_latencias(escrituras),
+        "lecturas": len(lecturas),
+        "lectura": _resumen_latencias(lecturas),
+    }
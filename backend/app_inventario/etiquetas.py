@@ -0,0 +1,244 @@
+# app_inventario/etiquetas.py
+"""
+Hojas de etiquetas QR imprimibles (A4, PDF o SVG).
+
+- Cada página se renderiza por separado en un pool de procesos; el documento
+  se emite página a página a medida que terminan, sin armarlo en memoria.
+- Este módulo no importa modelos: los workers sólo reciben
+  [(contenido_qr, nro_serie, descripcion), ...] ya resueltos por EtiquetasService.
+- Las etiquetas pueden llegar como generador (leído por lotes desde la BD);
+  sólo se necesita el total por adelantado para declarar las páginas.
+- El PDF se escribe a mano (una imagen 1-bit comprimida por página) porque
+  el formato permite dejar la tabla de referencias al final y así transmitirlo.
+"""
+import os
+import zlib
+from collections import deque
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor
+from xml.sax.saxutils import escape
+
+import qrcode
+from PIL import Image, ImageDraw, ImageFont
+
+# Medidas en mm
+PAGINA_ANCHO, PAGINA_ALTO = 210, 297
+MARGEN = 10
+COLUMNAS, FILAS = 3, 8
+ETIQUETAS_POR_PAGINA = COLUMNAS * FILAS
+CELDA_ANCHO = (PAGINA_ANCHO - 2 * MARGEN) / COLUMNAS
+CELDA_ALTO = (PAGINA_ALTO - 2 * MARGEN) / FILAS
+QR_LADO = CELDA_ALTO - 4
+DPI = 200
+
+FORMATOS = {"pdf": "application/pdf", "svg": "image/svg+xml"}
+
+_PT_POR_MM = 72 / 25.4
+_PX_POR_MM = DPI / 25.4
+
+
+def _matriz(contenido):
+    # Máscara fija: evaluar las 8 máscaras es ~90% del costo de generar un QR
+    # y cualquier máscara produce un código válido
+    qr = qrcode.QRCode(border=0, error_correction=qrcode.constants.ERROR_CORRECT_M, mask_pattern=0)
+    qr.add_data(contenido)
+    qr.make(fit=True)
+    return qr.get_matrix()
+
+
+def _posiciones(etiquetas):
+    """(x, y, etiqueta) de cada celda, en mm desde la esquina superior izquierda"""
+    for i, etiqueta in enumerate(etiquetas):
+        fila, columna = divmod(i, COLUMNAS)
+        yield MARGEN + columna * CELDA_ANCHO, MARGEN + fila * CELDA_ALTO, etiqueta
+
+
+def _fuente(tamano_mm):
+    try:
+        return ImageFont.load_default(size=max(8, int(tamano_mm * _PX_POR_MM)))
+    except TypeError:  # Pillow sin FreeType
+        return ImageFont.load_default()
+
+
+def renderizar_pagina_pdf(etiquetas):
+    """Página rasterizada 1-bit -> (ancho_px, alto_px, bytes comprimidos)"""
+    ancho = round(PAGINA_ANCHO * _PX_POR_MM)
+    alto = round(PAGINA_ALTO * _PX_POR_MM)
+    pagina = Image.new("1", (ancho, alto), 1)
+    dibujo = ImageDraw.Draw(pagina)
+    fuente_serie, fuente_detalle = _fuente(3.2), _fuente(2.4)
+
+    for x, y, (contenido, serie, detalle) in _posiciones(etiquetas):
+        matriz = _matriz(contenido)
+        lado = len(matriz)
+        modulo = max(1, int(QR_LADO * _PX_POR_MM) // lado)
+        # Un píxel por módulo y luego escalado sin interpolación
+        bits = bytes(0 if oscuro else 255 for valores in matriz for oscuro in valores)
+        qr = Image.frombytes("L", (lado, lado), bits).resize(
+            (lado * modulo, lado * modulo), Image.NEAREST
+        )
+        pagina.paste(qr.convert("1"), (int((x + 2) * _PX_POR_MM), int((y + 2) * _PX_POR_MM)))
+
+        tx = int((x + QR_LADO + 4) * _PX_POR_MM)
+        dibujo.text((tx, int((y + CELDA_ALTO / 2 - 4) * _PX_POR_MM)), serie, font=fuente_serie, fill=0)
+        if detalle:
+            dibujo.text((tx, int((y + CELDA_ALTO / 2 + 1) * _PX_POR_MM)), detalle, font=fuente_detalle, fill=0)
+
+    return ancho, alto, zlib.compress(pagina.tobytes(), 6)
+
+
+def renderizar_pagina_svg(etiquetas):
+    """Fragmento SVG vectorial de una página (coordenadas en mm, sin desplazar)"""
+    partes = []
+    for x, y, (contenido, serie, detalle) in _posiciones(etiquetas):
+        matriz = _matriz(contenido)
+        modulo = QR_LADO / len(matriz)
+        ox, oy = x + 2, y + 2
+        trazos = []
+        for fila, valores in enumerate(matriz):
+            columna = 0
+            while columna < len(valores):
+                if not valores[columna]:
+                    columna += 1
+                    continue
+                inicio = columna
+                while columna < len(valores) and valores[columna]:
+                    columna += 1
+                trazos.append(
+                    f"M{ox + inicio * modulo:.2f},{oy + fila * modulo:.2f}"
+                    f"h{(columna - inicio) * modulo:.2f}v{modulo:.2f}h-{(columna - inicio) * modulo:.2f}z"
+                )
+        partes.append(f'<path d="{"".join(trazos)}"/>')
+        tx = x + QR_LADO + 4
+        partes.append(
+            f'<text x="{tx:.2f}" y="{y + CELDA_ALTO / 2:.2f}" font-size="3.2" '
+            f'font-weight="bold">{escape(serie)}</text>'
+        )
+        if detalle:
+            partes.append(
+                f'<text x="{tx:.2f}" y="{y + CELDA_ALTO / 2 + 4:.2f}" font-size="2.4">{escape(detalle)}</text>'
+            )
+    return "".join(partes)
+
+
+def _total_paginas(total):
+    return max(1, -(-total // ETIQUETAS_POR_PAGINA))
+
+
+def _paginas(etiquetas, total):
+    """
+    Exactamente `_total_paginas(total)` páginas: se ignoran etiquetas de más y,
+    si llegan menos (filas borradas mientras se leía), se completa con páginas
+    vacías para que el documento coincida con lo ya declarado.
+    """
+    iterador = iter(etiquetas)
+    for _ in range(_total_paginas(total)):
+        yield list(islice(iterador, ETIQUETAS_POR_PAGINA))
+
+
+def _renderizar(funcion, paginas, workers):
+    """
+    Resultados de `funcion` por página, en orden. Con workers > 1 se usa un
+    pool de procesos con una ventana acotada de páginas en vuelo.
+    """
+    if workers <= 1:
+        for pagina in paginas:
+            yield funcion(pagina)
+        return
+
+    pool = ProcessPoolExecutor(max_workers=workers)
+    try:
+        pendientes = deque()
+        for pagina in paginas:
+            pendientes.append(pool.submit(funcion, pagina))
+            if len(pendientes) >= workers * 2:
+                yield pendientes.popleft().result()
+        while pendientes:
+            yield pendientes.popleft().result()
+    finally:
+        # Si el cliente corta la descarga no se siguen renderizando páginas
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def generar_pdf(etiquetas, workers=1, total=None):
+    """Genera el PDF como secuencia de bloques de bytes"""
+    if total is None:
+        total = len(etiquetas)
+    paginas = _paginas(etiquetas, total)
+    total = _total_paginas(total)
+    # Objetos: 1 catálogo, 2 árbol de páginas, luego (página, contenido, imagen) por hoja
+    kids = " ".join(f"{3 + 3 * i} 0 R" for i in range(total))
+    offsets = []
+    escritos = 0
+
+    def objeto(numero, cuerpo):
+        nonlocal escritos
+        offsets.append(escritos)
+        bloque = f"{numero} 0 obj\n".encode() + cuerpo + b"\nendobj\n"
+        escritos += len(bloque)
+        return bloque
+
+    cabecera = b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n"
+    escritos = len(cabecera)
+    yield cabecera
+    yield objeto(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+    yield objeto(2, f"<< /Type /Pages /Kids [{kids}] /Count {total} >>".encode())
+
+    ancho_pt = PAGINA_ANCHO * _PT_POR_MM
+    alto_pt = PAGINA_ALTO * _PT_POR_MM
+    resultados = _renderizar(renderizar_pagina_pdf, paginas, workers)
+    for i, (ancho, alto, datos) in enumerate(resultados):
+        n = 3 + 3 * i
+        contenido = f"q {ancho_pt:.2f} 0 0 {alto_pt:.2f} 0 0 cm /Im0 Do Q".encode()
+        yield objeto(n, (
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {ancho_pt:.2f} {alto_pt:.2f}] "
+            f"/Resources << /XObject << /Im0 {n + 2} 0 R >> >> /Contents {n + 1} 0 R >>"
+        ).encode())
+        yield objeto(n + 1, f"<< /Length {len(contenido)} >>\nstream\n".encode() + contenido + b"\nendstream")
+        yield objeto(n + 2, (
+            f"<< /Type /XObject /Subtype /Image /Width {ancho} /Height {alto} "
+            f"/ColorSpace /DeviceGray /BitsPerComponent 1 /Filter /FlateDecode "
+            f"/Length {len(datos)} >>\nstream\n"
+        ).encode() + datos + b"\nendstream")
+
+    xref = [f"xref\n0 {len(offsets) + 1}\n", "0000000000 65535 f \n"]
+    xref += [f"{o:010d} 00000 n \n" for o in offsets]
+    xref.append(f"trailer\n<< /Size {len(offsets) + 1} /Root 1 0 R >>\nstartxref\n{escritos}\n%%EOF\n")
+    yield "".join(xref).encode()
+
+
+def generar_svg(etiquetas, workers=1, total=None):
+    """Un único SVG con las páginas apiladas verticalmente (separadas por una línea de corte)"""
+    if total is None:
+        total = len(etiquetas)
+    paginas = _paginas(etiquetas, total)
+    total = _total_paginas(total)
+    alto = PAGINA_ALTO * total
+    yield (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{PAGINA_ANCHO}mm" height="{alto}mm" '
+        f'viewBox="0 0 {PAGINA_ANCHO} {alto}" font-family="sans-serif">'
+        f'<rect width="{PAGINA_ANCHO}" height="{alto}" fill="#fff"/>'
+    ).encode()
+    resultados = _renderizar(renderizar_pagina_svg, paginas, workers)
+    for i, fragmento in enumerate(resultados):
+        if i:
+            yield f'<line x1="0" y1="{PAGINA_ALTO * i}" x2="{PAGINA_ANCHO}" y2="{PAGINA_ALTO * i}" stroke="#ccc" stroke-width="0.2"/>'.encode()
+        yield f'<g transform="translate(0 {PAGINA_ALTO * i})">{fragmento}</g>'.encode()
+    yield b"</svg>"
+
+
+def generar(etiquetas, formato="pdf", workers=None, total=None):
+    """
+    Bloques de bytes del documento; `workers` por defecto = núcleos disponibles.
+    `total` es obligatorio si `etiquetas` es un generador.
+    """
+    if total is None:
+        total = len(etiquetas)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    # Para pocas páginas no compensa levantar procesos
+    if total <= ETIQUETAS_POR_PAGINA:
+        workers = 1
+    if formato == "svg":
+        return generar_svg(etiquetas, workers, total)
+    return generar_pdf(etiquetas, workers, total)
@@ -0,0 +1,29 @@
+# app_inventario/filters.py
+from rest_framework.filters import OrderingFilter, SearchFilter
+
+from .services import BusquedaProductosService
+
+
+class BusquedaProductosFilter(SearchFilter):
+    """
+    Igual que SearchFilter (?search=...), pero usa el índice de búsqueda
+    de productos (FTS5 / trigram) y anota `relevancia` en cada resultado.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        termino = request.query_params.get(self.search_param, "")
+        return BusquedaProductosService.buscar(queryset, termino)
+
+
+class RelevanciaOrderingFilter(OrderingFilter):
+    """
+    Si hay búsqueda y no se pidió un orden explícito, ordena por relevancia
+    antes que por el `ordering` por defecto de la vista.
+    """
+
+    def get_default_ordering(self, view):
+        ordering = super().get_default_ordering(view) or []
+        request = getattr(view, "request", None)
+        if request is not None and request.query_params.get("search", "").strip():
+            return ["-relevancia", *ordering]
+        return ordering
@@ -0,0 +1,100 @@
+# app_inventario/lotes.py
+"""
+Recorrido de tablas grandes con memoria acotada (comandos nocturnos y exportaciones).
+
+`queryset.iterator()` o recorrer un queryset completo hacen crecer la memoria
+con el tamaño de la flota (el segundo guarda todas las instancias en la cache
+del queryset). `por_lotes` pagina por clave:
+
+    WHERE id > <último id del lote anterior> ORDER BY id LIMIT n
+
+Cada lote es una consulta independiente que usa el índice de la PK (no hay
+OFFSET que se degrade al avanzar) y que no mantiene un cursor abierto, así
+que se puede escribir sobre la misma tabla mientras se recorre. Con `campos`
+se cargan sólo esas columnas (`.only()`).
+"""
+from argparse import ArgumentTypeError
+from itertools import islice
+
+from django.db.models.query import (
+    FlatValuesListIterable, ModelIterable, NamedValuesListIterable, ValuesIterable, ValuesListIterable,
+)
+
+TAMANO_LOTE = 2000
+
+
+def _clave(queryset):
+    """Función que obtiene la PK de una fila del queryset (instancia, dict o tupla)"""
+    iterable = queryset._iterable_class
+    pk = queryset.model._meta.pk
+    nombres = {"pk", pk.name, pk.attname}
+
+    if issubclass(iterable, ModelIterable):
+        return lambda fila: fila.pk
+    campos = queryset._fields or ()
+    if issubclass(iterable, ValuesIterable):
+        nombre = next((c for c in campos if c in nombres), None) if campos else pk.attname
+        if nombre is None:
+            raise ValueError("values() debe incluir la PK para recorrer por lotes")
+        return lambda fila: fila[nombre]
+    if issubclass(iterable, (ValuesListIterable, NamedValuesListIterable, FlatValuesListIterable)):
+        if campos and campos[0] not in nombres:
+            raise ValueError("values_list() debe tener la PK como primera columna para recorrer por lotes")
+        if issubclass(iterable, FlatValuesListIterable):
+            return lambda fila: fila
+        return lambda fila: fila[0]
+    raise ValueError(f"No se puede recorrer por lotes un queryset de tipo {iterable.__name__}")
+
+
+def por_lotes(queryset, tamano=TAMANO_LOTE, campos=None):
+    """
+    Listas de a lo más `tamano` filas, en orden de PK. El orden original del
+    queryset se descarta (la paginación por clave necesita ordenar por PK).
+    """
+    if tamano < 1:
+        raise ValueError("El tamaño de lote debe ser mayor que 0")
+    if campos:
+        queryset = queryset.only(*campos)
+    queryset = queryset.order_by("pk")
+    clave = _clave(queryset)
+
+    ultimo = None
+    while True:
+        pagina = queryset if ultimo is None else queryset.filter(pk__gt=ultimo)
+        lote = list(pagina[:tamano])
+        if not lote:
+            return
+        yield lote
+        if len(lote) < tamano:
+            return
+        ultimo = clave(lote[-1])
+
+
+def iterar(queryset, tamano=TAMANO_LOTE, campos=None):
+    """Como `por_lotes`, pero fila a fila"""
+    for lote in por_lotes(queryset, tamano, campos):
+        yield from lote
+
+
+def agrupar(iterable, tamano=TAMANO_LOTE):
+    """Agrupa cualquier iterable en listas de `tamano` (p. ej. para bulk_create)"""
+    iterador = iter(iterable)
+    while lote := list(islice(iterador, tamano)):
+        yield lote
+
+
+def agregar_argumento(parser):
+    """Opción --chunk-size común a los comandos que recorren tablas grandes"""
+    def tamano(valor):
+        try:
+            valor = int(valor)
+        except ValueError:
+            valor = 0
+        if valor < 1:
+            raise ArgumentTypeError("debe ser un entero mayor que 0")
+        return valor
+
+    parser.add_argument(
+        "--chunk-size", type=tamano, default=TAMANO_LOTE,
+        help=f"Filas leídas por consulta; acota la memoria (default: {TAMANO_LOTE})",
+    )
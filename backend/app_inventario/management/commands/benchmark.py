@@ -0,0 +1,83 @@
+# app_inventario/management/commands/benchmark.py
+import json
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from app_inventario import benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide latencia (p50/p95/p99), consultas SQL y memoria de endpoints, señales y "
+        "comandos clave, y guarda el resultado en JSON para comparar entre commits."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeticiones", type=int, default=20, help="Ejecuciones por escenario (default: 20)")
+        parser.add_argument("--calentamiento", type=int, default=2, help="Ejecuciones descartadas (default: 2)")
+        parser.add_argument("--escenarios",
+                            help=f"Nombres o tipos ({', '.join(benchmark.TIPOS)}) separados por coma (default: todos)")
+        parser.add_argument("--salida", help="Archivo JSON (default: benchmarks/<fecha>-<commit>.json)")
+        parser.add_argument("--comparar", help="JSON de una corrida anterior contra el cual comparar")
+        parser.add_argument("--umbral", type=float, default=0.2,
+                            help="Aumento relativo de p95/memoria considerado regresión (default: 0.2)")
+        parser.add_argument("--estricto", action="store_true",
+                            help="Termina con error si hay regresiones (para CI)")
+
+    def handle(self, *args, **options):
+        if options["repeticiones"] < 1:
+            raise CommandError("--repeticiones debe ser mayor que 0")
+
+        anterior = None
+        if options["comparar"]:
+            try:
+                with open(options["comparar"], encoding="utf-8") as f:
+                    anterior = json.load(f)
+            except (OSError, ValueError) as e:
+                raise CommandError(f"No se pudo leer {options['comparar']}: {e}")
+
+        seleccion = {s.strip() for s in (options["escenarios"] or "").split(",") if s.strip()} or None
+
+        def progreso(nombre, r):
+            self.stdout.write(
+                f"  {nombre:<32} p50 {r['p50_ms']:>9.2f}ms  p95 {r['p95_ms']:>9.2f}ms  "
+                f"p99 {r['p99_ms']:>9.2f}ms  consultas {r['consultas']:>6}  mem {r['memoria_kb']:>9.1f}KB"
+            )
+
+        try:
+            reporte = benchmark.ejecutar(
+                options["repeticiones"], options["calentamiento"], seleccion, progreso
+            )
+        except benchmark.BenchmarkError as e:
+            raise CommandError(str(e))
+        if not reporte["escenarios"]:
+            raise CommandError("Ningún escenario coincide con --escenarios")
+
+        salida = options["salida"] or os.path.join(
+            settings.BASE_DIR, "benchmarks",
+            f"{timezone.localtime():%Y%m%d-%H%M%S}-{reporte['commit'] or 'sin-commit'}.json",
+        )
+        os.makedirs(os.path.dirname(os.path.abspath(salida)), exist_ok=True)
+        with open(salida, "w", encoding="utf-8") as f:
+            json.dump(reporte, f, indent=2, ensure_ascii=False)
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(reporte['escenarios'])} escenarios sobre {reporte['productos']} productos → {salida}"
+        ))
+
+        if anterior is None:
+            return
+        if anterior.get("productos") != reporte["productos"]:
+            self.stdout.write(self.style.WARNING(
+                f"La corrida anterior usó {anterior.get('productos')} productos; la comparación es aproximada"
+            ))
+        regresiones = benchmark.comparar(reporte, anterior, options["umbral"])
+        if not regresiones:
+            self.stdout.write(self.style.SUCCESS(f"Sin regresiones frente a {anterior.get('commit')}"))
+            return
+        for regresion in regresiones:
+            self.stdout.write(self.style.ERROR(f"  REGRESIÓN {regresion}"))
+        if options["estricto"]:
+            raise CommandError(f"{len(regresiones)} regresión(es) frente a {anterior.get('commit')}")
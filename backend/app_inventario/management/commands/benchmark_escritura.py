@@ -0,0 +1,61 @@
+# app_inventario/management/commands/benchmark_escritura.py
+import json
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from app_inventario import benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide escrituras concurrentes (varios técnicos guardando productos a la vez mientras "
+        "otros consultan) y cuenta los 'database is locked'. Modifica el estado de los "
+        "productos sembrados con seed_inventory; no usar sobre datos reales."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--hilos", type=int, default=8, help="Escritores simultáneos (default: 8)")
+        parser.add_argument("--operaciones", type=int, default=50, help="Guardados por escritor (default: 50)")
+        parser.add_argument("--lectores", type=int, default=2, help="Hilos de lectura tipo polling (default: 2)")
+        parser.add_argument("--prefijo", default="SEED", help="Prefijo de los productos a modificar (default: SEED)")
+        parser.add_argument("--salida", help="Archivo JSON con el resultado")
+        parser.add_argument("--comparar", help="JSON de una corrida anterior (p. ej. con SQLITE_OPTIMIZADO=0)")
+
+    def handle(self, *args, **options):
+        if options["hilos"] < 1 or options["operaciones"] < 1 or options["lectores"] < 0:
+            raise CommandError("--hilos y --operaciones deben ser mayores que 0")
+
+        try:
+            r = benchmark.concurrencia_escritura(
+                options["hilos"], options["operaciones"], options["lectores"], options["prefijo"]
+            )
+        except benchmark.BenchmarkError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(f"Configuración: {r['configuracion']}")
+        self._mostrar("actual", r)
+        if options["comparar"]:
+            try:
+                with open(options["comparar"], encoding="utf-8") as f:
+                    self._mostrar(f"anterior ({options['comparar']})", json.load(f))
+            except (OSError, ValueError) as e:
+                raise CommandError(f"No se pudo leer {options['comparar']}: {e}")
+
+        if options["salida"]:
+            os.makedirs(os.path.dirname(os.path.abspath(options["salida"])), exist_ok=True)
+            with open(options["salida"], "w", encoding="utf-8") as f:
+                json.dump(r, f, indent=2, ensure_ascii=False)
+            self.stdout.write(self.style.SUCCESS(f"Resultado → {options['salida']}"))
+
+        if r["bloqueos"]:
+            self.stdout.write(self.style.WARNING(f"Ejemplo de error: {r['ejemplos_error'][0]}"))
+
+    def _mostrar(self, titulo, r):
+        estilo = self.style.ERROR if r["bloqueos"] else self.style.SUCCESS
+        self.stdout.write(estilo(
+            f"  {titulo:<12} {r['exitosas']}/{r['operaciones']} guardados, {r['bloqueos']} bloqueos, "
+            f"{r['escrituras_por_segundo']} escrituras/s | escritura p50 {r['escritura']['p50_ms']}ms "
+            f"p95 {r['escritura']['p95_ms']}ms p99 {r['escritura']['p99_ms']}ms | "
+            f"{r['lecturas']} lecturas, p95 {r['lectura']['p95_ms']}ms"
+        ))
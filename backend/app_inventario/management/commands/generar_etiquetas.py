@@ -0,0 +1,52 @@
+# app_inventario/management/commands/generar_etiquetas.py
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from app_inventario import etiquetas, lotes
+from app_inventario.services import EtiquetasService
+
+
+class Command(BaseCommand):
+    help = "Genera una hoja imprimible de etiquetas QR (PDF o SVG) para un lote de productos."
+
+    def add_arguments(self, parser):
+        parser.add_argument("salida", help="Archivo de salida (ej: etiquetas.pdf)")
+        parser.add_argument("--formato", choices=list(etiquetas.FORMATOS),
+                            help="pdf o svg (default: según la extensión de la salida)")
+        parser.add_argument("--sucursal", type=int, help="ID de sucursal")
+        parser.add_argument("--categoria", type=int, help="ID de categoría")
+        parser.add_argument("--desde", help="Fecha de compra inicial YYYY-MM-DD")
+        parser.add_argument("--hasta", help="Fecha de compra final YYYY-MM-DD")
+        parser.add_argument("--ids", help="IDs de producto separados por coma")
+        parser.add_argument("--workers", type=int, default=settings.ETIQUETAS_WORKERS,
+                            help="Procesos de renderizado (default: ETIQUETAS_WORKERS)")
+        lotes.agregar_argumento(parser)
+
+    def handle(self, *args, **options):
+        salida = options["salida"]
+        formato = options["formato"] or ("svg" if salida.lower().endswith(".svg") else "pdf")
+        try:
+            queryset = EtiquetasService.filtrar(
+                sucursal=options["sucursal"], categoria=options["categoria"],
+                desde=options["desde"], hasta=options["hasta"], ids=options["ids"],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        total = queryset.count()
+        if not total:
+            raise CommandError("No hay productos que coincidan con los filtros")
+
+        inicio = time.perf_counter()
+        lista = EtiquetasService.etiquetas(queryset, options["chunk_size"])
+        with open(salida, "wb") as f:
+            for bloque in etiquetas.generar(lista, formato, options["workers"], total):
+                f.write(bloque)
+
+        paginas = -(-total // etiquetas.ETIQUETAS_POR_PAGINA)
+        self.stdout.write(self.style.SUCCESS(
+            f"{total} etiquetas en {paginas} página(s) → {salida} "
+            f"({time.perf_counter() - inicio:.1f}s)"
+        ))
@@ -0,0 +1,23 @@
+# app_inventario/management/commands/programar_mantenciones.py
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from app_inventario import lotes
+from app_inventario.services import PlanMantencionService
+
+
+class Command(BaseCommand):
+    help = "Materializa las mantenciones preventivas de los planes activos en una ventana móvil."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dias", type=int, default=settings.MANTENCIONES_VENTANA_DIAS,
+            help="Días hacia adelante a programar (default: MANTENCIONES_VENTANA_DIAS)",
+        )
+        lotes.agregar_argumento(parser)
+
+    def handle(self, *args, **options):
+        creadas = PlanMantencionService.programar(dias=options["dias"], tamano=options["chunk_size"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Mantenciones programadas: {creadas} (ventana de {options['dias']} días)"
+        ))
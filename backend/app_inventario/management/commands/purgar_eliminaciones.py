@@ -0,0 +1,19 @@
+# app_inventario/management/commands/purgar_eliminaciones.py
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from app_inventario.services import SincronizacionService
+
+
+class Command(BaseCommand):
+    help = (
+        "Borra los registros de eliminaciones (tombstones) más antiguos que "
+        "SINCRONIZACION_RETENCION_DIAS. Pensado para ejecutarse a diario."
+    )
+
+    def handle(self, *args, **options):
+        borrados = SincronizacionService.purgar()
+        self.stdout.write(self.style.SUCCESS(
+            f"Eliminaciones purgadas: {borrados} "
+            f"(retención: {settings.SINCRONIZACION_RETENCION_DIAS} días)"
+        ))
@@ -0,0 +1,47 @@
+# app_inventario/management/commands/rebuild_rollups.py
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max, Min
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from app_inventario import lotes
+from app_inventario.models import Movimientos
+from app_inventario.services import RollupMovimientosService
+
+
+class Command(BaseCommand):
+    help = "Regenera los totales diarios y mensuales de movimientos en una ventana de fechas."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--desde", help="Fecha inicial YYYY-MM-DD (default: primer movimiento)")
+        parser.add_argument("--hasta", help="Fecha final YYYY-MM-DD (default: último movimiento)")
+        lotes.agregar_argumento(parser)
+
+    def handle(self, *args, **options):
+        rango = Movimientos.objects.aggregate(min=Min("fecha"), max=Max("fecha"))
+        if rango["min"] is None and not (options["desde"] and options["hasta"]):
+            self.stdout.write("No hay movimientos registrados.")
+            return
+
+        desde = self._fecha(options["desde"], "desde") or timezone.localdate(rango["min"])
+        hasta = self._fecha(options["hasta"], "hasta") or timezone.localdate(rango["max"])
+        if desde > hasta:
+            raise CommandError("--desde no puede ser posterior a --hasta")
+
+        diarios, mensuales = RollupMovimientosService.reconstruir(desde, hasta, options["chunk_size"])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Rollups regenerados ({desde} → {hasta}). "
+            f"Filas diarias: {diarios}, mensuales: {mensuales}"
+        ))
+
+    def _fecha(self, valor, nombre):
+        if not valor:
+            return None
+        try:
+            fecha = parse_date(valor)
+        except ValueError:  # bien formada pero inexistente (2025-02-30)
+            fecha = None
+        if fecha is None:
+            raise CommandError(f"--{nombre} debe tener formato YYYY-MM-DD")
+        return fecha
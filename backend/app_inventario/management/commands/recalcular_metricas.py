@@ -0,0 +1,16 @@
+# app_inventario/management/commands/recalcular_metricas.py
+from django.core.management.base import BaseCommand
+
+from app_inventario import metricas
+
+
+class Command(BaseCommand):
+    help = "Reconcilia los gauges de /metrics con un conteo real de la base de datos."
+
+    def handle(self, *args, **options):
+        conteos = metricas.recalcular()
+        self.stdout.write(self.style.SUCCESS(
+            f"Gauges recalculados: {sum(conteos['productos_estado'].values())} productos, "
+            f"{conteos['asignaciones_activas']} asignaciones activas, "
+            f"{conteos['notificaciones_no_leidas']} notificaciones no leídas"
+        ))
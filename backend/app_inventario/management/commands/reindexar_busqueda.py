@@ -0,0 +1,16 @@
+# app_inventario/management/commands/reindexar_busqueda.py
+from django.core.management.base import BaseCommand
+
+from app_inventario import lotes
+from app_inventario.services import BusquedaProductosService
+
+
+class Command(BaseCommand):
+    help = "Recalcula el índice de búsqueda de productos (texto_busqueda + FTS5/trigram)."
+
+    def add_arguments(self, parser):
+        lotes.agregar_argumento(parser)
+
+    def handle(self, *args, **options):
+        total = BusquedaProductosService.reindexar(batch_size=options["chunk_size"])
+        self.stdout.write(self.style.SUCCESS(f"Índice de búsqueda actualizado. Productos: {total}"))
@@ -0,0 +1,321 @@
+# app_inventario/management/commands/seed_inventory.py
+import random
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from app_inventario import autocompletado, metricas
+from app_inventario.models import (
+    Asignaciones, Categorias, CodigoQR, Estados, HistorialEstados, Mantenciones,
+    Marcas, Modelos, Movimientos, Notificaciones, Productos, Proveedores, Sucursales, Usuarios,
+)
+from app_inventario.services import (
+    BusquedaProductosService, CacheDetalleProductoService, GarantiaService, RollupMovimientosService,
+)
+
+User = get_user_model()
+
+# (nombre, peso) — la mayoría de la flota está operativa
+ESTADOS = [("Operativo", 70), ("En Bodega", 15), ("En Reparación", 10), ("Dado de baja", 5)]
+
+# categoría -> {marca: [modelos]}
+CATALOGO = {
+    "Notebooks": {
+        "HP": ["EliteBook 840", "ProBook 450", "ZBook Firefly"],
+        "Lenovo": ["ThinkPad T14", "ThinkPad X1 Carbon", "IdeaPad 5"],
+        "Dell": ["Latitude 5440", "Latitude 7440", "Precision 3581"],
+    },
+    "Desktops": {
+        "HP": ["EliteDesk 800", "ProDesk 400"],
+        "Lenovo": ["ThinkCentre M70q", "ThinkCentre M90t"],
+        "Dell": ["OptiPlex 7010"],
+    },
+    "Monitores": {
+        "Samsung": ["S24R350", "S27A600"],
+        "Dell": ["P2422H", "U2723QE"],
+        "LG": ["24MK600", "27UL500"],
+    },
+    "Impresoras": {
+        "HP": ["LaserJet Pro M404", "OfficeJet Pro 9010"],
+        "Epson": ["EcoTank L3250", "WorkForce WF-C5790"],
+        "Brother": ["HL-L2350DW"],
+    },
+    "Teléfonos": {
+        "Samsung": ["Galaxy A54", "Galaxy S23"],
+        "Apple": ["iPhone 13", "iPhone 15"],
+    },
+    "Tablets": {
+        "Apple": ["iPad 10", "iPad Air"],
+        "Samsung": ["Galaxy Tab S9"],
+    },
+    "Redes": {
+        "Cisco": ["Catalyst 9200", "Meraki MR36"],
+        "Ubiquiti": ["UniFi U6 Pro", "UniFi Switch 24"],
+    },
+}
+
+CIUDADES = [
+    "Santiago", "Valparaíso", "Concepción", "La Serena", "Antofagasta", "Temuco", "Rancagua",
+    "Talca", "Puerto Montt", "Iquique", "Arica", "Chillán", "Osorno", "Valdivia", "Calama",
+    "Copiapó", "Punta Arenas", "Los Ángeles", "Curicó", "Coyhaique",
+]
+
+DETALLES_MANTENCION = [
+    "Limpieza interna y cambio de pasta térmica", "Actualización de firmware",
+    "Cambio de batería", "Revisión general", "Reemplazo de disco por SSD",
+    "Cambio de teclado", "Calibración y limpieza de cabezales",
+]
+
+ANIOS_HISTORIA = 6
+
+
+@contextmanager
+def _fechas_manuales(*modelos):
+    """
+    Desactiva `auto_now_add` mientras se insertan datos históricos
+    (si no, bulk_create sobrescribe las fechas con la hora actual).
+    `creado` (Sincronizable) se mantiene: registra cuándo se insertó la fila.
+    """
+    campos = [
+        f for modelo in modelos for f in modelo._meta.concrete_fields
+        if getattr(f, "auto_now_add", False) and f.name != "creado"
+    ]
+    for campo in campos:
+        campo.auto_now_add = False
+    try:
+        yield
+    finally:
+        for campo in campos:
+            campo.auto_now_add = True
+
+
+class Command(BaseCommand):
+    help = (
+        "Genera una flota de prueba realista (productos, asignaciones, movimientos, "
+        "mantenciones, notificaciones) con inserciones masivas. Ej: --productos 100000"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--productos", type=int, default=1000, help="Productos a crear (default: 1000)")
+        parser.add_argument("--sucursales", type=int, default=40, help="Sucursales (default: 40)")
+        parser.add_argument("--usuarios", type=int,
+                            help="Usuarios a los que se asigna la flota (default: productos / 20, entre 10 y 20000)")
+        parser.add_argument("--seed", type=int, default=42, help="Semilla aleatoria (default: 42)")
+        parser.add_argument("--batch-size", type=int, default=2000, help="Productos por lote (default: 2000)")
+        parser.add_argument("--prefijo", default="SEED", help="Prefijo de números de serie y usuarios (default: SEED)")
+
+    def handle(self, *args, **options):
+        if options["productos"] < 1 or options["batch_size"] < 1:
+            raise CommandError("--productos y --batch-size deben ser mayores que 0")
+
+        self.rng = random.Random(options["seed"])
+        self.prefijo = options["prefijo"]
+        self.hoy = timezone.localdate()
+        inicio = time.perf_counter()
+
+        self.preparar_catalogo(options["sucursales"])
+        n_usuarios = options["usuarios"] or min(max(options["productos"] // 20, 10), 20000)
+        self.preparar_usuarios(n_usuarios)
+
+        # Se continúa la numeración si el prefijo ya se usó (permite sembrar en varias pasadas)
+        desde = Productos.objects.filter(nro_serie__startswith=f"{self.prefijo}-").count()
+        totales = dict.fromkeys(
+            ["productos", "asignaciones", "movimientos", "mantenciones", "notificaciones", "historial"], 0
+        )
+        for offset in range(0, options["productos"], options["batch_size"]):
+            n = min(options["batch_size"], options["productos"] - offset)
+            with transaction.atomic(), _fechas_manuales(
+                Asignaciones, Movimientos, HistorialEstados, Notificaciones
+            ):
+                for clave, valor in self.sembrar_lote(desde + offset, n).items():
+                    totales[clave] += valor
+            self.stdout.write(f"  {offset + n}/{options['productos']} productos")
+
+        self.stdout.write("Reconstruyendo rollups y caches...")
+        RollupMovimientosService.reconstruir(self.hoy - timedelta(days=366 * ANIOS_HISTORIA), self.hoy)
+        metricas.recalcular()
+        autocompletado.reiniciar()
+        CacheDetalleProductoService.invalidar_todo()
+
+        resumen = ", ".join(f"{k}: {v}" for k, v in totales.items())
+        self.stdout.write(self.style.SUCCESS(
+            f"Flota generada en {time.perf_counter() - inicio:.1f}s. {resumen}"
+        ))
+
+    # ------------------------------------------------------------------
+    # Catálogos y usuarios (idempotentes)
+    # ------------------------------------------------------------------
+
+    def preparar_catalogo(self, n_sucursales):
+        self.estados = [Estados.objects.get_or_create(nombre=nombre)[0] for nombre, _ in ESTADOS]
+        self.pesos_estado = [peso for _, peso in ESTADOS]
+
+        self.sucursales = []
+        for i in range(n_sucursales):
+            ciudad = CIUDADES[i % len(CIUDADES)]
+            nombre = f"Sucursal {ciudad}" + (f" {i // len(CIUDADES) + 1}" if i >= len(CIUDADES) else "")
+            self.sucursales.append(Sucursales.objects.get_or_create(
+                nombre=nombre, defaults={"direccion": f"Av. Principal {100 + i}, {ciudad}"}
+            )[0])
+
+        self.proveedores = [
+            Proveedores.objects.get_or_create(rut=f"76{i:06d}-{i % 10}", defaults={
+                "nombre": f"Proveedor {i + 1}", "contacto": f"Ejecutivo {i + 1}",
+                "telefono": f"+5622{i:07d}", "correo": f"ventas{i + 1}@proveedor.cl",
+            })[0]
+            for i in range(12)
+        ]
+
+        self.modelos = []  # (modelo con marca cargada, categoría)
+        for nombre_categoria, marcas in CATALOGO.items():
+            categoria = Categorias.objects.get_or_create(nombre=nombre_categoria)[0]
+            for nombre_marca, modelos in marcas.items():
+                marca = Marcas.objects.get_or_create(nombre=nombre_marca)[0]
+                for nombre_modelo in modelos:
+                    modelo = Modelos.objects.get_or_create(marca=marca, nombre=nombre_modelo)[0]
+                    modelo.marca = marca
+                    self.modelos.append((modelo, categoria))
+
+    def preparar_usuarios(self, total):
+        prefijo = f"{self.prefijo.lower()}-u"
+        existentes = User.objects.filter(username__startswith=prefijo).count()
+        if existentes < total:
+            # Un solo hash para todos: hashear 20.000 contraseñas tomaría minutos
+            password = make_password("inventario123")
+            nombres = ["Ana", "Benjamín", "Camila", "Diego", "Fernanda", "Ignacio", "Javiera", "Matías"]
+            apellidos = ["González", "Muñoz", "Rojas", "Díaz", "Pérez", "Soto", "Contreras", "Silva"]
+            with transaction.atomic():
+                for lote in range(existentes, total, 1000):
+                    users = User.objects.bulk_create([
+                        User(
+                            username=f"{prefijo}{i:06d}", password=password,
+                            first_name=self.rng.choice(nombres), last_name=self.rng.choice(apellidos),
+                            email=f"{prefijo}{i:06d}@coyahue.cl",
+                        )
+                        for i in range(lote, min(lote + 1000, total))
+                    ])
+                    Usuarios.objects.bulk_create([Usuarios(user=u) for u in users])
+        self.usuarios = list(
+            Usuarios.objects.filter(user__username__startswith=prefijo).values_list("id", flat=True)
+        )
+
+    # ------------------------------------------------------------------
+    # Flota
+    # ------------------------------------------------------------------
+
+    def _momento(self, desde, hasta=None):
+        """datetime aleatorio entre dos fechas (a lo más hoy)"""
+        hasta = min(hasta or self.hoy, self.hoy)
+        dias = max((hasta - desde).days, 0)
+        dia = desde + timedelta(days=self.rng.randint(0, dias))
+        return timezone.make_aware(datetime.combine(dia, datetime.min.time()) + timedelta(
+            hours=self.rng.randint(8, 19), minutes=self.rng.randint(0, 59)
+        ))
+
+    def sembrar_lote(self, desde, n):
+        rng = self.rng
+        productos = []
+        for i in range(desde, desde + n):
+            modelo, categoria = rng.choice(self.modelos)
+            fecha_compra = self.hoy - timedelta(days=rng.randint(0, 365 * ANIOS_HISTORIA))
+            garantia = rng.choice((12, 12, 24, 36))
+            vencimiento = GarantiaService.vencimiento(fecha_compra, garantia)
+            producto = Productos(
+                nro_serie=f"{self.prefijo}-{i:07d}",
+                fecha_compra=fecha_compra,
+                estado=rng.choices(self.estados, self.pesos_estado)[0],
+                documento_factura=f"F-{rng.randint(10000, 99999)}",
+                garantia_meses=garantia,
+                fecha_venc_garantia=vencimiento,
+                estado_garantia=GarantiaService.estado_garantia(vencimiento, self.hoy),
+                proveedor=rng.choice(self.proveedores),
+                modelo=modelo,
+                categoria=categoria,
+                sucursal=rng.choice(self.sucursales) if self.sucursales else None,
+            )
+            # bulk_create no pasa por las señales: el texto de búsqueda se arma acá
+            producto.texto_busqueda = BusquedaProductosService.texto_para(producto)
+            productos.append(producto)
+
+        Productos.objects.bulk_create(productos)
+        BusquedaProductosService.sincronizar(productos)
+        CodigoQR.objects.bulk_create([CodigoQR(producto=p) for p in productos])
+
+        historial, asignaciones, movimientos, mantenciones, notificaciones = [], [], [], [], []
+        operativo = self.estados[0]
+        for p in productos:
+            compra = self._momento(p.fecha_compra, p.fecha_compra)
+            historial.append(HistorialEstados(producto=p, estado=operativo, fecha=compra, comentario="Ingreso"))
+            movimientos.append(Movimientos(
+                tipo="entrada", sku=p.nro_serie, proveedor=p.proveedor.nombre,
+                referencia=p.documento_factura, fecha=compra,
+            ))
+            if p.estado != operativo:
+                historial.append(HistorialEstados(
+                    producto=p, estado=p.estado, fecha=self._momento(p.fecha_compra),
+                    comentario=f"Cambio a {p.estado.nombre}",
+                ))
+                if p.estado.nombre == "Dado de baja":
+                    movimientos.append(Movimientos(
+                        tipo="salida", sku=p.nro_serie, fecha=self._momento(p.fecha_compra),
+                        comentarios="Baja del activo",
+                    ))
+
+            # Asignaciones pasadas (devueltas) y, para ~30% de la flota, una activa
+            cursor = p.fecha_compra
+            for _ in range(rng.choice((0, 0, 1, 1, 2))):
+                inicio = cursor + timedelta(days=rng.randint(1, 120))
+                fin = inicio + timedelta(days=rng.randint(30, 400))
+                if fin >= self.hoy:
+                    break
+                asignaciones.append(Asignaciones(
+                    producto=p, usuario_id=rng.choice(self.usuarios),
+                    fecha_asignacion=inicio, fecha_devolucion=fin,
+                ))
+                cursor = fin
+            if p.estado == operativo and cursor < self.hoy and rng.random() < 0.43:
+                asignaciones.append(Asignaciones(
+                    producto=p, usuario_id=rng.choice(self.usuarios),
+                    fecha_asignacion=cursor + timedelta(days=rng.randint(0, (self.hoy - cursor).days)),
+                ))
+
+            if rng.random() < 0.15:
+                movimientos.append(Movimientos(
+                    tipo="ajuste", sku=p.nro_serie, fecha=self._momento(p.fecha_compra),
+                    comentarios="Ajuste de inventario",
+                ))
+
+            for _ in range(rng.choice((0, 0, 1, 1, 2, 3))):
+                mantenciones.append(Mantenciones(
+                    producto=p, fecha=self._momento(p.fecha_compra).date(),
+                    detalle=rng.choice(DETALLES_MANTENCION), proveedor=rng.choice(self.proveedores),
+                ))
+
+            if rng.random() < 0.2:
+                leido = rng.random() < 0.7
+                creada = self._momento(max(p.fecha_compra, self.hoy - timedelta(days=180)))
+                notificaciones.append(Notificaciones(
+                    producto=p, categoria=rng.choice(("mantenimiento", "garantia")),
+                    titulo=f"Revisión pendiente: {p.nro_serie}",
+                    mensaje=f"El producto {p.nro_serie} requiere revisión.",
+                    prioridad=rng.choice(("baja", "media", "alta")),
+                    fecha_creacion=creada, leido=leido, fecha_lectura=creada if leido else None,
+                ))
+
+        HistorialEstados.objects.bulk_create(historial)
+        Asignaciones.objects.bulk_create(asignaciones)
+        Movimientos.objects.bulk_create(movimientos)
+        Mantenciones.objects.bulk_create(mantenciones)
+        Notificaciones.objects.bulk_create(notificaciones)
+
+        return {
+            "productos": len(productos), "asignaciones": len(asignaciones),
+            "movimientos": len(movimientos), "mantenciones": len(mantenciones),
+            "notificaciones": len(notificaciones), "historial": len(historial),
+        }
@@ -0,0 +1,49 @@
+# app_inventario/management/commands/snapshot_inventario.py
+from argparse import ArgumentTypeError
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from app_inventario import lotes
+from app_inventario.services import SnapshotInventarioService
+
+
+def _fecha(valor):
+    fecha = parse_date(valor)
+    if fecha is None:
+        raise ArgumentTypeError("use el formato YYYY-MM-DD")
+    return fecha
+
+
+class Command(BaseCommand):
+    help = (
+        "Guarda la foto del inventario del mes (cierre contable). Una por mes: "
+        "si ya existe no hace nada. Para programarlo a diario (p. ej. cron "
+        "'55 23 * * *') usar --fin-de-mes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--fecha", type=_fecha, help="Día de la foto (default: hoy)")
+        parser.add_argument(
+            "--fin-de-mes", action="store_true",
+            help="Sólo toma la foto si la fecha es el último día del mes",
+        )
+        lotes.agregar_argumento(parser)
+
+    def handle(self, *args, **options):
+        fecha = options["fecha"] or timezone.localdate()
+        if options["fin_de_mes"] and not SnapshotInventarioService.es_fin_de_mes(fecha):
+            self.stdout.write(f"{fecha} no es fin de mes: no se toma la foto.")
+            return
+
+        snapshot = SnapshotInventarioService.tomar(fecha, tamano=options["chunk_size"])
+        if snapshot is None:
+            self.stdout.write(self.style.WARNING(
+                f"Ya existe la foto de {fecha:%m/%Y}: no se modifica."
+            ))
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f"Foto de {snapshot.periodo:%m/%Y} guardada: {snapshot.total_productos} productos "
+            f"({len(snapshot.datos) / 1024:.1f} KB comprimidos)"
+        ))
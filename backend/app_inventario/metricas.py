@@ -0,0 +1,238 @@
+# app_inventario/metricas.py
+"""
+Métricas en formato de texto de Prometheus para GET /metrics.
+
+Dos tipos de datos:
+
+- Por proceso (en memoria): latencia por endpoint (histograma), requests,
+  consultas SQL y aciertos/fallos de cache. Las alimenta PerfilMiddleware.
+  Como en cualquier exporter por proceso, con varios workers cada uno
+  reporta lo suyo: Prometheus debe scrapear cada instancia.
+- Gauges de inventario (productos por estado, asignaciones activas,
+  notificaciones no leídas, hojas de etiquetas en curso): con una cache
+  compartida (Redis/Memcached) son contadores incrementales mantenidos por
+  señales y el scrape no consulta la BD; se recalculan con un conteo si falta
+  cualquiera de las claves (primer uso, reinicio, expulsión) o con
+  `manage.py recalcular_metricas`. Con la cache por proceso (LocMemCache, la
+  de desarrollo) cada worker tendría sus propios contadores: el scrape cuenta
+  en la BD (COUNTs sobre índices).
+"""
+import threading
+from bisect import bisect_left
+
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.db.models import Count
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+# ------------------------------------------------------------------
+# Métricas por proceso
+# ------------------------------------------------------------------
+
+class Registro:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencias = {}   # (vista, metodo) -> [conteos por bucket, suma, total]
+        self.requests = {}    # (vista, metodo, status) -> total
+        self.consultas = {}   # (vista, metodo) -> total de consultas SQL
+        self.cache = {}       # (cache, resultado) -> total
+
+    def observar_request(self, vista, metodo, status, segundos, consultas):
+        clave = (vista or "sin_ruta", metodo)
+        with self._lock:
+            hist = self.latencias.setdefault(clave, [[0] * (len(BUCKETS) + 1), 0.0, 0])
+            hist[0][bisect_left(BUCKETS, segundos)] += 1
+            hist[1] += segundos
+            hist[2] += 1
+            clave_status = clave + (str(status),)
+            self.requests[clave_status] = self.requests.get(clave_status, 0) + 1
+            self.consultas[clave] = self.consultas.get(clave, 0) + consultas
+
+    def observar_cache(self, nombre, acierto):
+        clave = (nombre, "hit" if acierto else "miss")
+        with self._lock:
+            self.cache[clave] = self.cache.get(clave, 0) + 1
+
+    def reiniciar(self):
+        with self._lock:
+            self.latencias, self.requests, self.consultas, self.cache = {}, {}, {}, {}
+
+
+registro = Registro()
+
+
+def observar_cache(nombre, acierto):
+    registro.observar_cache(nombre, acierto)
+
+
+# ------------------------------------------------------------------
+# Gauges de inventario (cache compartida)
+# ------------------------------------------------------------------
+
+PREFIJO = "metricas"
+
+
+def _clave(nombre, etiqueta=""):
+    return f"{PREFIJO}:{nombre}:{etiqueta}"
+
+
+def _incrementales():
+    """¿La cache es compartida entre workers? (si no, los contadores no sirven)"""
+    return not isinstance(caches["default"], (LocMemCache, DummyCache))
+
+
+def _conteos_bd():
+    """Conteo completo desde la BD (sólo para sembrar o reconciliar)"""
+    from .models import Asignaciones, Estados, Notificaciones, Productos
+
+    estados = dict(Estados.objects.values_list("id", "nombre"))
+    por_estado = dict(Productos.objects.order_by().values_list("estado").annotate(n=Count("id")))
+    return {
+        "estados": estados,
+        "productos_estado": {str(pk): por_estado.get(pk, 0) for pk in estados},
+        "asignaciones_activas": Asignaciones.objects.filter(fecha_devolucion__isnull=True).count(),
+        "notificaciones_no_leidas": Notificaciones.objects.filter(leido=False).count(),
+    }
+
+
+def recalcular():
+    """Siembra/reconcilia los gauges con un conteo real"""
+    conteos = _conteos_bd()
+    valores = {
+        _clave("estados"): conteos["estados"],
+        _clave("asignaciones_activas"): conteos["asignaciones_activas"],
+        _clave("notificaciones_no_leidas"): conteos["notificaciones_no_leidas"],
+    }
+    for estado_id, total in conteos["productos_estado"].items():
+        valores[_clave("productos_estado", estado_id)] = total
+    cache.set_many(valores, None)
+    cache.add(_clave("etiquetas_en_curso"), 0, None)
+    return conteos
+
+
+def _incrementar_ahora(nombre, delta, etiqueta=""):
+    try:
+        cache.incr(_clave(nombre, etiqueta), delta)
+    except ValueError:
+        # Sin valor en cache: el conteo completo ya incluye este cambio (está confirmado)
+        recalcular()
+
+
+def incrementar(nombre, delta, etiqueta=""):
+    """Ajusta un gauge cuando la transacción se confirma (un rollback no lo altera)"""
+    if delta and _incrementales():
+        transaction.on_commit(lambda: _incrementar_ahora(nombre, delta, etiqueta))
+
+
+def registrar_estado(estado_id, nombre):
+    """Mantiene el mapa id -> nombre usado como etiqueta de productos por estado"""
+    estados = cache.get(_clave("estados"))
+    if estados is None:
+        return  # se siembra completo en el próximo scrape
+    estados[estado_id] = nombre
+    cache.set(_clave("estados"), estados, None)
+    cache.add(_clave("productos_estado", estado_id), 0, None)
+
+
+def etiquetas_en_curso(delta):
+    """Hojas de etiquetas QR renderizándose (no transaccional)"""
+    try:
+        cache.incr(_clave("etiquetas_en_curso"), delta)
+    except ValueError:
+        cache.set(_clave("etiquetas_en_curso"), max(delta, 0), None)
+
+
+def gauges():
+    en_curso = cache.get(_clave("etiquetas_en_curso"), 0)
+    if not _incrementales():
+        conteos = _conteos_bd()
+    else:
+        estados = cache.get(_clave("estados"))
+        if estados is not None:
+            claves = [_clave("productos_estado", pk) for pk in estados] + [
+                _clave("asignaciones_activas"), _clave("notificaciones_no_leidas"),
+            ]
+            valores = cache.get_many(claves)
+            if len(valores) == len(claves):
+                return {
+                    "productos_estado": {
+                        nombre: valores[_clave("productos_estado", pk)] for pk, nombre in estados.items()
+                    },
+                    "asignaciones_activas": valores[_clave("asignaciones_activas")],
+                    "notificaciones_no_leidas": valores[_clave("notificaciones_no_leidas")],
+                    "etiquetas_en_curso": en_curso,
+                }
+        # Falta alguna clave: reportarla en 0 sería falso
+        conteos = recalcular()
+    return {
+        "productos_estado": {
+            nombre: conteos["productos_estado"][str(pk)] for pk, nombre in conteos["estados"].items()
+        },
+        "asignaciones_activas": conteos["asignaciones_activas"],
+        "notificaciones_no_leidas": conteos["notificaciones_no_leidas"],
+        "etiquetas_en_curso": en_curso,
+    }
+
+
+# ------------------------------------------------------------------
+# Exposición
+# ------------------------------------------------------------------
+
+def _etiquetas(**pares):
+    escapar = lambda v: str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return "{" + ",".join(f'{k}="{escapar(v)}"' for k, v in pares.items()) + "}"
+
+
+def exponer():
+    lineas = []
+
+    def familia(nombre, tipo, ayuda):
+        lineas.append(f"# HELP {nombre} {ayuda}")
+        lineas.append(f"# TYPE {nombre} {tipo}")
+
+    with registro._lock:
+        latencias = {k: (list(v[0]), v[1], v[2]) for k, v in registro.latencias.items()}
+        requests = dict(registro.requests)
+        consultas = dict(registro.consultas)
+        caches = dict(registro.cache)
+
+    familia("inventario_http_request_duration_seconds", "histogram", "Latencia por endpoint")
+    for (vista, metodo), (conteos, suma, total) in sorted(latencias.items()):
+        acumulado = 0
+        for limite, n in zip(BUCKETS + ("+Inf",), conteos):
+            acumulado += n
+            lineas.append(
+                f"inventario_http_request_duration_seconds_bucket"
+                f"{_etiquetas(vista=vista, metodo=metodo, le=limite)} {acumulado}"
+            )
+        lineas.append(f"inventario_http_request_duration_seconds_sum{_etiquetas(vista=vista, metodo=metodo)} {suma:.6f}")
+        lineas.append(f"inventario_http_request_duration_seconds_count{_etiquetas(vista=vista, metodo=metodo)} {total}")
+
+    familia("inventario_http_requests_total", "counter", "Requests por endpoint y status")
+    for (vista, metodo, status), n in sorted(requests.items()):
+        lineas.append(f"inventario_http_requests_total{_etiquetas(vista=vista, metodo=metodo, status=status)} {n}")
+
+    familia("inventario_db_queries_total", "counter", "Consultas SQL por endpoint")
+    for (vista, metodo), n in sorted(consultas.items()):
+        lineas.append(f"inventario_db_queries_total{_etiquetas(vista=vista, metodo=metodo)} {n}")
+
+    familia("inventario_cache_requests_total", "counter", "Lecturas de cache por resultado (hit/miss)")
+    for (nombre, resultado), n in sorted(caches.items()):
+        lineas.append(f"inventario_cache_requests_total{_etiquetas(cache=nombre, resultado=resultado)} {n}")
+
+    datos = gauges()
+    familia("inventario_productos", "gauge", "Productos por estado")
+    for estado, n in sorted(datos["productos_estado"].items()):
+        lineas.append(f"inventario_productos{_etiquetas(estado=estado)} {n}")
+    familia("inventario_asignaciones_activas", "gauge", "Asignaciones sin devolución")
+    lineas.append(f"inventario_asignaciones_activas {datos['asignaciones_activas']}")
+    familia("inventario_notificaciones_no_leidas", "gauge", "Notificaciones sin leer")
+    lineas.append(f"inventario_notificaciones_no_leidas {datos['notificaciones_no_leidas']}")
+    familia("inventario_etiquetas_en_curso", "gauge", "Hojas de etiquetas QR renderizándose")
+    lineas.append(f"inventario_etiquetas_en_curso {datos['etiquetas_en_curso']}")
+
+    return "\n".join(lineas) + "\n"
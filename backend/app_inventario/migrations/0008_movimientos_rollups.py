@@ -0,0 +1,47 @@
+# Generated by Django 5.2.7 on 2026-10-19 12:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_inventario', '0007_movimientos_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MovimientosDiarios',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('sku', models.CharField(max_length=100)),
+                ('tipo', models.CharField(choices=[('entrada', 'Entrada'), ('salida', 'Salida'), ('ajuste', 'Ajuste')], max_length=10)),
+                ('cantidad', models.PositiveIntegerField(default=0)),
+                ('total_movimientos', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Movimientos diarios',
+                'verbose_name_plural': 'Movimientos diarios',
+                'indexes': [models.Index(fields=['sku', 'fecha'], name='app_inventa_sku_31a900_idx')],
+                'unique_together': {('fecha', 'sku', 'tipo')},
+            },
+        ),
+        migrations.CreateModel(
+            name='MovimientosMensuales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('sku', models.CharField(max_length=100)),
+                ('tipo', models.CharField(choices=[('entrada', 'Entrada'), ('salida', 'Salida'), ('ajuste', 'Ajuste')], max_length=10)),
+                ('cantidad', models.PositiveIntegerField(default=0)),
+                ('total_movimientos', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Movimientos mensuales',
+                'verbose_name_plural': 'Movimientos mensuales',
+                'indexes': [models.Index(fields=['sku', 'fecha'], name='app_inventa_sku_3b67e1_idx')],
+                'unique_together': {('fecha', 'sku', 'tipo')},
+            },
+        ),
+    ]
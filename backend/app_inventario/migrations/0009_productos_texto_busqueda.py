@@ -0,0 +1,62 @@
+# Generated by Django 5.2.7 on 2026-10-19 12:29
+
+from django.db import migrations, models
+from django.db.utils import OperationalError
+
+FTS_TABLE = "app_inventario_productos_fts"
+TRGM_INDEX = "app_inventario_productos_texto_trgm"
+
+
+def crear_indice_busqueda(apps, schema_editor):
+    Productos = apps.get_model("app_inventario", "Productos")
+
+    # Poblar la columna desnormalizada para los productos existentes
+    productos = list(Productos.objects.select_related("modelo__marca", "categoria"))
+    for p in productos:
+        partes = [p.nro_serie, p.modelo.marca.nombre, p.modelo.nombre, p.categoria.nombre]
+        p.texto_busqueda = " ".join(x for x in partes if x).lower()
+    Productos.objects.bulk_update(productos, ["texto_busqueda"], batch_size=500)
+
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        try:
+            schema_editor.execute(
+                f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(texto, tokenize='trigram')"
+            )
+        except OperationalError:
+            # SQLite sin FTS5/trigram (< 3.34): se usa icontains sobre la columna
+            return
+        schema_editor.execute(
+            f"INSERT INTO {FTS_TABLE}(rowid, texto) "
+            f"SELECT id, texto_busqueda FROM app_inventario_productos"
+        )
+    elif vendor == "postgresql":
+        schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        schema_editor.execute(
+            f"CREATE INDEX {TRGM_INDEX} ON app_inventario_productos "
+            f"USING gin (texto_busqueda gin_trgm_ops)"
+        )
+
+
+def eliminar_indice_busqueda(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+    elif vendor == "postgresql":
+        schema_editor.execute(f"DROP INDEX IF EXISTS {TRGM_INDEX}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_inventario', '0008_movimientos_rollups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productos',
+            name='texto_busqueda',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.RunPython(crear_indice_busqueda, eliminar_indice_busqueda),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.7 on 2026-10-19 12:40
+
+import calendar
+from datetime import date
+
+from django.db import migrations, models
+
+
+def sumar_meses(fecha, meses):
+    mes_total = fecha.month - 1 + meses
+    anio, mes = fecha.year + mes_total // 12, mes_total % 12 + 1
+    return fecha.replace(year=anio, month=mes, day=min(fecha.day, calendar.monthrange(anio, mes)[1]))
+
+
+def recalcular_vencimientos(apps, schema_editor):
+    """Reemplaza el vencimiento aproximado (meses * 30 días) por meses de calendario"""
+    Productos = apps.get_model("app_inventario", "Productos")
+    hoy = date.today()
+    productos = list(Productos.objects.only("id", "fecha_compra", "garantia_meses"))
+    for p in productos:
+        if p.fecha_compra and p.garantia_meses:
+            p.fecha_venc_garantia = sumar_meses(p.fecha_compra, p.garantia_meses)
+            p.estado_garantia = "VENCIDA" if p.fecha_venc_garantia < hoy else "VIGENTE"
+        else:
+            p.fecha_venc_garantia = None
+            p.estado_garantia = "NO_APLICA"
+    Productos.objects.bulk_update(productos, ["fecha_venc_garantia", "estado_garantia"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_inventario', '0009_productos_texto_busqueda'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='productos',
+            index=models.Index(fields=['fecha_venc_garantia'], name='productos_venc_garantia_idx'),
+        ),
+        migrations.RunPython(recalcular_vencimientos, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.7 on 2026-10-19 12:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_inventario', '0010_productos_garantia_calendario'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlanMantencion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=200)),
+                ('frecuencia_meses', models.PositiveIntegerField(default=6)),
+                ('detalle', models.TextField(blank=True, default='')),
+                ('activo', models.BooleanField(default=True)),
+                ('categoria', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='planes_mantencion', to='app_inventario.categorias')),
+                ('modelo', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='planes_mantencion', to='app_inventario.modelos')),
+                ('proveedor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='planes_mantencion', to='app_inventario.proveedores')),
+            ],
+            options={
+                'verbose_name_plural': 'Planes de mantención',
+            },
+        ),
+        migrations.AddField(
+            model_name='mantenciones',
+            name='plan',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='mantenciones', to='app_inventario.planmantencion'),
+        ),
+        migrations.AddIndex(
+            model_name='mantenciones',
+            index=models.Index(fields=['fecha'], name='mantenciones_fecha_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='mantenciones',
+            constraint=models.UniqueConstraint(condition=models.Q(('plan__isnull', False)), fields=('plan', 'producto', 'fecha'), name='mantencion_plan_producto_fecha_unica'),
+        ),
+        migrations.AddConstraint(
+            model_name='planmantencion',
+            constraint=models.CheckConstraint(condition=models.Q(('categoria__isnull', False), ('modelo__isnull', False), _connector='OR'), name='plan_mantencion_categoria_o_modelo'),
+        ),
+        migrations.AddConstraint(
+            model_name='planmantencion',
+            constraint=models.CheckConstraint(condition=models.Q(('frecuencia_meses__gt', 0)), name='plan_mantencion_frecuencia_positiva'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-19 13:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_inventario', '0011_planes_mantencion'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='productos',
+            index=models.Index(fields=['fecha_compra', 'id'], name='productos_fecha_compra_idx'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.7 on 2026-10-19 13:21
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_inventario', '0013_sincronizacion'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Auditorias',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('estado', models.CharField(choices=[('ABIERTA', 'Abierta'), ('CERRADA', 'Cerrada')], default='ABIERTA', max_length=10)),
+                ('iniciada', models.DateTimeField(auto_now_add=True)),
+                ('cerrada', models.DateTimeField(blank=True, null=True)),
+                ('esperados', models.JSONField(default=list)),
+                ('resultado', models.JSONField(blank=True, null=True)),
+                ('sucursal', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='auditorias', to='app_inventario.sucursales')),
+                ('usuario', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='auditorias', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'Auditorías',
+                'ordering': ['-iniciada'],
+            },
+        ),
+        migrations.CreateModel(
+            name='LecturasAuditoria',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('producto_id', models.PositiveBigIntegerField(blank=True, null=True)),
+                ('codigo', models.CharField(max_length=500)),
+                ('leido_en', models.DateTimeField(blank=True, null=True)),
+                ('auditoria', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lecturas', to='app_inventario.auditorias')),
+            ],
+            options={
+                'verbose_name_plural': 'Lecturas de auditoría',
+                'constraints': [models.UniqueConstraint(fields=('auditoria', 'codigo'), name='lectura_auditoria_unica')],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.7 on 2026-10-19 13:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_inventario', '0014_auditorias'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SnapshotsInventario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('periodo', models.DateField(help_text='Primer día del mes', unique=True)),
+                ('tomado', models.DateTimeField(auto_now_add=True)),
+                ('total_productos', models.PositiveIntegerField(default=0)),
+                ('resumen', models.JSONField(default=dict)),
+                ('datos', models.BinaryField()),
+            ],
+            options={
+                'verbose_name': 'Snapshot de inventario',
+                'verbose_name_plural': 'Snapshots de inventario',
+                'ordering': ['-periodo'],
+            },
+        ),
+    ]
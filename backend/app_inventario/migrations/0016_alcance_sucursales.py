@@ -0,0 +1,22 @@
+# Generated by Django 5.2.7 on 2026-10-19 13:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_inventario', '0015_snapshots_inventario'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usuarios',
+            name='sucursales',
+            field=models.ManyToManyField(blank=True, related_name='usuarios', to='app_inventario.sucursales'),
+        ),
+        migrations.AddIndex(
+            model_name='productos',
+            index=models.Index(fields=['sucursal', 'fecha_compra', 'id'], name='productos_sucursal_fecha_idx'),
+        ),
+    ]
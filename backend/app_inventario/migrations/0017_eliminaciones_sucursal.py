@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 13:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_inventario', '0016_alcance_sucursales'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='eliminaciones',
+            name='sucursal_id',
+            field=models.PositiveBigIntegerField(blank=True, null=True),
+        ),
+    ]
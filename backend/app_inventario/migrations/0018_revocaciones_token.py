@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-19 13:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_inventario', '0017_eliminaciones_sucursal'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RevocacionesToken',
+            fields=[
+                ('user_id', models.PositiveBigIntegerField(primary_key=True, serialize=False)),
+                ('validos_desde', models.PositiveBigIntegerField()),
+            ],
+            options={
+                'verbose_name_plural': 'Revocaciones de token',
+            },
+        ),
+    ]
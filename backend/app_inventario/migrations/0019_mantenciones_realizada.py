@@ -0,0 +1,28 @@
+# Generated by Django 5.2.7 on 2026-10-19 14:03
+
+from datetime import date
+
+from django.db import migrations, models
+from django.db.models import Q
+
+
+def marcar_pendientes(apps, schema_editor):
+    """Las del scheduler y las manuales con fecha futura no constan como realizadas"""
+    Mantenciones = apps.get_model("app_inventario", "Mantenciones")
+    Mantenciones.objects.filter(Q(plan__isnull=False) | Q(fecha__gt=date.today())).update(realizada=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_inventario', '0018_revocaciones_token'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mantenciones',
+            name='realizada',
+            field=models.BooleanField(default=True),
+        ),
+        migrations.RunPython(marcar_pendientes, migrations.RunPython.noop),
+    ]
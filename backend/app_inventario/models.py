@@ -8,7 +8,42 @@ from django.contrib.auth.models import User
 from django.contrib.auth import get_user_model
 
 
-class Proveedores(models.Model):
+class Sincronizable(models.Model):
+    """
+    Fechas de creación/modificación para la sincronización incremental
+    (GET /api/<recurso>/cambios/, ver SincronizacionService).
+    `auto_now` no se aplica en `queryset.update()`: quien actualice en masa
+    debe incluir `actualizado=timezone.now()`.
+    """
+    creado = models.DateTimeField(auto_now_add=True, db_index=True)
+    actualizado = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        abstract = True
+
+
+class Eliminaciones(models.Model):
+    """
+    Registro de borrados (tombstones) de los modelos `Sincronizable`.
+    Con `sucursal_id` no es un borrado sino una salida de alcance: la fila se
+    movió desde esa sucursal y la deben quitar quienes sólo la veían por ella.
+    """
+    modelo = models.CharField(max_length=50)
+    objeto_id = models.PositiveBigIntegerField()
+    eliminado = models.DateTimeField(auto_now_add=True)
+    sucursal_id = models.PositiveBigIntegerField(null=True, blank=True)
+
+    class Meta:
+        verbose_name_plural = "Eliminaciones"
+        indexes = [
+            models.Index(fields=["modelo", "eliminado"], name="eliminaciones_modelo_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.modelo} #{self.objeto_id} ({self.eliminado:%d/%m/%Y %H:%M})"
+
+
+class Proveedores(Sincronizable):
     """Proveedores de productos tecnológicos"""
     nombre = models.CharField(max_length=200)
     rut = models.CharField(max_length=12, unique=True)
@@ -23,7 +58,7 @@ class Proveedores(models.Model):
         return f"{self.nombre} ({self.rut})"
 
 
-class Marcas(models.Model):
+class Marcas(Sincronizable):
     """Marcas de productos (HP, Dell, Lenovo, etc.)"""
     nombre = models.CharField(max_length=100, unique=True)
 
@@ -34,7 +69,7 @@ class Marcas(models.Model):
         return self.nombre
 
 
-class Categorias(models.Model):
+class Categorias(Sincronizable):
     """Categorías de productos (Computadores, Impresoras, Tablets, etc.)"""
     nombre = models.CharField(max_length=100, unique=True)
     imagen =models.ImageField(upload_to='categorias/', blank=True, null=True)
@@ -45,7 +80,7 @@ class Categorias(models.Model):
         return self.nombre
 
 
-class Modelos(models.Model):
+class Modelos(Sincronizable):
     """Modelos específicos de productos"""
     marca = models.ForeignKey(Marcas, on_delete=models.CASCADE, related_name='modelos')
     nombre = models.CharField(max_length=200)
@@ -58,7 +93,7 @@ class Modelos(models.Model):
         return f"{self.marca.nombre} {self.nombre}"
 
 
-class Estados(models.Model):
+class Estados(Sincronizable):
     """Estados posibles de los productos (Operativo, En Mantención, Dado de Baja, etc.)"""
     nombre = models.CharField(max_length=100, unique=True)
     descripcion = models.TextField(blank=True, null=True)
@@ -70,7 +105,7 @@ class Estados(models.Model):
         return self.nombre
     
 
-class Sucursales(models.Model):
+class Sucursales(Sincronizable):
     """Sucursales a las que pertenecen los productos"""
     nombre = models.CharField(max_length=200, unique=True)
     direccion = models.CharField(max_length=300, blank=True, null=True)
@@ -83,7 +118,7 @@ class Sucursales(models.Model):
         return self.nombre
 
 
-class Productos(models.Model):
+class Productos(Sincronizable):
     """Productos/Activos tecnológicos"""
 
     nro_serie = models.CharField(max_length=100, unique=True, verbose_name="Número de Serie")
@@ -109,24 +144,27 @@ class Productos(models.Model):
     categoria = models.ForeignKey(Categorias, on_delete=models.PROTECT, related_name='productos')
     sucursal = models.ForeignKey(Sucursales, on_delete=models.PROTECT, null=True, blank=True, related_name='productos')
 
+    # Texto desnormalizado para el índice de búsqueda (serie, marca, modelo, categoría).
+    # Lo mantienen las señales; ver BusquedaProductosService.
+    texto_busqueda = models.TextField(blank=True, default='', editable=False)
+
     class Meta:
         verbose_name_plural = "Productos"
+        indexes = [
+            # "¿Qué vence en los próximos N días?" = range scan (ver GarantiaService)
+            models.Index(fields=["fecha_venc_garantia"], name="productos_venc_garantia_idx"),
+            # Orden por defecto del listado paginado (sin sort de toda la tabla por página)
+            models.Index(fields=["fecha_compra", "id"], name="productos_fecha_compra_idx"),
+            # El mismo listado acotado a las sucursales del usuario (ver alcance.py)
+            models.Index(fields=["sucursal", "fecha_compra", "id"], name="productos_sucursal_fecha_idx"),
+        ]
 
     def save(self, *args, **kwargs):
-        """Calcular fecha de vencimiento de garantía automáticamente."""
-        from datetime import timedelta
-        from django.utils import timezone
-
-        if self.fecha_compra and self.garantia_meses:
-            # Calcular vencimiento
-            self.fecha_venc_garantia = self.fecha_compra + timedelta(days=self.garantia_meses * 30)
+        """Calcular fecha de vencimiento de garantía automáticamente (meses de calendario)."""
+        from .services import GarantiaService
 
-            # Actualizar estado
-            hoy = timezone.now().date()
-            if hoy > self.fecha_venc_garantia:
-                self.estado_garantia = 'VENCIDA'
-            else:
-                self.estado_garantia = 'VIGENTE'
+        self.fecha_venc_garantia = GarantiaService.vencimiento(self.fecha_compra, self.garantia_meses)
+        self.estado_garantia = GarantiaService.estado_garantia(self.fecha_venc_garantia)
 
         super().save(*args, **kwargs)
 
@@ -166,13 +204,32 @@ class Usuarios(models.Model):
 
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='perfil_usuario')
     rol = models.CharField(max_length=20, choices=ROLES, default='USUARIO')
+    # Alcance: sólo ve los productos de estas sucursales (vacío = todas; ver alcance.py)
+    sucursales = models.ManyToManyField(Sucursales, blank=True, related_name='usuarios')
     
 
     
     def __str__(self):
         return f"{self.user.get_full_name()} ({self.user.username})"
 
-class Asignaciones(models.Model):
+
+class RevocacionesToken(models.Model):
+    """
+    Corte de los JWT de un usuario: se rechazan los emitidos (claim `iat`)
+    antes de `validos_desde` (segundos epoch). Sin FK: debe sobrevivir al
+    borrado del usuario. Ver autenticacion.py.
+    """
+    user_id = models.PositiveBigIntegerField(primary_key=True)
+    validos_desde = models.PositiveBigIntegerField()
+
+    class Meta:
+        verbose_name_plural = "Revocaciones de token"
+
+    def __str__(self):
+        return f"Usuario #{self.user_id} (tokens desde {self.validos_desde})"
+
+
+class Asignaciones(Sincronizable):
     """Asignación de productos a usuarios"""
     producto = models.ForeignKey(Productos, on_delete=models.CASCADE, related_name='asignaciones')
     usuario = models.ForeignKey(Usuarios, on_delete=models.CASCADE, related_name='asignaciones')
@@ -187,21 +244,66 @@ class Asignaciones(models.Model):
         return f"{self.producto.nro_serie} → {self.usuario} ({estado})"
 
 
-class Mantenciones(models.Model):
-    """Mantenciones realizadas a los productos"""
+class PlanMantencion(models.Model):
+    """
+    Mantención preventiva recurrente para todos los productos de una categoría
+    o de un modelo (si se indica modelo, tiene prioridad sobre la categoría).
+    Las fechas futuras las materializa PlanMantencionService.
+    """
+    nombre = models.CharField(max_length=200)
+    categoria = models.ForeignKey(Categorias, on_delete=models.CASCADE, null=True, blank=True, related_name='planes_mantencion')
+    modelo = models.ForeignKey(Modelos, on_delete=models.CASCADE, null=True, blank=True, related_name='planes_mantencion')
+    frecuencia_meses = models.PositiveIntegerField(default=6)
+    detalle = models.TextField(blank=True, default='')
+    proveedor = models.ForeignKey(Proveedores, on_delete=models.SET_NULL, null=True, blank=True, related_name='planes_mantencion')
+    activo = models.BooleanField(default=True)
+
+    class Meta:
+        verbose_name_plural = "Planes de mantención"
+        constraints = [
+            models.CheckConstraint(
+                condition=models.Q(categoria__isnull=False) | models.Q(modelo__isnull=False),
+                name="plan_mantencion_categoria_o_modelo",
+            ),
+            models.CheckConstraint(condition=models.Q(frecuencia_meses__gt=0), name="plan_mantencion_frecuencia_positiva"),
+        ]
+
+    def __str__(self):
+        return f"{self.nombre} (cada {self.frecuencia_meses} meses)"
+
+
+class Mantenciones(Sincronizable):
+    """Mantenciones de los productos: realizadas o pendientes (programadas por un plan o a mano)"""
     producto = models.ForeignKey(Productos, on_delete=models.CASCADE, related_name='mantenciones')
     fecha = models.DateField()
     detalle = models.TextField()
     proveedor = models.ForeignKey(Proveedores, on_delete=models.SET_NULL, null=True, blank=True, related_name='mantenciones')
+    # Plan que la generó (None = ingresada manualmente)
+    plan = models.ForeignKey(PlanMantencion, on_delete=models.SET_NULL, null=True, blank=True, related_name='mantenciones')
+    # Las del scheduler nacen pendientes: pasada la fecha siguen pendientes (atrasadas)
+    # hasta que alguien registre que se hizo
+    realizada = models.BooleanField(default=True)
 
     class Meta:
         verbose_name_plural = "Mantenciones"
         ordering = ['-fecha']
+        indexes = [
+            # "¿Qué mantenciones vencen esta semana?" = range scan
+            models.Index(fields=["fecha"], name="mantenciones_fecha_idx"),
+        ]
+        constraints = [
+            # Permite re-ejecutar el scheduler sin duplicar (bulk_create ignore_conflicts)
+            models.UniqueConstraint(
+                fields=["plan", "producto", "fecha"],
+                condition=models.Q(plan__isnull=False),
+                name="mantencion_plan_producto_fecha_unica",
+            ),
+        ]
 
     def __str__(self):
         return f"Mantención {self.producto.nro_serie} - {self.fecha}"
 
-class Movimientos(models.Model):
+class Movimientos(Sincronizable):
     """
     Movimientos de stock (entradas, salidas, ajustes).
     No modifican directamente el producto, pero dejan un registro histórico.
@@ -244,6 +346,51 @@ class Movimientos(models.Model):
     def __str__(self):
         return f"[{self.get_tipo_display()}] {self.sku} x{self.cantidad} ({self.fecha.strftime('%d/%m/%Y %H:%M')})"
 
+
+class RollupMovimientos(models.Model):
+    """
+    Totales agregados de Movimientos por periodo, SKU y tipo.
+    Se mantienen incrementalmente desde las señales de Movimientos y se
+    pueden regenerar con el comando `rebuild_rollups`.
+    """
+    fecha = models.DateField()
+    sku = models.CharField(max_length=100)
+    tipo = models.CharField(max_length=10, choices=Movimientos.TIPO_CHOICES)
+
+    # Suma de `cantidad` y número de movimientos del periodo
+    cantidad = models.PositiveIntegerField(default=0)
+    total_movimientos = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        abstract = True
+
+    def __str__(self):
+        return f"{self.fecha} {self.sku} [{self.tipo}] x{self.cantidad}"
+
+
+class MovimientosDiarios(RollupMovimientos):
+    """Totales diarios de movimientos"""
+
+    class Meta:
+        verbose_name = "Movimientos diarios"
+        verbose_name_plural = "Movimientos diarios"
+        unique_together = ['fecha', 'sku', 'tipo']
+        indexes = [
+            models.Index(fields=['sku', 'fecha']),
+        ]
+
+
+class MovimientosMensuales(RollupMovimientos):
+    """Totales mensuales de movimientos (fecha = primer día del mes)"""
+
+    class Meta:
+        verbose_name = "Movimientos mensuales"
+        verbose_name_plural = "Movimientos mensuales"
+        unique_together = ['fecha', 'sku', 'tipo']
+        indexes = [
+            models.Index(fields=['sku', 'fecha']),
+        ]
+
 class HistorialEstados(models.Model):
     """Historial de cambios de estado de los productos"""
     producto = models.ForeignKey(Productos, on_delete=models.CASCADE, related_name='historial_estados')
@@ -275,7 +422,7 @@ class Documentaciones(models.Model):
 
 
 User = get_user_model()
-class Notificaciones(models.Model):
+class Notificaciones(Sincronizable):
 
     CATEGORIAS = [
         ("mantenimiento", "Mantenimiento"),
@@ -356,11 +503,14 @@ class CodigoQR(models.Model):
     imagen_qr = models.ImageField(upload_to='qr_codes/', blank=True, null=True)
     
     def generar_qr(self):
-        relative_url = "paginas/producto/detalle.html?id=" + str(self.producto.id)
-        base = "localhost:5500/"
-        full_url = f"{base}{relative_url}"
+        """
+        Guarda una copia PNG del QR en `imagen_qr`.
+        Ya no se llama al crear productos: las imágenes se sirven bajo demanda
+        desde /api/productos/{id}/qr/ (ver QRService).
+        """
+        from .services import QRService
 
-        print("URL GENERADA:", full_url)
+        full_url = QRService.contenido_producto(self.producto.id)
 
         # Crear QR
         qr = qrcode.make(full_url)
@@ -370,3 +520,73 @@ class CodigoQR(models.Model):
 
         filename = f"qr_producto_{self.producto.id}.png"
         self.imagen_qr.save(filename, File(buffer), save=False)
+
+
+class Auditorias(models.Model):
+    """
+    Toma de inventario físico de una sucursal con lector QR (funciona sin
+    conexión: el dispositivo descarga los esperados, lee y sube las lecturas).
+    `esperados` son los ids de los productos de la sucursal al iniciar; la
+    conciliación compara contra esa foto, no contra el estado actual.
+    """
+    ESTADOS = [
+        ('ABIERTA', 'Abierta'),
+        ('CERRADA', 'Cerrada'),
+    ]
+
+    sucursal = models.ForeignKey(Sucursales, on_delete=models.PROTECT, related_name='auditorias')
+    usuario = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='auditorias')
+    estado = models.CharField(max_length=10, choices=ESTADOS, default='ABIERTA')
+    iniciada = models.DateTimeField(auto_now_add=True)
+    cerrada = models.DateTimeField(null=True, blank=True)
+    esperados = models.JSONField(default=list)
+    # Conciliación (ver AuditoriaService.conciliar); se llena al cerrar
+    resultado = models.JSONField(null=True, blank=True)
+
+    class Meta:
+        verbose_name_plural = "Auditorías"
+        ordering = ['-iniciada']
+
+    def __str__(self):
+        return f"Auditoría {self.sucursal} - {self.iniciada:%d/%m/%Y} ({self.get_estado_display()})"
+
+
+class LecturasAuditoria(models.Model):
+    """Un código leído durante una auditoría (repetidos y reintentos se ignoran)"""
+    auditoria = models.ForeignKey(Auditorias, on_delete=models.CASCADE, related_name='lecturas')
+    # El id que trae el QR; sin FK: puede ser un producto borrado o de otro sistema
+    producto_id = models.PositiveBigIntegerField(null=True, blank=True)
+    codigo = models.CharField(max_length=500)
+    leido_en = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name_plural = "Lecturas de auditoría"
+        constraints = [
+            models.UniqueConstraint(fields=["auditoria", "codigo"], name="lectura_auditoria_unica"),
+        ]
+
+    def __str__(self):
+        return f"{self.auditoria_id}: {self.codigo}"
+
+
+class SnapshotsInventario(models.Model):
+    """
+    Foto del inventario al cierre de un mes (una por mes, no se reescribe).
+    `datos` es JSON columnar comprimido con zlib (una lista por columna:
+    id, nro_serie, estado, sucursal, categoria, asignado, garantia) y
+    `resumen` los totales ya agregados; ver SnapshotInventarioService.
+    """
+    periodo = models.DateField(unique=True, help_text="Primer día del mes")
+    tomado = models.DateTimeField(auto_now_add=True)
+    total_productos = models.PositiveIntegerField(default=0)
+    resumen = models.JSONField(default=dict)
+    datos = models.BinaryField()
+
+    class Meta:
+        verbose_name = "Snapshot de inventario"
+        verbose_name_plural = "Snapshots de inventario"
+        ordering = ['-periodo']
+
+    def __str__(self):
+        return f"Inventario {self.periodo:%m/%Y} ({self.total_productos} productos)"
+
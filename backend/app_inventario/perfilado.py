@@ -0,0 +1,231 @@
+# app_inventario/perfilado.py
+"""
+Perfilado por request: consultas SQL, tiempo de SQL, tiempo por receptor de
+señal y tiempo de serialización.
+
+- `PerfilMiddleware` abre un perfil por request, lo expone en la cabecera
+  `Server-Timing` (visible en las DevTools del navegador; sólo para staff
+  salvo con DEBUG: revela consultas y receptores), escribe una línea JSON en
+  el log rotativo `app_inventario.perfil` y compara contra el presupuesto del
+  endpoint (`PERFIL_PRESUPUESTOS`).
+- Con PERFIL_ACTIVO = False (por defecto fuera de DEBUG y pruebas) no se
+  instrumentan señales ni serializers y no hay cabecera ni log; el
+  middleware sólo mide tiempo y número de consultas para las métricas de
+  latencia de /metrics (metricas.py).
+- Las señales y los serializers sólo se miden si hay un perfil activo;
+  fuera de un request (comandos, migraciones) no cambia nada.
+- El tiempo de un receptor es inclusivo: si guarda otro modelo, incluye los
+  receptores que eso dispare.
+"""
+import json
+import logging
+import os
+import re
+import time
+from contextlib import ExitStack
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.db import connections
+from django.dispatch import Signal
+from rest_framework.serializers import BaseSerializer
+
+from . import metricas
+
+logger = logging.getLogger("app_inventario.perfil")
+
+_perfil_actual = ContextVar("perfil_actual", default=None)
+
+
+class PresupuestoExcedido(AssertionError):
+    """Se lanza en modo estricto (pruebas) cuando un endpoint excede su presupuesto"""
+
+
+class Perfil:
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.consultas = 0
+        self.sql_ms = 0.0
+        self.serializacion_ms = 0.0
+        self.receptores = {}  # nombre -> [llamadas, ms]
+        self._serializando = 0
+
+    def registrar_receptor(self, nombre, ms):
+        datos = self.receptores.setdefault(nombre, [0, 0.0])
+        datos[0] += 1
+        datos[1] += ms
+
+    @property
+    def total_ms(self):
+        return (time.perf_counter() - self.inicio) * 1000
+
+    @property
+    def senales_ms(self):
+        return sum(ms for _, ms in self.receptores.values())
+
+    def server_timing(self, total_ms, max_receptores=5):
+        partes = [
+            f'db;dur={self.sql_ms:.1f};desc="{self.consultas} consultas"',
+            f"ser;dur={self.serializacion_ms:.1f}",
+            f"sig;dur={self.senales_ms:.1f}",
+        ]
+        mas_lentos = sorted(self.receptores.items(), key=lambda r: r[1][1], reverse=True)
+        for nombre, (llamadas, ms) in mas_lentos[:max_receptores]:
+            corto = re.sub(r"[^A-Za-z0-9_-]", "_", nombre.rsplit(".", 1)[-1])
+            partes.append(f'sig-{corto};dur={ms:.1f};desc="{llamadas}x"')
+        partes.append(f"total;dur={total_ms:.1f}")
+        return ", ".join(partes)
+
+
+def perfil_actual():
+    return _perfil_actual.get()
+
+
+# ------------------------------------------------------------------
+# Instrumentación (se instala una vez desde AppConfig.ready)
+# ------------------------------------------------------------------
+
+def _medir_sql(perfil):
+    def wrapper(execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            perfil.consultas += 1
+            perfil.sql_ms += (time.perf_counter() - inicio) * 1000
+    return wrapper
+
+
+def _medir_receptor(receptor):
+    nombre = f"{getattr(receptor, '__module__', '')}.{getattr(receptor, '__qualname__', repr(receptor))}"
+
+    @wraps(receptor)
+    def medido(*args, **kwargs):
+        perfil = _perfil_actual.get()
+        if perfil is None:
+            return receptor(*args, **kwargs)
+        inicio = time.perf_counter()
+        try:
+            return receptor(*args, **kwargs)
+        finally:
+            perfil.registrar_receptor(nombre, (time.perf_counter() - inicio) * 1000)
+    return medido
+
+
+_instalado = False
+
+
+def instalar():
+    """Envuelve el despacho de señales y `Serializer.data` (idempotente)"""
+    global _instalado
+    if _instalado:
+        return
+    _instalado = True
+
+    live_receivers = Signal._live_receivers
+
+    def _live_receivers(self, sender):
+        sync_receivers, async_receivers = live_receivers(self, sender)
+        if _perfil_actual.get() is None:
+            return sync_receivers, async_receivers
+        return [_medir_receptor(r) for r in sync_receivers], async_receivers
+
+    Signal._live_receivers = _live_receivers
+
+    data = BaseSerializer.data.fget
+
+    def data_medida(self):
+        perfil = _perfil_actual.get()
+        if perfil is None or perfil._serializando:
+            return data(self)
+        # Sólo el serializer de nivel superior (los anidados ya están incluidos)
+        perfil._serializando += 1
+        inicio = time.perf_counter()
+        try:
+            return data(self)
+        finally:
+            perfil._serializando -= 1
+            perfil.serializacion_ms += (time.perf_counter() - inicio) * 1000
+
+    BaseSerializer.data = property(data_medida)
+
+
+# ------------------------------------------------------------------
+# Presupuestos
+# ------------------------------------------------------------------
+
+def presupuesto_para(nombre_vista):
+    """Presupuesto {'consultas': n, 'ms': n} del endpoint (por nombre de URL)"""
+    presupuestos = getattr(settings, "PERFIL_PRESUPUESTOS", {})
+    return presupuestos.get(nombre_vista) or presupuestos.get("*")
+
+
+def excesos(perfil, total_ms, presupuesto):
+    """{'consultas': msg, 'ms': msg} con lo que se pasó del presupuesto"""
+    if not presupuesto:
+        return {}
+    resultado = {}
+    if presupuesto.get("consultas") is not None and perfil.consultas > presupuesto["consultas"]:
+        resultado["consultas"] = f"consultas {perfil.consultas} > {presupuesto['consultas']}"
+    if presupuesto.get("ms") is not None and total_ms > presupuesto["ms"]:
+        resultado["ms"] = f"tiempo {total_ms:.0f}ms > {presupuesto['ms']}ms"
+    return resultado
+
+
+class PerfilMiddleware:
+    """Ver docstring del módulo."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if getattr(settings, "PERFIL_ACTIVO", False):
+            os.makedirs(settings.LOGS_DIR, exist_ok=True)
+
+    def __call__(self, request):
+        activo = getattr(settings, "PERFIL_ACTIVO", False)
+        perfil = Perfil()
+        # Sin perfil en el contexto las señales y los serializers no se miden
+        token = _perfil_actual.set(perfil) if activo else None
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(_medir_sql(perfil)))
+                response = self.get_response(request)
+        finally:
+            if token is not None:
+                _perfil_actual.reset(token)
+
+        total_ms = perfil.total_ms
+        match = getattr(request, "resolver_match", None)
+        vista = match.view_name if match else None
+        metricas.registro.observar_request(
+            vista, request.method, response.status_code, total_ms / 1000, perfil.consultas
+        )
+        if not activo:
+            return response
+
+        # DRF deja en `request.user` el usuario del token una vez autenticado
+        if settings.DEBUG or getattr(getattr(request, "user", None), "is_staff", False):
+            response["Server-Timing"] = perfil.server_timing(total_ms)
+        problemas = excesos(perfil, total_ms, presupuesto_para(vista))
+
+        registro = {
+            "metodo": request.method,
+            "ruta": request.path,
+            "vista": vista,
+            "status": response.status_code,
+            "total_ms": round(total_ms, 1),
+            "consultas": perfil.consultas,
+            "sql_ms": round(perfil.sql_ms, 1),
+            "serializacion_ms": round(perfil.serializacion_ms, 1),
+            "receptores": {n: {"llamadas": c, "ms": round(ms, 1)} for n, (c, ms) in perfil.receptores.items()},
+        }
+        if problemas:
+            registro["presupuesto_excedido"] = list(problemas.values())
+            logger.warning(json.dumps(registro, ensure_ascii=False))
+            # En modo estricto sólo falla el conteo de consultas (el tiempo varía entre máquinas)
+            if getattr(settings, "PERFIL_ESTRICTO", False) and "consultas" in problemas:
+                raise PresupuestoExcedido(f"{request.method} {request.path} ({vista}): {problemas['consultas']}")
+        else:
+            logger.info(json.dumps(registro, ensure_ascii=False))
+        return response
@@ -0,0 +1,153 @@
+# app_inventario/replicas.py
+"""
+Lecturas en una réplica para listados, reportes y exportaciones.
+
+- `ReplicaRouter` envía las lecturas a `settings.REPLICA_DB` sólo dentro de
+  un contexto marcado (`en_replica`); todo lo demás (y todas las
+  escrituras) va a "default". Fuera de un request nada cambia.
+- Se marcan las acciones de lectura de los viewsets con `LecturaReplicaMixin`
+  (atributo `acciones_replica`) y las vistas de plantilla con `@lectura_replica`.
+- Read-your-writes: `ReplicaMiddleware` recuerda (en la cache compartida,
+  REPLICA_STICKY_SEGUNDOS) a los usuarios que acaban de escribir; sus
+  lecturas van a la primaria hasta que la réplica alcance el retraso
+  esperado. Dentro de un mismo request, tras cualquier escritura las
+  lecturas siguientes también vuelven a la primaria.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+_contexto = ContextVar("replica_contexto", default=None)
+
+
+class _Contexto:
+    __slots__ = ("alias", "escribio")
+
+    def __init__(self, alias):
+        self.alias = alias
+        self.escribio = False
+
+
+def alias_replica():
+    """Alias de la réplica configurada (None si no hay)"""
+    alias = getattr(settings, "REPLICA_DB", None)
+    return alias if alias and alias in connections.databases else None
+
+
+def alias_lectura():
+    """Alias al que van las lecturas en este momento (None = el router decide/default)"""
+    contexto = _contexto.get()
+    if contexto is None or contexto.escribio:
+        return None
+    return contexto.alias
+
+
+def _clave(user_id):
+    return f"replica:escritura:{user_id}"
+
+
+def marcar_escritura(user_id):
+    cache.set(_clave(user_id), True, getattr(settings, "REPLICA_STICKY_SEGUNDOS", 15))
+
+
+def escribio_hace_poco(user_id):
+    return bool(cache.get(_clave(user_id)))
+
+
+def puede_usar_replica(request):
+    """Lectura segura de un usuario que no escribió recientemente"""
+    if request.method not in SAFE_METHODS or alias_replica() is None:
+        return False
+    user = getattr(request, "user", None)
+    if user is not None and user.is_authenticated and escribio_hace_poco(user.pk):
+        return False
+    return True
+
+
+@contextmanager
+def en_replica(alias=None):
+    """Marca el bloque: sus lecturas van a la réplica (o a `alias`)"""
+    token = _contexto.set(_Contexto(alias or alias_replica()))
+    try:
+        yield
+    finally:
+        _contexto.reset(token)
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        return alias_lectura()
+
+    def db_for_write(self, model, **hints):
+        contexto = _contexto.get()
+        if contexto is not None:
+            contexto.escribio = True
+        # Explícito: una instancia leída de la réplica se guarda igual en la primaria
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        bases = {DEFAULT_DB_ALIAS, alias_replica()}
+        if obj1._state.db in bases and obj2._state.db in bases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return None
+
+
+# ------------------------------------------------------------------
+# Vistas
+# ------------------------------------------------------------------
+
+class LecturaReplicaMixin:
+    """
+    Viewsets: las acciones en `acciones_replica` leen de la réplica.
+    La decisión se toma después de autenticar (hace falta el usuario).
+    """
+    acciones_replica = ("list",)
+
+    def dispatch(self, request, *args, **kwargs):
+        token = _contexto.set(None)
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            _contexto.reset(token)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if self.action in self.acciones_replica and puede_usar_replica(request):
+            _contexto.set(_Contexto(alias_replica()))
+
+
+def lectura_replica(vista):
+    """Vistas de plantilla (dashboard, listados): mismas reglas que el mixin"""
+    @wraps(vista)
+    def envuelta(request, *args, **kwargs):
+        if not puede_usar_replica(request):
+            return vista(request, *args, **kwargs)
+        with en_replica():
+            return vista(request, *args, **kwargs)
+    return envuelta
+
+
+class ReplicaMiddleware:
+    """Tras un request de escritura autenticado, fija al usuario a la primaria"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if request.method not in SAFE_METHODS and alias_replica() is not None:
+            # DRF (JWT) copia el usuario autenticado al HttpRequest
+            user = getattr(request, "user", None)
+            if user is not None and user.is_authenticated:
+                marcar_escritura(user.pk)
+        return response
@@ -1,24 +1,28 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
+from django.db.models import Prefetch
+from django.urls import reverse
+from django.utils import timezone
 from .models import (
     Proveedores, Marcas, Categorias, Modelos, Estados, 
     Productos, Usuarios, Asignaciones, Mantenciones, 
     HistorialEstados, Documentaciones, Notificaciones, LogAcceso,
-    Sucursales, CodigoQR, Movimientos
+    Sucursales, CodigoQR, Movimientos, PlanMantencion, Auditorias, SnapshotsInventario
 )
 
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+
+from .autenticacion import agregar_claims
+from .services import GarantiaService
+
 # ============= SERIALIZERS BÁSICOS =============
 class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
     @classmethod
     def get_token(cls, user):
         token = super().get_token(user)
 
-        # Campos extra en el payload:
-        token["username"] = user.username
-        token["is_staff"] = user.is_staff
-
-        return token
+        # Campos extra en el payload (los mismos que usa JWTClaimsAuthentication):
+        return agregar_claims(token, user)
 class UserSerializer(serializers.ModelSerializer):
     """Serializer para el User de Django"""
     class Meta:
@@ -54,7 +58,7 @@ class ModelosSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Modelos
-        fields = ['id', 'marca', 'marca_nombre', 'nombre']
+        fields = ['id', 'marca', 'marca_nombre', 'nombre', 'actualizado']
 
 
 class EstadosSerializer(serializers.ModelSerializer):
@@ -76,12 +80,12 @@ class CodigoQRSerializer(serializers.ModelSerializer):
         fields = ['id', 'imagen_qr', 'imagen_qr_url']
     
     def get_imagen_qr_url(self, obj):
-        if obj.imagen_qr:
-            request = self.context.get('request')
-            if request:
-                return request.build_absolute_uri(obj.imagen_qr.url)
-            return obj.imagen_qr.url
-        return None
+        # Endpoint de renderizado bajo demanda (el PNG guardado queda sólo por compatibilidad)
+        url = reverse('productos-qr', args=[obj.producto_id])
+        request = self.context.get('request')
+        if request:
+            return request.build_absolute_uri(url)
+        return url
 
 # ============= SERIALIZERS DE USUARIOS =============
 
@@ -99,8 +103,8 @@ class UsuariosSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Usuarios
-        fields = ['id', 'user', 'username', 'email', 'nombre_completo', 'rol', 'is_staff']
-        read_only_fields = ['id', 'user', 'username', 'email', 'nombre_completo', 'is_staff']
+        fields = ['id', 'user', 'username', 'email', 'nombre_completo', 'rol', 'is_staff', 'sucursales']
+        read_only_fields = ['id', 'user', 'username', 'email', 'nombre_completo', 'is_staff', 'sucursales']
 
     def get_nombre_completo(self, obj):
         return obj.user.get_full_name()
@@ -128,6 +132,7 @@ class UsuariosCreateSerializer(serializers.ModelSerializer):
             'last_name',
             'rol',
             'is_staff',
+            'sucursales',
         ]
         read_only_fields = ['id']
 
@@ -139,6 +144,7 @@ class UsuariosCreateSerializer(serializers.ModelSerializer):
         first_name = validated_data.pop('first_name')
         last_name = validated_data.pop('last_name')
         is_staff = validated_data.pop('is_staff', False)
+        sucursales = validated_data.pop('sucursales', [])
 
         # Crear User de Django
         user = User.objects.create_user(
@@ -153,6 +159,8 @@ class UsuariosCreateSerializer(serializers.ModelSerializer):
 
         # Crear Usuario personalizado (perfil)
         usuario = Usuarios.objects.create(user=user, **validated_data)
+        # Alcance: vacío = todas las sucursales (ver alcance.py)
+        usuario.sucursales.set(sucursales)
         return usuario
 
 
@@ -181,6 +189,7 @@ class UsuariosUpdateSerializer(serializers.ModelSerializer):
             'rol',
             'is_staff',
             'password',
+            'sucursales',
         ]
         read_only_fields = ['id']
 
@@ -215,6 +224,9 @@ class ProductosListSerializer(serializers.ModelSerializer):
     estado_nombre = serializers.CharField(source='estado.nombre', read_only=True)
     sucursal = SucursalSerializer(read_only=True)
     codigo_qr = CodigoQRSerializer(read_only=True)  
+    situacion_garantia = serializers.SerializerMethodField()
+    dias_garantia_restantes = serializers.SerializerMethodField()
+
     class Meta:
         model = Productos
         fields = [
@@ -223,12 +235,21 @@ class ProductosListSerializer(serializers.ModelSerializer):
             'modelo', 'modelo_nombre',
             'categoria', 'categoria_nombre',
             'estado', 'estado_nombre',
-            'documento_factura', 'sucursal', 'codigo_qr', 'garantia_meses', 'estado_garantia'
+            'documento_factura', 'sucursal', 'codigo_qr', 'garantia_meses', 'estado_garantia',
+            'fecha_venc_garantia', 'situacion_garantia', 'dias_garantia_restantes',
+            'actualizado',
         ]
     
     def get_modelo_nombre(self, obj):
         return f"{obj.modelo.marca.nombre} {obj.modelo.nombre}"
 
+    # Calculados al vuelo: `estado_garantia` sólo se actualiza al guardar o con check_garantias
+    def get_situacion_garantia(self, obj):
+        return GarantiaService.situacion(obj.fecha_venc_garantia)
+
+    def get_dias_garantia_restantes(self, obj):
+        return GarantiaService.dias_restantes(obj.fecha_venc_garantia)
+
 
 class ProductosDetailSerializer(serializers.ModelSerializer):
     proveedor = ProveedoresSerializer(read_only=True)
@@ -240,6 +261,9 @@ class ProductosDetailSerializer(serializers.ModelSerializer):
     # QR asociado al producto (OneToOne: related_name='qr')
     codigo_qr = CodigoQRSerializer(read_only=True)
 
+    situacion_garantia = serializers.SerializerMethodField()
+    dias_garantia_restantes = serializers.SerializerMethodField()
+
     # Datos relacionados
     asignaciones = serializers.SerializerMethodField()
     mantenciones = serializers.SerializerMethodField()
@@ -255,6 +279,8 @@ class ProductosDetailSerializer(serializers.ModelSerializer):
             "garantia_meses",
             "fecha_venc_garantia",
             "estado_garantia",
+            "situacion_garantia",
+            "dias_garantia_restantes",
             "proveedor",
             "modelo",
             "categoria",
@@ -266,28 +292,74 @@ class ProductosDetailSerializer(serializers.ModelSerializer):
             "historial_estados",
         ]
 
+    MANTENCIONES_RECIENTES = 5
+    HISTORIAL_RECIENTE = 10
+
+    def get_situacion_garantia(self, obj):
+        return GarantiaService.situacion(obj.fecha_venc_garantia)
+
+    def get_dias_garantia_restantes(self, obj):
+        return GarantiaService.dias_restantes(obj.fecha_venc_garantia)
+
+    @classmethod
+    def prefetches(cls):
+        """
+        Prefetch con querysets recortados: con el queryset de la vista, las tres
+        relaciones se cargan en tres consultas en total (no por producto).
+        """
+        return [
+            Prefetch(
+                "asignaciones",
+                queryset=Asignaciones.objects.filter(
+                    fecha_devolucion__isnull=True
+                ).select_related("usuario__user"),
+                to_attr="asignaciones_activas",
+            ),
+            Prefetch(
+                "mantenciones",
+                # Sólo historial: las programadas (futuras o atrasadas) no desplazan a las realizadas
+                queryset=Mantenciones.objects.filter(realizada=True, fecha__lte=timezone.localdate())
+                .select_related("proveedor").order_by("-fecha")[:cls.MANTENCIONES_RECIENTES],
+                to_attr="mantenciones_recientes",
+            ),
+            Prefetch(
+                "historial_estados",
+                queryset=HistorialEstados.objects.select_related("estado")
+                .order_by("-fecha")[:cls.HISTORIAL_RECIENTE],
+                to_attr="historial_reciente",
+            ),
+        ]
+
     def get_asignaciones(self, obj):
         """
         Solo asignaciones activas (sin fecha_devolucion).
-        Se hace select_related para no spamear la BD.
+        Usa el prefetch si viene del ViewSet; si no, consulta directo.
         """
-        qs = obj.asignaciones.select_related("usuario__user").filter(
-            fecha_devolucion__isnull=True
-        )
+        qs = getattr(obj, "asignaciones_activas", None)
+        if qs is None:
+            qs = obj.asignaciones.select_related("usuario__user").filter(
+                fecha_devolucion__isnull=True
+            )
         return AsignacionesSerializer(qs, many=True).data
 
     def get_mantenciones(self, obj):
         """
-        Últimas 5 mantenciones del producto.
+        Últimas 5 mantenciones realizadas del producto.
         """
-        qs = obj.mantenciones.select_related("proveedor").all()[:5]
+        qs = getattr(obj, "mantenciones_recientes", None)
+        if qs is None:
+            qs = obj.mantenciones.filter(
+                realizada=True, fecha__lte=timezone.localdate()
+            ).select_related("proveedor")[:self.MANTENCIONES_RECIENTES]
         return MantencionesSerializer(qs, many=True).data
 
     def get_historial_estados(self, obj):
         """
         Últimos 10 cambios de estado del producto.
         """
-        qs = obj.historial_estados.select_related("estado").all()[:10]
+        qs = getattr(obj, "historial_reciente", None)
+        if qs is None:
+            qs = obj.historial_estados.select_related("estado").all()[:self.HISTORIAL_RECIENTE]
         return HistorialEstadosSerializer(qs, many=True).data
 
 
@@ -312,7 +384,7 @@ class AsignacionesSerializer(serializers.ModelSerializer):
             'id', 'producto', 'producto_info', 
             'usuario', 'usuario_nombre',
             'fecha_asignacion', 'fecha_devolucion',
-            'estado_asignacion'
+            'estado_asignacion', 'actualizado'
         ]
     
     def get_producto_info(self, obj):
@@ -373,6 +445,8 @@ class MantencionesSerializer(serializers.ModelSerializer):
         source="producto.nro_serie", read_only=True
     )
     proveedor_nombre = serializers.SerializerMethodField()
+    # Si no se indica (null: también en formularios) se deduce de la fecha al crear
+    realizada = serializers.BooleanField(required=False, allow_null=True)
 
     class Meta:
         model = Mantenciones
@@ -383,9 +457,20 @@ class MantencionesSerializer(serializers.ModelSerializer):
             "proveedor",
             "proveedor_nombre",
             "fecha",
-            "descripcion",
-            "costo",
+            "detalle",
+            "plan",
+            "realizada",
+            "actualizado",
         ]
+        read_only_fields = ["plan"]
+
+    def validate(self, attrs):
+        if attrs.get("realizada") is None:
+            attrs.pop("realizada", None)
+            if self.instance is None:
+                # Realizada si la fecha ya pasó (o es hoy), pendiente si es futura
+                attrs["realizada"] = attrs["fecha"] <= timezone.localdate()
+        return attrs
 
     def get_proveedor_nombre(self, obj):
         """
@@ -397,6 +482,29 @@ class MantencionesSerializer(serializers.ModelSerializer):
         return ""
 
 
+class PlanMantencionSerializer(serializers.ModelSerializer):
+    categoria_nombre = serializers.CharField(source="categoria.nombre", read_only=True, default=None)
+    modelo_nombre = serializers.CharField(source="modelo.nombre", read_only=True, default=None)
+
+    class Meta:
+        model = PlanMantencion
+        fields = [
+            "id", "nombre",
+            "categoria", "categoria_nombre",
+            "modelo", "modelo_nombre",
+            "frecuencia_meses", "detalle", "proveedor", "activo",
+        ]
+
+    def validate(self, data):
+        categoria = data.get("categoria", getattr(self.instance, "categoria", None))
+        modelo = data.get("modelo", getattr(self.instance, "modelo", None))
+        if not categoria and not modelo:
+            raise serializers.ValidationError("Debe indicar una categoría o un modelo")
+        if data.get("frecuencia_meses", 1) < 1:
+            raise serializers.ValidationError({"frecuencia_meses": "Debe ser al menos 1 mes"})
+        return data
+
+
 # ============= SERIALIZERS DE HISTORIAL =============
 
 class HistorialEstadosSerializer(serializers.ModelSerializer):
@@ -461,7 +569,7 @@ class NotificacionesSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'categoria', 'titulo', 'mensaje', 
             'producto', 'producto_nombre', 'fecha_creacion',
-            'leido', 'prioridad', 'url_accion', 'tiempo_transcurrido'
+            'leido', 'prioridad', 'url_accion', 'tiempo_transcurrido', 'actualizado'
         ]
         read_only_fields = ['id', 'fecha_creacion']
     
@@ -501,4 +609,34 @@ class LogAccesoSerializer(serializers.ModelSerializer):
 class MovimientosSerializer(serializers.ModelSerializer):
     class Meta:
         model = Movimientos
-        fields = "__all__"
\ No newline at end of file
+        fields = "__all__"
+
+
+# ============= SERIALIZERS DE AUDITORÍAS =============
+
+class AuditoriasSerializer(serializers.ModelSerializer):
+    """Auditoría sin la lista de esperados (la foto se descarga aparte)"""
+    sucursal_nombre = serializers.CharField(source='sucursal.nombre', read_only=True)
+    total_esperados = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Auditorias
+        fields = [
+            'id', 'sucursal', 'sucursal_nombre', 'usuario', 'estado',
+            'iniciada', 'cerrada', 'total_esperados', 'resultado',
+        ]
+        read_only_fields = ['usuario', 'estado', 'iniciada', 'cerrada', 'resultado']
+
+    def get_total_esperados(self, obj):
+        return len(obj.esperados)
+
+
+# ============= SERIALIZERS DE SNAPSHOTS DE INVENTARIO =============
+
+class SnapshotsInventarioSerializer(serializers.ModelSerializer):
+    """Foto mensual sin las columnas por producto (ver la acción `datos`)"""
+    class Meta:
+        model = SnapshotsInventario
+        fields = ['id', 'periodo', 'tomado', 'total_productos', 'resumen']
+        read_only_fields = fields
+
@@ -1,7 +1,40 @@
 # app_inventario/services.py
-from django.db.models import Count
-from .models import Notificaciones, Categorias, Productos 
-from django.db.models import Count, Q
+import base64
+import binascii
+import calendar
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import uuid
+import zlib
+from collections import Counter
+from datetime import datetime, time, timedelta
+from io import BytesIO
+from urllib.parse import parse_qs, urlsplit
+
+import qrcode
+import qrcode.image.svg
+from PIL import Image
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, connection, models, transaction
+from django.db.models import Case, Count, ExpressionWrapper, F, Q, Sum, Value, When, Window
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Cast, Coalesce, Concat, RowNumber, TruncDate, TruncMonth, TruncWeek
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from . import lotes, metricas
+from .models import (
+    Notificaciones, Categorias, Productos,
+    Movimientos, MovimientosDiarios, MovimientosMensuales,
+    Asignaciones, Mantenciones, HistorialEstados, PlanMantencion, Eliminaciones,
+    Auditorias, LecturasAuditoria, SnapshotsInventario, Sucursales, Estados,
+)
 
 class NotificacionService:
     """Servicio para gestionar notificaciones del inventario"""
@@ -68,4 +101,1575 @@ class NotificacionService:
             mensaje=mensaje,
             usuario=usuario,
             prioridad='media'
-        )
\ No newline at end of file
+        )
+
+
+class RollupMovimientosService:
+    """
+    Mantiene las tablas de totales diarios y mensuales de Movimientos.
+
+    - `aplicar` suma (o resta, con signo=-1) un movimiento a sus buckets.
+    - `reconstruir` regenera los buckets de una ventana de fechas desde el ledger.
+    - `tendencia` lee los buckets para los gráficos (día, semana o mes).
+    """
+
+    PERIODOS = ("dia", "semana", "mes")
+    BATCH_SIZE = 1000
+
+    @staticmethod
+    def buckets(fecha):
+        """Devuelve (día, primer día del mes) en la zona horaria local"""
+        dia = timezone.localdate(fecha)
+        return dia, dia.replace(day=1)
+
+    @classmethod
+    def aplicar(cls, movimiento, signo=1):
+        dia, mes = cls.buckets(movimiento.fecha)
+        for modelo, fecha in ((MovimientosDiarios, dia), (MovimientosMensuales, mes)):
+            cls._incrementar(
+                modelo, fecha, movimiento.sku, movimiento.tipo,
+                signo * movimiento.cantidad, signo,
+            )
+
+    @staticmethod
+    def _incrementar(modelo, fecha, sku, tipo, cantidad, movimientos):
+        filtro = modelo.objects.filter(fecha=fecha, sku=sku, tipo=tipo)
+        with transaction.atomic():
+            actualizados = filtro.update(
+                cantidad=F('cantidad') + cantidad,
+                total_movimientos=F('total_movimientos') + movimientos,
+            )
+            if not actualizados and movimientos > 0:
+                try:
+                    with transaction.atomic():
+                        modelo.objects.create(
+                            fecha=fecha, sku=sku, tipo=tipo,
+                            cantidad=cantidad, total_movimientos=movimientos,
+                        )
+                except IntegrityError:
+                    # Otro proceso creó el bucket entre el UPDATE y el INSERT
+                    filtro.update(
+                        cantidad=F('cantidad') + cantidad,
+                        total_movimientos=F('total_movimientos') + movimientos,
+                    )
+            if movimientos < 0:
+                filtro.filter(total_movimientos__lte=0).delete()
+
+    @classmethod
+    def reconstruir(cls, desde, hasta, tamano=BATCH_SIZE):
+        """
+        Regenera los rollups entre `desde` y `hasta` (fechas, inclusive).
+        Los meses se recalculan completos aunque la ventana los corte.
+        Los buckets se insertan de a `tamano` a medida que se leen.
+        Retorna (filas_diarias, filas_mensuales).
+        """
+        mes_desde = desde.replace(day=1)
+        mes_hasta = (hasta.replace(day=1) + timedelta(days=32)).replace(day=1)
+
+        with transaction.atomic():
+            MovimientosDiarios.objects.filter(fecha__range=(desde, hasta)).delete()
+            diarios = cls._agregar(
+                TruncDate('fecha'), desde, hasta + timedelta(days=1), MovimientosDiarios, tamano
+            )
+
+            MovimientosMensuales.objects.filter(
+                fecha__gte=mes_desde, fecha__lt=mes_hasta
+            ).delete()
+            mensuales = cls._agregar(
+                TruncMonth('fecha', output_field=models.DateField()),
+                mes_desde, mes_hasta, MovimientosMensuales, tamano,
+            )
+
+        return diarios, mensuales
+
+    @classmethod
+    def _agregar(cls, trunc, desde, hasta, modelo, tamano=BATCH_SIZE):
+        """Agrupa el ledger en [desde, hasta) con `trunc` y lo inserta en `modelo`"""
+        tz = timezone.get_current_timezone()
+        inicio = datetime.combine(desde, time.min, tzinfo=tz)
+        fin = datetime.combine(hasta, time.min, tzinfo=tz)
+
+        filas = (
+            Movimientos.objects.filter(fecha__gte=inicio, fecha__lt=fin)
+            .annotate(bucket=trunc)
+            .values('bucket', 'sku', 'tipo')
+            .annotate(total=Sum('cantidad'), n=Count('id'))
+            .order_by()
+        )
+        objetos = (
+            modelo(
+                fecha=f['bucket'], sku=f['sku'], tipo=f['tipo'],
+                cantidad=f['total'], total_movimientos=f['n'],
+            )
+            for f in filas.iterator(chunk_size=tamano)
+        )
+        total = 0
+        for lote in lotes.agrupar(objetos, tamano):
+            modelo.objects.bulk_create(lote)
+            total += len(lote)
+        return total
+
+    @classmethod
+    def tendencia(cls, periodo="dia", desde=None, hasta=None, skus=None, por_sku=False):
+        """
+        Totales por periodo y tipo leídos desde los rollups.
+        `semana` se agrega sobre los totales diarios (lunes como inicio); como
+        `mes`, `desde` se lleva al inicio de su periodo para no cortar el primero.
+        """
+        modelo = MovimientosMensuales if periodo == "mes" else MovimientosDiarios
+        qs = modelo.objects.all()
+
+        if desde:
+            if periodo == "mes":
+                desde = desde.replace(day=1)
+            elif periodo == "semana":
+                desde -= timedelta(days=desde.weekday())
+            qs = qs.filter(fecha__gte=desde)
+        if hasta:
+            qs = qs.filter(fecha__lte=hasta)
+        if skus:
+            qs = qs.filter(sku__in=skus)
+
+        if periodo == "semana":
+            qs = qs.annotate(periodo=TruncWeek('fecha'))
+        else:
+            qs = qs.annotate(periodo=F('fecha'))
+
+        campos = ['periodo', 'tipo'] + (['sku'] if por_sku else [])
+        return list(
+            qs.values(*campos)
+            .annotate(cantidad_total=Sum('cantidad'), movimientos=Sum('total_movimientos'))
+            .order_by(*campos)
+        )
+
+class BusquedaProductosService:
+    """
+    Índice de búsqueda de productos.
+
+    - `Productos.texto_busqueda`: columna desnormalizada (serie, marca, modelo, categoría).
+    - SQLite: tabla FTS5 con tokenizer trigram, ranking con bm25.
+    - PostgreSQL: índice GIN pg_trgm sobre la columna, ranking por similitud trigram.
+    - Otros motores: icontains sobre la columna desnormalizada.
+    """
+
+    FTS_TABLE = "app_inventario_productos_fts"
+    MIN_TRIGRAMA = 3
+    _fts_disponible = {}
+
+    @staticmethod
+    def texto_para(producto):
+        modelo = producto.modelo
+        partes = [producto.nro_serie, modelo.marca.nombre, modelo.nombre, producto.categoria.nombre]
+        return " ".join(p for p in partes if p).lower()
+
+    @classmethod
+    def usa_fts(cls):
+        if connection.vendor != "sqlite":
+            return False
+        if connection.alias not in cls._fts_disponible:
+            cls._fts_disponible[connection.alias] = (
+                cls.FTS_TABLE in connection.introspection.table_names()
+            )
+        return cls._fts_disponible[connection.alias]
+
+    @classmethod
+    def sincronizar(cls, productos):
+        """Actualiza las filas FTS de los productos dados (solo SQLite)"""
+        if not cls.usa_fts():
+            return
+        filas = [(p.pk, p.texto_busqueda) for p in productos]
+        with connection.cursor() as cursor:
+            cursor.executemany(f"DELETE FROM {cls.FTS_TABLE} WHERE rowid = %s", [(pk,) for pk, _ in filas])
+            cursor.executemany(f"INSERT INTO {cls.FTS_TABLE}(rowid, texto) VALUES (%s, %s)", filas)
+
+    @classmethod
+    def eliminar(cls, pk):
+        if not cls.usa_fts():
+            return
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {cls.FTS_TABLE} WHERE rowid = %s", [pk])
+
+    @classmethod
+    def reindexar(cls, queryset=None, batch_size=500):
+        """
+        Recalcula `texto_busqueda` (y el índice FTS) de los productos dados.
+        Se usa al renombrar marcas/modelos/categorías y desde `reindexar_busqueda`.
+        """
+        if queryset is None:
+            queryset = Productos.objects.all()
+        qs = queryset.select_related("modelo__marca", "categoria")
+        campos = ("nro_serie", "modelo__nombre", "modelo__marca__nombre", "categoria__nombre")
+
+        total = 0
+        for lote in lotes.por_lotes(qs, batch_size, campos):
+            for producto in lote:
+                producto.texto_busqueda = cls.texto_para(producto)
+            total += cls._guardar_lote(lote)
+        return total
+
+    @classmethod
+    def _guardar_lote(cls, lote):
+        Productos.objects.bulk_update(lote, ["texto_busqueda"])
+        cls.sincronizar(lote)
+        return len(lote)
+
+    @classmethod
+    def buscar(cls, queryset, termino):
+        """
+        Filtra `queryset` por `termino` y anota `relevancia` (mayor = mejor).
+        Coincidencias exactas o por prefijo del número de serie suben al inicio.
+        """
+        termino = (termino or "").strip().lower()
+        if not termino:
+            return queryset
+
+        palabras = termino.split()
+        largas = [p for p in palabras if len(p) >= cls.MIN_TRIGRAMA]
+        cortas = [p for p in palabras if len(p) < cls.MIN_TRIGRAMA]
+
+        if cls.usa_fts() and largas:
+            match = " AND ".join('"{}"'.format(p.replace('"', '""')) for p in largas)
+            tabla = Productos._meta.db_table
+            queryset = queryset.filter(
+                pk__in=RawSQL(f"SELECT rowid FROM {cls.FTS_TABLE} WHERE {cls.FTS_TABLE} MATCH %s", [match])
+            )
+            relevancia = RawSQL(
+                f"SELECT -bm25({cls.FTS_TABLE}) FROM {cls.FTS_TABLE} "
+                f"WHERE {cls.FTS_TABLE} MATCH %s AND rowid = {tabla}.id",
+                [match],
+                output_field=models.FloatField(),
+            )
+        else:
+            cortas = palabras
+            if connection.vendor == "postgresql":
+                from django.contrib.postgres.search import TrigramWordSimilarity
+                relevancia = TrigramWordSimilarity(Value(termino), "texto_busqueda")
+            else:
+                relevancia = Value(0.0, output_field=models.FloatField())
+
+        for palabra in cortas:
+            queryset = queryset.filter(texto_busqueda__icontains=palabra)
+
+        bonus = Case(
+            When(nro_serie__iexact=termino, then=Value(100.0)),
+            When(nro_serie__istartswith=termino, then=Value(10.0)),
+            default=Value(0.0),
+            output_field=models.FloatField(),
+        )
+        return queryset.annotate(relevancia=ExpressionWrapper(
+            relevancia + bonus, output_field=models.FloatField()
+        ))
+
+    @classmethod
+    def sugerencias(cls, termino, limite=10, queryset=None):
+        """Sugerencias de typeahead ordenadas por relevancia (sobre `queryset`, p. ej. ya acotado)"""
+        if not (termino or "").strip():
+            return []
+        if queryset is None:
+            queryset = Productos.objects.all()
+        qs = cls.buscar(queryset.select_related("modelo__marca", "categoria"), termino)
+        return [
+            {
+                "id": p.id,
+                "nro_serie": p.nro_serie,
+                "modelo": f"{p.modelo.marca.nombre} {p.modelo.nombre}",
+                "categoria": p.categoria.nombre,
+                "relevancia": round(p.relevancia, 4),
+            }
+            for p in qs.order_by("-relevancia", "nro_serie")[:limite]
+        ]
+
+
+class TimelineProductoService:
+    """
+    Línea de tiempo unificada de un producto: asignaciones, devoluciones,
+    mantenciones, cambios de estado, movimientos (por SKU = nro_serie) y
+    notificaciones, en una sola consulta UNION ALL ordenada por
+    (momento, tipo, ref_id) descendente.
+
+    La paginación es por cursor (keyset): el filtro "anterior al cursor" se
+    aplica dentro de cada rama, así cada página cuesta una consulta sin OFFSET.
+    """
+
+    TIPOS = ("asignacion", "devolucion", "mantencion", "estado", "movimiento", "notificacion")
+    LIMITE_DEFECTO = 50
+    LIMITE_MAXIMO = 200
+
+    @staticmethod
+    def _momento(campo):
+        # Fechas y datetimes se normalizan al mismo tipo para el ORDER BY de la unión
+        return Cast(campo, output_field=models.DateTimeField())
+
+    @staticmethod
+    def _texto(*partes):
+        valores = [p if hasattr(p, "resolve_expression") else Value(p) for p in partes]
+        if len(valores) == 1:
+            return Cast(valores[0], output_field=models.TextField())
+        return Concat(*valores, output_field=models.TextField())
+
+    @classmethod
+    def _ramas(cls, producto):
+        asignaciones = Asignaciones.objects.filter(producto=producto)
+        usuario = Coalesce(F("usuario__user__username"), Value(""))
+        return {
+            "asignacion": (
+                asignaciones, "fecha_asignacion",
+                cls._texto("Asignado a ", usuario), cls._texto(""),
+            ),
+            "devolucion": (
+                asignaciones.filter(fecha_devolucion__isnull=False), "fecha_devolucion",
+                cls._texto("Devuelto por ", usuario), cls._texto(""),
+            ),
+            "mantencion": (
+                Mantenciones.objects.filter(producto=producto, realizada=True), "fecha",
+                cls._texto("Mantención"), cls._texto(F("detalle")),
+            ),
+            "estado": (
+                HistorialEstados.objects.filter(producto=producto), "fecha",
+                cls._texto("Estado: ", F("estado__nombre")),
+                cls._texto(Coalesce(F("comentario"), Value(""))),
+            ),
+            "movimiento": (
+                Movimientos.objects.filter(sku=producto.nro_serie), "fecha",
+                cls._texto(F("tipo"), " x", Cast(F("cantidad"), output_field=models.TextField())),
+                cls._texto(F("comentarios")),
+            ),
+            "notificacion": (
+                Notificaciones.objects.filter(producto=producto, fecha_creacion__isnull=False),
+                "fecha_creacion",
+                cls._texto(Coalesce(F("titulo"), Value(""))), cls._texto(F("mensaje")),
+            ),
+        }
+
+    @classmethod
+    def eventos(cls, producto, cursor=None, limite=LIMITE_DEFECTO, tipos=None):
+        """
+        Retorna (eventos, siguiente_cursor). `cursor` es el valor opaco devuelto
+        por la página anterior; `tipos` restringe las ramas incluidas.
+        """
+        limite = min(max(int(limite), 1), cls.LIMITE_MAXIMO)
+        posicion = cls.decodificar_cursor(cursor) if cursor else None
+
+        consultas = []
+        for tipo, (qs, campo, titulo, detalle) in cls._ramas(producto).items():
+            if tipos and tipo not in tipos:
+                continue
+            qs = qs.annotate(
+                ev_momento=cls._momento(campo),
+                ev_tipo=Value(tipo, output_field=models.CharField()),
+                ev_ref_id=F("id"),
+                ev_titulo=titulo,
+                ev_detalle=detalle,
+            )
+            if posicion:
+                qs = qs.filter(cls._antes_de(tipo, *posicion))
+            consultas.append(
+                qs.values("ev_momento", "ev_tipo", "ev_ref_id", "ev_titulo", "ev_detalle").order_by()
+            )
+
+        if not consultas:
+            return [], None
+
+        union = consultas[0].union(*consultas[1:], all=True).order_by(
+            "-ev_momento", "-ev_tipo", "-ev_ref_id"
+        )
+        filas = list(union[:limite + 1])
+
+        siguiente = None
+        if len(filas) > limite:
+            filas = filas[:limite]
+            ultima = filas[-1]
+            siguiente = cls.codificar_cursor(ultima["ev_momento"], ultima["ev_tipo"], ultima["ev_ref_id"])
+
+        eventos = [
+            {
+                "momento": f["ev_momento"],
+                "tipo": f["ev_tipo"],
+                "ref_id": f["ev_ref_id"],
+                "titulo": f["ev_titulo"],
+                "detalle": f["ev_detalle"],
+            }
+            for f in filas
+        ]
+        return eventos, siguiente
+
+    @classmethod
+    def _antes_de(cls, tipo, momento, cursor_tipo, cursor_id):
+        """Filas de esta rama que van después del cursor en orden descendente"""
+        momento = cls._momento(Value(momento, output_field=models.DateTimeField()))
+        if tipo < cursor_tipo:
+            return Q(ev_momento__lte=momento)
+        if tipo > cursor_tipo:
+            return Q(ev_momento__lt=momento)
+        return Q(ev_momento__lt=momento) | Q(ev_momento=momento, ev_ref_id__lt=cursor_id)
+
+    @staticmethod
+    def codificar_cursor(momento, tipo, ref_id):
+        crudo = f"{momento.isoformat()}|{tipo}|{ref_id}"
+        return base64.urlsafe_b64encode(crudo.encode()).decode()
+
+    @classmethod
+    def decodificar_cursor(cls, cursor):
+        """Lanza ValueError si el cursor no es válido"""
+        try:
+            momento, tipo, ref_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+            momento = datetime.fromisoformat(momento)
+            ref_id = int(ref_id)
+        except (ValueError, UnicodeDecodeError, binascii.Error) as exc:
+            raise ValueError("cursor inválido") from exc
+        if tipo not in cls.TIPOS:
+            raise ValueError("cursor inválido")
+        return momento, tipo, ref_id
+
+
+class CacheDetalleProductoService:
+    """
+    Cache del payload de GET /api/productos/{id}/.
+
+    - Una entrada por producto: {"gen": generación, "payloads": {host: data}}
+      (el payload incluye URLs absolutas del QR, por eso se separa por host).
+    - Escrituras en el producto o sus relaciones borran su entrada (signals).
+    - Cambios en catálogos (marcas, modelos, estados...) suben la generación
+      global, lo que invalida todas las entradas sin recorrerlas.
+    """
+
+    PREFIJO = "producto_detalle"
+    CLAVE_GENERACION = "producto_detalle:gen"
+
+    @classmethod
+    def _clave(cls, producto_id):
+        return f"{cls.PREFIJO}:{producto_id}"
+
+    @staticmethod
+    def _ttl():
+        return getattr(settings, "DETALLE_PRODUCTO_CACHE_TTL", 300)
+
+    @classmethod
+    def obtener(cls, producto_id, host):
+        valores = cache.get_many([cls._clave(producto_id), cls.CLAVE_GENERACION])
+        entrada = valores.get(cls._clave(producto_id))
+        data = None
+        if entrada and entrada["gen"] == valores.get(cls.CLAVE_GENERACION, 0):
+            data = entrada["payloads"].get(host)
+        metricas.observar_cache("detalle_producto", data is not None)
+        return data
+
+    @classmethod
+    def guardar(cls, producto_id, host, data):
+        generacion = cache.get(cls.CLAVE_GENERACION, 0)
+        entrada = cache.get(cls._clave(producto_id))
+        if not entrada or entrada["gen"] != generacion:
+            entrada = {"gen": generacion, "payloads": {}}
+        entrada["payloads"][host] = data
+        cache.set(cls._clave(producto_id), entrada, cls._ttl())
+
+    @classmethod
+    def invalidar(cls, *producto_ids):
+        cache.delete_many([cls._clave(pk) for pk in producto_ids])
+
+    @classmethod
+    def invalidar_todo(cls):
+        try:
+            cache.incr(cls.CLAVE_GENERACION)
+        except ValueError:
+            # La clave no existe todavía (o expiró)
+            cache.set(cls.CLAVE_GENERACION, 1, None)
+
+
+class VersionProductosService:
+    """
+    Sellos de versión por producto para el cache de fragmentos de plantilla
+    (filas de listar_productos.html).
+
+    - El sello cambia con cualquier escritura del producto o sus relaciones
+      (las mismas señales que invalidan el detalle).
+    - Incluye la generación global de CacheDetalleProductoService: renombrar
+      una marca, un estado, etc. cambia el sello de todas las filas.
+    - Si el sello de un producto no está en cache se crea uno nuevo, así un
+      fragmento viejo nunca vuelve a coincidir.
+    """
+
+    PREFIJO = "producto_version"
+
+    @classmethod
+    def _clave(cls, producto_id):
+        return f"{cls.PREFIJO}:{producto_id}"
+
+    @staticmethod
+    def _nuevo():
+        return uuid.uuid4().hex[:12]
+
+    @classmethod
+    def sellos(cls, producto_ids):
+        """{producto_id: sello} en una sola lectura de cache"""
+        claves = {cls._clave(pk): pk for pk in producto_ids}
+        valores = cache.get_many([*claves, CacheDetalleProductoService.CLAVE_GENERACION])
+        generacion = valores.pop(CacheDetalleProductoService.CLAVE_GENERACION, 0)
+
+        nuevos = {clave: cls._nuevo() for clave in claves if clave not in valores}
+        if nuevos:
+            cache.set_many(nuevos, None)
+            valores.update(nuevos)
+        return {pk: f"{generacion}.{valores[clave]}" for clave, pk in claves.items()}
+
+    @classmethod
+    def invalidar(cls, *producto_ids):
+        cache.set_many({cls._clave(pk): cls._nuevo() for pk in producto_ids}, None)
+
+
+class ResumenInventarioService:
+    """
+    Agregados del dashboard particionados por sucursal.
+
+    - Una entrada de cache por sucursal (y otra para los productos sin
+      sucursal): total, conteos por estado y por categoría, asignados y
+      los últimos productos comprados.
+    - El dashboard suma las particiones del alcance del usuario: el de una
+      sucursal lee sólo su entrada y, si falta, la calcula recorriendo sólo
+      sus productos (filtro por sucursal_id, con índice).
+    - Las señales de Productos/Asignaciones borran la partición afectada;
+      `DASHBOARD_CACHE_TTL` acota lo que no pasa por señales.
+    """
+
+    PREFIJO = "dashboard:sucursal"
+    ULTIMOS = 5
+
+    @classmethod
+    def _clave(cls, sucursal_id):
+        return f"{cls.PREFIJO}:{'sin' if sucursal_id is None else sucursal_id}"
+
+    @staticmethod
+    def _ttl():
+        return getattr(settings, "DASHBOARD_CACHE_TTL", 300)
+
+    @staticmethod
+    def _filtro(sucursal_ids, prefijo=""):
+        ids = [s for s in sucursal_ids if s is not None]
+        filtro = Q(**{f"{prefijo}sucursal_id__in": ids})
+        if None in sucursal_ids:
+            filtro |= Q(**{f"{prefijo}sucursal__isnull": True})
+        return filtro
+
+    @classmethod
+    def resumen(cls, sucursales=None):
+        """Agregados de las sucursales dadas (None = todas, incluidos los productos sin sucursal)"""
+        if sucursales is None:
+            sucursales = [*Sucursales.objects.values_list("id", flat=True), None]
+        claves = {cls._clave(s): s for s in sucursales}
+        particiones = cache.get_many(list(claves))
+        faltan = [s for clave, s in claves.items() if clave not in particiones]
+        metricas.observar_cache("dashboard", not faltan)
+        if faltan:
+            nuevas = {cls._clave(s): p for s, p in cls._calcular(faltan).items()}
+            cache.set_many(nuevas, cls._ttl())
+            particiones.update(nuevas)
+        return cls._sumar(particiones.values())
+
+    @classmethod
+    def _calcular(cls, sucursal_ids):
+        particiones = {
+            s: {"total": 0, "por_estado": {}, "por_categoria": {}, "asignados": 0, "ultimos": []}
+            for s in sucursal_ids
+        }
+        conteos = (
+            Productos.objects.filter(cls._filtro(sucursal_ids))
+            .values("sucursal_id", "estado_id", "categoria_id").annotate(n=Count("id")).order_by()
+        )
+        for fila in conteos:
+            p = particiones[fila["sucursal_id"]]
+            p["total"] += fila["n"]
+            p["por_estado"][fila["estado_id"]] = p["por_estado"].get(fila["estado_id"], 0) + fila["n"]
+            p["por_categoria"][fila["categoria_id"]] = p["por_categoria"].get(fila["categoria_id"], 0) + fila["n"]
+
+        asignados = (
+            Asignaciones.objects.filter(cls._filtro(sucursal_ids, "producto__"), fecha_devolucion__isnull=True)
+            .values("producto__sucursal_id").annotate(n=Count("id")).order_by()
+        )
+        for fila in asignados:
+            particiones[fila["producto__sucursal_id"]]["asignados"] = fila["n"]
+
+        # Los N más recientes de cada sucursal en una sola consulta (ROW_NUMBER por sucursal)
+        ultimos = (
+            Productos.objects.filter(cls._filtro(sucursal_ids))
+            .annotate(orden=Window(
+                RowNumber(), partition_by=F("sucursal_id"), order_by=[F("fecha_compra").desc(), F("id").desc()],
+            ))
+            .filter(orden__lte=cls.ULTIMOS)
+            .order_by("sucursal_id", "orden").values_list("sucursal_id", "fecha_compra", "id")
+        )
+        for sucursal_id, fecha_compra, pk in ultimos:
+            particiones[sucursal_id]["ultimos"].append((fecha_compra, pk))
+        return particiones
+
+    @classmethod
+    def _sumar(cls, particiones):
+        total = {"total": 0, "por_estado": Counter(), "por_categoria": Counter(), "asignados": 0, "ultimos": []}
+        for p in particiones:
+            total["total"] += p["total"]
+            total["por_estado"].update(p["por_estado"])
+            total["por_categoria"].update(p["por_categoria"])
+            total["asignados"] += p["asignados"]
+            total["ultimos"].extend(p["ultimos"])
+        total["ultimos"] = [pk for _, pk in sorted(total["ultimos"], reverse=True)[:cls.ULTIMOS]]
+        return total
+
+    @classmethod
+    def invalidar(cls, *sucursal_ids):
+        cache.delete_many([cls._clave(s) for s in set(sucursal_ids)])
+
+
+class QRService:
+    """
+    Renderizado de códigos QR bajo demanda.
+
+    - El contenido del QR es `QR_BASE_URL` + la página de detalle del producto,
+      así que cambiar de host sólo requiere cambiar el setting.
+    - Cada imagen se guarda en disco bajo el hash de (contenido, tamaño, formato);
+      al superar `QR_CACHE_MAX_BYTES` se borran las menos usadas (mtime = último uso).
+    """
+
+    FORMATOS = {"png": "image/png", "svg": "image/svg+xml"}
+    TAMANO_DEFECTO = 300
+    # Tamaños que acepta el endpoint (en px): pocas variantes por producto en la cache
+    TAMANOS = (150, 300, 600)
+    BORDE = 4
+
+    _bytes_en_cache = None
+    _lock = threading.Lock()
+
+    @staticmethod
+    def contenido_producto(producto_id):
+        base = settings.QR_BASE_URL
+        if not base.endswith("/"):
+            base += "/"
+        return f"{base}paginas/productos/detalle.html?id={producto_id}"
+
+    @staticmethod
+    def clave(contenido, tamano, formato):
+        return hashlib.sha256(f"{contenido}\0{tamano}\0{formato}".encode()).hexdigest()
+
+    @classmethod
+    def validar(cls, formato, tamano):
+        """Normaliza los parámetros del endpoint; ValueError si no son válidos"""
+        formato = (formato or "png").lower()
+        if formato not in cls.FORMATOS:
+            raise ValueError(f"Formato inválido. Use: {', '.join(cls.FORMATOS)}")
+        try:
+            tamano = int(tamano or cls.TAMANO_DEFECTO)
+        except (TypeError, ValueError):
+            raise ValueError("El tamaño debe ser un número entero")
+        if tamano not in cls.TAMANOS:
+            raise ValueError(f"El tamaño debe ser uno de: {', '.join(map(str, cls.TAMANOS))}")
+        return formato, tamano
+
+    @classmethod
+    def renderizar(cls, contenido, tamano, formato):
+        """Genera la imagen sin pasar por la cache"""
+        qr = qrcode.QRCode(border=cls.BORDE, error_correction=qrcode.constants.ERROR_CORRECT_M)
+        qr.add_data(contenido)
+        qr.make(fit=True)
+        modulos = qr.modules_count + 2 * cls.BORDE
+        qr.box_size = max(1, tamano // modulos)
+
+        if formato == "svg":
+            svg = qr.make_image(image_factory=qrcode.image.svg.SvgPathImage).to_string()
+            # El factory usa mm; se fija el tamaño en px y el viewBox mantiene la escala
+            return re.sub(
+                rb'width="[^"]+" height="[^"]+"',
+                f'width="{tamano}" height="{tamano}"'.encode(),
+                svg, count=1,
+            )
+
+        # PNG con módulos de tamaño entero, centrado en un lienzo de `tamano` px
+        imagen = qr.make_image(fill_color="black", back_color="white").get_image()
+        lienzo = Image.new("1", (tamano, tamano), 1)
+        offset = (tamano - imagen.size[0]) // 2
+        lienzo.paste(imagen, (offset, offset))
+        buffer = BytesIO()
+        lienzo.save(buffer, format="PNG", optimize=True)
+        return buffer.getvalue()
+
+    @classmethod
+    def obtener(cls, contenido, tamano, formato):
+        """Devuelve (bytes, clave), desde disco si ya se generó"""
+        clave = cls.clave(contenido, tamano, formato)
+        ruta = os.path.join(settings.QR_CACHE_DIR, clave[:2], f"{clave}.{formato}")
+        try:
+            with open(ruta, "rb") as f:
+                datos = f.read()
+            os.utime(ruta)  # marca de uso para el LRU
+            metricas.observar_cache("qr_disco", True)
+            return datos, clave
+        except FileNotFoundError:
+            metricas.observar_cache("qr_disco", False)
+
+        datos = cls.renderizar(contenido, tamano, formato)
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        # Escritura atómica: otro worker nunca lee un archivo a medias
+        fd, temporal = tempfile.mkstemp(dir=os.path.dirname(ruta), suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(datos)
+        os.replace(temporal, ruta)
+        cls._registrar_escritura(len(datos))
+        return datos, clave
+
+    @classmethod
+    def _archivos(cls):
+        for raiz, _, nombres in os.walk(settings.QR_CACHE_DIR):
+            for nombre in nombres:
+                if nombre.endswith(".tmp"):
+                    continue
+                ruta = os.path.join(raiz, nombre)
+                try:
+                    st = os.stat(ruta)
+                except FileNotFoundError:
+                    continue
+                yield ruta, st.st_size, st.st_mtime
+
+    @classmethod
+    def _registrar_escritura(cls, nbytes):
+        with cls._lock:
+            if cls._bytes_en_cache is None:
+                cls._bytes_en_cache = sum(tam for _, tam, _ in cls._archivos())
+            else:
+                cls._bytes_en_cache += nbytes
+            if cls._bytes_en_cache > settings.QR_CACHE_MAX_BYTES:
+                cls._bytes_en_cache = cls.purgar(int(settings.QR_CACHE_MAX_BYTES * 0.9))
+
+    @classmethod
+    def purgar(cls, limite_bytes=0):
+        """Borra las imágenes menos usadas hasta quedar bajo `limite_bytes`; devuelve el total final"""
+        archivos = sorted(cls._archivos(), key=lambda a: a[2])
+        total = sum(tam for _, tam, _ in archivos)
+        for ruta, tam, _ in archivos:
+            if total <= limite_bytes:
+                break
+            try:
+                os.remove(ruta)
+            except FileNotFoundError:
+                pass
+            total -= tam
+        return total
+
+
+class EtiquetasService:
+    """Selección de productos y datos para las hojas de etiquetas (ver etiquetas.py)"""
+
+    @staticmethod
+    def filtrar(sucursal=None, categoria=None, desde=None, hasta=None, ids=None):
+        """
+        Productos a etiquetar. Los filtros se combinan; `desde`/`hasta` son
+        fechas de compra. Lanza ValueError si algún valor no es válido.
+        """
+        qs = Productos.objects.all()
+        try:
+            if ids:
+                if isinstance(ids, str):
+                    ids = [i for i in ids.split(",") if i.strip()]
+                qs = qs.filter(pk__in=[int(i) for i in ids])
+            if sucursal:
+                qs = qs.filter(sucursal_id=int(sucursal))
+            if categoria:
+                qs = qs.filter(categoria_id=int(categoria))
+        except (TypeError, ValueError):
+            raise ValueError("Los filtros 'ids', 'sucursal' y 'categoria' deben ser numéricos")
+
+        for nombre, valor, lookup in (("desde", desde, "gte"), ("hasta", hasta, "lte")):
+            if not valor:
+                continue
+            fecha = valor if hasattr(valor, "year") else parse_date(valor)
+            if fecha is None:
+                raise ValueError(f"'{nombre}' debe tener formato YYYY-MM-DD")
+            qs = qs.filter(**{f"fecha_compra__{lookup}": fecha})
+        return qs
+
+    @staticmethod
+    def etiquetas(queryset, tamano=lotes.TAMANO_LOTE):
+        """
+        (contenido_qr, nro_serie, 'Marca Modelo') en orden de ID, leídos por
+        lotes a medida que se consumen (generador: el total sale de `count()`).
+        """
+        filas = queryset.values_list("id", "nro_serie", "modelo__marca__nombre", "modelo__nombre")
+        return (
+            (QRService.contenido_producto(pk), serie, f"{marca} {modelo}".strip())
+            for pk, serie, marca, modelo in lotes.iterar(filas, tamano)
+        )
+
+
+class CambioEstadoService:
+    """
+    Cambio de estado de muchos productos a la vez (p. ej. un laboratorio
+    completo a "En Mantención") en una transacción:
+
+    - un UPDATE de `estado_id` (por lote de ids) en vez de un save() por producto,
+    - el historial con bulk_create,
+    - una sola notificación con el resumen.
+
+    UPDATE y bulk_create no disparan señales: lo que hacen las señales de
+    Productos/HistorialEstados para un cambio de estado (gauge de productos
+    por estado, cache del detalle, sellos de las filas) se hace acá.
+    El estado no participa en el cálculo de garantía ni en el texto de
+    búsqueda, así que no hay nada más que recalcular.
+    """
+
+    MAXIMO = 10000
+    BATCH_SIZE = 500
+    SERIES_EN_MENSAJE = 10
+
+    @classmethod
+    def cambiar(cls, producto_ids, estado, comentario="", sucursales=None):
+        """
+        Retorna {"actualizados", "sin_cambio", "no_encontrados"}.
+        Los productos que ya estaban en `estado` no generan historial.
+        Con `sucursales` (alcance del usuario) los de otras sucursales
+        cuentan como no encontrados.
+        """
+        ids = sorted(set(producto_ids))
+        if len(ids) > cls.MAXIMO:
+            raise ValueError(f"Máximo {cls.MAXIMO} productos por cambio")
+
+        with transaction.atomic():
+            base = Productos.objects.select_for_update()
+            if sucursales is not None:
+                base = base.filter(sucursal_id__in=sucursales)
+            filas = []
+            for lote in lotes.agrupar(ids, cls.BATCH_SIZE):
+                filas.extend(
+                    base.filter(id__in=lote).order_by()
+                    .values_list("id", "nro_serie", "estado_id", "sucursal_id")
+                )
+            encontrados = {fila[0] for fila in filas}
+            cambian = [fila for fila in filas if fila[2] != estado.pk]
+            cambian_ids = [fila[0] for fila in cambian]
+
+            ahora = timezone.now()
+            for lote in lotes.agrupar(cambian_ids, cls.BATCH_SIZE):
+                Productos.objects.filter(id__in=lote).update(estado=estado, actualizado=ahora)
+            HistorialEstados.objects.bulk_create(
+                [HistorialEstados(producto_id=pk, estado=estado, comentario=comentario) for pk in cambian_ids],
+                batch_size=cls.BATCH_SIZE,
+            )
+
+            if cambian:
+                cls._notificar(cambian, estado)
+                anteriores = {}
+                for fila in cambian:
+                    anteriores[fila[2]] = anteriores.get(fila[2], 0) + 1
+                for anterior, cantidad in anteriores.items():
+                    metricas.incrementar("productos_estado", -cantidad, anterior)
+                metricas.incrementar("productos_estado", len(cambian), estado.pk)
+
+                def invalidar():
+                    CacheDetalleProductoService.invalidar(*cambian_ids)
+                    VersionProductosService.invalidar(*cambian_ids)
+                    ResumenInventarioService.invalidar(*(fila[3] for fila in cambian))
+                transaction.on_commit(invalidar)
+
+        return {
+            "actualizados": len(cambian),
+            "sin_cambio": len(filas) - len(cambian),
+            "no_encontrados": [pk for pk in ids if pk not in encontrados],
+        }
+
+    @classmethod
+    def _notificar(cls, cambian, estado):
+        series = [fila[1] for fila in cambian[:cls.SERIES_EN_MENSAJE]]
+        resto = len(cambian) - len(series)
+        detalle = ", ".join(series) + (f" y {resto} más" if resto else "")
+        # Un solo producto: la misma notificación que el cambio individual (con enlace al producto)
+        Notificaciones.objects.create(
+            producto_id=cambian[0][0] if len(cambian) == 1 else None,
+            categoria='mantenimiento',
+            titulo=f"Cambio de estado: {len(cambian)} producto{'s' if len(cambian) > 1 else ''}",
+            mensaje=f"Pasaron a '{estado.nombre}': {detalle}.",
+            prioridad='media',
+        )
+
+
+class GarantiaService:
+    """
+    Motor único de garantías: cálculo del vencimiento, días restantes,
+    situación (vigente / por vencer / vencida), calendario y alertas.
+
+    Los vencimientos usan meses de calendario (31-ene + 1 mes = 28/29-feb)
+    y las consultas por rango van contra el índice de `fecha_venc_garantia`.
+    """
+
+    ALERTAS_DIAS = (30, 7)         # umbrales de notificación
+    POR_VENCER_DIAS = 30           # ventana de "por vencer"
+    VENTANA_DUPLICADOS = timedelta(days=14)
+    CALENDARIO_DIAS_DEFECTO = 90
+    CALENDARIO_DIAS_MAXIMO = 730
+
+    @staticmethod
+    def sumar_meses(fecha, meses):
+        """Suma meses de calendario; si el día no existe se usa el último del mes"""
+        mes_total = fecha.month - 1 + meses
+        anio, mes = fecha.year + mes_total // 12, mes_total % 12 + 1
+        return fecha.replace(year=anio, month=mes, day=min(fecha.day, calendar.monthrange(anio, mes)[1]))
+
+    @classmethod
+    def vencimiento(cls, fecha_compra, garantia_meses):
+        if not fecha_compra or not garantia_meses:
+            return None
+        return cls.sumar_meses(fecha_compra, garantia_meses)
+
+    @staticmethod
+    def dias_restantes(fecha_venc, hoy=None):
+        if not fecha_venc:
+            return None
+        return (fecha_venc - (hoy or timezone.localdate())).days
+
+    @classmethod
+    def situacion(cls, fecha_venc, hoy=None):
+        """'no_aplica', 'vencida', 'por_vencer' o 'vigente'"""
+        dias = cls.dias_restantes(fecha_venc, hoy)
+        if dias is None:
+            return "no_aplica"
+        if dias < 0:
+            return "vencida"
+        if dias <= cls.POR_VENCER_DIAS:
+            return "por_vencer"
+        return "vigente"
+
+    @classmethod
+    def estado_garantia(cls, fecha_venc, hoy=None):
+        """Valor para el campo Productos.estado_garantia"""
+        situacion = cls.situacion(fecha_venc, hoy)
+        return {"no_aplica": "NO_APLICA", "vencida": "VENCIDA"}.get(situacion, "VIGENTE")
+
+    @staticmethod
+    def por_vencer(dias, hoy=None, queryset=None):
+        """Productos cuyo vencimiento cae entre hoy y hoy + `dias` (range scan)"""
+        hoy = hoy or timezone.localdate()
+        queryset = Productos.objects.all() if queryset is None else queryset
+        return queryset.filter(fecha_venc_garantia__range=(hoy, hoy + timedelta(days=dias)))
+
+    @staticmethod
+    def actualizar_estados(hoy=None):
+        """Marca como VENCIDA las garantías que expiraron (un solo UPDATE)"""
+        hoy = hoy or timezone.localdate()
+        return (
+            Productos.objects.filter(estado_garantia="VIGENTE", fecha_venc_garantia__lt=hoy)
+            .update(estado_garantia="VENCIDA", actualizado=timezone.now())
+        )
+
+    @staticmethod
+    def calendario(desde, hasta, queryset=None):
+        """Vencimientos por día y por semana (lunes) en [desde, hasta]"""
+        queryset = Productos.objects.all() if queryset is None else queryset
+        queryset = queryset.filter(fecha_venc_garantia__range=(desde, hasta)).order_by()
+
+        por_dia = [
+            {"fecha": fila["fecha_venc_garantia"], "cantidad": fila["cantidad"]}
+            for fila in queryset.values("fecha_venc_garantia")
+            .annotate(cantidad=Count("id")).order_by("fecha_venc_garantia")
+        ]
+        semanas = {}
+        for fila in por_dia:
+            lunes = fila["fecha"] - timedelta(days=fila["fecha"].weekday())
+            semanas[lunes] = semanas.get(lunes, 0) + fila["cantidad"]
+
+        return {
+            "desde": desde,
+            "hasta": hasta,
+            "total": sum(f["cantidad"] for f in por_dia),
+            "por_dia": por_dia,
+            "por_semana": [{"semana": s, "cantidad": c} for s, c in sorted(semanas.items())],
+        }
+
+    @classmethod
+    def _avisados(cls, productos):
+        """Notificaciones de garantía recientes (ventana de duplicados) de esos productos"""
+        return Notificaciones.objects.filter(
+            producto__in=productos,
+            categoria='garantia',
+            fecha_creacion__gte=timezone.now() - cls.VENTANA_DUPLICADOS,
+        )
+
+    @classmethod
+    def notificar_vencimiento(cls, producto, hoy=None, avisados=None):
+        """
+        Crea la alerta de garantía si el producto está dentro de algún umbral
+        y no se le avisó en los últimos 14 días. Devuelve la notificación o None.
+        `avisados` (IDs ya notificados) evita la consulta cuando se procesa un lote.
+        """
+        dias = cls.dias_restantes(producto.fecha_venc_garantia, hoy)
+        if dias is None or not 0 <= dias <= max(cls.ALERTAS_DIAS):
+            return None
+
+        if avisados is not None:
+            existe = producto.pk in avisados
+        else:
+            existe = cls._avisados([producto.pk]).exists()
+        if existe:
+            return None
+
+        venc = producto.fecha_venc_garantia
+        if dias == 0:
+            titulo = f"Vencimiento de garantía hoy: {producto.nro_serie}"
+            mensaje = f"La garantía del equipo {producto.nro_serie} vence hoy ({venc})."
+        else:
+            titulo = f"Vencimiento de garantía en {dias} días: {producto.nro_serie}"
+            mensaje = f"La garantía del equipo {producto.nro_serie} vence el {venc} (faltan {dias} días)."
+
+        return Notificaciones.objects.create(
+            producto=producto,
+            categoria='garantia',
+            titulo=titulo,
+            mensaje=mensaje,
+            prioridad='alta' if dias <= min(cls.ALERTAS_DIAS) else 'media',
+            url_accion=f"/productos/{producto.pk}/",
+        )
+
+    @classmethod
+    def notificar_vencimientos(cls, queryset=None, hoy=None, tamano=lotes.TAMANO_LOTE):
+        """
+        Alertas de los productos dentro del umbral mayor, recorridos por lotes
+        con sólo las columnas necesarias (memoria constante). Devuelve cuántas creó.
+        """
+        productos = cls.por_vencer(max(cls.ALERTAS_DIAS), hoy, queryset)
+        creadas = 0
+        for lote in lotes.por_lotes(productos, tamano, ("nro_serie", "fecha_venc_garantia")):
+            avisados = set(cls._avisados(lote).values_list("producto_id", flat=True))
+            creadas += sum(1 for p in lote if cls.notificar_vencimiento(p, hoy, avisados))
+        return creadas
+
+
+class PlanMantencionService:
+    """
+    Materializa las mantenciones de los planes preventivos en una ventana móvil.
+
+    Para cada (plan, producto) la serie se ancla siempre en la fecha de
+    compra: ancla + k * frecuencia (meses de calendario). Anclar en la
+    última mantención arrastraría el recorte a fin de mes (31/01 -> 28/02
+    -> 28/03...); la última sólo indica desde dónde faltan fechas. Se
+    insertan con bulk_create y la restricción única (plan, producto, fecha)
+    hace que re-ejecutar el scheduler sea idempotente.
+    """
+
+    BATCH_SIZE = 1000
+
+    @staticmethod
+    def _ventana():
+        return getattr(settings, "MANTENCIONES_VENTANA_DIAS", 90)
+
+    @staticmethod
+    def productos_del_plan(plan):
+        if plan.modelo_id:
+            return Productos.objects.filter(modelo_id=plan.modelo_id)
+        return Productos.objects.filter(categoria_id=plan.categoria_id)
+
+    @staticmethod
+    def fechas(ancla, frecuencia_meses, hoy, horizonte):
+        """ancla + k * frecuencia para k >= 1, dentro de [hoy, horizonte]"""
+        fechas = []
+        # Sin recorrer los periodos anteriores a `hoy` (compras de hace años)
+        meses = (hoy.year - ancla.year) * 12 + hoy.month - ancla.month
+        k = max(1, meses // frecuencia_meses)
+        while (fecha := GarantiaService.sumar_meses(ancla, k * frecuencia_meses)) <= horizonte:
+            if fecha >= hoy:
+                fechas.append(fecha)
+            k += 1
+        return fechas
+
+    @classmethod
+    def programar(cls, planes=None, hoy=None, dias=None, tamano=lotes.TAMANO_LOTE):
+        """
+        Crea las mantenciones faltantes hasta hoy + `dias`; devuelve cuántas se
+        insertaron. Los productos de cada plan se procesan de a `tamano`.
+        """
+        hoy = hoy or timezone.localdate()
+        horizonte = hoy + timedelta(days=cls._ventana() if dias is None else dias)
+        planes = PlanMantencion.objects.filter(activo=True) if planes is None else planes
+
+        creadas = 0
+        for plan in planes:
+            # La última mantención del plan viene con cada lote de productos
+            filas = cls.productos_del_plan(plan).annotate(
+                ultima=models.Max("mantenciones__fecha", filter=Q(mantenciones__plan=plan))
+            ).values_list("id", "fecha_compra", "ultima")
+
+            antes = None
+            for lote in lotes.por_lotes(filas, tamano):
+                nuevas = [
+                    Mantenciones(
+                        producto_id=producto_id, fecha=fecha, plan=plan, realizada=False,
+                        detalle=plan.detalle or plan.nombre, proveedor_id=plan.proveedor_id,
+                    )
+                    # Serie anclada en la compra; sólo las fechas posteriores a la última ya creada
+                    for producto_id, compra, ultima in lote
+                    for fecha in cls.fechas(
+                        compra, plan.frecuencia_meses,
+                        max(hoy, ultima + timedelta(days=1)) if ultima else hoy, horizonte,
+                    )
+                ]
+                if nuevas:
+                    if antes is None:
+                        antes = Mantenciones.objects.filter(plan=plan).count()
+                    Mantenciones.objects.bulk_create(nuevas, batch_size=cls.BATCH_SIZE, ignore_conflicts=True)
+            if antes is not None:
+                creadas += Mantenciones.objects.filter(plan=plan).count() - antes
+
+        if creadas:
+            # bulk_create no dispara señales: las fichas cacheadas muestran mantenciones
+            CacheDetalleProductoService.invalidar_todo()
+        return creadas
+
+    @classmethod
+    def cancelar_pendientes(cls, plan, hoy=None):
+        """Elimina las mantenciones futuras pendientes del plan (al editarlo o desactivarlo)"""
+        hoy = hoy or timezone.localdate()
+        eliminadas, _ = Mantenciones.objects.filter(plan=plan, realizada=False, fecha__gte=hoy).delete()
+        return eliminadas
+
+    @classmethod
+    def reprogramar(cls, plan):
+        cls.cancelar_pendientes(plan)
+        return cls.programar([plan]) if plan.activo else 0
+
+    @staticmethod
+    def agenda(desde, hasta, queryset=None):
+        """Mantenciones con fecha en [desde, hasta] y conteo por sucursal"""
+        queryset = Mantenciones.objects.all() if queryset is None else queryset
+        queryset = queryset.filter(fecha__range=(desde, hasta))
+        por_sucursal = [
+            {"sucursal": fila["producto__sucursal"], "sucursal_nombre": fila["producto__sucursal__nombre"],
+             "cantidad": fila["cantidad"]}
+            for fila in queryset.order_by().values("producto__sucursal", "producto__sucursal__nombre")
+            .annotate(cantidad=Count("id")).order_by("producto__sucursal__nombre")
+        ]
+        return queryset, por_sucursal
+
+
+class SincronizacionService:
+    """
+    Sincronización incremental de los modelos `Sincronizable`
+    (GET /api/<recurso>/cambios/): el cliente guarda una copia local y pide
+    sólo lo que cambió desde su último `cursor`.
+
+    - `cambios`: filas con (actualizado, id) posterior al cursor, en ese orden
+      (keyset sobre el índice de `actualizado`, sin OFFSET).
+    - `eliminados`: ids borrados desde el momento del cursor (`Eliminaciones`)
+      y, para un usuario de sucursal, los que salieron de sus sucursales
+      (movidos a otra) y no volvieron.
+    - `mas`: quedan cambios; pedir de nuevo con el cursor devuelto.
+
+    El cursor final no avanza más allá de "ahora - SINCRONIZACION_MARGEN_SEGUNDOS":
+    una fila guardada por una transacción que aún no confirmaba al momento de
+    leer (su `actualizado` es anterior al commit) llega en la siguiente
+    sincronización. Por lo mismo una fila puede llegar repetida; el cliente la
+    aplica como upsert.
+    """
+
+    LIMITE_DEFECTO = 500
+    LIMITE_MAXIMO = 2000
+
+    class CursorVencido(ValueError):
+        """El cursor es anterior a la retención de borrados: hay que recargar todo"""
+
+    @staticmethod
+    def registrar_eliminacion(instancia):
+        Eliminaciones.objects.create(modelo=instancia._meta.model_name, objeto_id=instancia.pk)
+
+    @staticmethod
+    def registrar_salida(producto, sucursal_id):
+        """El producto (y sus asignaciones) dejó la sucursal `sucursal_id`"""
+        asignaciones = Asignaciones.objects.filter(producto_id=producto.pk).values_list("pk", flat=True)
+        Eliminaciones.objects.bulk_create(
+            [Eliminaciones(modelo="productos", objeto_id=producto.pk, sucursal_id=sucursal_id)]
+            + [Eliminaciones(modelo="asignaciones", objeto_id=pk, sucursal_id=sucursal_id) for pk in asignaciones]
+        )
+
+    @staticmethod
+    def limite_retencion():
+        return timezone.now() - timedelta(days=settings.SINCRONIZACION_RETENCION_DIAS)
+
+    @classmethod
+    def purgar(cls):
+        """Borra los registros de borrados que ya no cubre ningún cursor válido"""
+        return Eliminaciones.objects.filter(eliminado__lt=cls.limite_retencion()).delete()[0]
+
+    @classmethod
+    def cambios(cls, queryset, posicion=None, limite=LIMITE_DEFECTO, sucursales=None):
+        """
+        Retorna (filas, ids_eliminados, cursor, mas). `posicion` es
+        (momento, id) — la del cursor decodificado, o (fecha, 0) para
+        ?updated_since= — o None para la carga inicial completa.
+        `sucursales`: las del alcance del cliente (None = sin restricción).
+        """
+        limite = min(max(int(limite), 1), cls.LIMITE_MAXIMO)
+        eliminados = []
+        if posicion is not None:
+            momento, ultimo_id = posicion
+            if momento < cls.limite_retencion():
+                raise cls.CursorVencido("cursor vencido")
+            registros = Eliminaciones.objects.filter(modelo=queryset.model._meta.model_name, eliminado__gt=momento)
+            if sucursales is None:
+                registros = registros.filter(sucursal_id__isnull=True)
+            else:
+                # Salidas de sus sucursales, salvo las filas que ya volvieron (llegan en `cambios`)
+                registros = registros.filter(
+                    Q(sucursal_id__isnull=True) | Q(sucursal_id__in=sucursales)
+                ).exclude(sucursal_id__isnull=False, objeto_id__in=queryset.values("pk"))
+            eliminados = list(registros.order_by().values_list("objeto_id", flat=True).distinct())
+            queryset = queryset.filter(
+                Q(actualizado__gt=momento) | Q(actualizado=momento, pk__gt=ultimo_id)
+            )
+
+        filas = list(queryset.order_by("actualizado", "pk")[:limite + 1])
+        mas = len(filas) > limite
+        filas = filas[:limite]
+
+        tope = (timezone.now() - timedelta(seconds=settings.SINCRONIZACION_MARGEN_SEGUNDOS), 0)
+        if mas:
+            siguiente = (filas[-1].actualizado, filas[-1].pk)
+        else:
+            siguiente = min((filas[-1].actualizado, filas[-1].pk), tope) if filas else tope
+            if posicion is not None:
+                siguiente = max(siguiente, posicion)
+        return filas, eliminados, cls.codificar_cursor(*siguiente), mas
+
+    @staticmethod
+    def codificar_cursor(momento, ultimo_id):
+        crudo = f"{momento.isoformat()}|{ultimo_id}"
+        return base64.urlsafe_b64encode(crudo.encode()).decode()
+
+    @staticmethod
+    def decodificar_cursor(cursor):
+        """Lanza ValueError si el cursor no es válido"""
+        try:
+            momento, ultimo_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+            momento = datetime.fromisoformat(momento)
+            ultimo_id = int(ultimo_id)
+        except (ValueError, UnicodeDecodeError, binascii.Error) as exc:
+            raise ValueError("cursor inválido") from exc
+        if timezone.is_naive(momento):
+            raise ValueError("cursor inválido")
+        return momento, ultimo_id
+
+    @staticmethod
+    def decodificar_fecha(valor):
+        """?updated_since= en ISO 8601 (fecha o fecha y hora); lanza ValueError"""
+        # Un "+" sin codificar en la query string llega como espacio
+        valor = re.sub(r"(\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?) (\d{2}:?\d{2})$", r"\1+\2", valor.strip())
+        momento = parse_datetime(valor)
+        if momento is None:
+            fecha = parse_date(valor)
+            if fecha is None:
+                raise ValueError("updated_since inválido")
+            momento = datetime.combine(fecha, time.min)
+        if timezone.is_naive(momento):
+            momento = timezone.make_aware(momento)
+        return momento, 0
+
+
+class AuditoriaService:
+    """
+    Toma de inventario con lector QR sin conexión (ver `Auditorias`):
+
+    1. `iniciar`: guarda los ids esperados de la sucursal y devuelve la foto
+       compacta para el dispositivo (columnas + filas, sin objetos anidados).
+    2. `registrar_lecturas`: recibe las lecturas en lotes grandes. Cada código
+       se guarda una vez (restricción única + ignore_conflicts), así que el
+       dispositivo puede reintentar una subida sin duplicar.
+    3. `conciliar`: encontrados / faltantes / fuera de lugar / desconocidos
+       como operaciones de conjuntos sobre ids; sólo se consulta la BD para
+       describir los faltantes y los de otras sucursales.
+    """
+
+    COLUMNAS = ("id", "nro_serie", "modelo__marca__nombre", "modelo__nombre", "categoria__nombre", "estado__nombre")
+    NOMBRES_COLUMNAS = ("id", "nro_serie", "marca", "modelo", "categoria", "estado")
+    MAX_LECTURAS = 10000
+    BATCH_SIZE = 1000
+
+    @classmethod
+    def iniciar(cls, sucursal, usuario_id=None):
+        """Crea la auditoría y retorna (auditoria, foto)"""
+        filas = list(
+            Productos.objects.filter(sucursal=sucursal).order_by("id").values_list(*cls.COLUMNAS)
+        )
+        auditoria = Auditorias.objects.create(
+            sucursal=sucursal, usuario_id=usuario_id, esperados=[fila[0] for fila in filas],
+        )
+        return auditoria, cls._foto(filas)
+
+    @classmethod
+    def foto(cls, auditoria):
+        """La foto de los esperados con los datos actuales (para volver a descargarla)"""
+        filas = []
+        for ids in lotes.agrupar(auditoria.esperados, cls.BATCH_SIZE):
+            filas.extend(Productos.objects.filter(id__in=ids).order_by().values_list(*cls.COLUMNAS))
+        filas.sort()
+        return cls._foto(filas)
+
+    @classmethod
+    def _foto(cls, filas):
+        return {"columnas": list(cls.NOMBRES_COLUMNAS), "filas": [list(fila) for fila in filas]}
+
+    @staticmethod
+    def producto_de_codigo(codigo):
+        """
+        Id del producto a partir de lo leído: el id o la URL del QR
+        (`.../detalle.html?id=<id>`, ver QRService.contenido_producto).
+        None si no corresponde a un producto.
+        """
+        codigo = str(codigo).strip()
+        if codigo.isdigit():
+            return int(codigo)
+        valores = parse_qs(urlsplit(codigo).query).get("id")
+        if valores and valores[0].isdigit():
+            return int(valores[0])
+        return None
+
+    @classmethod
+    def registrar_lecturas(cls, auditoria, lecturas):
+        """
+        `lecturas`: lista de códigos (texto o id) o de {"codigo", "leido_en"}.
+        Retorna cuántas se recibieron. Lanza ValueError si el formato no es
+        válido o la auditoría ya está cerrada.
+        """
+        if auditoria.estado != "ABIERTA":
+            raise ValueError("La auditoría está cerrada")
+        if not isinstance(lecturas, list):
+            raise ValueError("'lecturas' debe ser una lista")
+        if len(lecturas) > cls.MAX_LECTURAS:
+            raise ValueError(f"Máximo {cls.MAX_LECTURAS} lecturas por envío")
+
+        nuevas = {}
+        for lectura in lecturas:
+            leido_en = None
+            if isinstance(lectura, dict):
+                leido_en = lectura.get("leido_en")
+                lectura = lectura.get("codigo")
+            if not isinstance(lectura, (str, int)) or isinstance(lectura, bool) or not str(lectura).strip():
+                raise ValueError("Cada lectura debe ser un código (texto o id)")
+            if leido_en is not None:
+                leido_en = parse_datetime(str(leido_en))
+                if leido_en is None:
+                    raise ValueError("'leido_en' debe ser una fecha y hora ISO 8601")
+                if timezone.is_naive(leido_en):
+                    leido_en = timezone.make_aware(leido_en)
+
+            producto_id = cls.producto_de_codigo(lectura)
+            # Normalizado: el mismo producto leído como id o como URL es una sola lectura
+            codigo = str(producto_id) if producto_id is not None else str(lectura).strip()[:500]
+            nuevas.setdefault(codigo, LecturasAuditoria(
+                auditoria=auditoria, producto_id=producto_id, codigo=codigo, leido_en=leido_en,
+            ))
+
+        LecturasAuditoria.objects.bulk_create(
+            nuevas.values(), batch_size=cls.BATCH_SIZE, ignore_conflicts=True,
+        )
+        return len(lecturas)
+
+    @classmethod
+    def conciliar(cls, auditoria):
+        """Cierra la auditoría y guarda/retorna el resultado"""
+        esperados = set(auditoria.esperados)
+        leidos = set()
+        desconocidos = []
+        lecturas = list(auditoria.lecturas.order_by("id").values_list("producto_id", "codigo"))
+        for producto_id, codigo in lecturas:
+            if producto_id is None:
+                desconocidos.append(codigo)
+            else:
+                leidos.add(producto_id)
+
+        encontrados = esperados & leidos
+        faltantes = esperados - leidos
+        otros = leidos - esperados
+
+        descripcion = {}
+        for ids in lotes.agrupar(sorted(faltantes | otros), cls.BATCH_SIZE):
+            for fila in Productos.objects.filter(id__in=ids).order_by().values(
+                "id", "nro_serie", "sucursal_id", "sucursal__nombre",
+            ):
+                descripcion[fila["id"]] = fila
+
+        fuera_de_lugar = []
+        for producto_id in sorted(otros):
+            fila = descripcion.get(producto_id)
+            if fila is None:
+                # Id con formato válido pero sin producto: se reporta como desconocido
+                desconocidos.append(str(producto_id))
+                continue
+            fuera_de_lugar.append({
+                "id": producto_id, "nro_serie": fila["nro_serie"],
+                "sucursal": fila["sucursal_id"], "sucursal_nombre": fila["sucursal__nombre"],
+            })
+
+        resultado = {
+            "totales": {
+                "esperados": len(esperados),
+                "leidos": len(lecturas),
+                "encontrados": len(encontrados),
+                "faltantes": len(faltantes),
+                "fuera_de_lugar": len(fuera_de_lugar),
+                "desconocidos": len(desconocidos),
+            },
+            "faltantes": [
+                {"id": producto_id, "nro_serie": descripcion.get(producto_id, {}).get("nro_serie")}
+                for producto_id in sorted(faltantes)
+            ],
+            "fuera_de_lugar": fuera_de_lugar,
+            "desconocidos": desconocidos,
+        }
+
+        auditoria.estado = "CERRADA"
+        auditoria.cerrada = timezone.now()
+        auditoria.resultado = resultado
+        auditoria.save(update_fields=["estado", "cerrada", "resultado"])
+        return resultado
+
+
+class SnapshotInventarioService:
+    """
+    Fotos mensuales del inventario para los cierres (comando `snapshot_inventario`).
+
+    - `tomar` recorre los productos por lotes y guarda, por columna, el
+      estado, la sucursal, la categoría, el usuario asignado y la situación
+      de garantía de cada uno (JSON columnar + zlib: los valores repetidos
+      de cada columna comprimen muy bien). Una foto por mes; no se reescribe.
+    - `resumen` (totales por sucursal, estado, categoría y su combinación)
+      se calcula al tomar la foto, con los nombres vigentes en ese momento:
+      los reportes históricos lo leen sin reconstruir nada.
+    - `diferencia` compara dos fotos en memoria (altas, bajas y cambios por campo).
+    """
+
+    COLUMNAS = ("id", "nro_serie", "estado", "sucursal", "categoria", "asignado", "garantia")
+    COMPARADAS = ("estado", "sucursal", "categoria", "asignado", "garantia")
+    DIMENSIONES = {"sucursal": Sucursales, "estado": Estados, "categoria": Categorias}
+    LIMITE_DEFECTO = 1000
+
+    @staticmethod
+    def periodo(fecha):
+        return fecha.replace(day=1)
+
+    @staticmethod
+    def es_fin_de_mes(fecha):
+        return fecha.day == calendar.monthrange(fecha.year, fecha.month)[1]
+
+    @classmethod
+    def tomar(cls, fecha=None, tamano=lotes.TAMANO_LOTE):
+        """Foto del mes de `fecha` (hoy por defecto). None si ese mes ya tiene una."""
+        fecha = fecha or timezone.localdate()
+        periodo = cls.periodo(fecha)
+        if SnapshotsInventario.objects.filter(periodo=periodo).exists():
+            return None
+
+        asignados = dict(
+            Asignaciones.objects.filter(fecha_devolucion__isnull=True)
+            .order_by("fecha_asignacion", "id").values_list("producto_id", "usuario_id")
+        )
+        columnas = {columna: [] for columna in cls.COLUMNAS}
+        productos = Productos.objects.values_list(
+            "id", "nro_serie", "estado_id", "sucursal_id", "categoria_id", "fecha_venc_garantia",
+        )
+        for lote in lotes.por_lotes(productos, tamano):
+            for pk, nro_serie, estado, sucursal, categoria, vencimiento in lote:
+                columnas["id"].append(pk)
+                columnas["nro_serie"].append(nro_serie)
+                columnas["estado"].append(estado)
+                columnas["sucursal"].append(sucursal)
+                columnas["categoria"].append(categoria)
+                columnas["asignado"].append(asignados.get(pk))
+                columnas["garantia"].append(GarantiaService.situacion(vencimiento, fecha))
+
+        try:
+            with transaction.atomic():
+                return SnapshotsInventario.objects.create(
+                    periodo=periodo,
+                    total_productos=len(columnas["id"]),
+                    resumen=cls._resumen(columnas),
+                    datos=zlib.compress(json.dumps(columnas, separators=(",", ":")).encode()),
+                )
+        except IntegrityError:
+            return None  # otro proceso tomó la foto del mes mientras se recorría
+
+    @classmethod
+    def _resumen(cls, columnas):
+        nombres = {
+            dimension: dict(modelo.objects.values_list("id", "nombre"))
+            for dimension, modelo in cls.DIMENSIONES.items()
+        }
+
+        def totales(dimension):
+            return [
+                {"id": pk, "nombre": nombres[dimension].get(pk), "cantidad": cantidad}
+                for pk, cantidad in sorted(Counter(columnas[dimension]).items(), key=lambda x: (x[0] is None, x[0] or 0))
+            ]
+
+        combinaciones = Counter(zip(columnas["sucursal"], columnas["estado"], columnas["categoria"]))
+        return {
+            "total": len(columnas["id"]),
+            "asignados": sum(1 for usuario in columnas["asignado"] if usuario is not None),
+            "por_garantia": dict(Counter(columnas["garantia"])),
+            **{f"por_{dimension}": totales(dimension) for dimension in cls.DIMENSIONES},
+            # Filas [sucursal, estado, categoria, cantidad] para tablas dinámicas
+            "detalle": [
+                [sucursal, estado, categoria, cantidad]
+                for (sucursal, estado, categoria), cantidad in sorted(
+                    combinaciones.items(), key=lambda x: tuple(v or 0 for v in x[0])
+                )
+            ],
+            "nombres": nombres,
+        }
+
+    @staticmethod
+    def datos(snapshot):
+        """Las columnas de la foto ({columna: [valores]})"""
+        return json.loads(zlib.decompress(bytes(snapshot.datos)))
+
+    @classmethod
+    def diferencia(cls, desde, hasta, limite=LIMITE_DEFECTO):
+        """
+        Cambios entre dos fotos. Las listas de altas, bajas y cambios se
+        cortan en `limite`; los totales siempre son completos.
+        """
+        limite = max(int(limite), 0)
+        a, b = cls.datos(desde), cls.datos(hasta)
+        indice_a = {pk: i for i, pk in enumerate(a["id"])}
+        indice_b = {pk: i for i, pk in enumerate(b["id"])}
+
+        altas = sorted(indice_b.keys() - indice_a.keys())
+        bajas = sorted(indice_a.keys() - indice_b.keys())
+
+        cambios = []
+        por_campo = dict.fromkeys(cls.COMPARADAS, 0)
+        for pk in sorted(indice_a.keys() & indice_b.keys()):
+            i, j = indice_a[pk], indice_b[pk]
+            distintos = {campo: [a[campo][i], b[campo][j]] for campo in cls.COMPARADAS if a[campo][i] != b[campo][j]}
+            if distintos:
+                for campo in distintos:
+                    por_campo[campo] += 1
+                cambios.append({"id": pk, "nro_serie": b["nro_serie"][j], **distintos})
+
+        totales = {}
+        for dimension in cls.DIMENSIONES:
+            antes = {t["id"]: t for t in desde.resumen.get(f"por_{dimension}", [])}
+            despues = {t["id"]: t for t in hasta.resumen.get(f"por_{dimension}", [])}
+            totales[dimension] = [
+                {
+                    "id": pk,
+                    "nombre": (despues.get(pk) or antes.get(pk))["nombre"],
+                    "antes": antes.get(pk, {}).get("cantidad", 0),
+                    "despues": despues.get(pk, {}).get("cantidad", 0),
+                }
+                for pk in sorted(antes.keys() | despues.keys(), key=lambda x: (x is None, x or 0))
+            ]
+            for fila in totales[dimension]:
+                fila["diferencia"] = fila["despues"] - fila["antes"]
+
+        return {
+            "desde": desde.periodo,
+            "hasta": hasta.periodo,
+            "totales": totales,
+            "cantidades": {
+                "altas": len(altas), "bajas": len(bajas), "cambios": len(cambios), "por_campo": por_campo,
+            },
+            "altas": [{"id": pk, "nro_serie": b["nro_serie"][indice_b[pk]]} for pk in altas[:limite]],
+            "bajas": [{"id": pk, "nro_serie": a["nro_serie"][indice_a[pk]]} for pk in bajas[:limite]],
+            "cambios": cambios[:limite],
+        }
+
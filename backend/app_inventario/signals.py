@@ -10,10 +10,8 @@ from .services import NotificacionService
 @receiver(post_save, sender=Productos)
 def crear_qr_producto(sender, instance, created, **kwargs):
     if created:
-        # Crear la instancia QR asociada
-        qr = CodigoQR.objects.create(producto=instance)
-        qr.generar_qr()
-        qr.save()
+        # Crear la instancia QR asociada; la imagen se renderiza bajo demanda
+        CodigoQR.objects.create(producto=instance)
 
 
 # Señales para crear notificaciones automáticas
@@ -23,15 +21,12 @@ STOCK_CRITICO = 5  # Umbral para stock crítico
 
 
 # app_inventario/signals.py
-from datetime import timedelta
 from django.db.models.signals import pre_save, post_save
 from django.dispatch import receiver
 from django.utils import timezone
 
 from .models import Productos, Notificaciones
-
-# Umbrales para alertas de garantía (días antes del vencimiento)
-GARANTIA_ALERTAS_DIAS = [30, 7]  # puedes ajustar: 30 días y 7 días antes
+from .services import GarantiaService
 
 
 @receiver(pre_save, sender=Productos)
@@ -47,6 +42,11 @@ def producto_pre_save(sender, instance, **kwargs):
     except Productos.DoesNotExist:
         return
 
+    # Lo usa el gauge de productos por estado (métricas) en post_save
+    instance._estado_anterior_id = old.estado_id
+    # Y la partición del dashboard de la sucursal de origen (si se movió)
+    instance._sucursal_anterior_id = old.sucursal_id
+
     viejo_estado = old.estado.nombre if old.estado else None
     nuevo_estado = instance.estado.nombre if instance.estado else None
 
@@ -66,7 +66,7 @@ def producto_post_save(sender, instance, created, **kwargs):
     """
     - Si es creación, puedes crear una notificación informativa de mantenimiento.
     - Si se actualiza, revisar vencimiento de garantía y crear notificaciones 'garantia'
-      cuando falten 30 o 7 días (o lo que configures).
+      cuando falten 30 o 7 días (ver GarantiaService.ALERTAS_DIAS).
     """
     hoy = timezone.now().date()
 
@@ -81,46 +81,407 @@ def producto_post_save(sender, instance, created, **kwargs):
         )
         # no return: también chequeamos garantía si fecha_venc_garantia ya está calculada
 
-    # 2) Alertas de garantía (si existe fecha_venc_garantia)
-    venc = getattr(instance, 'fecha_venc_garantia', None)
-    if not venc:
+    # 2) Alertas de garantía (mismas reglas que check_garantias)
+    GarantiaService.notificar_vencimiento(instance, hoy)
+
+
+# ============= ROLLUPS DE MOVIMIENTOS =============
+from django.db.models.signals import post_delete
+
+from .models import Movimientos
+from .services import RollupMovimientosService
+
+
+@receiver(pre_save, sender=Movimientos)
+def movimiento_pre_save(sender, instance, **kwargs):
+    """Guarda la versión anterior para poder descontarla de los rollups."""
+    instance._rollup_anterior = None
+    if instance.pk:
+        instance._rollup_anterior = (
+            Movimientos.objects.filter(pk=instance.pk)
+            .only('fecha', 'sku', 'tipo', 'cantidad')
+            .first()
+        )
+
+
+@receiver(post_save, sender=Movimientos)
+def movimiento_post_save(sender, instance, created, **kwargs):
+    """
+    Suma el movimiento a los totales diarios/mensuales.
+    Si es una edición, primero descuenta los valores anteriores.
+    (bulk_create/update no disparan señales: usar `rebuild_rollups`.)
+    """
+    anterior = getattr(instance, '_rollup_anterior', None)
+    if anterior is not None:
+        RollupMovimientosService.aplicar(anterior, signo=-1)
+    RollupMovimientosService.aplicar(instance)
+
+
+@receiver(post_delete, sender=Movimientos)
+def movimiento_post_delete(sender, instance, **kwargs):
+    RollupMovimientosService.aplicar(instance, signo=-1)
+
+
+# ============= ÍNDICE DE BÚSQUEDA DE PRODUCTOS =============
+from .models import Modelos, Marcas, Categorias
+from .services import BusquedaProductosService
+
+
+@receiver(pre_save, sender=Productos)
+def producto_texto_busqueda(sender, instance, **kwargs):
+    """Recalcula la columna desnormalizada antes de guardar."""
+    instance.texto_busqueda = BusquedaProductosService.texto_para(instance)
+
+
+@receiver(post_save, sender=Productos)
+def producto_indice_busqueda(sender, instance, **kwargs):
+    BusquedaProductosService.sincronizar([instance])
+
+
+@receiver(post_delete, sender=Productos)
+def producto_indice_busqueda_delete(sender, instance, **kwargs):
+    BusquedaProductosService.eliminar(instance.pk)
+
+
+@receiver(post_save, sender=Modelos)
+@receiver(post_save, sender=Marcas)
+@receiver(post_save, sender=Categorias)
+def catalogo_indice_busqueda(sender, instance, created, **kwargs):
+    """Al renombrar marca/modelo/categoría se reindexan sus productos."""
+    if created:
         return
+    filtro = {
+        Modelos: {"modelo": instance},
+        Marcas: {"modelo__marca": instance},
+        Categorias: {"categoria": instance},
+    }[sender]
+    BusquedaProductosService.reindexar(Productos.objects.filter(**filtro))
+
+
+# ============= ÍNDICE DE AUTOCOMPLETADO (en memoria) =============
+from django.contrib.auth import get_user_model
+from django.db import transaction
+
+from . import autocompletado
+from .models import Proveedores, Usuarios
+
+_CAMPOS_AUTOCOMPLETADO = {
+    Productos: "nro_serie",
+    Modelos: "modelos",
+    Proveedores: "proveedores",
+    Usuarios: "usuarios",
+}
+
+
+@receiver(post_save, sender=Productos)
+@receiver(post_save, sender=Modelos)
+@receiver(post_save, sender=Proveedores)
+@receiver(post_save, sender=Usuarios)
+def autocompletado_post_save(sender, instance, **kwargs):
+    # on_commit: un rollback no debe dejar entradas fantasma en el índice
+    campo = _CAMPOS_AUTOCOMPLETADO[sender]
+    transaction.on_commit(lambda: autocompletado.actualizar(campo, instance))
+
+
+@receiver(post_delete, sender=Productos)
+@receiver(post_delete, sender=Modelos)
+@receiver(post_delete, sender=Proveedores)
+@receiver(post_delete, sender=Usuarios)
+def autocompletado_post_delete(sender, instance, **kwargs):
+    campo, pk = _CAMPOS_AUTOCOMPLETADO[sender], instance.pk
+    transaction.on_commit(lambda: autocompletado.eliminar(campo, pk))
+
+
+@receiver(post_save, sender=Marcas)
+def autocompletado_marca(sender, instance, created, **kwargs):
+    """El texto de los modelos incluye la marca: reindexar sus modelos."""
+    if not created:
+        pks = list(instance.modelos.values_list("pk", flat=True))
+        transaction.on_commit(lambda: autocompletado.sincronizar("modelos", pks))
+
+
+@receiver(post_save, sender=get_user_model())
+def autocompletado_user(sender, instance, created, **kwargs):
+    """Nombre/username/email viven en User: reindexar su perfil de Usuarios."""
+    if not created:
+        pks = list(Usuarios.objects.filter(user=instance).values_list("pk", flat=True))
+        transaction.on_commit(lambda: autocompletado.sincronizar("usuarios", pks))
+
+
+# ============= CACHE DEL DETALLE DE PRODUCTO =============
+from .models import Asignaciones, Mantenciones, HistorialEstados, CodigoQR, Estados, Sucursales
+from .services import CacheDetalleProductoService, VersionProductosService
+
+
+def _invalidar_detalle(producto_id):
+    """Detalle cacheado y filas cacheadas de los listados (sello de versión)"""
+    def invalidar():
+        CacheDetalleProductoService.invalidar(producto_id)
+        VersionProductosService.invalidar(producto_id)
+
+    if producto_id:
+        transaction.on_commit(invalidar)
+
+
+@receiver(post_save, sender=Productos)
+@receiver(post_delete, sender=Productos)
+def detalle_producto_cache(sender, instance, **kwargs):
+    _invalidar_detalle(instance.pk)
+
+
+@receiver(post_save, sender=Asignaciones)
+@receiver(post_delete, sender=Asignaciones)
+@receiver(post_save, sender=Mantenciones)
+@receiver(post_delete, sender=Mantenciones)
+@receiver(post_save, sender=HistorialEstados)
+@receiver(post_delete, sender=HistorialEstados)
+@receiver(post_save, sender=CodigoQR)
+@receiver(post_delete, sender=CodigoQR)
+def detalle_producto_cache_relacion(sender, instance, **kwargs):
+    _invalidar_detalle(instance.producto_id)
+
+
+@receiver(post_save, sender=Proveedores)
+@receiver(post_delete, sender=Proveedores)
+@receiver(post_save, sender=Marcas)
+@receiver(post_delete, sender=Marcas)
+@receiver(post_save, sender=Modelos)
+@receiver(post_delete, sender=Modelos)
+@receiver(post_save, sender=Categorias)
+@receiver(post_delete, sender=Categorias)
+@receiver(post_save, sender=Estados)
+@receiver(post_delete, sender=Estados)
+@receiver(post_save, sender=Sucursales)
+@receiver(post_delete, sender=Sucursales)
+@receiver(post_save, sender=Usuarios)
+@receiver(post_delete, sender=Usuarios)
+def detalle_producto_cache_catalogo(sender, instance, **kwargs):
+    """Los catálogos aparecen anidados en muchos detalles: invalidar todo."""
+    transaction.on_commit(CacheDetalleProductoService.invalidar_todo)
+
+
+# ============= PLANES DE MANTENCIÓN =============
+from django.db.models.signals import pre_delete
+
+from .models import PlanMantencion
+from .services import PlanMantencionService
+
+
+@receiver(post_save, sender=PlanMantencion)
+def plan_mantencion_guardado(sender, instance, **kwargs):
+    """Al crear/editar un plan se rehacen sus mantenciones futuras"""
+    transaction.on_commit(lambda: PlanMantencionService.reprogramar(instance))
+
+
+@receiver(pre_delete, sender=PlanMantencion)
+def plan_mantencion_eliminado(sender, instance, **kwargs):
+    # Las realizadas se conservan (plan=NULL); las pendientes ya no aplican
+    PlanMantencionService.cancelar_pendientes(instance)
+
+
+# ============= GAUGES DE MÉTRICAS =============
+from . import metricas
+
+
+@receiver(post_save, sender=Productos)
+def metricas_producto(sender, instance, created, **kwargs):
+    anterior = None if created else getattr(instance, "_estado_anterior_id", instance.estado_id)
+    if anterior != instance.estado_id:
+        metricas.incrementar("productos_estado", 1, instance.estado_id)
+        if anterior is not None:
+            metricas.incrementar("productos_estado", -1, anterior)
+
+
+@receiver(post_delete, sender=Productos)
+def metricas_producto_eliminado(sender, instance, **kwargs):
+    metricas.incrementar("productos_estado", -1, instance.estado_id)
+
+
+@receiver(post_save, sender=Estados)
+def metricas_estado(sender, instance, **kwargs):
+    transaction.on_commit(lambda: metricas.registrar_estado(instance.pk, instance.nombre))
+
+
+@receiver(pre_save, sender=Asignaciones)
+def metricas_asignacion_pre(sender, instance, **kwargs):
+    if instance.pk:
+        instance._metricas_activa = Asignaciones.objects.filter(
+            pk=instance.pk, fecha_devolucion__isnull=True
+        ).exists()
+
+
+@receiver(post_save, sender=Asignaciones)
+def metricas_asignacion(sender, instance, created, **kwargs):
+    activa_antes = False if created else getattr(instance, "_metricas_activa", False)
+    activa = instance.fecha_devolucion is None
+    metricas.incrementar("asignaciones_activas", int(activa) - int(activa_antes))
+
+
+@receiver(post_delete, sender=Asignaciones)
+def metricas_asignacion_eliminada(sender, instance, **kwargs):
+    if instance.fecha_devolucion is None:
+        metricas.incrementar("asignaciones_activas", -1)
+
+
+@receiver(pre_save, sender=Notificaciones)
+def metricas_notificacion_pre(sender, instance, **kwargs):
+    if instance.pk:
+        instance._metricas_no_leida = Notificaciones.objects.filter(pk=instance.pk, leido=False).exists()
+
+
+@receiver(post_save, sender=Notificaciones)
+def metricas_notificacion(sender, instance, created, **kwargs):
+    no_leida_antes = False if created else getattr(instance, "_metricas_no_leida", False)
+    metricas.incrementar("notificaciones_no_leidas", int(not instance.leido) - int(no_leida_antes))
+
+
+@receiver(post_delete, sender=Notificaciones)
+def metricas_notificacion_eliminada(sender, instance, **kwargs):
+    if not instance.leido:
+        metricas.incrementar("notificaciones_no_leidas", -1)
+
+
+# ============= REVOCACIÓN DE TOKENS JWT =============
+# Los tokens llevan is_active/is_staff/rol/perfil/sucursales como claims
+# (autenticacion.py): si cambian, los tokens emitidos antes quedan revocados.
+from django.db.models.signals import m2m_changed
+
+from . import autenticacion
+
+CAMPOS_TOKEN_USER = ("is_active", "is_staff", "is_superuser", "username", "password")
+
+
+def _revocar_tokens(user_id):
+    transaction.on_commit(lambda: autenticacion.revocar(user_id))
+
+
+@receiver(pre_save, sender=get_user_model())
+def tokens_user_pre(sender, instance, update_fields=None, **kwargs):
+    if not instance.pk:
+        return
+    if update_fields is not None and not set(update_fields) & set(CAMPOS_TOKEN_USER):
+        return  # p. ej. last_login al iniciar sesión
+    anterior = sender.objects.filter(pk=instance.pk).values(*CAMPOS_TOKEN_USER).first()
+    instance._revocar_tokens = anterior is not None and any(
+        anterior[campo] != getattr(instance, campo) for campo in CAMPOS_TOKEN_USER
+    )
+
+
+@receiver(post_save, sender=get_user_model())
+def tokens_user(sender, instance, **kwargs):
+    if getattr(instance, "_revocar_tokens", False):
+        instance._revocar_tokens = False
+        _revocar_tokens(instance.pk)
+
+
+@receiver(pre_save, sender=Usuarios)
+def tokens_perfil_pre(sender, instance, **kwargs):
+    if instance.pk:
+        anterior = Usuarios.objects.filter(pk=instance.pk).values("rol", "user_id").first()
+        instance._revocar_tokens = anterior is not None and (
+            anterior["rol"] != instance.rol or anterior["user_id"] != instance.user_id
+        )
+
+
+@receiver(post_save, sender=Usuarios)
+def tokens_perfil(sender, instance, **kwargs):
+    if getattr(instance, "_revocar_tokens", False):
+        instance._revocar_tokens = False
+        _revocar_tokens(instance.user_id)
+
+
+@receiver(post_delete, sender=get_user_model())
+def tokens_user_eliminado(sender, instance, **kwargs):
+    _revocar_tokens(instance.pk)
+
+
+@receiver(post_delete, sender=Usuarios)
+def tokens_perfil_eliminado(sender, instance, **kwargs):
+    _revocar_tokens(instance.user_id)
+
+
+@receiver(m2m_changed, sender=Usuarios.sucursales.through)
+def tokens_perfil_sucursales(sender, instance, action, reverse, pk_set, **kwargs):
+    """Las sucursales van en el token (alcance): asignarlas o quitarlas lo revoca"""
+    if action not in ("post_add", "post_remove", "pre_clear"):
+        return
+    if not reverse:
+        _revocar_tokens(instance.user_id)
+        return
+    # Desde la sucursal (sucursal.usuarios.add(...)): pk_set son perfiles; en clear, todos los suyos
+    perfiles = Usuarios.objects.filter(sucursales=instance) if pk_set is None else Usuarios.objects.filter(pk__in=pk_set)
+    for user_id in perfiles.values_list("user_id", flat=True):
+        _revocar_tokens(user_id)
+
+
+# ============= SINCRONIZACIÓN INCREMENTAL =============
+from django.db.models.signals import post_delete, post_save
+
+from .models import Sincronizable
+from .services import SincronizacionService
+
+
+@receiver(post_delete)
+def sincronizacion_eliminado(sender, instance, **kwargs):
+    """Tombstone para que los clientes sincronizados quiten su copia"""
+    if issubclass(sender, Sincronizable):
+        SincronizacionService.registrar_eliminacion(instance)
+
+
+@receiver(post_save, sender=Productos)
+def sincronizacion_cambio_sucursal(sender, instance, created, **kwargs):
+    """Al moverse de sucursal sale del alcance de quienes sólo veían la de origen"""
+    anterior = None if created else getattr(instance, "_sucursal_anterior_id", None)
+    if anterior is not None and anterior != instance.sucursal_id:
+        SincronizacionService.registrar_salida(instance, anterior)
+
+
+@receiver(post_save, sender=Proveedores)
+@receiver(post_save, sender=Marcas)
+@receiver(post_save, sender=Modelos)
+@receiver(post_save, sender=Categorias)
+@receiver(post_save, sender=Estados)
+@receiver(post_save, sender=Sucursales)
+def sincronizacion_catalogo(sender, instance, created, **kwargs):
+    """El listado de productos incluye los nombres del catálogo: al editarlo cambian sus productos"""
+    if created:
+        return
+    filtro = {
+        Proveedores: {"proveedor": instance},
+        Marcas: {"modelo__marca": instance},
+        Modelos: {"modelo": instance},
+        Categorias: {"categoria": instance},
+        Estados: {"estado": instance},
+        Sucursales: {"sucursal": instance},
+    }[sender]
+    Productos.objects.filter(**filtro).update(actualizado=timezone.now())
+
+
+# ============= DASHBOARD POR SUCURSAL =============
+# Cada sucursal tiene su partición de agregados en cache (ResumenInventarioService):
+# una escritura sólo borra la de la sucursal afectada.
+from .services import ResumenInventarioService
+
+
+def _invalidar_resumen(*sucursal_ids):
+    transaction.on_commit(lambda: ResumenInventarioService.invalidar(*sucursal_ids))
+
+
+@receiver(post_save, sender=Productos)
+def resumen_producto(sender, instance, created, **kwargs):
+    anterior = instance.sucursal_id if created else getattr(instance, "_sucursal_anterior_id", instance.sucursal_id)
+    _invalidar_resumen(instance.sucursal_id, anterior)
+
+
+@receiver(post_delete, sender=Productos)
+def resumen_producto_eliminado(sender, instance, **kwargs):
+    _invalidar_resumen(instance.sucursal_id)
+
 
-    dias_restantes = (venc - hoy).days
-
-    # Para cada umbral configurado, crear notificación si corresponde
-    for dias in GARANTIA_ALERTAS_DIAS:
-        # Si está dentro del umbral y >= 0 (no crear si ya venció)
-        if 0 <= dias_restantes <= dias:
-            # Evitar duplicados: buscar notificación reciente con misma categoria y producto y texto parecido
-            from django.utils import timezone as dj_tz
-            ventana = dj_tz.now() - timedelta(days=14)  # evitar duplicados en 14 días
-            existe = Notificaciones.objects.filter(
-                producto=instance,
-                categoria='garantia',
-                titulo__icontains=f"garantía"  # criterio simple; ajustar si quieres más exactitud
-            ).filter(fecha_creacion__gte=ventana).exists()
-
-            if not existe:
-                # Crear mensaje según días restantes
-                if dias_restantes == 0:
-                    titulo = f"Vencimiento de garantía hoy: {instance.nro_serie}"
-                    mensaje = f"La garantía del equipo {instance.nro_serie} vence hoy ({venc})."
-                    prioridad = 'alta'
-                else:
-                    titulo = f"Vencimiento de garantía en {dias_restantes} días: {instance.nro_serie}"
-                    mensaje = f"La garantía del equipo {instance.nro_serie} vence el {venc} (faltan {dias_restantes} días)."
-                    prioridad = 'media' if dias_restantes > 7 else 'alta'
-
-                Notificaciones.objects.create(
-                    producto=instance,
-                    categoria='garantia',
-                    titulo=titulo,
-                    mensaje=mensaje,
-                    prioridad=prioridad,
-                    url_accion=f"/productos/{instance.pk}/"  # si tu app tiene esa ruta
-                )
-            # Si ya existe, no hacemos nada (evita spam)
-            # NOTA: No hacemos break: puede haber dos umbrales (30 y 7). 
-            # Si quieres crear solamente la notificación del umbral más cercano,
-            # añade un break aquí.
+@receiver(post_save, sender=Asignaciones)
+@receiver(post_delete, sender=Asignaciones)
+def resumen_asignacion(sender, instance, **kwargs):
+    # Si el producto ya no existe (borrado en cascada) su propia señal invalida la partición
+    sucursal = Productos.objects.filter(pk=instance.producto_id).values_list("sucursal_id", flat=True)
+    if sucursal:
+        _invalidar_resumen(sucursal[0])
@@ -0,0 +1,62 @@
+# test/factories.py
+# Datos mínimos para pruebas (catálogos + productos)
+
+import tempfile
+import time
+from datetime import date
+from unittest import mock
+
+from django.test import override_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from app_inventario.autenticacion import agregar_claims
+from app_inventario.models import (
+    Categorias, Estados, Marcas, Modelos, Productos, Proveedores,
+)
+
+# Archivos subidos y cache de QR: en pruebas se escriben en un directorio temporal
+_MEDIA_TEMPORAL = tempfile.mkdtemp(prefix="inventario-test-")
+media_temporal = override_settings(
+    MEDIA_ROOT=_MEDIA_TEMPORAL, QR_CACHE_DIR=f"{_MEDIA_TEMPORAL}/qr_cache"
+)
+
+
+def crear_catalogo():
+    marca = Marcas.objects.create(nombre="HP")
+    return {
+        "estado": Estados.objects.create(nombre="Operativo"),
+        "proveedor": Proveedores.objects.create(
+            nombre="Proveedor Test", rut="11111111-1", contacto="Contacto",
+            telefono="123", correo="prov@test.cl",
+        ),
+        "marca": marca,
+        "modelo": Modelos.objects.create(marca=marca, nombre="EliteBook 840"),
+        "categoria": Categorias.objects.create(nombre="Notebooks"),
+    }
+
+
+def crear_producto(catalogo, nro_serie, **extra):
+    datos = {
+        "nro_serie": nro_serie,
+        "fecha_compra": date.today(),
+        "estado": catalogo["estado"],
+        "proveedor": catalogo["proveedor"],
+        "modelo": catalogo["modelo"],
+        "categoria": catalogo["categoria"],
+    }
+    datos.update(extra)
+    return Productos.objects.create(**datos)
+
+
+def autenticar(client, user):
+    """Access token JWT con claims, como en el frontend (la API no carga el User por request)"""
+    access = agregar_claims(RefreshToken.for_user(user).access_token, user)
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+
+
+def un_segundo_despues():
+    """
+    Para revocar: `iat` es entero y un token emitido en el mismo segundo
+    que la revocación sigue siendo válido.
+    """
+    return mock.patch("time.time", return_value=time.time() + 1)
@@ -0,0 +1,82 @@
+# test/test_auditorias.py
+# Pruebas de la toma de inventario con lector QR (auditorías sin conexión)
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from app_inventario.models import Auditorias, Sucursales
+from app_inventario.services import QRService
+from app_inventario.test.factories import crear_catalogo, crear_producto, media_temporal
+
+User = get_user_model()
+URL = "/api/api/auditorias/"
+
+
+@media_temporal
+class AuditoriasTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        catalogo = crear_catalogo()
+        self.bodega = Sucursales.objects.create(nombre="Bodega Central")
+        self.tienda = Sucursales.objects.create(nombre="Tienda Norte")
+        self.esperados = [crear_producto(catalogo, f"NB-{n}", sucursal=self.bodega) for n in range(1, 4)]
+        self.ajeno = crear_producto(catalogo, "NB-AJENO", sucursal=self.tienda)
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username="u", password="x"))
+
+    def iniciar(self):
+        res = self.client.post(URL, {"sucursal": self.bodega.pk}, format="json")
+        self.assertEqual(res.status_code, 201)
+        return res.data
+
+    def test_foto_compacta(self):
+        data = self.iniciar()
+        self.assertEqual(data["total_esperados"], 3)
+        self.assertEqual(data["foto"]["columnas"][:2], ["id", "nro_serie"])
+        self.assertEqual([fila[1] for fila in data["foto"]["filas"]], ["NB-1", "NB-2", "NB-3"])
+
+        res = self.client.get(f"{URL}{data['id']}/foto/")
+        self.assertEqual(res.data, data["foto"])
+
+    def test_conciliacion(self):
+        auditoria = self.iniciar()["id"]
+        uno, dos, tres = self.esperados
+
+        # Primera subida (URL del QR e id) y un reintento con repetidos
+        lecturas = [QRService.contenido_producto(uno.pk), dos.pk]
+        res = self.client.post(f"{URL}{auditoria}/lecturas/", {"lecturas": lecturas}, format="json")
+        self.assertEqual(res.data["total_lecturas"], 2)
+        res = self.client.post(f"{URL}{auditoria}/lecturas/", {"lecturas": [str(uno.pk)]}, format="json")
+        self.assertEqual(res.data["total_lecturas"], 2)
+
+        res = self.client.post(f"{URL}{auditoria}/cerrar/", {"lecturas": [
+            {"codigo": QRService.contenido_producto(self.ajeno.pk), "leido_en": "2026-10-19T10:00:00Z"},
+            "ETIQUETA-ROTA",
+            999999,
+        ]}, format="json")
+        self.assertEqual(res.status_code, 200)
+        resultado = res.data["resultado"]
+
+        self.assertEqual(resultado["totales"], {
+            "esperados": 3, "leidos": 5, "encontrados": 2, "faltantes": 1,
+            "fuera_de_lugar": 1, "desconocidos": 2,
+        })
+        self.assertEqual(resultado["faltantes"], [{"id": tres.pk, "nro_serie": "NB-3"}])
+        self.assertEqual(resultado["fuera_de_lugar"][0]["sucursal_nombre"], "Tienda Norte")
+        self.assertEqual(sorted(resultado["desconocidos"]), ["999999", "ETIQUETA-ROTA"])
+
+        # Cerrada: no acepta más lecturas
+        self.assertEqual(Auditorias.objects.get(pk=auditoria).estado, "CERRADA")
+        res = self.client.post(f"{URL}{auditoria}/lecturas/", {"lecturas": [tres.pk]}, format="json")
+        self.assertEqual(res.status_code, 400)
+
+    def test_validacion(self):
+        self.assertEqual(self.client.post(URL, {"sucursal": 999}, format="json").status_code, 400)
+        auditoria = self.iniciar()["id"]
+        res = self.client.post(f"{URL}{auditoria}/lecturas/", {"lecturas": "NB-1"}, format="json")
+        self.assertEqual(res.status_code, 400)
+        res = self.client.post(f"{URL}{auditoria}/lecturas/", {"lecturas": [{"codigo": None}]}, format="json")
+        self.assertEqual(res.status_code, 400)
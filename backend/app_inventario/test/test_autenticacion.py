@@ -0,0 +1,119 @@
+# test/test_autenticacion.py
+# Pruebas de la autenticación JWT por claims (sin cargar el usuario) y su revocación
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from app_inventario import autenticacion
+from app_inventario.models import Usuarios
+from app_inventario.test.factories import autenticar, un_segundo_despues
+
+User = get_user_model()
+
+
+class AutenticacionClaimsTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        autenticacion.limpiar_cache_local()
+        self.user = User.objects.create_user(username="tecnico", password="clave-segura-1")
+        self.perfil = Usuarios.objects.create(user=self.user, rol="ADMIN")
+        self.client = APIClient()
+
+    def tearDown(self):
+        # Los ids de usuario se reutilizan entre pruebas
+        autenticacion.limpiar_cache_local()
+        cache.clear()
+
+    def login(self):
+        res = self.client.post("/api/auth/token/", {"username": "tecnico", "password": "clave-segura-1"})
+        self.assertEqual(res.status_code, 200)
+        return res.data
+
+    def usar(self, access):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+
+    def test_claims_y_sin_consultar_user(self):
+        tokens = self.login()
+        claims = AccessToken(tokens["access"])
+        self.assertEqual((claims["rol"], claims["perfil"]), ("ADMIN", self.perfil.pk))
+
+        self.usar(tokens["access"])
+        with CaptureQueriesContext(connection) as consultas:
+            self.assertEqual(self.client.get("/api/api/estados/").status_code, 200)
+        self.assertFalse([q for q in consultas.captured_queries if "auth_user" in q["sql"]])
+
+        res = self.client.get("/api/api/usuarios/me/")
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.data["id"], self.perfil.pk)
+
+    def test_token_sin_claims_se_rechaza(self):
+        self.usar(str(RefreshToken.for_user(self.user).access_token))
+        self.assertEqual(self.client.get("/api/api/estados/").status_code, 401)
+
+    def test_desactivar_revoca(self):
+        tokens = self.login()
+        self.usar(tokens["access"])
+        self.assertEqual(self.client.get("/api/api/estados/").status_code, 200)
+
+        with un_segundo_despues(), self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+        self.assertEqual(self.client.get("/api/api/estados/").status_code, 401)
+        res = self.client.post("/api/auth/token/refresh/", {"refresh": tokens["refresh"]})
+        self.assertEqual(res.status_code, 401)
+
+    def test_cambio_de_rol_revoca_y_last_login_no(self):
+        tokens = self.login()
+        self.usar(tokens["access"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.get(pk=self.user.pk).save(update_fields=["last_login"])
+        self.assertEqual(self.client.get("/api/api/estados/").status_code, 200)
+
+        with un_segundo_despues(), self.captureOnCommitCallbacks(execute=True):
+            self.perfil.rol = "USUARIO"
+            self.perfil.save()
+        self.assertEqual(self.client.get("/api/api/estados/").status_code, 401)
+
+    def test_revocacion_persistente(self):
+        """El corte está en la BD: sobrevive a la cache; un token del mismo segundo vale"""
+        tokens = self.login()
+        with un_segundo_despues():
+            autenticacion.revocar(self.user.pk)
+        cache.clear()
+        autenticacion.limpiar_cache_local()
+        self.usar(tokens["access"])
+        self.assertEqual(self.client.get("/api/api/estados/").status_code, 401)
+
+        autenticacion.revocar(self.user.pk)
+        autenticar(self.client, self.user)
+        self.assertEqual(self.client.get("/api/api/estados/").status_code, 200)
+
+    def test_refresh_relee_claims(self):
+        """Un perfil creado después del login aparece al renovar (sin revocar)"""
+        self.perfil.delete()
+        autenticacion.limpiar_cache_local()
+        cache.clear()
+        tokens = self.login()
+        self.assertIsNone(AccessToken(tokens["access"])["rol"])
+
+        Usuarios.objects.create(user=self.user, rol="USUARIO")
+        res = self.client.post("/api/auth/token/refresh/", {"refresh": tokens["refresh"]})
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(AccessToken(res.data["access"])["rol"], "USUARIO")
+
+    def test_cambiar_password_carga_el_user(self):
+        self.usar(self.login()["access"])
+        res = self.client.post(
+            "/api/api/usuarios/cambiar_password/",
+            {"old_password": "clave-segura-1", "new_password": "clave-segura-2"},
+        )
+        self.assertEqual(res.status_code, 200)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password("clave-segura-2"))
@@ -0,0 +1,133 @@
+# test/test_autocompletado.py
+# Pruebas del índice de prefijos de /api/autocomplete/
+
+import threading
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from app_inventario import autocompletado
+from app_inventario.models import Marcas, Modelos, Usuarios
+from app_inventario.test.factories import crear_catalogo, crear_producto, media_temporal
+
+User = get_user_model()
+
+
+class IndicePrefijosTestCase(TestCase):
+
+    def test_upsert_eliminar_y_limite(self):
+        indice = autocompletado.IndicePrefijos()
+        indice.cargar([
+            (1, ["nb-1209"], {"id": 1}),
+            (2, ["nb-1300"], {"id": 2}),
+            (3, ["pc-0045"], {"id": 3}),
+        ])
+        self.assertEqual([d["id"] for d in indice.buscar("NB-", 10)], [1, 2])
+        self.assertEqual([d["id"] for d in indice.buscar("nb-", 1)], [1])
+
+        indice.upsert(1, ["pc-9999"], {"id": 1})
+        self.assertEqual([d["id"] for d in indice.buscar("nb", 10)], [2])
+        indice.eliminar(3)
+        self.assertEqual([d["id"] for d in indice.buscar("pc", 10)], [1])
+
+    def test_particion_por_sucursal(self):
+        indice = autocompletado.IndicePorSucursal()
+        indice.cargar([
+            (1, ["nb-1209"], {"id": 1, "sucursal": 10}),
+            (2, ["nb-1300"], {"id": 2, "sucursal": 20}),
+            (3, ["nb-1100"], {"id": 3, "sucursal": 30}),
+            (4, ["nb-1250"], {"id": 4, "sucursal": 10}),
+        ])
+        self.assertEqual([d["id"] for d in indice.buscar("nb", 10)], [3, 1, 4, 2])
+        self.assertEqual([d["id"] for d in indice.buscar("nb", 10, sucursales=[10, 20])], [1, 4, 2])
+        self.assertEqual([d["id"] for d in indice.buscar("nb", 2, sucursales=[20, 10])], [1, 4])
+        self.assertEqual(indice.buscar("nb", 10, sucursales=[]), [])
+
+        indice.upsert(2, ["nb-1300"], {"id": 2, "sucursal": 30})  # traslado
+        self.assertEqual([d["id"] for d in indice.buscar("nb", 10, sucursales=[20])], [])
+        self.assertEqual([d["id"] for d in indice.buscar("nb", 10, sucursales=[30])], [3, 2])
+        indice.eliminar(3)
+        self.assertEqual(len(indice), 3)
+        self.assertEqual([d["id"] for d in indice.buscar("nb", 10, sucursales=[30])], [2])
+
+    @override_settings(AUTOCOMPLETADO_TTL=0)
+    def test_recarga_en_segundo_plano(self):
+        """Vencido el TTL se sigue sirviendo el índice actual; los cambios en vuelo no se pierden"""
+        autocompletado.reiniciar()
+        entradas = [(1, ["latitude"], {"id": 1}), (2, ["elitebook"], {"id": 2})]
+
+        def cargar(campo, indice):
+            indice.cargar(list(entradas))
+            if campo in autocompletado._recargando:
+                autocompletado.eliminar("modelos", 1)  # llega por señal durante la reconstrucción
+
+        with mock.patch.object(autocompletado, "_cargar", side_effect=cargar):
+            actual = autocompletado.obtener_indice("modelos")  # primera carga: síncrona
+            entradas.append((3, ["vostro"], {"id": 3}))
+            self.assertIs(autocompletado.obtener_indice("modelos"), actual)
+            for hilo in threading.enumerate():
+                if hilo.name == "autocompletado-modelos":
+                    hilo.join()
+
+        nuevo = autocompletado._indices["modelos"]
+        self.assertIsNot(nuevo, actual)
+        self.assertEqual([d["id"] for d in nuevo.buscar("vos", 10)], [3])
+        self.assertEqual(nuevo.buscar("lat", 10), [])
+        autocompletado.reiniciar()
+
+
+@media_temporal
+class AutocompleteEndpointTestCase(TestCase):
+
+    def setUp(self):
+        autocompletado.reiniciar()
+        self.catalogo = crear_catalogo()
+        crear_producto(self.catalogo, "NB-1209")
+        user = User.objects.create_user(
+            username="jlopez", password="x", first_name="Jaime", last_name="López"
+        )
+        Usuarios.objects.create(user=user)
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+
+    def get(self, **params):
+        res = self.client.get("/api/api/autocomplete/", params)
+        self.assertEqual(res.status_code, 200)
+        return res.data["resultados"]
+
+    def test_campos_y_claves(self):
+        datos = self.get(q="elite")
+        self.assertEqual([m["texto"] for m in datos["modelos"]], ["HP EliteBook 840"])
+        self.assertEqual(self.get(q="1111", campos="proveedores")["proveedores"][0]["rut"], "11111111-1")
+        self.assertEqual(self.get(q="lóp", campos="usuarios")["usuarios"][0]["username"], "jlopez")
+
+    def test_signals_mantienen_indice(self):
+        self.get(q="nb")  # carga los índices
+        with self.captureOnCommitCallbacks(execute=True):
+            crear_producto(self.catalogo, "NB-1300")
+            marca = Marcas.objects.create(nombre="Dell")
+            Modelos.objects.create(marca=marca, nombre="Latitude")
+        self.assertEqual(
+            [p["texto"] for p in self.get(q="nb-1", campos="nro_serie")["nro_serie"]],
+            ["NB-1209", "NB-1300"],
+        )
+        self.assertEqual(
+            [m["texto"] for m in self.get(q="lat", campos="modelos", marca=marca.pk)["modelos"]],
+            ["Dell Latitude"],
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            marca.nombre = "Dell Inc"
+            marca.save()
+        self.assertEqual(self.get(q="dell inc", campos="modelos")["modelos"][0]["texto"], "Dell Inc Latitude")
+
+    def test_limite_por_campo_y_validacion(self):
+        for i in range(5):
+            crear_producto(self.catalogo, f"NB-2{i}")
+        datos = self.get(q="nb", campos="nro_serie,modelos", limit=10, limit_nro_serie=2)
+        self.assertEqual(len(datos["nro_serie"]), 2)
+
+        res = self.client.get("/api/api/autocomplete/", {"campos": "marcas"})
+        self.assertEqual(res.status_code, 400)
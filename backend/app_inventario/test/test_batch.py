@@ -0,0 +1,82 @@
+# test/test_batch.py
+# Pruebas del endpoint batch (varios GET de la API en un solo request)
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from app_inventario import autenticacion
+from app_inventario.autenticacion import agregar_claims
+from app_inventario.models import Notificaciones, Usuarios
+from app_inventario.test.factories import crear_catalogo, crear_producto, media_temporal
+
+User = get_user_model()
+URL = "/api/api/batch/"
+
+
+@media_temporal
+class BatchTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        autenticacion.limpiar_cache_local()
+        self.user = User.objects.create_user(username="bodega", password="clave-segura-1")
+        self.perfil = Usuarios.objects.create(user=self.user, rol="ADMIN")
+        catalogo = crear_catalogo()
+        crear_producto(catalogo, "NB-1")
+        crear_producto(catalogo, "NB-2")
+        Notificaciones.objects.create(
+            usuario=self.user, categoria="garantia", titulo="Hola", mensaje="Mensaje",
+        )
+        self.client = APIClient()
+        access = agregar_claims(RefreshToken.for_user(self.user).access_token, self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+
+    def tearDown(self):
+        autenticacion.limpiar_cache_local()
+        cache.clear()
+
+    def batch(self, solicitudes):
+        return self.client.post(URL, {"requests": solicitudes}, format="json")
+
+    def test_respuestas_combinadas(self):
+        res = self.batch({
+            "productos": "productos/?search=NB-2",
+            "notis": "/api/api/notificaciones/no_leidas/",
+            "nada": "productos/999999/",
+        })
+        self.assertEqual(res.status_code, 200)
+        respuestas = res.data["responses"]
+
+        self.assertEqual(respuestas["productos"]["status"], 200)
+        self.assertEqual(
+            [p["nro_serie"] for p in respuestas["productos"]["body"]["results"]], ["NB-2"],
+        )
+        self.assertEqual(respuestas["notis"]["status"], 200)
+        self.assertIn("Hola", [n["titulo"] for n in respuestas["notis"]["body"]["notificaciones"]])
+        self.assertEqual(respuestas["nada"]["status"], 404)
+
+    def test_rechaza_urls_fuera_de_la_api(self):
+        res = self.batch({
+            "html": "/api/productos/",
+            "externa": "https://example.com/api/api/productos/",
+            "otro_batch": "batch/",
+            "no_existe": "no-existe/",
+        })
+        respuestas = res.data["responses"]
+        self.assertEqual(respuestas["html"]["status"], 400)
+        self.assertEqual(respuestas["externa"]["status"], 400)
+        self.assertEqual(respuestas["otro_batch"]["status"], 400)
+        self.assertEqual(respuestas["no_existe"]["status"], 404)
+
+    def test_validacion(self):
+        self.assertEqual(self.batch({}).status_code, 400)
+        self.assertEqual(self.batch({"a": 1}).status_code, 400)
+        muchos = {str(n): "productos/" for n in range(21)}
+        self.assertEqual(self.batch(muchos).status_code, 400)
+
+    def test_requiere_autenticacion(self):
+        self.client.credentials()
+        self.assertEqual(self.batch({"productos": "productos/"}).status_code, 401)
@@ -0,0 +1,104 @@
+# test/test_benchmark.py
+# Pruebas de seed_inventory y del banco de pruebas de rendimiento
+
+import io
+
+from django.core.management import call_command
+from django.db.models import F
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from app_inventario import benchmark
+from app_inventario.models import (
+    Asignaciones, CodigoQR, Movimientos, MovimientosDiarios, Notificaciones, Productos,
+)
+from app_inventario.services import BusquedaProductosService
+from app_inventario.test.factories import media_temporal
+
+
+@media_temporal
+class SeedInventoryTestCase(TestCase):
+
+    def sembrar(self, productos=60, **opciones):
+        call_command(
+            "seed_inventory", productos=productos, batch_size=25, sucursales=3,
+            stdout=io.StringIO(), **opciones,
+        )
+
+    def test_genera_flota_consistente(self):
+        self.sembrar()
+
+        self.assertEqual(Productos.objects.count(), 60)
+        self.assertEqual(CodigoQR.objects.count(), 60)
+        self.assertFalse(Productos.objects.filter(texto_busqueda="").exists())
+        self.assertTrue(Asignaciones.objects.filter(fecha_devolucion__isnull=True).exists())
+        # Las devoluciones nunca son anteriores a la asignación
+        self.assertFalse(Asignaciones.objects.filter(fecha_devolucion__lt=F("fecha_asignacion")).exists())
+
+        # Fechas históricas (auto_now_add se desactiva sólo durante la siembra)
+        self.assertTrue(Movimientos.objects.filter(fecha__date__lt=timezone.localdate()).exists())
+        self.assertTrue(MovimientosDiarios.objects.exists())
+        self.assertTrue(Movimientos._meta.get_field("fecha").auto_now_add)
+
+        # El índice de búsqueda quedó sincronizado
+        producto = Productos.objects.first()
+        encontrados = BusquedaProductosService.buscar(Productos.objects.all(), producto.nro_serie)
+        self.assertIn(producto, encontrados)
+
+    def test_continua_numeracion(self):
+        self.sembrar(productos=10)
+        self.sembrar(productos=10)
+        self.assertEqual(Productos.objects.filter(nro_serie__startswith="SEED-").count(), 20)
+
+
+@media_temporal
+class BenchmarkTestCase(TestCase):
+
+    def test_ejecutar_y_comparar(self):
+        call_command("seed_inventory", productos=30, sucursales=2, stdout=io.StringIO())
+        productos = Productos.objects.count()
+        notificaciones = Notificaciones.objects.count()
+
+        reporte = benchmark.ejecutar(
+            repeticiones=3, calentamiento=0,
+            seleccion={"productos_listado", "producto_detalle", "senal"},
+        )
+
+        self.assertEqual(
+            set(reporte["escenarios"]),
+            {"productos_listado", "producto_detalle", "senal_producto_creado",
+             "senal_cambio_estado", "senal_asignacion"},
+        )
+        listado = reporte["escenarios"]["productos_listado"]
+        self.assertLessEqual(listado["p50_ms"], listado["p95_ms"])
+        self.assertGreater(listado["consultas"], 0)
+        self.assertEqual(reporte["productos"], 30)
+
+        # Las escrituras de los escenarios se revierten
+        self.assertEqual(Productos.objects.count(), productos)
+        self.assertEqual(Notificaciones.objects.count(), notificaciones)
+
+        self.assertEqual(benchmark.comparar(reporte, reporte), [])
+        peor = {"escenarios": {"productos_listado": dict(listado, consultas=listado["consultas"] + 5)}}
+        regresiones = benchmark.comparar(peor, reporte)
+        self.assertEqual(len(regresiones), 1)
+        self.assertIn("consultas", regresiones[0])
+
+
+@media_temporal
+class ConcurrenciaEscrituraTestCase(TransactionTestCase):
+
+    def test_configuracion_y_corrida(self):
+        configuracion = benchmark.configuracion_bd()
+        if configuracion["bd"] == "sqlite":
+            # Lock de escritura al abrir la transacción (evita "database is locked" al instante)
+            self.assertEqual(configuracion["transaction_mode"], "IMMEDIATE")
+
+        with self.assertRaises(benchmark.BenchmarkError):
+            benchmark.concurrencia_escritura(hilos=1, operaciones=1, lectores=0)
+
+        call_command("seed_inventory", productos=10, sucursales=1, stdout=io.StringIO())
+        # La BD de pruebas en memoria usa locks por tabla: sin lectores en paralelo
+        resultado = benchmark.concurrencia_escritura(hilos=1, operaciones=5, lectores=0)
+        self.assertEqual(resultado["exitosas"], 5)
+        self.assertEqual(resultado["bloqueos"], 0)
@@ -0,0 +1,77 @@
+# test/test_busqueda.py
+# Pruebas del índice de búsqueda de productos
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from app_inventario.models import Categorias, Productos, Sucursales
+from app_inventario.services import BusquedaProductosService
+from app_inventario.test.factories import crear_catalogo, crear_producto, media_temporal
+
+User = get_user_model()
+
+
+@media_temporal
+class BusquedaProductosTestCase(TestCase):
+
+    def setUp(self):
+        self.catalogo = crear_catalogo()
+        self.p1 = crear_producto(self.catalogo, "NB-1209")
+        self.p2 = crear_producto(self.catalogo, "XNB-12090")
+        otra = Categorias.objects.create(nombre="Impresoras")
+        self.p3 = crear_producto(self.catalogo, "IMP-055", categoria=otra)
+
+    def ids(self, termino):
+        qs = BusquedaProductosService.buscar(Productos.objects.all(), termino)
+        return list(qs.order_by("-relevancia", "nro_serie").values_list("nro_serie", flat=True))
+
+    def test_texto_desnormalizado(self):
+        self.p1.refresh_from_db()
+        self.assertEqual(self.p1.texto_busqueda, "nb-1209 hp elitebook 840 notebooks")
+
+    def test_fragmento_y_ranking(self):
+        """Un fragmento de serie encuentra coincidencias; el prefijo exacto va primero"""
+        self.assertEqual(self.ids("nb-120"), ["NB-1209", "XNB-12090"])
+        self.assertEqual(self.ids("impresoras"), ["IMP-055"])
+        self.assertEqual(self.ids("hp 055"), ["IMP-055"])
+
+    def test_renombrar_catalogo_reindexa(self):
+        """Al renombrar una categoría, sus productos se encuentran con el nuevo nombre"""
+        categoria = self.catalogo["categoria"]
+        categoria.nombre = "Portátiles"
+        categoria.save()
+        self.assertEqual(self.ids("portátiles"), ["NB-1209", "XNB-12090"])
+        self.assertEqual(self.ids("notebooks"), [])
+
+    def test_eliminar_producto(self):
+        self.p1.delete()
+        self.assertEqual(self.ids("1209"), ["XNB-12090"])
+
+    def test_endpoints(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user(username="u", password="x"))
+
+        res = client.get("/api/api/productos/", {"search": "nb-1209"})
+        self.assertEqual([p["nro_serie"] for p in res.data["results"]], ["NB-1209", "XNB-12090"])
+
+        res = client.get("/api/api/productos/sugerencias/", {"q": "12090", "limit": 5})
+        self.assertEqual([s["nro_serie"] for s in res.data], ["XNB-12090"])
+
+    def test_listado_paginado_con_filtros(self):
+        """Lo que usa la tabla virtual: filtro por sucursal, page_size y páginas sin repetir filas"""
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user(username="u", password="x"))
+        sucursal = Sucursales.objects.create(nombre="Coyhaique")
+        Productos.objects.filter(pk=self.p3.pk).update(sucursal=sucursal)
+
+        res = client.get("/api/api/productos/", {"sucursal": sucursal.pk})
+        self.assertEqual([p["nro_serie"] for p in res.data["results"]], ["IMP-055"])
+
+        # Misma fecha de compra en todos: el desempate por id mantiene el orden entre páginas
+        series = []
+        for pagina in (1, 2, 3):
+            res = client.get("/api/api/productos/", {"page_size": 1, "page": pagina})
+            self.assertEqual(res.data["count"], 3)
+            series += [p["nro_serie"] for p in res.data["results"]]
+        self.assertEqual(series, ["IMP-055", "XNB-12090", "NB-1209"])
@@ -0,0 +1,61 @@
+# test/test_cambio_estado.py
+# Pruebas del cambio de estado masivo (POST /api/api/productos/cambiar_estado/)
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from app_inventario.models import Estados, HistorialEstados, Notificaciones, Productos
+from app_inventario.services import CacheDetalleProductoService
+from app_inventario.test.factories import crear_catalogo, crear_producto, media_temporal
+
+User = get_user_model()
+URL = "/api/api/productos/cambiar_estado/"
+
+
+@media_temporal
+class CambioEstadoMasivoTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.catalogo = crear_catalogo()
+        self.mantencion = Estados.objects.create(nombre="En Mantención")
+        self.productos = [crear_producto(self.catalogo, f"LAB-{n}") for n in range(1, 6)]
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username="u", password="x"))
+
+    def test_un_update_historial_y_una_notificacion(self):
+        ya_en_mantencion = self.productos[0]
+        Productos.objects.filter(pk=ya_en_mantencion.pk).update(estado=self.mantencion)
+        CacheDetalleProductoService.guardar(self.productos[1].pk, "testserver", {"cacheado": True})
+        notificaciones = Notificaciones.objects.count()
+
+        ids = [p.pk for p in self.productos] + [999999]
+        with self.captureOnCommitCallbacks(execute=True), CaptureQueriesContext(connection) as ctx:
+            res = self.client.post(URL, {
+                "productos": ids, "estado": self.mantencion.pk, "comentario": "Laboratorio 2",
+            }, format="json")
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.data, {"actualizados": 4, "sin_cambio": 1, "no_encontrados": [999999]})
+        updates = [q["sql"] for q in ctx.captured_queries if q["sql"].startswith('UPDATE "app_inventario_productos"')]
+        self.assertEqual(len(updates), 1)
+
+        self.assertEqual(Productos.objects.filter(estado=self.mantencion).count(), 5)
+        self.assertEqual(
+            HistorialEstados.objects.filter(estado=self.mantencion, comentario="Laboratorio 2").count(), 4,
+        )
+        self.assertEqual(Notificaciones.objects.count(), notificaciones + 1)
+        self.assertIn("4 productos", Notificaciones.objects.order_by("-id").first().titulo)
+        self.assertIsNone(CacheDetalleProductoService.obtener(self.productos[1].pk, "testserver"))
+
+    def test_validacion(self):
+        self.assertEqual(self.client.post(URL, {"productos": [], "estado": self.mantencion.pk}, format="json").status_code, 400)
+        self.assertEqual(self.client.post(URL, {"productos": ["x"], "estado": self.mantencion.pk}, format="json").status_code, 400)
+        self.assertEqual(self.client.post(URL, {"productos": [self.productos[0].pk], "estado": 999}, format="json").status_code, 400)
+        self.assertEqual(self.client.post(URL, [self.productos[0].pk], format="json").status_code, 400)
+        self.assertEqual(self.client.post(URL, {"productos": [2 ** 64], "estado": self.mantencion.pk}, format="json").status_code, 400)
+        self.assertEqual(self.client.post(URL, {"productos": [self.productos[0].pk], "estado": 2 ** 64}, format="json").status_code, 400)
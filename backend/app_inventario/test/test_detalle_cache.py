@@ -0,0 +1,58 @@
+# test/test_detalle_cache.py
+# Pruebas del detalle de producto (prefetch + cache invalidada por señales)
+
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+
+from rest_framework.test import APIClient
+
+from app_inventario.models import Asignaciones, Mantenciones, Marcas, Usuarios
+from app_inventario.test.factories import autenticar, crear_catalogo, crear_producto, media_temporal
+
+User = get_user_model()
+
+
+@media_temporal
+class DetalleProductoCacheTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        catalogo = crear_catalogo()
+        self.producto = crear_producto(catalogo, "NB-3001")
+        user = User.objects.create_user(username="tecnico", password="x")
+        usuario = Usuarios.objects.create(user=user)
+        Asignaciones.objects.create(producto=self.producto, usuario=usuario)
+        for dia in range(1, 8):
+            Mantenciones.objects.create(producto=self.producto, fecha=date(2025, 1, dia), detalle=f"M{dia}")
+
+        self.client = APIClient()
+        autenticar(self.client, user)
+        self.url = f"/api/api/productos/{self.producto.pk}/"
+
+    def test_consultas_acotadas_y_cache(self):
+        """La primera lectura usa un número fijo de consultas; la segunda sale de cache"""
+        with self.assertNumQueries(4):
+            res = self.client.get(self.url)
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(len(res.data["mantenciones"]), 5)
+        self.assertEqual(len(res.data["asignaciones"]), 1)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(self.url).data, res.data)
+
+    def test_invalidacion_por_senales(self):
+        """Nuevas mantenciones o cambios de catálogo invalidan el payload"""
+        self.client.get(self.url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Mantenciones.objects.create(producto=self.producto, fecha=date(2025, 2, 1), detalle="Nueva")
+        res = self.client.get(self.url)
+        self.assertEqual(res.data["mantenciones"][0]["detalle"], "Nueva")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Marcas.objects.filter(pk=self.producto.modelo.marca_id).first().save()
+        with self.assertNumQueries(4):
+            self.client.get(self.url)
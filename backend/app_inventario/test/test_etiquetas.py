@@ -0,0 +1,86 @@
+# test/test_etiquetas.py
+# Pruebas de las hojas de etiquetas QR
+
+import os
+import re
+import tempfile
+from datetime import date
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+
+from app_inventario import etiquetas
+from app_inventario.models import Sucursales
+from app_inventario.test.factories import crear_catalogo, crear_producto, media_temporal
+
+User = get_user_model()
+
+
+def objetos_pdf(datos):
+    """Verifica la tabla xref y devuelve el número de páginas"""
+    inicio_xref = int(re.search(rb"startxref\n(\d+)", datos).group(1))
+    assert datos[inicio_xref:].startswith(b"xref")
+    offsets = re.findall(rb"(\d{10}) 00000 n", datos[inicio_xref:])
+    for numero, offset in enumerate(offsets, start=1):
+        assert datos[int(offset):].startswith(f"{numero} 0 obj".encode()), numero
+    return int(re.search(rb"/Count (\d+)", datos).group(1))
+
+
+class DocumentoEtiquetasTestCase(SimpleTestCase):
+
+    lista = [(f"http://x/detalle.html?id={i}", f"SN-{i}", "HP EliteBook") for i in range(50)]
+
+    def test_pdf_multipagina_con_pool(self):
+        """50 etiquetas -> 3 páginas con offsets válidos, igual en serie y en paralelo"""
+        serie = b"".join(etiquetas.generar_pdf(self.lista, workers=1))
+        paralelo = b"".join(etiquetas.generar_pdf(self.lista, workers=2))
+        self.assertEqual(objetos_pdf(serie), 3)
+        self.assertEqual(serie, paralelo)
+
+    def test_svg(self):
+        svg = b"".join(etiquetas.generar(self.lista[:3], "svg")).decode()
+        self.assertTrue(svg.startswith("<svg") and svg.endswith("</svg>"))
+        self.assertEqual(svg.count("<path"), 3)
+        self.assertIn(">SN-2</text>", svg)
+
+
+@media_temporal
+class EtiquetasEndpointTestCase(TestCase):
+
+    def setUp(self):
+        catalogo = crear_catalogo()
+        self.sucursal = Sucursales.objects.create(nombre="Central", direccion="Calle 1")
+        crear_producto(catalogo, "A-1", sucursal=self.sucursal, fecha_compra=date(2025, 1, 5))
+        crear_producto(catalogo, "A-2", sucursal=self.sucursal, fecha_compra=date(2025, 3, 5))
+        crear_producto(catalogo, "B-1", fecha_compra=date(2025, 1, 5))
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username="u", password="x"))
+
+    def test_endpoint_filtra_y_transmite(self):
+        url = "/api/api/productos/etiquetas/"
+        res = self.client.get(url, {"sucursal": self.sucursal.pk, "formato": "svg", "hasta": "2025-01-31"})
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(res.streaming)
+        svg = b"".join(res.streaming_content).decode()
+        self.assertIn("A-1", svg)
+        self.assertNotIn("A-2", svg)
+        self.assertNotIn("B-1", svg)
+
+        self.assertEqual(self.client.get(url, {"ids": "x"}).status_code, 400)
+        self.assertEqual(self.client.get(url, {"desde": "2030-01-01"}).status_code, 400)
+
+    @override_settings(ETIQUETAS_MAXIMO_HTTP=2)
+    def test_maximo_por_documento(self):
+        url = "/api/api/productos/etiquetas/"
+        self.assertEqual(self.client.get(url).status_code, 400)
+        self.assertEqual(self.client.get(url, {"sucursal": self.sucursal.pk}).status_code, 200)
+
+    def test_comando(self):
+        with tempfile.TemporaryDirectory() as directorio:
+            salida = os.path.join(directorio, "etiquetas.pdf")
+            call_command("generar_etiquetas", salida, workers=1, stdout=StringIO())
+            with open(salida, "rb") as f:
+                self.assertEqual(objetos_pdf(f.read()), 1)
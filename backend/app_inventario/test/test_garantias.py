@@ -0,0 +1,91 @@
+# test/test_garantias.py
+# Pruebas del motor de garantías y del calendario de vencimientos
+
+from datetime import date, timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from app_inventario.models import Notificaciones, Productos
+from app_inventario.services import GarantiaService
+from app_inventario.test.factories import crear_catalogo, crear_producto, media_temporal
+
+User = get_user_model()
+
+
+class MesesCalendarioTestCase(SimpleTestCase):
+
+    def test_sumar_meses(self):
+        self.assertEqual(GarantiaService.sumar_meses(date(2025, 1, 31), 1), date(2025, 2, 28))
+        self.assertEqual(GarantiaService.sumar_meses(date(2023, 2, 28), 12), date(2024, 2, 28))
+        self.assertEqual(GarantiaService.sumar_meses(date(2024, 2, 29), 12), date(2025, 2, 28))
+        self.assertEqual(GarantiaService.sumar_meses(date(2025, 11, 15), 14), date(2027, 1, 15))
+        # Antes: 36 * 30 días = 2027-12-16 (15 días de desfase)
+        self.assertEqual(GarantiaService.vencimiento(date(2025, 1, 1), 36), date(2028, 1, 1))
+        self.assertIsNone(GarantiaService.vencimiento(date(2025, 1, 1), 0))
+
+    def test_situacion(self):
+        hoy = date(2025, 6, 1)
+        self.assertEqual(GarantiaService.situacion(None, hoy), "no_aplica")
+        self.assertEqual(GarantiaService.situacion(date(2025, 5, 31), hoy), "vencida")
+        self.assertEqual(GarantiaService.situacion(date(2025, 7, 1), hoy), "por_vencer")
+        self.assertEqual(GarantiaService.situacion(date(2025, 7, 2), hoy), "vigente")
+
+
+@media_temporal
+class GarantiasTestCase(TestCase):
+
+    def setUp(self):
+        self.catalogo = crear_catalogo()
+        self.hoy = timezone.localdate()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username="u", password="x"))
+
+    def crear_con_vencimiento(self, serie, dias):
+        """Producto con garantía de 12 meses que vence en `dias` días"""
+        compra = GarantiaService.sumar_meses(self.hoy + timedelta(days=dias), -12)
+        producto = crear_producto(self.catalogo, serie, fecha_compra=compra, garantia_meses=12)
+        # Si el día no existe 12 meses después se ajusta: fijar la fecha exacta
+        Productos.objects.filter(pk=producto.pk).update(fecha_venc_garantia=self.hoy + timedelta(days=dias))
+        return producto
+
+    def test_calendario_por_dia_y_semana(self):
+        self.crear_con_vencimiento("A", 3)
+        self.crear_con_vencimiento("B", 3)
+        self.crear_con_vencimiento("C", 20)
+        self.crear_con_vencimiento("D", 200)
+
+        res = self.client.get("/api/api/garantias/calendario/", {"hasta": str(self.hoy + timedelta(days=60))})
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.data["total"], 3)
+        self.assertEqual(
+            [(f["fecha"], f["cantidad"]) for f in res.data["por_dia"]],
+            [(self.hoy + timedelta(days=3), 2), (self.hoy + timedelta(days=20), 1)],
+        )
+        self.assertEqual(sum(s["cantidad"] for s in res.data["por_semana"]), 3)
+        self.assertTrue(all(s["semana"].weekday() == 0 for s in res.data["por_semana"]))
+
+        res = self.client.get("/api/api/garantias/proximas/", {"dias": 7})
+        self.assertEqual([p["nro_serie"] for p in res.data], ["A", "B"])
+        self.assertEqual(res.data[0]["dias_restantes"], 3)
+
+        self.assertEqual(self.client.get("/api/api/garantias/calendario/", {"desde": "x"}).status_code, 400)
+        self.assertEqual(self.client.get("/api/api/garantias/calendario/", {"desde": "2025-02-30"}).status_code, 400)
+
+    def test_check_garantias_sin_duplicados(self):
+        """El comando y la señal comparten reglas: una sola alerta por producto"""
+        producto = self.crear_con_vencimiento("E", 5)
+        Notificaciones.objects.filter(categoria="garantia").delete()
+        vencido = self.crear_con_vencimiento("F", -1)
+        Productos.objects.filter(pk=vencido.pk).update(estado_garantia="VIGENTE")
+
+        call_command("check_garantias", stdout=StringIO())
+        call_command("check_garantias", stdout=StringIO())
+        alertas = Notificaciones.objects.filter(categoria="garantia")
+        self.assertEqual(alertas.count(), 1)
+        self.assertEqual((alertas[0].producto, alertas[0].prioridad), (producto, "alta"))
+        self.assertEqual(Productos.objects.get(pk=vencido.pk).estado_garantia, "VENCIDA")
@@ -0,0 +1,56 @@
+# test/test_listado_productos.py
+# Pruebas de los listados HTML de productos (paginación + filas cacheadas)
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from app_inventario.models import Marcas, Productos
+from app_inventario.test.factories import crear_catalogo, crear_producto, media_temporal
+
+
+@media_temporal
+@override_settings(PRODUCTOS_POR_PAGINA=2)
+class ListadoProductosTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.catalogo = crear_catalogo()
+        self.productos = [crear_producto(self.catalogo, f"NB-{n}") for n in range(1, 4)]
+
+    def series(self, response):
+        return [p.nro_serie for p in response.context["productos"]]
+
+    def test_paginado(self):
+        res = self.client.get(reverse("productos"))
+        self.assertEqual(res.context["total_productos"], 3)
+        self.assertEqual(self.series(res), ["NB-3", "NB-2"])
+
+        res = self.client.get(reverse("productos"), {"page": 2, "search": "nb"})
+        self.assertEqual(self.series(res), ["NB-1"])
+        # Los enlaces de página conservan la búsqueda
+        self.assertContains(res, "?page=1&amp;search=nb")
+
+        res = self.client.get(reverse("productos_disponibles"))
+        self.assertEqual(res.context["total_productos"], 3)
+
+    def test_filas_cacheadas_por_sello(self):
+        producto = self.productos[-1]
+        self.assertContains(self.client.get(reverse("productos")), "NB-3")
+
+        # update() no dispara señales: la fila sale de cache con el dato anterior
+        Productos.objects.filter(pk=producto.pk).update(nro_serie="NB-3X")
+        self.assertNotContains(self.client.get(reverse("productos")), "NB-3X")
+
+        # Guardar el producto cambia su sello
+        with self.captureOnCommitCallbacks(execute=True):
+            Productos.objects.get(pk=producto.pk).save()
+        self.assertContains(self.client.get(reverse("productos")), "NB-3X")
+
+    def test_catalogo_invalida_todas_las_filas(self):
+        self.client.get(reverse("productos"))
+        with self.captureOnCommitCallbacks(execute=True):
+            Marcas.objects.filter(pk=self.catalogo["marca"].pk).update(nombre="Hewlett")
+            self.catalogo["marca"].refresh_from_db()
+            self.catalogo["marca"].save()
+        self.assertContains(self.client.get(reverse("productos")), "Hewlett", count=2)
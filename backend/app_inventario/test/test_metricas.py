@@ -0,0 +1,100 @@
+# test/test_metricas.py
+# Pruebas de GET /metrics (histogramas por endpoint y gauges incrementales)
+
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from app_inventario import metricas
+from app_inventario.models import Asignaciones, Estados, Notificaciones, Usuarios
+from app_inventario.test.factories import crear_catalogo, crear_producto, media_temporal
+
+User = get_user_model()
+
+
+@media_temporal
+@override_settings(METRICAS_TOKEN="secreto")
+class MetricasTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        metricas.registro.reiniciar()
+        self.catalogo = crear_catalogo()
+        self.user = User.objects.create_user(username="u", password="x")
+
+    def scrape(self):
+        return self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer secreto").content.decode()
+
+    def valor(self, texto, metrica):
+        for linea in texto.splitlines():
+            if linea.startswith(metrica + " "):
+                return float(linea.split()[-1])
+        return None
+
+    @mock.patch("app_inventario.metricas._incrementales", return_value=True)
+    def test_gauges_incrementales(self, _):
+        texto = self.scrape()  # siembra con un conteo
+        self.assertEqual(self.valor(texto, 'inventario_productos{estado="Operativo"}'), 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            producto = crear_producto(self.catalogo, "NB-1")
+            Asignaciones.objects.create(producto=producto, usuario=Usuarios.objects.create(user=self.user))
+
+        # El scrape ya no consulta la BD
+        with self.assertNumQueries(0):
+            texto = metricas.exponer()
+        self.assertEqual(self.valor(texto, 'inventario_productos{estado="Operativo"}'), 1)
+        self.assertEqual(self.valor(texto, "inventario_asignaciones_activas"), 1)
+        no_leidas = self.valor(texto, "inventario_notificaciones_no_leidas")
+        self.assertEqual(no_leidas, Notificaciones.objects.filter(leido=False).count())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            producto.estado = Estados.objects.create(nombre="En Bodega")
+            producto.save()
+            Notificaciones.objects.filter(leido=False).first().marcar_como_leida()
+        texto = metricas.exponer()
+        self.assertEqual(self.valor(texto, 'inventario_productos{estado="Operativo"}'), 0)
+        self.assertEqual(self.valor(texto, 'inventario_productos{estado="En Bodega"}'), 1)
+        self.assertEqual(
+            self.valor(texto, "inventario_notificaciones_no_leidas"),
+            Notificaciones.objects.filter(leido=False).count(),
+        )
+
+        # Una clave expulsada de la cache se recalcula, no se reporta en 0
+        cache.delete(metricas._clave("asignaciones_activas"))
+        self.assertEqual(self.valor(metricas.exponer(), "inventario_asignaciones_activas"), 1)
+
+    def test_cache_por_proceso_cuenta_en_la_bd(self):
+        """Con LocMemCache los contadores de cada worker no suman: el scrape cuenta"""
+        producto = crear_producto(self.catalogo, "NB-1")  # sin on_commit: no pasa por contadores
+        Asignaciones.objects.create(producto=producto, usuario=Usuarios.objects.create(user=self.user))
+        texto = self.scrape()
+        self.assertEqual(self.valor(texto, 'inventario_productos{estado="Operativo"}'), 1)
+        self.assertEqual(self.valor(texto, "inventario_asignaciones_activas"), 1)
+
+    def test_latencia_y_cache(self):
+        producto = crear_producto(self.catalogo, "NB-2")
+        api = APIClient()
+        api.force_authenticate(self.user)
+        api.get(f"/api/api/productos/{producto.pk}/")
+        api.get(f"/api/api/productos/{producto.pk}/")
+
+        texto = self.scrape()
+        self.assertEqual(
+            self.valor(texto, 'inventario_http_request_duration_seconds_count{vista="productos-detail",metodo="GET"}'), 2
+        )
+        self.assertEqual(
+            self.valor(texto, 'inventario_http_request_duration_seconds_bucket{vista="productos-detail",metodo="GET",le="+Inf"}'), 2
+        )
+        self.assertEqual(self.valor(texto, 'inventario_cache_requests_total{cache="detalle_producto",resultado="hit"}'), 1)
+        self.assertEqual(self.valor(texto, 'inventario_cache_requests_total{cache="detalle_producto",resultado="miss"}'), 1)
+
+    def test_token(self):
+        self.assertEqual(self.client.get("/metrics").status_code, 401)
+        res = self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer secreto")
+        self.assertEqual(res.status_code, 200)
+        with override_settings(METRICAS_TOKEN=""):
+            self.assertEqual(self.client.get("/metrics").status_code, 403)
@@ -1,13 +1,16 @@
-# tests/test_notificaciones.py
+# test/test_notificaciones.py
 # Script para probar que las notificaciones se generan correctamente
 
 from django.test import TestCase
 from django.contrib.auth import get_user_model
-from app_inventario.models import Productos, Notificaciones
+from app_inventario.models import Estados, Notificaciones
 from app_inventario.services import NotificacionService
 
+from app_inventario.test.factories import crear_catalogo, crear_producto, media_temporal
+
 User = get_user_model()
 
+@media_temporal
 class NotificacionesTestCase(TestCase):
     
     def setUp(self):
@@ -17,52 +20,33 @@ class NotificacionesTestCase(TestCase):
             password='testpass123'
         )
         
-        self.producto = Productos.objects.create(
-            nombre='Producto Test',
-            stock=100,
-            precio=1000,
-            estado='activo'
-        )
+        self.producto = crear_producto(crear_catalogo(), 'SN-NOTIF-1')
     
-    def test_notificacion_stock_bajo(self):
-        """Prueba que se cree notificación cuando el stock es bajo"""
-        # Reducir stock a nivel bajo
-        self.producto.stock = 5
-        self.producto.save()
-        
-        # Crear notificación manualmente (simula tu señal)
-        NotificacionService.crear_notificacion_stock_bajo(
-            producto=self.producto,
-            usuario=self.user
-        )
-        
-        # Verificar que se creó la notificación
+    def test_notificacion_producto_creado(self):
+        """Prueba que la señal avise al registrar un producto"""
         notificacion = Notificaciones.objects.filter(
-            categoria='stock',
+            categoria='mantenimiento',
             producto=self.producto
         ).first()
         
         self.assertIsNotNone(notificacion)
-        self.assertEqual(notificacion.prioridad, 'alta')
-        self.assertIn('stock bajo', notificacion.titulo.lower())
-        print(f"✅ Test stock bajo: {notificacion.mensaje}")
+        self.assertEqual(notificacion.prioridad, 'baja')
+        self.assertIn('producto creado', notificacion.titulo.lower())
     
     def test_notificacion_cambio_estado(self):
         """Prueba que se cree notificación al cambiar estado a 'baja'"""
-        # Cambiar estado (esto debería disparar tu signal)
-        self.producto.estado = 'dado_de_baja'
+        # Cambiar estado (esto dispara producto_pre_save)
+        self.producto.estado = Estados.objects.create(nombre='Dado de baja')
         self.producto.save()
         
-        # Verificar que se creó la notificación
         notificacion = Notificaciones.objects.filter(
-            categoria='stock',
-            producto=self.producto
+            categoria='mantenimiento',
+            producto=self.producto,
+            titulo__startswith='Cambio de estado'
         ).first()
         
-        if notificacion:
-            print(f"✅ Test cambio estado: {notificacion.mensaje}")
-        else:
-            print("⚠️ No se creó notificación para cambio de estado")
+        self.assertIsNotNone(notificacion)
+        self.assertIn("'Dado de baja'", notificacion.mensaje)
     
     def test_notificacion_proveedor(self):
         """Prueba creación de notificación de proveedor"""
@@ -125,7 +109,7 @@ class NotificacionesTestCase(TestCase):
 """
 Para ejecutar estas pruebas, usa:
 
-python manage.py test tests.test_notificaciones
+python manage.py test app_inventario.test.test_notificaciones
 
 O ejecuta este script standalone:
 """
@@ -134,7 +118,7 @@ if __name__ == '__main__':
     import django
     import os
     
-    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'tu_proyecto.settings')
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'inventario_project.settings_test')
     django.setup()
     
     from django.test.utils import get_runner
@@ -142,4 +126,4 @@ if __name__ == '__main__':
     
     TestRunner = get_runner(settings)
     test_runner = TestRunner()
-    failures = test_runner.run_tests(["tests.test_notificaciones"])
\ No newline at end of file
+    failures = test_runner.run_tests(["app_inventario.test.test_notificaciones"])
\ No newline at end of file
@@ -0,0 +1,61 @@
+# test/test_perfilado.py
+# Pruebas del middleware de perfilado (Server-Timing y presupuestos)
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from app_inventario import metricas
+from app_inventario.perfilado import PresupuestoExcedido
+from app_inventario.test.factories import autenticar, crear_catalogo, crear_producto, media_temporal
+
+User = get_user_model()
+
+
+@media_temporal
+class PerfiladoTestCase(TestCase):
+
+    def setUp(self):
+        self.catalogo = crear_catalogo()
+        self.producto = crear_producto(self.catalogo, "NB-7001")
+        self.client = APIClient()
+        autenticar(self.client, User.objects.create_user(username="u", password="x", is_staff=True))
+
+    def test_server_timing_con_receptores(self):
+        """Un PATCH de producto expone (a staff) SQL, serialización y receptores de señales"""
+        with self.assertLogs("app_inventario.perfil", level="INFO") as logs:
+            res = self.client.patch(
+                f"/api/api/productos/{self.producto.pk}/", {"garantia_meses": 24}, format="json"
+            )
+        self.assertEqual(res.status_code, 200)
+        timing = res["Server-Timing"]
+        self.assertRegex(timing, r'db;dur=[\d.]+;desc="\d+ consultas"')
+        self.assertIn("ser;dur=", timing)
+        # Sólo se listan los 5 receptores más lentos: el orden varía entre corridas
+        self.assertRegex(timing, r'sig-producto_\w+;dur=[\d.]+;desc="1x"')
+        self.assertIn('"vista": "productos-detail"', logs.output[0])
+
+        # Sin DEBUG un usuario que no es staff no ve la cabecera (sí queda en el log)
+        otro = APIClient()
+        autenticar(otro, User.objects.create_user(username="v", password="x"))
+        with self.assertLogs("app_inventario.perfil", level="INFO"):
+            self.assertNotIn("Server-Timing", otro.get(f"/api/api/productos/{self.producto.pk}/"))
+
+    @override_settings(PERFIL_ACTIVO=False)
+    def test_inactivo_solo_metricas(self):
+        """Sin perfilado no hay cabecera ni log, pero /metrics sigue midiendo latencia"""
+        metricas.registro.reiniciar()
+        res = self.client.get(f"/api/api/productos/{self.producto.pk}/")
+        self.assertNotIn("Server-Timing", res)
+        self.assertEqual(metricas.registro.requests, {("productos-detail", "GET", "200"): 1})
+
+    @override_settings(PERFIL_PRESUPUESTOS={"productos-list": {"consultas": 1}}, PERFIL_ESTRICTO=True)
+    def test_presupuesto_estricto(self):
+        with self.assertRaises(PresupuestoExcedido), self.assertLogs("app_inventario.perfil", "WARNING"):
+            self.client.get("/api/api/productos/")
+
+    @override_settings(PERFIL_PRESUPUESTOS={"productos-list": {"consultas": 1}}, PERFIL_ESTRICTO=False)
+    def test_presupuesto_solo_log(self):
+        with self.assertLogs("app_inventario.perfil", "WARNING") as logs:
+            self.assertEqual(self.client.get("/api/api/productos/").status_code, 200)
+        self.assertIn("presupuesto_excedido", logs.output[0])
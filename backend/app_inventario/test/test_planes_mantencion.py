@@ -0,0 +1,117 @@
+# test/test_planes_mantencion.py
+# Pruebas del scheduler de mantenciones preventivas
+
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from app_inventario.models import Mantenciones, PlanMantencion, Sucursales
+from app_inventario.services import GarantiaService, PlanMantencionService
+from app_inventario.test.factories import crear_catalogo, crear_producto, media_temporal
+
+User = get_user_model()
+
+
+@media_temporal
+class PlanMantencionTestCase(TestCase):
+
+    def setUp(self):
+        self.catalogo = crear_catalogo()
+        self.sucursal = Sucursales.objects.create(nombre="Temuco")
+        self.nb1 = crear_producto(self.catalogo, "NB-1", fecha_compra=date(2025, 1, 31), sucursal=self.sucursal)
+        self.nb2 = crear_producto(self.catalogo, "NB-2", fecha_compra=date(2025, 3, 15))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.plan = PlanMantencion.objects.create(
+                nombre="Limpieza", categoria=self.catalogo["categoria"], frecuencia_meses=3, activo=False,
+            )
+
+    def test_programar_ventana_idempotente(self):
+        hoy = date(2025, 4, 1)
+        creadas = PlanMantencionService.programar(hoy=hoy, dias=180)
+        self.assertEqual(creadas, 0)  # plan inactivo
+
+        self.plan.activo = True
+        self.plan.save()
+        creadas = PlanMantencionService.programar(hoy=hoy, dias=180)
+        fechas = sorted(Mantenciones.objects.filter(plan=self.plan).values_list("producto__nro_serie", "fecha"))
+        self.assertEqual(fechas, [
+            ("NB-1", date(2025, 4, 30)), ("NB-1", date(2025, 7, 31)),
+            ("NB-2", date(2025, 6, 15)), ("NB-2", date(2025, 9, 15)),
+        ])
+        self.assertEqual(creadas, 4)
+        self.assertEqual(PlanMantencionService.programar(hoy=hoy, dias=180), 0)
+
+        # La ventana avanza: la serie continúa desde la última programada
+        PlanMantencionService.programar(hoy=hoy, dias=300)
+        self.assertTrue(
+            Mantenciones.objects.filter(plan=self.plan, producto=self.nb1, fecha=date(2025, 10, 31)).exists()
+        )
+
+    def test_serie_mensual_sin_deriva(self):
+        """Fin de mes: cada ejecución recalcula desde la compra, no desde la última fecha recortada"""
+        PlanMantencion.objects.filter(pk=self.plan.pk).update(activo=True, frecuencia_meses=1)
+        self.plan.refresh_from_db()
+        PlanMantencionService.programar([self.plan], hoy=date(2025, 2, 1), dias=88)
+        PlanMantencionService.programar([self.plan], hoy=date(2025, 2, 1), dias=150)
+        fechas = list(
+            Mantenciones.objects.filter(plan=self.plan, producto=self.nb1).order_by("fecha").values_list("fecha", flat=True)
+        )
+        self.assertEqual(fechas, [
+            date(2025, 2, 28), date(2025, 3, 31), date(2025, 4, 30), date(2025, 5, 31), date(2025, 6, 30),
+        ])
+
+    def test_programadas_no_cuentan_como_realizadas(self):
+        """Las del plan nacen pendientes: no llenan el historial del detalle ni /realizadas/"""
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user(username="u", password="x"))
+        PlanMantencion.objects.filter(pk=self.plan.pk).update(activo=True, frecuencia_meses=1)
+        self.plan.refresh_from_db()
+        hoy = date.today()
+        PlanMantencionService.programar([self.plan], hoy=hoy - timedelta(days=60), dias=240)
+        atrasada = Mantenciones.objects.filter(plan=self.plan, producto=self.nb1, fecha__lt=hoy).earliest("fecha")
+
+        res = client.post("/api/api/mantenciones/", {
+            "producto": self.nb1.pk, "fecha": str(hoy - timedelta(days=90)), "detalle": "Cambio de disco",
+        })
+        self.assertEqual(res.status_code, 201)
+        self.assertTrue(res.data["realizada"])
+
+        detalle = client.get(f"/api/api/productos/{self.nb1.pk}/").data
+        self.assertEqual([m["detalle"] for m in detalle["mantenciones"]], ["Cambio de disco"])
+        self.assertEqual(len(client.get("/api/api/mantenciones/realizadas/").data), 1)
+        self.assertTrue(all(not m["realizada"] for m in client.get("/api/api/mantenciones/proximas/").data))
+
+        # Registrar que la atrasada sí se hizo
+        res = client.patch(f"/api/api/mantenciones/{atrasada.pk}/", {"realizada": True}, format="json")
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(len(client.get("/api/api/mantenciones/realizadas/").data), 2)
+
+    def test_reprogramar_y_agenda(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user(username="u", password="x"))
+        hoy = date.today()
+        crear_producto(self.catalogo, "NB-3", fecha_compra=hoy - timedelta(days=1))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            res = client.patch(
+                f"/api/api/planes-mantencion/{self.plan.pk}/", {"activo": True, "frecuencia_meses": 1}, format="json"
+            )
+        self.assertEqual(res.status_code, 200)
+        pendientes = Mantenciones.objects.filter(plan=self.plan, producto__nro_serie="NB-3")
+        primera = pendientes.order_by("fecha").first().fecha
+        self.assertEqual(primera, GarantiaService.sumar_meses(hoy - timedelta(days=1), 1))
+        res = client.get("/api/api/mantenciones/agenda/", {"desde": str(primera), "hasta": str(primera)})
+        self.assertEqual([m["producto_nro_serie"] for m in res.data["resultados"]], ["NB-3"])
+        self.assertEqual(res.data["por_sucursal"][0]["cantidad"], 1)
+        self.assertEqual(client.get("/api/api/mantenciones/agenda/", {"desde": "2025-02-30"}).status_code, 400)
+        res = client.get("/api/api/mantenciones/proximas/", {"dias": 10 ** 10})
+        self.assertEqual(res.status_code, 200)
+        self.assertIn(primera.isoformat(), [m["fecha"] for m in res.data])
+
+        self.assertEqual(
+            client.post("/api/api/planes-mantencion/", {"nombre": "X", "frecuencia_meses": 2}).status_code, 400
+        )
+        self.plan.delete()
+        self.assertFalse(Mantenciones.objects.filter(fecha__gte=hoy).exists())
@@ -0,0 +1,84 @@
+# test/test_qr.py
+# Pruebas del renderizado de QR bajo demanda y su cache en disco
+
+import os
+import tempfile
+from io import BytesIO
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from PIL import Image
+from rest_framework.test import APIClient
+
+from app_inventario import autenticacion
+from app_inventario.models import Sucursales, Usuarios
+from app_inventario.services import QRService
+from app_inventario.test.factories import autenticar, crear_catalogo, crear_producto, media_temporal
+
+User = get_user_model()
+
+
+@media_temporal
+@override_settings(QR_BASE_URL="https://inventario.example.cl")
+class QRProductoTestCase(TestCase):
+
+    def setUp(self):
+        self.producto = crear_producto(crear_catalogo(), "NB-4001")
+        self.url = f"/api/api/productos/{self.producto.pk}/qr/"
+        self.client = APIClient()
+        self.user = User.objects.create_user(username="u", password="x")
+        autenticar(self.client, self.user)
+
+    def tearDown(self):
+        autenticacion.limpiar_cache_local()
+
+    def test_png_y_svg(self):
+        """Sirve PNG del tamaño pedido y SVG con ETag"""
+        res = self.client.get(self.url, {"tamano": 300})
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res["Content-Type"], "image/png")
+        self.assertEqual(res["Cache-Control"], "private, max-age=86400")
+        self.assertEqual(Image.open(BytesIO(res.content)).size, (300, 300))
+
+        res2 = self.client.get(self.url, {"tamano": 300}, HTTP_IF_NONE_MATCH=res["ETag"])
+        self.assertEqual(res2.status_code, 304)
+
+        res = self.client.get(self.url, {"formato": "svg", "tamano": 150})
+        self.assertEqual(res["Content-Type"], "image/svg+xml")
+        self.assertIn(b'width="150" height="150"', res.content)
+
+        self.assertEqual(self.client.get(self.url, {"formato": "gif"}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {"tamano": 10}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {"tamano": 2048}).status_code, 400)
+
+    def test_requiere_token_y_alcance(self):
+        """Sin token 401; un producto fuera de las sucursales del usuario no existe"""
+        self.assertEqual(APIClient().get(self.url).status_code, 401)
+
+        sucursal = Sucursales.objects.create(nombre="Tienda Norte")
+        Usuarios.objects.create(user=self.user).sucursales.set([sucursal])
+        autenticar(self.client, User.objects.get(pk=self.user.pk))
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+    def test_contenido_desde_settings(self):
+        """La URL codificada sale de QR_BASE_URL y el producto ya no guarda PNG"""
+        self.assertEqual(
+            QRService.contenido_producto(self.producto.pk),
+            f"https://inventario.example.cl/paginas/productos/detalle.html?id={self.producto.pk}",
+        )
+        self.assertFalse(self.producto.codigo_qr.imagen_qr)
+
+    def test_cache_lru(self):
+        """Las imágenes se reutilizan desde disco y se purgan las menos usadas"""
+        with tempfile.TemporaryDirectory() as directorio, override_settings(QR_CACHE_DIR=directorio):
+            QRService._bytes_en_cache = None
+            datos, clave = QRService.obtener("a", 128, "png")
+            ruta = os.path.join(directorio, clave[:2], f"{clave}.png")
+            self.assertTrue(os.path.exists(ruta))
+            self.assertEqual(QRService.obtener("a", 128, "png"), (datos, clave))
+
+            os.utime(ruta, (1, 1))  # la más antigua
+            QRService.obtener("b", 128, "png")
+            QRService.purgar(limite_bytes=len(datos) + 1)
+            self.assertFalse(os.path.exists(ruta))
+            QRService._bytes_en_cache = None
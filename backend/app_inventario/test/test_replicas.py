@@ -0,0 +1,79 @@
+# test/test_replicas.py
+# Pruebas del router de réplica de lectura con una segunda BD SQLite
+
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from app_inventario import replicas
+from app_inventario.models import Categorias, Estados, Marcas, Modelos, Productos, Proveedores
+from app_inventario.test.factories import autenticar, crear_catalogo, crear_producto, media_temporal
+
+User = get_user_model()
+
+
+@media_temporal
+@override_settings(REPLICA_DB="replica")
+class ReplicaTestCase(TestCase):
+    databases = {"default", "replica"}
+
+    def setUp(self):
+        cache.clear()
+        self.catalogo = crear_catalogo()
+        self.primaria = crear_producto(self.catalogo, "SOLO-PRIMARIA")
+
+        # La "réplica" tiene otros datos: así se ve de dónde leyó cada request.
+        # bulk_create no dispara señales (que escribirían en la primaria)
+        marca = Marcas.objects.using("replica").create(nombre="Dell")
+        Productos.objects.using("replica").bulk_create([Productos(
+            nro_serie="SOLO-REPLICA", fecha_compra=date.today(),
+            estado=Estados.objects.using("replica").create(nombre="Operativo"),
+            proveedor=Proveedores.objects.using("replica").create(
+                nombre="Prov", rut="22222222-2", contacto="c", telefono="1", correo="p@r.cl",
+            ),
+            modelo=Modelos.objects.using("replica").create(marca=marca, nombre="Latitude"),
+            categoria=Categorias.objects.using("replica").create(nombre="Notebooks"),
+        )])
+
+        self.user = User.objects.create_user(username="tecnico", password="x")
+        self.client = APIClient()
+        autenticar(self.client, self.user)
+
+    def series(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return {p["nro_serie"] for p in response.data["results"]}
+
+    def test_listados_leen_de_la_replica(self):
+        self.assertEqual(self.series("/api/api/productos/"), {"SOLO-REPLICA"})
+        # El detalle (cacheado) siempre lee de la primaria
+        self.assertEqual(self.client.get(f"/api/api/productos/{self.primaria.pk}/").status_code, 200)
+
+    def test_read_your_writes(self):
+        response = self.client.patch(
+            f"/api/api/productos/{self.primaria.pk}/", {"documento_factura": "F-1"}, format="json"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Productos.objects.get(pk=self.primaria.pk).documento_factura, "F-1")
+        self.assertFalse(Productos.objects.using("replica").filter(documento_factura="F-1").exists())
+
+        # Quien escribió lee de la primaria durante REPLICA_STICKY_SEGUNDOS...
+        self.assertEqual(self.series("/api/api/productos/"), {"SOLO-PRIMARIA"})
+
+        # ...los demás siguen en la réplica
+        otro = APIClient()
+        otro.force_authenticate(User.objects.create_user(username="mesa", password="x"))
+        self.assertEqual({p["nro_serie"] for p in otro.get("/api/api/productos/").data["results"]}, {"SOLO-REPLICA"})
+
+    def test_router(self):
+        self.assertIsNone(replicas.alias_lectura())
+        with replicas.en_replica():
+            self.assertEqual(Productos.objects.get().nro_serie, "SOLO-REPLICA")
+            # Una escritura dentro del bloque devuelve las lecturas siguientes a la primaria
+            Estados.objects.create(nombre="En Bodega")
+            self.assertEqual(Productos.objects.get().nro_serie, "SOLO-PRIMARIA")
+        self.assertTrue(Estados.objects.filter(nombre="En Bodega").exists())
+        self.assertFalse(Estados.objects.using("replica").filter(nombre="En Bodega").exists())
@@ -0,0 +1,88 @@
+# test/test_rollups.py
+# Pruebas de los totales diarios/mensuales de Movimientos
+
+from datetime import date, datetime, timezone as dt_timezone
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from app_inventario.models import Movimientos, MovimientosDiarios, MovimientosMensuales
+from app_inventario.services import RollupMovimientosService
+
+User = get_user_model()
+
+
+class RollupMovimientosTestCase(TestCase):
+
+    def crear_movimiento(self, tipo, sku, cantidad, fecha):
+        mov = Movimientos.objects.create(tipo=tipo, sku=sku, cantidad=cantidad)
+        # `fecha` es auto_now_add: se fija después con update (sin señales)
+        Movimientos.objects.filter(pk=mov.pk).update(fecha=fecha)
+        mov.refresh_from_db()
+        return mov
+
+    def test_incremental_crear_editar_eliminar(self):
+        """Los signals mantienen los buckets al crear, editar y eliminar"""
+        mov = Movimientos.objects.create(tipo="entrada", sku="NB-1", cantidad=3)
+        Movimientos.objects.create(tipo="entrada", sku="NB-1", cantidad=2)
+
+        diario = MovimientosDiarios.objects.get(sku="NB-1", tipo="entrada")
+        self.assertEqual(diario.cantidad, 5)
+        self.assertEqual(diario.total_movimientos, 2)
+        self.assertEqual(MovimientosMensuales.objects.get(sku="NB-1").cantidad, 5)
+
+        mov.tipo = "salida"
+        mov.save()
+        self.assertEqual(MovimientosDiarios.objects.get(sku="NB-1", tipo="entrada").cantidad, 2)
+        self.assertEqual(MovimientosDiarios.objects.get(sku="NB-1", tipo="salida").cantidad, 3)
+
+        mov.delete()
+        self.assertFalse(MovimientosDiarios.objects.filter(tipo="salida").exists())
+
+    def test_rebuild_rollups(self):
+        """El comando regenera los buckets desde el ledger"""
+        self.crear_movimiento("entrada", "PC-1", 4, datetime(2025, 1, 6, 10, tzinfo=dt_timezone.utc))
+        self.crear_movimiento("entrada", "PC-1", 1, datetime(2025, 1, 7, 10, tzinfo=dt_timezone.utc))
+        self.crear_movimiento("salida", "PC-1", 2, datetime(2025, 2, 3, 10, tzinfo=dt_timezone.utc))
+        MovimientosDiarios.objects.all().delete()
+        MovimientosMensuales.objects.all().delete()
+
+        call_command("rebuild_rollups", desde="2025-01-01", hasta="2025-02-28", stdout=StringIO())
+
+        self.assertEqual(MovimientosDiarios.objects.count(), 3)
+        with self.assertRaises(CommandError):
+            call_command("rebuild_rollups", desde="2025-02-30", stdout=StringIO())
+        enero = MovimientosMensuales.objects.get(fecha=date(2025, 1, 1), tipo="entrada")
+        self.assertEqual((enero.cantidad, enero.total_movimientos), (5, 2))
+
+        semanas = RollupMovimientosService.tendencia("semana", skus=["PC-1"])
+        self.assertEqual(
+            [(f["periodo"], f["tipo"], f["cantidad_total"]) for f in semanas],
+            [(date(2025, 1, 6), "entrada", 5), (date(2025, 2, 3), "salida", 2)],
+        )
+
+        # `desde` a mitad de semana no deja una primera barra parcial
+        semanas = RollupMovimientosService.tendencia("semana", desde=date(2025, 1, 8), skus=["PC-1"])
+        self.assertEqual(
+            [(f["periodo"], f["cantidad_total"]) for f in semanas],
+            [(date(2025, 1, 6), 5), (date(2025, 2, 3), 2)],
+        )
+
+    def test_endpoint_tendencia(self):
+        """GET /api/movimientos/tendencia/ valida parámetros y filtra por SKU"""
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user(username="u", password="x"))
+        Movimientos.objects.create(tipo="entrada", sku="A", cantidad=1)
+        Movimientos.objects.create(tipo="salida", sku="B", cantidad=1)
+
+        res = client.get("/api/api/movimientos/tendencia/", {"periodo": "mes", "sku": "A"})
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual([f["tipo"] for f in res.data["resultados"]], ["entrada"])
+
+        res = client.get("/api/api/movimientos/tendencia/", {"periodo": "anio"})
+        self.assertEqual(res.status_code, 400)
+        res = client.get("/api/api/movimientos/tendencia/", {"desde": "2025-02-30"})
+        self.assertEqual(res.status_code, 400)
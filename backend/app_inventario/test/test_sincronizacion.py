@@ -0,0 +1,133 @@
+# test/test_sincronizacion.py
+# Pruebas de la sincronización incremental (GET /api/api/<recurso>/cambios/)
+
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from app_inventario import autenticacion
+from app_inventario.models import Asignaciones, Eliminaciones, Productos, Sucursales, Usuarios
+from app_inventario.services import SincronizacionService
+from app_inventario.test.factories import autenticar, crear_catalogo, crear_producto, media_temporal
+
+User = get_user_model()
+URL = "/api/api/productos/cambios/"
+
+
+@media_temporal
+@override_settings(SINCRONIZACION_MARGEN_SEGUNDOS=0)
+class SincronizacionTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.catalogo = crear_catalogo()
+        self.productos = [crear_producto(self.catalogo, f"NB-{n}") for n in range(1, 4)]
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username="u", password="x"))
+
+    def cambios(self, **params):
+        res = self.client.get(URL, params)
+        self.assertEqual(res.status_code, 200, res.data)
+        return res.data
+
+    def series(self, data):
+        return [p["nro_serie"] for p in data["cambios"]]
+
+    def test_carga_inicial_por_lotes(self):
+        data = self.cambios(limit=2)
+        self.assertEqual(self.series(data), ["NB-1", "NB-2"])
+        self.assertTrue(data["mas"])
+
+        data = self.cambios(cursor=data["cursor"], limit=2)
+        self.assertEqual(self.series(data), ["NB-3"])
+        self.assertFalse(data["mas"])
+
+        # Sin cambios desde el último cursor
+        self.assertEqual(self.series(self.cambios(cursor=data["cursor"])), [])
+
+    def test_cambios_y_eliminados(self):
+        cursor = self.cambios()["cursor"]
+        editado, borrado, _ = self.productos
+        editado.documento_factura = "F-1"
+        editado.save()
+        borrado_id = borrado.pk
+        borrado.delete()
+
+        data = self.cambios(cursor=cursor)
+        self.assertEqual(self.series(data), ["NB-1"])
+        self.assertEqual(data["eliminados"], [borrado_id])
+
+    def test_renombrar_catalogo_marca_sus_productos(self):
+        cursor = self.cambios()["cursor"]
+        marca = self.catalogo["modelo"].marca
+        marca.nombre = "Hewlett-Packard"
+        marca.save()
+
+        data = self.cambios(cursor=cursor)
+        self.assertEqual(len(data["cambios"]), 3)
+        self.assertTrue(all(p["modelo_nombre"].startswith("Hewlett-Packard") for p in data["cambios"]))
+
+    def test_updated_since(self):
+        antes = timezone.now()
+        Productos.objects.update(actualizado=antes - timedelta(hours=1))
+        Productos.objects.filter(pk=self.productos[2].pk).update(actualizado=antes + timedelta(seconds=1))
+
+        # "+" sin codificar: llega como espacio
+        desde = antes.replace(microsecond=0).isoformat()
+        res = self.client.get(f"{URL}?updated_since={desde}")
+        self.assertEqual(self.series(res.data), ["NB-3"])
+
+    def test_parametros_invalidos_y_cursor_vencido(self):
+        self.assertEqual(self.client.get(URL, {"cursor": "no-es-un-cursor"}).status_code, 400)
+        self.assertEqual(self.client.get(URL, {"updated_since": "ayer"}).status_code, 400)
+
+        viejo = SincronizacionService.codificar_cursor(timezone.now() - timedelta(days=365), 0)
+        self.assertEqual(self.client.get(URL, {"cursor": viejo}).status_code, 410)
+
+    def test_salida_de_alcance(self):
+        """Un producto movido a otra sucursal es un `eliminado` para quien sólo veía la de origen"""
+        norte = Sucursales.objects.create(nombre="Tienda Norte")
+        sur = Sucursales.objects.create(nombre="Tienda Sur")
+        movido, vuelve, _ = self.productos
+        Productos.objects.filter(pk__in=[movido.pk, vuelve.pk]).update(sucursal=norte)
+        user = User.objects.create_user(username="norte", password="x")
+        perfil = Usuarios.objects.create(user=user)
+        perfil.sucursales.set([norte])
+        asignacion = Asignaciones.objects.create(producto=movido, usuario=perfil)
+        sucursal_cliente = APIClient()
+        autenticar(sucursal_cliente, user)
+        cursor = sucursal_cliente.get(URL).data["cursor"]
+        cursor_asignaciones = sucursal_cliente.get("/api/api/asignaciones/cambios/").data["cursor"]
+        cursor_central = self.cambios()["cursor"]
+
+        for producto in (movido, vuelve):
+            producto.refresh_from_db()
+            producto.sucursal = sur
+            producto.save()
+        vuelve.sucursal = norte
+        vuelve.save()
+
+        data = sucursal_cliente.get(URL, {"cursor": cursor}).data
+        self.assertEqual(data["eliminados"], [movido.pk])
+        self.assertEqual(self.series(data), ["NB-2"])
+        data = sucursal_cliente.get("/api/api/asignaciones/cambios/", {"cursor": cursor_asignaciones}).data
+        self.assertEqual(data["eliminados"], [asignacion.pk])
+        # Sin restricción de sucursal sigue viéndolos: no es un borrado
+        self.assertEqual(self.cambios(cursor=cursor_central)["eliminados"], [])
+        autenticacion.limpiar_cache_local()
+
+    def test_purgar(self):
+        self.productos[0].delete()
+        Eliminaciones.objects.update(eliminado=timezone.now() - timedelta(days=365))
+        vigente = self.productos[1].pk
+        self.productos[1].delete()
+
+        self.assertGreater(SincronizacionService.purgar(), 0)
+        self.assertEqual(
+            list(Eliminaciones.objects.filter(modelo="productos").values_list("objeto_id", flat=True)),
+            [vigente],
+        )
@@ -0,0 +1,73 @@
+# test/test_snapshots.py
+# Pruebas de las fotos mensuales del inventario y su comparación
+
+import io
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from app_inventario.models import Estados, SnapshotsInventario, Sucursales
+from app_inventario.services import SnapshotInventarioService
+from app_inventario.test.factories import crear_catalogo, crear_producto, media_temporal
+
+User = get_user_model()
+URL = "/api/api/snapshots-inventario/"
+
+
+@media_temporal
+class SnapshotsInventarioTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        catalogo = crear_catalogo()
+        self.sucursal = Sucursales.objects.create(nombre="Casa Matriz")
+        self.productos = [
+            crear_producto(catalogo, f"NB-{n}", sucursal=self.sucursal) for n in range(1, 4)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username="u", password="x"))
+
+    def test_foto_columnar_y_resumen(self):
+        snapshot = SnapshotInventarioService.tomar(date(2026, 9, 30))
+        self.assertEqual(snapshot.periodo, date(2026, 9, 1))
+        self.assertEqual(SnapshotInventarioService.datos(snapshot)["nro_serie"], ["NB-1", "NB-2", "NB-3"])
+        self.assertEqual(
+            snapshot.resumen["por_sucursal"], [{"id": self.sucursal.pk, "nombre": "Casa Matriz", "cantidad": 3}],
+        )
+        # Una por mes: no se reescribe
+        self.assertIsNone(SnapshotInventarioService.tomar(date(2026, 9, 30)))
+
+    def test_diferencia(self):
+        SnapshotInventarioService.tomar(date(2026, 9, 30))
+        baja = Estados.objects.create(nombre="Dado de Baja")
+        cambiado, eliminado, _ = self.productos
+        cambiado.estado = baja
+        cambiado.save()
+        eliminado.delete()
+        SnapshotInventarioService.tomar(date(2026, 10, 31))
+
+        res = self.client.get(f"{URL}diferencia/", {"desde": "2026-09", "hasta": "2026-10"})
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.data["cantidades"]["bajas"], 1)
+        self.assertEqual(res.data["cantidades"]["por_campo"]["estado"], 1)
+        self.assertEqual(res.data["cambios"][0]["nro_serie"], "NB-1")
+        self.assertEqual(res.data["cambios"][0]["estado"][1], baja.pk)
+        por_estado = {fila["nombre"]: fila["diferencia"] for fila in res.data["totales"]["estado"]}
+        self.assertEqual(por_estado["Dado de Baja"], 1)
+
+        self.assertEqual(self.client.get(f"{URL}diferencia/", {"desde": "2026-08", "hasta": "2026-10"}).status_code, 404)
+        self.assertEqual(self.client.get(f"{URL}diferencia/", {"desde": "septiembre"}).status_code, 400)
+        self.assertEqual(self.client.get(f"{URL}diferencia/", {"desde": "2025-13"}).status_code, 400)
+
+    def test_comando_fin_de_mes(self):
+        call_command("snapshot_inventario", fecha=date(2026, 10, 19), fin_de_mes=True, stdout=io.StringIO())
+        self.assertFalse(SnapshotsInventario.objects.exists())
+        call_command("snapshot_inventario", fecha=date(2026, 10, 31), fin_de_mes=True, stdout=io.StringIO())
+        self.assertTrue(SnapshotsInventario.objects.filter(periodo=date(2026, 10, 1)).exists())
+
+        res = self.client.get(URL)
+        self.assertEqual([s["periodo"] for s in res.data], ["2026-10-01"])
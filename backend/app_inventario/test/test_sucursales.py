@@ -0,0 +1,161 @@
+# test/test_sucursales.py
+# Pruebas del alcance por sucursal (usuarios de sucursal) y del dashboard particionado
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from app_inventario import autenticacion, autocompletado
+from app_inventario.models import Asignaciones, Estados, Sucursales, Usuarios
+from app_inventario.services import CacheDetalleProductoService, ResumenInventarioService
+from app_inventario.test.factories import (
+    autenticar, crear_catalogo, crear_producto, media_temporal, un_segundo_despues,
+)
+
+User = get_user_model()
+URL = "/api/api/productos/"
+
+
+@media_temporal
+class AlcanceSucursalTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        autocompletado.reiniciar()
+        self.catalogo = crear_catalogo()
+        self.norte = Sucursales.objects.create(nombre="Tienda Norte")
+        self.sur = Sucursales.objects.create(nombre="Tienda Sur")
+        self.propios = [crear_producto(self.catalogo, f"NORTE-{n}", sucursal=self.norte) for n in range(1, 3)]
+        self.ajeno = crear_producto(self.catalogo, "SUR-1", sucursal=self.sur)
+
+        self.user = User.objects.create_user(username="norte", password="x")
+        self.perfil = Usuarios.objects.create(user=self.user)
+        self.perfil.sucursales.set([self.norte])
+        self.client = APIClient()
+        autenticar(self.client, self.user)
+
+    def tearDown(self):
+        autenticacion.limpiar_cache_local()
+        autocompletado.reiniciar()
+        cache.clear()
+
+    def test_listado_y_detalle_acotados(self):
+        series = {p["nro_serie"] for p in self.client.get(URL).data["results"]}
+        self.assertEqual(series, {"NORTE-1", "NORTE-2"})
+        # Ni desde el cache del detalle (que es por producto, no por usuario)
+        CacheDetalleProductoService.guardar(self.ajeno.pk, "testserver", {"sucursal": {"id": self.sur.pk}})
+        self.assertEqual(self.client.get(f"{URL}{self.ajeno.pk}/").status_code, 404)
+        self.assertEqual(self.client.get(f"{URL}{self.propios[0].pk}/").status_code, 200)
+
+        # Sin sucursales asignadas (o ADMIN) ve todo
+        admin = APIClient()
+        autenticar(admin, User.objects.create_user(username="central", password="x"))
+        self.assertEqual(admin.get(URL).data["count"], 3)
+
+    def test_escrituras_fuera_del_alcance(self):
+        datos = {
+            "nro_serie": "NUEVO-1", "fecha_compra": "2026-01-01", "estado": self.catalogo["estado"].pk,
+            "proveedor": self.catalogo["proveedor"].pk, "modelo": self.catalogo["modelo"].pk,
+            "categoria": self.catalogo["categoria"].pk, "sucursal": self.sur.pk,
+        }
+        self.assertEqual(self.client.post(URL, datos, format="json").status_code, 403)
+        self.assertEqual(self.client.post(URL, {**datos, "sucursal": None}, format="json").status_code, 403)
+        res = self.client.patch(f"{URL}{self.propios[0].pk}/", {"sucursal": self.sur.pk}, format="json")
+        self.assertEqual(res.status_code, 403)
+
+        baja = Estados.objects.create(nombre="Dado de Baja")
+        res = self.client.post(f"{URL}cambiar_estado/", {
+            "productos": [self.propios[0].pk, self.ajeno.pk], "estado": baja.pk,
+        }, format="json")
+        self.assertEqual(res.data, {"actualizados": 1, "sin_cambio": 0, "no_encontrados": [self.ajeno.pk]})
+
+    def test_relaciones_y_autocompletado(self):
+        Asignaciones.objects.create(producto=self.ajeno, usuario=self.perfil)
+        Asignaciones.objects.create(producto=self.propios[0], usuario=self.perfil)
+        res = self.client.get("/api/api/asignaciones/")
+        self.assertEqual([a["producto"] for a in res.data["results"]], [self.propios[0].pk])
+
+        res = self.client.get("/api/api/autocomplete/", {"q": "", "campos": "nro_serie"})
+        self.assertEqual({p["texto"] for p in res.data["resultados"]["nro_serie"]}, {"NORTE-1", "NORTE-2"})
+
+        self.assertEqual(self.client.get("/api/api/snapshots-inventario/").status_code, 403)
+
+    def test_no_puede_ampliar_su_propio_alcance(self):
+        """Ni por el CRUD de usuarios ni por /me/ se quita sucursales o se da rol ADMIN"""
+        url = f"/api/api/usuarios/{self.perfil.pk}/"
+        for datos in ({"sucursales": []}, {"rol": "ADMIN"}, {"is_staff": True}):
+            self.assertEqual(self.client.patch(url, datos, format="json").status_code, 403)
+        self.assertEqual(self.client.delete(url).status_code, 403)
+
+        res = self.client.patch("/api/api/usuarios/me/", {
+            "rol": "ADMIN", "is_staff": True, "sucursales": [], "first_name": "Norte",
+        }, format="json")
+        self.assertEqual(res.status_code, 200)
+        self.perfil.refresh_from_db()
+        self.assertEqual(self.perfil.user.first_name, "Norte")
+        self.assertNotEqual(self.perfil.rol, "ADMIN")
+        self.assertFalse(self.perfil.user.is_staff)
+        self.assertEqual(list(self.perfil.sucursales.all()), [self.norte])
+
+        # Un administrador sin restricción sí puede asignarlas
+        admin = APIClient()
+        autenticar(admin, User.objects.create_user(username="central", password="x", is_staff=True))
+        self.assertEqual(admin.patch(url, {"sucursales": [self.sur.pk]}, format="json").status_code, 200)
+
+    def test_asignar_sucursales_revoca_el_token(self):
+        with un_segundo_despues(), self.captureOnCommitCallbacks(execute=True):
+            self.perfil.sucursales.add(self.sur)
+        self.assertEqual(self.client.get(URL).status_code, 401)
+
+        # El token nuevo ya trae ambas sucursales
+        token = autenticacion.agregar_claims({}, User.objects.get(pk=self.user.pk))
+        self.assertEqual(token["sucursales"], sorted([self.norte.pk, self.sur.pk]))
+
+
+@media_temporal
+class DashboardParticionadoTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.catalogo = crear_catalogo()
+        self.norte = Sucursales.objects.create(nombre="Tienda Norte")
+        self.sur = Sucursales.objects.create(nombre="Tienda Sur")
+        crear_producto(self.catalogo, "NORTE-1", sucursal=self.norte)
+        crear_producto(self.catalogo, "SUR-1", sucursal=self.sur)
+        crear_producto(self.catalogo, "SIN-SUCURSAL")
+
+    def test_particiones_e_invalidacion(self):
+        self.assertEqual(ResumenInventarioService.resumen()["total"], 3)
+        self.assertEqual(ResumenInventarioService.resumen([self.norte.pk])["total"], 1)
+
+        # Sólo se borra la partición de la sucursal que cambió
+        with self.captureOnCommitCallbacks(execute=True):
+            crear_producto(self.catalogo, "NORTE-2", sucursal=self.norte)
+        self.assertIsNone(cache.get(ResumenInventarioService._clave(self.norte.pk)))
+        self.assertIsNotNone(cache.get(ResumenInventarioService._clave(self.sur.pk)))
+
+        with self.assertNumQueries(3):  # conteos, asignados y últimos de la partición que falta
+            resumen = ResumenInventarioService.resumen([self.norte.pk, self.sur.pk])
+        self.assertEqual(resumen["total"], 3)
+        self.assertEqual(resumen["por_estado"][self.catalogo["estado"].pk], 3)
+
+    def test_ultimos_de_todas_las_particiones_en_una_consulta(self):
+        norte = [crear_producto(self.catalogo, f"NORTE-{i}", sucursal=self.norte) for i in range(2, 8)]
+        cache.clear()
+        ids = [self.norte.pk, self.sur.pk, None]
+        with self.assertNumQueries(3):  # conteos, asignados y últimos, sin importar cuántas sucursales falten
+            particiones = ResumenInventarioService._calcular(ids)
+        self.assertEqual(len(particiones[self.norte.pk]["ultimos"]), ResumenInventarioService.ULTIMOS)
+        self.assertEqual(particiones[self.norte.pk]["ultimos"][0][1], norte[-1].pk)
+        self.assertEqual(len(particiones[self.sur.pk]["ultimos"]), 1)
+        self.assertEqual(len(particiones[None]["ultimos"]), 1)
+
+    def test_dashboard_de_usuario_de_sucursal(self):
+        user = User.objects.create_user(username="sur", password="x")
+        Usuarios.objects.create(user=user).sucursales.set([self.sur])
+        self.client.force_login(user)
+
+        res = self.client.get("/api/dashboard/")
+        self.assertEqual(res.context["total_productos"], 1)
+        self.assertEqual([p.nro_serie for p in res.context["ultimos_productos"]], ["SUR-1"])
@@ -0,0 +1,76 @@
+# test/test_timeline.py
+# Pruebas de /api/productos/{id}/timeline/
+
+from datetime import date, datetime, timezone as dt_timezone
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from app_inventario.models import (
+    Asignaciones, Estados, HistorialEstados, Mantenciones, Movimientos, Notificaciones, Usuarios,
+)
+from app_inventario.test.factories import crear_catalogo, crear_producto, media_temporal
+
+User = get_user_model()
+
+
+@media_temporal
+class TimelineProductoTestCase(TestCase):
+
+    def setUp(self):
+        catalogo = crear_catalogo()
+        self.producto = crear_producto(catalogo, "NB-1209")
+        user = User.objects.create_user(username="tecnico", password="x")
+        usuario = Usuarios.objects.create(user=user)
+
+        Asignaciones.objects.create(producto=self.producto, usuario=usuario)
+        Asignaciones.objects.filter(producto=self.producto).update(
+            fecha_asignacion=date(2025, 1, 10), fecha_devolucion=date(2025, 3, 1)
+        )
+        Mantenciones.objects.create(producto=self.producto, fecha=date(2025, 2, 1), detalle="Limpieza")
+        historial = HistorialEstados.objects.create(
+            producto=self.producto, estado=Estados.objects.create(nombre="En Mantención")
+        )
+        HistorialEstados.objects.filter(pk=historial.pk).update(
+            fecha=datetime(2025, 2, 1, 9, tzinfo=dt_timezone.utc)
+        )
+        Movimientos.objects.create(tipo="salida", sku="NB-1209", cantidad=1)
+        Movimientos.objects.filter(sku="NB-1209").update(
+            fecha=datetime(2025, 1, 10, 0, 0, tzinfo=dt_timezone.utc)
+        )
+        Movimientos.objects.create(tipo="entrada", sku="OTRO", cantidad=1)
+        Notificaciones.objects.filter(producto=self.producto).update(
+            fecha_creacion=datetime(2024, 12, 1, tzinfo=dt_timezone.utc)
+        )
+
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+        self.url = f"/api/api/productos/{self.producto.pk}/timeline/"
+
+    def test_flujo_unificado_ordenado(self):
+        res = self.client.get(self.url)
+        self.assertEqual(res.status_code, 200)
+        tipos = [e["tipo"] for e in res.data["results"]]
+        self.assertEqual(
+            tipos,
+            ["devolucion", "estado", "mantencion", "movimiento", "asignacion", "notificacion"],
+        )
+        self.assertIsNone(res.data["next"])
+
+    def test_paginacion_por_cursor(self):
+        """Recorrer con limit=1 devuelve los mismos eventos, sin repetir ni saltar"""
+        completo = [(e["tipo"], e["ref_id"]) for e in self.client.get(self.url).data["results"]]
+
+        vistos, url = [], self.url + "?limit=1"
+        while url:
+            res = self.client.get(url)
+            vistos += [(e["tipo"], e["ref_id"]) for e in res.data["results"]]
+            url = res.data["next"]
+        self.assertEqual(vistos, completo)
+
+    def test_filtro_y_errores(self):
+        res = self.client.get(self.url, {"tipos": "estado,mantencion"})
+        self.assertEqual([e["tipo"] for e in res.data["results"]], ["estado", "mantencion"])
+        self.assertEqual(self.client.get(self.url, {"tipos": "otro"}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {"cursor": "xx"}).status_code, 400)
@@ -38,6 +38,12 @@ from .views import (
     SucursalViewSet,
     CodigoQRViewSet,
     MovimientosViewSet,
+    AutocompleteViewSet,
+    GarantiasViewSet,
+    PlanesMantencionViewSet,
+    BatchViewSet,
+    AuditoriasViewSet,
+    SnapshotsInventarioViewSet,
 
 )
 
@@ -54,6 +60,7 @@ router.register(r'productos', ProductosViewSet, basename='productos')
 router.register(r'usuarios', UsuariosViewSet, basename='usuarios')
 router.register(r'asignaciones', AsignacionesViewSet, basename='asignaciones')
 router.register(r'mantenciones', MantencionesViewSet, basename='mantenciones')
+router.register(r'planes-mantencion', PlanesMantencionViewSet, basename='planes-mantencion')
 router.register(r'historial-estados', HistorialEstadosViewSet, basename='historial-estados')
 router.register(r'documentaciones', DocumentacionesViewSet, basename='documentaciones')
 router.register(r'notificaciones', NotificacionesViewSet, basename='notificaciones')
@@ -61,6 +68,11 @@ router.register(r'logs-acceso', LogAccesoViewSet, basename='logs-acceso')
 router.register(r'sucursales', SucursalViewSet)
 router.register(r'codigos-qr', CodigoQRViewSet)
 router.register(r'movimientos', MovimientosViewSet, basename='movimientos')
+router.register(r'autocomplete', AutocompleteViewSet, basename='autocomplete')
+router.register(r'garantias', GarantiasViewSet, basename='garantias')
+router.register(r'auditorias', AuditoriasViewSet, basename='auditorias')
+router.register(r'snapshots-inventario', SnapshotsInventarioViewSet, basename='snapshots-inventario')
+router.register(r'batch', BatchViewSet, basename='batch')
 # URLs de la app
 urlpatterns = [
     path('api/', include(router.urls)),
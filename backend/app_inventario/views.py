@@ -1,17 +1,39 @@
-from datetime import date
+import hmac
+import json
+import logging
+import time
+from datetime import date, timedelta
+from urllib.parse import urlsplit
 from rest_framework.filters import OrderingFilter, SearchFilter
+from django.conf import settings
 from django.contrib import messages
 from django.core.paginator import Paginator
 from django.db.models import Q
-from django.http import JsonResponse
+from django.http import HttpRequest, HttpResponse, JsonResponse, QueryDict, StreamingHttpResponse
+from django.urls import Resolver404, resolve, reverse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
 from django.shortcuts import render, redirect, get_object_or_404
-from django.db import models 
-from .services import NotificacionService
+from django.db import models, transaction
+from .services import (
+    NotificacionService, RollupMovimientosService, BusquedaProductosService,
+    TimelineProductoService, CacheDetalleProductoService, QRService, EtiquetasService,
+    GarantiaService, PlanMantencionService, VersionProductosService, SincronizacionService,
+    AuditoriaService, CambioEstadoService, SnapshotInventarioService, ResumenInventarioService,
+)
+from .filters import BusquedaProductosFilter, RelevanciaOrderingFilter
+from . import alcance, autocompletado
+from . import etiquetas as etiquetas_qr
+from . import metricas
+from .replicas import LecturaReplicaMixin, alias_lectura, lectura_replica
+from .alcance import AlcanceSucursalMixin, SinRestriccionSucursal
+from .autenticacion import agregar_claims, usuario_bd
 from django.contrib.auth.decorators import login_required
 
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import viewsets, status, filters
 from rest_framework.decorators import action
+from rest_framework.pagination import PageNumberPagination
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.response import Response
 
@@ -21,7 +43,8 @@ from rest_framework_simplejwt.views import TokenObtainPairView
 from .models import (
     Proveedores, Marcas, Categorias, Modelos, Estados, Productos,
     Usuarios, Asignaciones, Mantenciones, HistorialEstados,
-    Documentaciones, Notificaciones, LogAcceso, Sucursales, CodigoQR, Usuarios, Movimientos
+    Documentaciones, Notificaciones, LogAcceso, Sucursales, CodigoQR, Usuarios, Movimientos,
+    PlanMantencion, Auditorias, SnapshotsInventario,
 )
 from .serializers import (
     ProveedoresSerializer, MarcasSerializer, CategoriasSerializer,
@@ -29,9 +52,10 @@ from .serializers import (
     ProductosListSerializer, ProductosDetailSerializer, ProductosCreateUpdateSerializer,
     UsuariosSerializer, UsuariosCreateSerializer,
     AsignacionesSerializer, AsignacionesCreateSerializer,
-    MantencionesSerializer,
+    MantencionesSerializer, PlanMantencionSerializer,
     HistorialEstadosSerializer, HistorialEstadosCreateSerializer,
-    DocumentacionesSerializer, NotificacionesSerializer, LogAccesoSerializer, UsuariosUpdateSerializer, MovimientosSerializer
+    DocumentacionesSerializer, NotificacionesSerializer, LogAccesoSerializer, UsuariosUpdateSerializer, MovimientosSerializer,
+    AuditoriasSerializer, SnapshotsInventarioSerializer,
 )
 from .forms import (
     ProductoForm, ProductoFilterForm,
@@ -42,6 +66,8 @@ from .forms import (
     ModelosForm, ModelosFilterForm
 )
 
+logger = logging.getLogger(__name__)
+
 
 # ================== JWT PERSONALIZADO ==================
 
@@ -55,12 +81,9 @@ class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
     def get_token(cls, user):
         token = super().get_token(user)
 
-        # Información extra en el payload del token (opcional)
-        token["username"] = user.username
-        token["is_staff"] = user.is_staff
-        # Si tienes un campo extra de rol/perfil podrías agregarlo aquí
-
-        return token
+        # Información extra en el payload del token: username, is_staff, rol y
+        # perfil. Con esto la API autentica sin cargar el usuario en cada request.
+        return agregar_claims(token, user)
 
     def validate(self, attrs):
         data = super().validate(attrs)
@@ -83,10 +106,59 @@ class MyTokenObtainPairView(TokenObtainPairView):
     serializer_class = MyTokenObtainPairSerializer
 
 
+# ============= SINCRONIZACIÓN INCREMENTAL =============
+
+
+class SincronizacionMixin:
+    """
+    GET /api/<recurso>/cambios/?updated_since=<ISO 8601> | ?cursor=<cursor>&limit=500
+
+    Sólo lo que cambió: {"cambios": [...], "eliminados": [ids], "cursor": ..., "mas": bool}.
+    Sin parámetros entrega todas las filas (carga inicial), también por lotes.
+    Respeta el alcance del queryset y los filtros del listado (?sucursal=...).
+    Una fila que sale del alcance del usuario (se movió a otra sucursal)
+    aparece en `eliminados`; una que sólo deja de cumplir un filtro, no.
+    Ver SincronizacionService.
+    """
+
+    @action(detail=False, methods=["get"])
+    def cambios(self, request):
+        params = request.query_params
+        try:
+            if params.get("cursor"):
+                posicion = SincronizacionService.decodificar_cursor(params["cursor"])
+            elif params.get("updated_since"):
+                posicion = SincronizacionService.decodificar_fecha(params["updated_since"])
+            else:
+                posicion = None
+            filas, eliminados, cursor, mas = SincronizacionService.cambios(
+                self.filter_queryset(self.get_queryset()), posicion,
+                int(params.get("limit", SincronizacionService.LIMITE_DEFECTO)),
+                sucursales=alcance.sucursales_de(request.user),
+            )
+        except SincronizacionService.CursorVencido:
+            return Response(
+                {"error": "El cursor es demasiado antiguo; recarga todo (sin updated_since ni cursor)"},
+                status=status.HTTP_410_GONE,
+            )
+        except ValueError:
+            return Response(
+                {"error": "Parámetros 'updated_since', 'cursor' o 'limit' inválidos"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        return Response({
+            "cambios": self.get_serializer(filas, many=True).data,
+            "eliminados": eliminados,
+            "cursor": cursor,
+            "mas": mas,
+        })
+
+
 # ============= VIEWSETS TABLAS BÁSICAS =============
 
 
-class ProveedoresViewSet(viewsets.ModelViewSet):
+class ProveedoresViewSet(SincronizacionMixin, viewsets.ModelViewSet):
     """ViewSet para gestionar Proveedores"""
     queryset = Proveedores.objects.all()
     serializer_class = ProveedoresSerializer
@@ -97,7 +169,7 @@ class ProveedoresViewSet(viewsets.ModelViewSet):
     ordering = ["nombre"]
 
 
-class MarcasViewSet(viewsets.ModelViewSet):
+class MarcasViewSet(SincronizacionMixin, viewsets.ModelViewSet):
     """ViewSet para gestionar Marcas"""
     queryset = Marcas.objects.all()
     serializer_class = MarcasSerializer
@@ -107,7 +179,7 @@ class MarcasViewSet(viewsets.ModelViewSet):
     ordering = ["nombre"]
 
 
-class CategoriasViewSet(viewsets.ModelViewSet):
+class CategoriasViewSet(SincronizacionMixin, viewsets.ModelViewSet):
     """ViewSet para gestionar Categorías"""
     queryset = Categorias.objects.all()
     serializer_class = CategoriasSerializer
@@ -117,7 +189,7 @@ class CategoriasViewSet(viewsets.ModelViewSet):
     ordering = ["nombre"]
 
 
-class ModelosViewSet(viewsets.ModelViewSet):
+class ModelosViewSet(SincronizacionMixin, viewsets.ModelViewSet):
     """ViewSet para gestionar Modelos"""
     queryset = Modelos.objects.select_related("marca").all()
     serializer_class = ModelosSerializer
@@ -129,7 +201,7 @@ class ModelosViewSet(viewsets.ModelViewSet):
     ordering = ["marca__nombre", "nombre"]
 
 
-class EstadosViewSet(viewsets.ModelViewSet):
+class EstadosViewSet(SincronizacionMixin, viewsets.ModelViewSet):
     """ViewSet para gestionar Estados"""
     queryset = Estados.objects.all()
     serializer_class = EstadosSerializer
@@ -139,7 +211,7 @@ class EstadosViewSet(viewsets.ModelViewSet):
     ordering = ["nombre"]
 
 
-class SucursalViewSet(viewsets.ModelViewSet):
+class SucursalViewSet(SincronizacionMixin, viewsets.ModelViewSet):
     """ViewSet para gestionar Sucursales"""
     queryset = Sucursales.objects.all()
     serializer_class = SucursalSerializer
@@ -155,15 +227,29 @@ class CodigoQRViewSet(viewsets.ModelViewSet):
 
 # ============= VIEWSET DE PRODUCTOS =============
 
+class ProductosPagination(PageNumberPagination):
+    """
+    La tabla virtualizada del frontend pide páginas a medida que se hace
+    scroll; `page_size` deja ajustar cuántas filas trae cada request.
+    """
+    page_size_query_param = "page_size"
+    max_page_size = 200
 
-class ProductosViewSet(viewsets.ModelViewSet):
-    """ViewSet para gestionar Productos"""
+
+class ProductosViewSet(AlcanceSucursalMixin, SincronizacionMixin, LecturaReplicaMixin, viewsets.ModelViewSet):
+    """ViewSet para gestionar Productos (acotado a las sucursales del usuario, ver alcance.py)"""
     permission_classes = [IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
-    filterset_fields = ["categoria", "estado", "proveedor", "modelo"]
+    # El detalle no: su payload se cachea y no debe quedar con datos atrasados
+    acciones_replica = ("list", "disponibles", "por_categoria", "etiquetas")
+    # ?search= usa el índice de búsqueda (FTS5 / trigram) en vez de icontains con JOINs
+    filter_backends = [DjangoFilterBackend, BusquedaProductosFilter, RelevanciaOrderingFilter]
+    filterset_fields = ["categoria", "estado", "proveedor", "modelo", "sucursal"]
     search_fields = ["nro_serie", "modelo__nombre", "categoria__nombre"]
-    ordering_fields = ["fecha_compra", "nro_serie"]
-    ordering = ["-fecha_compra"]
+    ordering_fields = ["fecha_compra", "nro_serie", "relevancia"]
+    # Desempate por id: con orden total las páginas no repiten ni saltan filas
+    ordering = ["-fecha_compra", "-id"]
+    pagination_class = ProductosPagination
+    ID_MAXIMO = 2 ** 63 - 1
 
     def get_queryset(self):
         """
@@ -172,12 +258,30 @@ class ProductosViewSet(viewsets.ModelViewSet):
         En lugar de hacer una consulta por cada relación (proveedor, modelo, etc.),
         select_related hace un JOIN en SQL y trae todos los datos en una sola consulta.
         """
-        return (
-            Productos.objects.select_related(
-                "proveedor", "modelo", "modelo__marca", "categoria", "estado"
-            )
-            .all()
+        qs = Productos.objects.select_related(
+            "proveedor", "modelo", "modelo__marca", "categoria", "estado",
+            "sucursal", "codigo_qr",
         )
+        if self.action == "retrieve":
+            # Asignaciones activas, últimas mantenciones e historial en 3 consultas
+            qs = qs.prefetch_related(*ProductosDetailSerializer.prefetches())
+        return self.acotar(qs)
+
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Detalle de producto servido desde cache cuando existe
+        (lo invalidan las señales ante cualquier escritura relacionada).
+        """
+        pk = kwargs[self.lookup_field]
+        host = request.get_host()
+        data = CacheDetalleProductoService.obtener(pk, host)
+        # El cache es por producto, no por usuario: fuera del alcance sigue el camino normal (404)
+        if data is not None and alcance.permitida(request.user, (data.get("sucursal") or {}).get("id")):
+            return Response(data)
+
+        response = super().retrieve(request, *args, **kwargs)
+        CacheDetalleProductoService.guardar(pk, host, response.data)
+        return response
 
     def get_serializer_class(self):
         """Usa serializer diferente según la acción"""
@@ -198,13 +302,192 @@ class ProductosViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(productos, many=True)
         return Response(serializer.data)
 
+    @action(detail=False, methods=["post"])
+    def cambiar_estado(self, request):
+        """
+        Cambio de estado masivo en una transacción (ver CambioEstadoService).
+        POST /api/productos/cambiar_estado/
+        {"productos": [1, 2, 3], "estado": 4, "comentario": "Laboratorio 2 a mantención"}
+        """
+        datos = request.data if isinstance(request.data, dict) else {}
+        ids = datos.get("productos")
+        # Ids fuera de rango (> 64 bits) harían fallar la consulta en vez de no encontrarse
+        if not isinstance(ids, list) or not ids or not all(
+            isinstance(pk, int) and not isinstance(pk, bool) and 0 < pk <= self.ID_MAXIMO for pk in ids
+        ):
+            return Response(
+                {"error": "'productos' debe ser una lista no vacía de ids"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            estado_id = int(datos.get("estado"))
+            if not 0 < estado_id <= self.ID_MAXIMO:
+                raise ValueError
+            estado = Estados.objects.get(pk=estado_id)
+        except (TypeError, ValueError, Estados.DoesNotExist):
+            return Response(
+                {"error": "Debe indicar un estado válido"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            resultado = CambioEstadoService.cambiar(
+                ids, estado, datos.get("comentario") or "", self.sucursales,
+            )
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(resultado)
+
+    @action(detail=False, methods=["get"])
+    def sugerencias(self, request):
+        """
+        Sugerencias de typeahead ordenadas por relevancia.
+        GET /api/productos/sugerencias/?q=nb-12&limit=10
+        """
+        try:
+            limite = min(max(int(request.query_params.get("limit", 10)), 1), 50)
+        except ValueError:
+            limite = 10
+        termino = request.query_params.get("q", "")
+        return Response(BusquedaProductosService.sugerencias(termino, limite, self.acotar(Productos.objects.all())))
+
+    @action(detail=True, methods=["get"])
+    def timeline(self, request, pk=None):
+        """
+        Historia completa del producto en un solo flujo ordenado por fecha
+        (más reciente primero), paginado por cursor.
+
+        GET /api/productos/{id}/timeline/?limit=50&cursor=<next_cursor>&tipos=estado,mantencion
+        """
+        producto = get_object_or_404(self.acotar(Productos.objects.only("id", "nro_serie")), pk=pk)
+
+        tipos = [t.strip() for t in request.query_params.get("tipos", "").split(",") if t.strip()]
+        invalidos = [t for t in tipos if t not in TimelineProductoService.TIPOS]
+        if invalidos:
+            return Response(
+                {"error": f"Tipos no soportados: {', '.join(invalidos)}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            limite = int(request.query_params.get("limit", TimelineProductoService.LIMITE_DEFECTO))
+            eventos, siguiente = TimelineProductoService.eventos(
+                producto, request.query_params.get("cursor"), limite, tipos
+            )
+        except ValueError:
+            return Response(
+                {"error": "Parámetros 'limit' o 'cursor' inválidos"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        next_url = None
+        if siguiente:
+            params = request.query_params.copy()
+            params["cursor"] = siguiente
+            next_url = request.build_absolute_uri(f"{request.path}?{params.urlencode()}")
+
+        return Response({
+            "next": next_url,
+            "next_cursor": siguiente,
+            "results": eventos,
+        })
+
+    @action(detail=False, methods=["get"])
+    def etiquetas(self, request):
+        """
+        Hoja de etiquetas QR imprimible (A4, 3x8) para un lote de productos.
+        El documento se transmite página a página mientras se renderiza.
+        Hasta ETIQUETAS_MAXIMO_HTTP etiquetas y ETIQUETAS_WORKERS_HTTP procesos
+        por request; lotes mayores con `manage.py generar_etiquetas`.
+
+        GET /api/productos/etiquetas/?formato=pdf|svg&sucursal=1&categoria=2
+            &desde=2025-01-01&hasta=2025-01-31&ids=1,2,3
+        """
+        formato = request.query_params.get("formato", "pdf").lower()
+        if formato not in etiquetas_qr.FORMATOS:
+            return Response(
+                {"error": f"Formato inválido. Use: {', '.join(etiquetas_qr.FORMATOS)}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        params = request.query_params
+        try:
+            queryset = EtiquetasService.filtrar(
+                sucursal=params.get("sucursal"), categoria=params.get("categoria"),
+                desde=params.get("desde"), hasta=params.get("hasta"), ids=params.get("ids"),
+            )
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        # El documento se transmite después de que termina la vista: la BD se fija acá
+        queryset = self.acotar(queryset).using(alias_lectura())
+        total = queryset.count()
+        if not total:
+            return Response(
+                {"error": "No hay productos que coincidan con los filtros"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if total > settings.ETIQUETAS_MAXIMO_HTTP:
+            return Response(
+                {"error": (
+                    f"{total} etiquetas superan el máximo de {settings.ETIQUETAS_MAXIMO_HTTP} por documento; "
+                    "acote los filtros o use el comando generar_etiquetas"
+                )},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        def generar():
+            metricas.etiquetas_en_curso(1)
+            try:
+                # Los productos se leen por lotes a medida que se renderizan las páginas
+                yield from etiquetas_qr.generar(
+                    EtiquetasService.etiquetas(queryset), formato, settings.ETIQUETAS_WORKERS_HTTP, total
+                )
+            finally:
+                metricas.etiquetas_en_curso(-1)
+
+        response = StreamingHttpResponse(generar(), content_type=etiquetas_qr.FORMATOS[formato])
+        response["Content-Disposition"] = f'attachment; filename="etiquetas_qr.{formato}"'
+        return response
+
+    @action(detail=True, methods=["get"])
+    def qr(self, request, pk=None):
+        """
+        Imagen del código QR renderizada bajo demanda (cacheada en disco).
+        Exige token y respeta el alcance por sucursal; el frontend la
+        descarga como blob. Sólo los tamaños de QRService.TAMANOS, para
+        acotar las variantes que llegan a la cache en disco.
+
+        GET /api/productos/{id}/qr/?formato=png|svg&tamano=150|300|600
+        """
+        try:
+            formato, tamano = QRService.validar(
+                request.query_params.get("formato"), request.query_params.get("tamano")
+            )
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        producto = get_object_or_404(self.acotar(Productos.objects.only("id")), pk=pk)
+        contenido = QRService.contenido_producto(producto.id)
+        etag = f'"{QRService.clave(contenido, tamano, formato)}"'
+        if request.headers.get("If-None-Match") == etag:
+            response = HttpResponse(status=304)
+        else:
+            datos, _ = QRService.obtener(contenido, tamano, formato)
+            response = HttpResponse(datos, content_type=QRService.FORMATOS[formato])
+        response["ETag"] = etag
+        response["Cache-Control"] = "private, max-age=86400"
+        return response
+
     @action(detail=False, methods=["get"])
     def por_categoria(self, request):
         """Agrupa productos por categoría"""
         from django.db.models import Count
 
+        filtro = None
+        if self.sucursales is not None:
+            filtro = Q(productos__sucursal_id__in=self.sucursales)
         stats = Categorias.objects.annotate(
-            total_productos=Count("productos")
+            total_productos=Count("productos", filter=filtro)
         ).values("nombre", "total_productos")
         return Response(stats)
 
@@ -261,6 +544,138 @@ class ProductosViewSet(viewsets.ModelViewSet):
     
 
 
+# ============= GARANTÍAS =============
+
+
+class GarantiasViewSet(LecturaReplicaMixin, viewsets.ViewSet):
+    """Planificación de vencimientos de garantía (ver GarantiaService)"""
+    permission_classes = [IsAuthenticated]
+    acciones_replica = ("calendario", "proximas")
+
+    def _filtrados(self, request):
+        """Productos filtrados por ?sucursal= y ?categoria=; ValueError si no son numéricos"""
+        queryset = alcance.acotar(Productos.objects.all(), request.user)
+        if request.query_params.get("sucursal"):
+            queryset = queryset.filter(sucursal_id=int(request.query_params["sucursal"]))
+        if request.query_params.get("categoria"):
+            queryset = queryset.filter(categoria_id=int(request.query_params["categoria"]))
+        return queryset
+
+    @action(detail=False, methods=["get"])
+    def calendario(self, request):
+        """
+        Vencimientos por día y por semana.
+
+        GET /api/garantias/calendario/?desde=2025-01-01&hasta=2025-03-31&sucursal=1&categoria=2
+          - desde: default hoy; hasta: default desde + 90 días (máximo 2 años)
+        """
+        params = request.query_params
+        try:
+            desde = parse_date(params["desde"]) if params.get("desde") else timezone.localdate()
+            hasta = (
+                parse_date(params["hasta"]) if params.get("hasta")
+                else desde and desde + timedelta(days=GarantiaService.CALENDARIO_DIAS_DEFECTO)
+            )
+        except ValueError:  # bien formada pero inexistente (2025-02-30)
+            desde = hasta = None
+        if desde is None or hasta is None:
+            return Response(
+                {"error": "Las fechas deben tener formato YYYY-MM-DD"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if desde > hasta or (hasta - desde).days > GarantiaService.CALENDARIO_DIAS_MAXIMO:
+            return Response(
+                {"error": f"Rango inválido (máximo {GarantiaService.CALENDARIO_DIAS_MAXIMO} días)"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            queryset = self._filtrados(request)
+        except ValueError:
+            return Response({"error": "Filtros inválidos"}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(GarantiaService.calendario(desde, hasta, queryset))
+
+    @action(detail=False, methods=["get"])
+    def proximas(self, request):
+        """
+        Productos cuya garantía vence en los próximos N días.
+
+        GET /api/garantias/proximas/?dias=30&sucursal=1
+        """
+        try:
+            dias = int(request.query_params.get("dias", GarantiaService.POR_VENCER_DIAS))
+            queryset = self._filtrados(request)
+        except ValueError:
+            return Response(
+                {"error": "'dias', 'sucursal' y 'categoria' deben ser numéricos"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        dias = min(max(dias, 0), GarantiaService.CALENDARIO_DIAS_MAXIMO)
+
+        hoy = timezone.localdate()
+        productos = (
+            GarantiaService.por_vencer(dias, hoy, queryset)
+            .order_by("fecha_venc_garantia", "id")
+            .values("id", "nro_serie", "fecha_venc_garantia")
+        )
+        return Response([
+            {**p, "dias_restantes": GarantiaService.dias_restantes(p["fecha_venc_garantia"], hoy)}
+            for p in productos
+        ])
+
+
+# ============= AUTOCOMPLETADO =============
+
+
+class AutocompleteViewSet(viewsets.ViewSet):
+    """
+    Typeahead sobre un índice de prefijos en memoria (ver autocompletado.py).
+
+    GET /api/autocomplete/?q=nb-12&campos=nro_serie,modelos&limit=10&limit_modelos=5
+      - campos: nro_serie, modelos, proveedores, usuarios (default: todos)
+      - limit: máximo por campo (default 10, tope 50)
+      - limit_<campo>: límite específico para un campo
+      - marca: restringe los modelos a una marca
+    """
+    permission_classes = [IsAuthenticated]
+    LIMITE_MAXIMO = 50
+
+    def _limite(self, valor, defecto):
+        try:
+            return min(max(int(valor), 1), self.LIMITE_MAXIMO)
+        except (TypeError, ValueError):
+            return defecto
+
+    def list(self, request):
+        inicio = time.perf_counter()
+        params = request.query_params
+
+        campos = [c.strip() for c in params.get("campos", "").split(",") if c.strip()]
+        invalidos = [c for c in campos if c not in autocompletado.CAMPOS]
+        if invalidos:
+            return Response(
+                {"error": f"Campos no soportados: {', '.join(invalidos)}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        campos = campos or list(autocompletado.CAMPOS)
+
+        limite = self._limite(params.get("limit"), 10)
+        limites = {
+            c: self._limite(params[f"limit_{c}"], limite)
+            for c in campos if f"limit_{c}" in params
+        }
+
+        resultados = autocompletado.buscar(
+            params.get("q", ""), campos, limite, limites, marca=params.get("marca"),
+            sucursales=alcance.sucursales_de(request.user),
+        )
+        return Response({
+            "q": params.get("q", ""),
+            "resultados": resultados,
+            "tiempo_ms": round((time.perf_counter() - inicio) * 1000, 3),
+        })
+
+
 # ============= VIEWSET DE USUARIOS =============
 
 from rest_framework import viewsets, status, filters
@@ -293,7 +708,7 @@ class UsuariosViewSet(viewsets.ModelViewSet):
       - POST   /api/usuarios/cambiar_password/ -> cambiar contraseña
     """
 
-    queryset = Usuarios.objects.select_related("user").all()
+    queryset = Usuarios.objects.select_related("user").prefetch_related("sucursales")
     permission_classes = [IsAuthenticated]
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = [
@@ -318,6 +733,14 @@ class UsuariosViewSet(viewsets.ModelViewSet):
             return UsuariosUpdateSerializer
         return UsuariosSerializer
 
+    def get_permissions(self):
+        # Crear, editar o borrar usuarios (rol, is_staff, sucursales) cambia el alcance:
+        # sólo un administrador sin restricción de sucursal; si no, un usuario de
+        # sucursal podría dejarse sin sucursales o darse rol ADMIN.
+        if self.action in ["create", "update", "partial_update", "destroy"]:
+            return [IsAuthenticated(), IsAdminUser(), SinRestriccionSucursal()]
+        return super().get_permissions()
+
     # ---------- PERFIL: /api/usuarios/me/ ----------
     @action(detail=False, methods=["get", "patch"], url_path="me")
     def me(self, request):
@@ -326,7 +749,7 @@ class UsuariosViewSet(viewsets.ModelViewSet):
         PATCH /api/usuarios/me/     -> actualizar nombre/email del usuario actual
         """
         try:
-            usuario = Usuarios.objects.get(user=request.user)
+            usuario = Usuarios.objects.select_related("user").get(user_id=request.user.pk)
         except Usuarios.DoesNotExist:
             return Response(
                 {"detail": "Usuario no encontrado"},
@@ -338,9 +761,11 @@ class UsuariosViewSet(viewsets.ModelViewSet):
             serializer = UsuariosSerializer(usuario)
             return Response(serializer.data)
 
-        # Actualizar datos (perfil)
+        # Actualizar datos (perfil); rol, is_staff y sucursales (alcance) los asigna un administrador
+        campos_admin = {"rol", "is_staff", "sucursales"}
+        datos = {k: v for k, v in request.data.items() if k not in campos_admin}
         serializer = UsuariosUpdateSerializer(
-            usuario, data=request.data, partial=True
+            usuario, data=datos, partial=True
         )
         serializer.is_valid(raise_exception=True)
         serializer.save()
@@ -358,7 +783,7 @@ class UsuariosViewSet(viewsets.ModelViewSet):
           "new_password": "NuevaClave123!"
         }
         """
-        user = request.user
+        user = usuario_bd(request.user)
         old_password = request.data.get("old_password")
         new_password = request.data.get("new_password")
 
@@ -389,19 +814,21 @@ class UsuariosViewSet(viewsets.ModelViewSet):
 # ============= VIEWSET DE ASIGNACIONES =============
 
 
-class AsignacionesViewSet(viewsets.ModelViewSet):
+class AsignacionesViewSet(AlcanceSucursalMixin, SincronizacionMixin, LecturaReplicaMixin, viewsets.ModelViewSet):
     """ViewSet para gestionar Asignaciones"""
     permission_classes = [IsAuthenticated]
+    acciones_replica = ("list", "activas", "devueltas")
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     filterset_fields = ["usuario", "producto"]
     ordering_fields = ["fecha_asignacion", "fecha_devolucion"]
     ordering = ["-fecha_asignacion"]
+    campo_sucursal = "producto__sucursal"
 
     def get_queryset(self):
         """Optimiza las queries"""
-        return Asignaciones.objects.select_related(
+        return self.acotar(Asignaciones.objects.select_related(
             "producto", "producto__categoria", "usuario", "usuario__user"
-        ).all()
+        ))
 
     def get_serializer_class(self):
         """Usa serializer diferente para crear"""
@@ -446,46 +873,118 @@ class AsignacionesViewSet(viewsets.ModelViewSet):
 # ============= VIEWSET DE MANTENCIONES =============
 
 
-class MantencionesViewSet(viewsets.ModelViewSet):
+class MantencionesViewSet(AlcanceSucursalMixin, SincronizacionMixin, LecturaReplicaMixin, viewsets.ModelViewSet):
     """ViewSet para gestionar Mantenciones"""
     permission_classes = [IsAuthenticated]
+    acciones_replica = ("list", "proximas", "agenda", "realizadas")
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     filterset_fields = ["producto", "proveedor"]
     ordering_fields = ["fecha"]
     ordering = ["-fecha"]
     serializer_class = MantencionesSerializer
+    campo_sucursal = "producto__sucursal"
+    # Tope de ?dias= en proximas (un valor enorme desborda `date`)
+    DIAS_MAXIMO = 3650
 
     def get_queryset(self):
-        return Mantenciones.objects.select_related("producto", "proveedor").all()
+        return self.acotar(Mantenciones.objects.select_related("producto", "proveedor"))
 
     @action(detail=False, methods=["get"])
     def proximas(self, request):
-        """Retorna mantenciones programadas (futuras)"""
-        mantenciones = self.get_queryset().filter(fecha__gte=date.today())
+        """
+        Retorna mantenciones pendientes con fecha de hoy en adelante.
+        ?dias=N limita a las que vencen en los próximos N días.
+        """
+        mantenciones = self.filter_queryset(self.get_queryset()).filter(realizada=False, fecha__gte=date.today())
+        dias = request.query_params.get("dias")
+        if dias:
+            try:
+                dias = min(max(int(dias), 0), self.DIAS_MAXIMO)
+            except ValueError:
+                return Response({"error": "'dias' debe ser un número"}, status=status.HTTP_400_BAD_REQUEST)
+            mantenciones = mantenciones.filter(fecha__lte=date.today() + timedelta(days=dias))
         serializer = self.get_serializer(mantenciones, many=True)
         return Response(serializer.data)
 
+    @action(detail=False, methods=["get"])
+    def agenda(self, request):
+        """
+        Mantenciones de un rango (default: semana actual, lunes a domingo)
+        con el conteo por sucursal.
+
+        GET /api/mantenciones/agenda/?desde=2025-06-02&hasta=2025-06-08&sucursal=3
+        """
+        hoy = timezone.localdate()
+        params = request.query_params
+        try:
+            desde = parse_date(params["desde"]) if params.get("desde") else hoy - timedelta(days=hoy.weekday())
+            hasta = parse_date(params["hasta"]) if params.get("hasta") else desde and desde + timedelta(days=6)
+        except ValueError:  # bien formada pero inexistente (2025-02-30)
+            desde = hasta = None
+        if desde is None or hasta is None or desde > hasta:
+            return Response(
+                {"error": "Rango de fechas inválido (formato YYYY-MM-DD)"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        queryset = self.filter_queryset(self.get_queryset())
+        if params.get("sucursal"):
+            try:
+                queryset = queryset.filter(producto__sucursal_id=int(params["sucursal"]))
+            except ValueError:
+                return Response({"error": "'sucursal' debe ser un número"}, status=status.HTTP_400_BAD_REQUEST)
+
+        mantenciones, por_sucursal = PlanMantencionService.agenda(desde, hasta, queryset)
+        return Response({
+            "desde": desde,
+            "hasta": hasta,
+            "por_sucursal": por_sucursal,
+            "resultados": self.get_serializer(mantenciones.order_by("fecha", "id"), many=True).data,
+        })
+
     @action(detail=False, methods=["get"])
     def realizadas(self, request):
-        """Retorna mantenciones ya realizadas"""
-        mantenciones = self.get_queryset().filter(fecha__lt=date.today())
+        """Retorna mantenciones ya realizadas (no las programadas cuya fecha pasó)"""
+        mantenciones = self.get_queryset().filter(realizada=True)
         serializer = self.get_serializer(mantenciones, many=True)
         return Response(serializer.data)
 
 
+class PlanesMantencionViewSet(viewsets.ModelViewSet):
+    """
+    Planes de mantención preventiva. Al crear/editar un plan se reprograman
+    sus mantenciones futuras (ver signals.py y PlanMantencionService).
+    """
+    permission_classes = [IsAuthenticated]
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = ["categoria", "modelo", "activo"]
+    serializer_class = PlanMantencionSerializer
+    queryset = PlanMantencion.objects.select_related("categoria", "modelo").all()
+
+    @action(detail=False, methods=["post"])
+    def programar(self, request):
+        """Ejecuta el scheduler para todos los planes activos (?dias= ventana)"""
+        try:
+            dias = int(request.data.get("dias")) if request.data.get("dias") else None
+        except (TypeError, ValueError):
+            return Response({"error": "'dias' debe ser un número"}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({"creadas": PlanMantencionService.programar(dias=dias)})
+
+
 # ============= VIEWSET DE HISTORIAL DE ESTADOS =============
 
 
-class HistorialEstadosViewSet(viewsets.ModelViewSet):
+class HistorialEstadosViewSet(AlcanceSucursalMixin, LecturaReplicaMixin, viewsets.ModelViewSet):
     """ViewSet para gestionar Historial de Estados"""
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     filterset_fields = ["producto", "estado"]
     ordering_fields = ["fecha"]
     ordering = ["-fecha"]
+    campo_sucursal = "producto__sucursal"
 
     def get_queryset(self):
-        return HistorialEstados.objects.select_related("producto", "estado").all()
+        return self.acotar(HistorialEstados.objects.select_related("producto", "estado"))
 
     def get_serializer_class(self):
         """Usa serializer especial para crear (actualiza producto automáticamente)"""
@@ -497,7 +996,7 @@ class HistorialEstadosViewSet(viewsets.ModelViewSet):
 # ============= VIEWSET DE DOCUMENTACIÓN =============
 
 
-class DocumentacionesViewSet(viewsets.ModelViewSet):
+class DocumentacionesViewSet(AlcanceSucursalMixin, viewsets.ModelViewSet):
     """ViewSet para gestionar Documentación"""
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
@@ -506,23 +1005,31 @@ class DocumentacionesViewSet(viewsets.ModelViewSet):
     ordering_fields = ["fecha_subida"]
     ordering = ["-fecha_subida"]
     serializer_class = DocumentacionesSerializer
+    campo_sucursal = "producto__sucursal"
 
     def get_queryset(self):
-        return Documentaciones.objects.select_related("producto").all()
+        return self.acotar(Documentaciones.objects.select_related("producto"))
 
 
 # ============= VIEWSET DE NOTIFICACIONES =============
 
 
-class NotificacionesViewSet(viewsets.ModelViewSet):
+class NotificacionesViewSet(SincronizacionMixin, viewsets.ModelViewSet):
     serializer_class = NotificacionesSerializer
     permission_classes = [IsAuthenticated]
     
     def get_queryset(self):
         # Filtra notificaciones del usuario o globales
-        return Notificaciones.objects.filter(
-            models.Q(usuario=self.request.user) | models.Q(usuario__isnull=True)
+        queryset = Notificaciones.objects.filter(
+            models.Q(usuario_id=self.request.user.pk) | models.Q(usuario__isnull=True)
         )
+        # ...y de productos de sus sucursales (las que no son de un producto se ven siempre)
+        sucursales = alcance.sucursales_de(self.request.user)
+        if sucursales is not None:
+            queryset = queryset.filter(
+                models.Q(producto__isnull=True) | models.Q(producto__sucursal_id__in=sucursales)
+            )
+        return queryset
     
     @action(detail=False, methods=['get'])
     def no_leidas(self, request):
@@ -546,10 +1053,13 @@ class NotificacionesViewSet(viewsets.ModelViewSet):
         """Marca todas las notificaciones como leídas"""
         from django.utils import timezone
         notificaciones = self.get_queryset().filter(leido=False)
-        notificaciones.update(leido=True, fecha_lectura=timezone.now())
+        ahora = timezone.now()
+        count = notificaciones.update(leido=True, fecha_lectura=ahora, actualizado=ahora)
+        # update() no dispara señales: ajustar el gauge de no leídas
+        metricas.incrementar("notificaciones_no_leidas", -count)
         return Response({
             'status': 'todas las notificaciones marcadas como leídas',
-            'count': notificaciones.count()
+            'count': count
         })
     
     @action(detail=False, methods=['delete'])
@@ -582,6 +1092,215 @@ class LogAccesoViewSet(viewsets.ReadOnlyModelViewSet):
         return Response(serializer.data)
 
 
+# ============= AUDITORÍAS DE INVENTARIO (LECTOR QR) =============
+
+
+class AuditoriasViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Toma de inventario sin conexión, en pocos requests aunque sean miles de equipos:
+
+    POST /api/auditorias/ {"sucursal": 3}            -> auditoría + foto de los esperados
+    GET  /api/auditorias/{id}/foto/                  -> volver a descargar la foto
+    POST /api/auditorias/{id}/lecturas/ {"lecturas": [...]}  (se puede repetir)
+    POST /api/auditorias/{id}/cerrar/ {"lecturas": [...]}    -> conciliación
+
+    Las lecturas son lo que leyó el lector (URL del QR o id), opcionalmente
+    {"codigo": ..., "leido_en": ...}. Ver AuditoriaService.
+    """
+    serializer_class = AuditoriasSerializer
+    permission_classes = [IsAuthenticated]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    filterset_fields = ["sucursal", "estado"]
+    ordering = ["-iniciada"]
+
+    def get_queryset(self):
+        return alcance.acotar(Auditorias.objects.select_related("sucursal"), self.request.user)
+
+    def create(self, request):
+        try:
+            sucursal = Sucursales.objects.get(pk=int(request.data.get("sucursal")))
+        except (TypeError, ValueError, Sucursales.DoesNotExist):
+            return Response(
+                {"error": "Debe indicar una sucursal válida"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        alcance.verificar(request.user, sucursal.pk)
+        auditoria, foto = AuditoriaService.iniciar(sucursal, request.user.pk)
+        return Response(
+            {**self.get_serializer(auditoria).data, "foto": foto},
+            status=status.HTTP_201_CREATED,
+        )
+
+    @action(detail=True, methods=["get"])
+    def foto(self, request, pk=None):
+        return Response(AuditoriaService.foto(self.get_object()))
+
+    @action(detail=True, methods=["post"])
+    def lecturas(self, request, pk=None):
+        auditoria = self.get_object()
+        try:
+            recibidas = AuditoriaService.registrar_lecturas(auditoria, request.data.get("lecturas"))
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({"recibidas": recibidas, "total_lecturas": auditoria.lecturas.count()})
+
+    @action(detail=True, methods=["post"])
+    def cerrar(self, request, pk=None):
+        auditoria = self.get_object()
+        try:
+            with transaction.atomic():
+                if "lecturas" in request.data:
+                    AuditoriaService.registrar_lecturas(auditoria, request.data["lecturas"])
+                elif auditoria.estado != "ABIERTA":
+                    raise ValueError("La auditoría está cerrada")
+                AuditoriaService.conciliar(auditoria)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(self.get_serializer(auditoria).data)
+
+
+# ============= SNAPSHOTS MENSUALES DE INVENTARIO =============
+
+
+class SnapshotsInventarioViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Fotos de cierre de mes (las guarda el comando `snapshot_inventario`).
+
+    GET /api/snapshots-inventario/                 -> periodos con su resumen
+    GET /api/snapshots-inventario/{id}/datos/      -> columnas por producto
+    GET /api/snapshots-inventario/diferencia/?desde=2026-08&hasta=2026-09&limit=1000
+
+    Cubren todo el inventario: no están disponibles para usuarios de sucursal.
+    """
+    serializer_class = SnapshotsInventarioSerializer
+    permission_classes = [IsAuthenticated, SinRestriccionSucursal]
+    pagination_class = None
+
+    def get_queryset(self):
+        return SnapshotsInventario.objects.defer("datos")
+
+    @action(detail=True, methods=["get"])
+    def datos(self, request, pk=None):
+        snapshot = get_object_or_404(SnapshotsInventario, pk=pk)
+        return Response({
+            "periodo": snapshot.periodo,
+            "columnas": SnapshotInventarioService.datos(snapshot),
+        })
+
+    @action(detail=False, methods=["get"])
+    def diferencia(self, request):
+        fotos = {}
+        for parametro in ("desde", "hasta"):
+            try:
+                fecha = parse_date(f"{request.query_params.get(parametro, '')}-01")
+            except ValueError:  # bien formado pero inexistente (2025-13)
+                fecha = None
+            if fecha is None:
+                return Response(
+                    {"error": f"'{parametro}' debe ser un mes (YYYY-MM)"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            fotos[parametro] = SnapshotsInventario.objects.filter(periodo=fecha).first()
+            if fotos[parametro] is None:
+                return Response(
+                    {"error": f"No hay foto del inventario para {fecha:%m/%Y}"},
+                    status=status.HTTP_404_NOT_FOUND,
+                )
+        try:
+            limite = int(request.query_params.get("limit", SnapshotInventarioService.LIMITE_DEFECTO))
+        except ValueError:
+            return Response({"error": "'limit' inválido"}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(SnapshotInventarioService.diferencia(fotos["desde"], fotos["hasta"], limite))
+
+
+# ============= BATCH (VARIOS GET EN UN REQUEST) =============
+
+
+class BatchViewSet(viewsets.ViewSet):
+    """
+    Ejecuta varios GET de la API en un solo request (arranque de páginas
+    desde sucursales con mucha latencia: un viaje de ida y vuelta en vez de N).
+
+    POST /api/batch/
+    {"requests": {"productos": "productos/?page=1", "notis": "notificaciones/no_leidas/"}}
+    -> {"responses": {"productos": {"status": 200, "body": {...}}, "notis": {...}}}
+
+    - Las URLs son relativas a la API (o rutas absolutas dentro de ella).
+    - Cada sub-request pasa por su vista con sus permisos, con el usuario ya
+      autenticado de este request, y usa la misma conexión a la BD.
+    - Un sub-request que falla no afecta a los demás: queda con su status.
+    """
+    permission_classes = [IsAuthenticated]
+    MAXIMO = 20
+
+    def create(self, request):
+        solicitudes = request.data.get("requests") if isinstance(request.data, dict) else None
+        if not isinstance(solicitudes, dict) or not solicitudes:
+            return Response(
+                {"error": "'requests' debe ser un objeto {id: url} no vacío"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if len(solicitudes) > self.MAXIMO:
+            return Response(
+                {"error": f"Máximo {self.MAXIMO} sub-requests por batch"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if not all(isinstance(url, str) for url in solicitudes.values()):
+            return Response(
+                {"error": "Cada sub-request debe ser una URL (texto)"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        return Response({
+            "responses": {id_: self._ejecutar(request, url) for id_, url in solicitudes.items()}
+        })
+
+    def _ejecutar(self, request, url):
+        partes = urlsplit(url)
+        prefijo = reverse("api-root")
+        ruta = partes.path if partes.path.startswith("/") else prefijo + partes.path
+        if partes.scheme or partes.netloc or not ruta.startswith(prefijo):
+            return {"status": 400, "body": {"error": "Sólo URLs de la API"}}
+        try:
+            match = resolve(ruta)
+        except Resolver404:
+            return {"status": 404, "body": {"error": "No encontrado"}}
+        if getattr(match.func, "cls", None) is BatchViewSet:
+            return {"status": 400, "body": {"error": "Un batch no puede incluir otro batch"}}
+
+        sub = HttpRequest()
+        sub.method = "GET"
+        sub.path = sub.path_info = ruta
+        sub.META = {
+            **{k: v for k, v in request.META.items() if k not in ("CONTENT_TYPE", "CONTENT_LENGTH")},
+            "REQUEST_METHOD": "GET",
+            "PATH_INFO": ruta,
+            "QUERY_STRING": partes.query,
+        }
+        sub.GET = QueryDict(partes.query)
+        sub.resolver_match = match
+        # DRF toma el usuario ya autenticado (sin volver a validar el token)
+        sub._force_auth_user = request.user
+        sub._force_auth_token = request.auth
+
+        try:
+            response = match.func(sub, *match.args, **match.kwargs)
+        except Exception:
+            logger.exception("Error en sub-request de batch: GET %s", url)
+            return {"status": 500, "body": {"error": "Error interno"}}
+
+        if hasattr(response, "data"):
+            body = response.data
+        elif response.streaming:
+            body = {"error": "Las respuestas en streaming no se pueden incluir en un batch"}
+        elif response.get("Content-Type", "").startswith("application/json"):
+            body = json.loads(response.content)
+        else:
+            body = response.content.decode(response.charset or "utf-8")
+        return {"status": response.status_code, "body": body}
+
+
 # ============= VISTAS BASADAS EN TEMPLATES (HTML) =============
 # Estas vistas siguen usando la autenticación clásica de Django (session),
 # pero no interfieren con JWT. Puedes mantenerlas o migrarlas a frontend SPA.
@@ -1110,7 +1829,9 @@ def marcar_todas_leidas(request):
         ) | Notificaciones.objects.filter(
             usuario__isnull=True, leido=False
         )
-        queryset.update(leido=True, fecha_lectura=timezone.now())
+        ahora = timezone.now()
+        count = queryset.update(leido=True, fecha_lectura=ahora, actualizado=ahora)
+        metricas.incrementar("notificaciones_no_leidas", -count)
         
         messages.success(
             request, "Todas las notificaciones han sido marcadas como leídas."
@@ -1153,22 +1874,19 @@ def configuracion(request):
     return render(request, "configuracion.html", context)
 
 
+@lectura_replica
 def productos_list(request):
     """Lista de productos con filtros"""
-    productos = Productos.objects.select_related(
+    productos = alcance.acotar(Productos.objects.select_related(
         "categoria", "modelo", "modelo__marca", "estado", "proveedor"
-    ).all()
+    ), request.user)
 
     filter_form = ProductoFilterForm(request.GET)
 
     if filter_form.is_valid():
         search = filter_form.cleaned_data.get("search")
         if search:
-            productos = productos.filter(
-                Q(nro_serie__icontains=search)
-                | Q(modelo__nombre__icontains=search)
-                | Q(categoria__nombre__icontains=search)
-            )
+            productos = BusquedaProductosService.buscar(productos, search)
 
         categoria = filter_form.cleaned_data.get("categoria")
         if categoria:
@@ -1189,16 +1907,38 @@ def productos_list(request):
             ).values_list("producto_id", flat=True)
             productos = productos.exclude(id__in=productos_asignados_ids)
 
-    productos = productos.order_by("-fecha_compra")
+    if filter_form.is_valid() and filter_form.cleaned_data.get("search"):
+        productos = productos.order_by("-relevancia", "-fecha_compra", "-id")
+    else:
+        productos = productos.order_by("-fecha_compra", "-id")
 
     context = {
-        "productos": productos,
         "filter_form": filter_form,
-        "total_productos": productos.count(),
+        **_paginar_productos(request, productos),
     }
     return render(request, "listar_productos.html", context)
 
 
+def _paginar_productos(request, productos):
+    """
+    Página actual de un listado HTML de productos. Cada producto lleva su
+    `sello` de versión: la plantilla cachea la fila renderizada con él.
+    """
+    paginator = Paginator(productos, settings.PRODUCTOS_POR_PAGINA)
+    pagina = paginator.get_page(request.GET.get("page"))
+
+    sellos = VersionProductosService.sellos([p.pk for p in pagina])
+    for producto in pagina:
+        producto.sello = sellos[producto.pk]
+
+    return {
+        "productos": pagina,
+        "total_productos": paginator.count,
+        "rango_paginas": paginator.get_elided_page_range(pagina.number, on_each_side=2, on_ends=1),
+        "filas_cache_ttl": settings.FILAS_PRODUCTO_CACHE_TTL,
+    }
+
+
 def productos_create(request):
     """Crear nuevo producto"""
     marcas = Marcas.objects.all()
@@ -1230,7 +1970,7 @@ def productos_create(request):
 
 def productos_edit(request, pk):
     """Editar producto existente"""
-    producto = get_object_or_404(Productos, pk=pk)
+    producto = get_object_or_404(alcance.acotar(Productos.objects.all(), request.user), pk=pk)
 
     if request.method == "POST":
         post_data = request.POST.copy()
@@ -1265,7 +2005,7 @@ def productos_edit(request, pk):
 
 def productos_delete(request, pk):
     """Eliminar producto"""
-    producto = get_object_or_404(Productos, pk=pk)
+    producto = get_object_or_404(alcance.acotar(Productos.objects.all(), request.user), pk=pk)
 
     if request.method == "POST":
         nro_serie = producto.nro_serie
@@ -1284,9 +2024,9 @@ def productos_delete(request, pk):
 def producto_detail(request, pk):
     """Ver detalle completo de un producto"""
     producto = get_object_or_404(
-        Productos.objects.select_related(
+        alcance.acotar(Productos.objects.select_related(
             "categoria", "modelo", "modelo__marca", "estado", "proveedor"
-        ).prefetch_related("asignaciones", "mantenciones", "historial_estados"),
+        ).prefetch_related("asignaciones", "mantenciones", "historial_estados"), request.user),
         pk=pk,
     )
 
@@ -1300,6 +2040,20 @@ def get_modelos_by_marca(request):
     """API endpoint para obtener modelos de una marca (AJAX)"""
     marca_id = request.GET.get("marca_id")
 
+    # Con ?q= (y opcionalmente ?limit=) responde desde el índice de autocompletado
+    # en vez de enviar todos los modelos de la marca.
+    if marca_id and "q" in request.GET:
+        try:
+            limite = min(max(int(request.GET.get("limit", 20)), 1), 50)
+        except ValueError:
+            limite = 20
+        modelos = autocompletado.buscar(
+            request.GET["q"], ["modelos"], limite, marca=marca_id
+        )["modelos"]
+        return JsonResponse(
+            [{"id": m["id"], "nombre": m["texto"]} for m in modelos], safe=False
+        )
+
     if marca_id:
         modelos = Modelos.objects.filter(marca_id=marca_id).values("id", "nombre")
         return JsonResponse(list(modelos), safe=False)
@@ -1307,75 +2061,64 @@ def get_modelos_by_marca(request):
     return JsonResponse([], safe=False)
 
 
+@lectura_replica
 def productos_disponibles(request):
     """Productos sin asignación activa"""
     productos_asignados_ids = Asignaciones.objects.filter(
         fecha_devolucion__isnull=True
     ).values_list("producto_id", flat=True)
 
-    productos = Productos.objects.select_related(
-        "categoria", "modelo", "estado", "proveedor"
-    ).exclude(id__in=productos_asignados_ids)
+    productos = alcance.acotar(Productos.objects.select_related(
+        "categoria", "modelo", "modelo__marca", "estado", "proveedor"
+    ), request.user).exclude(id__in=productos_asignados_ids).order_by("-fecha_compra", "-id")
 
     filter_form = ProductoFilterForm()
 
     context = {
-        "productos": productos,
         "filter_form": filter_form,
-        "total_productos": productos.count(),
         "filtro_activo": "disponibles",
+        **_paginar_productos(request, productos),
     }
     return render(request, "listar_productos.html", context)
 
 
+@lectura_replica
 def dashboard(request):
-    """Dashboard principal del sistema"""
-    from django.db.models import Count
-
-    total_productos = Productos.objects.count()
-    productos_operativos = Productos.objects.filter(
-        estado__nombre="Operativo"
-    ).count()
-    productos_mantencion = Productos.objects.filter(
-        estado__nombre="En Mantención"
-    ).count()
-
-    productos_asignados = Asignaciones.objects.filter(
-        fecha_devolucion__isnull=True
-    ).count()
+    """
+    Dashboard principal del sistema. Los agregados de productos vienen de
+    las particiones por sucursal en cache (ver ResumenInventarioService):
+    un usuario de sucursal sólo lee y recalcula las suyas.
+    """
+    resumen = ResumenInventarioService.resumen(alcance.sucursales_de(request.user))
+    total_productos = resumen["total"]
 
-    total_proveedores = Proveedores.objects.count()
-    total_categorias = Categorias.objects.count()
-    total_marcas = Marcas.objects.count()
-    total_modelos = Modelos.objects.count()
+    def con_totales(objetos, conteos):
+        for objeto in objetos:
+            objeto.total = conteos[objeto.pk]
+            objeto.porcentaje = (objeto.total / total_productos) * 100 if total_productos else 0
+        return sorted(objetos, key=lambda o: -o.total)
 
-    productos_por_categoria = (
-        Categorias.objects.annotate(total=Count("productos"))
-        .filter(total__gt=0)
-        .order_by("-total")[:5]
+    productos_por_estado = con_totales(
+        list(Estados.objects.in_bulk(list(resumen["por_estado"])).values()), resumen["por_estado"]
     )
-
-    for categoria in productos_por_categoria:
-        if total_productos > 0:
-            categoria.porcentaje = (categoria.total / total_productos) * 100
-        else:
-            categoria.porcentaje = 0
-
-    productos_por_estado = (
-        Estados.objects.annotate(total=Count("productos"))
-        .filter(total__gt=0)
-        .order_by("-total")
+    top_categorias = [pk for pk, _ in resumen["por_categoria"].most_common(5)]
+    productos_por_categoria = con_totales(
+        list(Categorias.objects.in_bulk(top_categorias).values()), resumen["por_categoria"]
     )
 
-    for estado in productos_por_estado:
-        if total_productos > 0:
-            estado.porcentaje = (estado.total / total_productos) * 100
-        else:
-            estado.porcentaje = 0
+    por_nombre = {estado.nombre: estado.total for estado in productos_por_estado}
+    productos_operativos = por_nombre.get("Operativo", 0)
+    productos_mantencion = por_nombre.get("En Mantención", 0)
+    productos_asignados = resumen["asignados"]
+
+    total_proveedores = Proveedores.objects.count()
+    total_categorias = Categorias.objects.count()
+    total_marcas = Marcas.objects.count()
+    total_modelos = Modelos.objects.count()
 
     ultimos_productos = Productos.objects.select_related(
         "categoria", "modelo", "estado"
-    ).order_by("-fecha_compra")[:5]
+    ).filter(pk__in=resumen["ultimos"]).order_by("-fecha_compra", "-id")
 
     context = {
         "total_productos": total_productos,
@@ -1400,7 +2143,7 @@ def reportes(request):
     }
     return render(request, "reportes.html", context)
 
-class MovimientosViewSet(viewsets.ModelViewSet):
+class MovimientosViewSet(SincronizacionMixin, LecturaReplicaMixin, viewsets.ModelViewSet):
     """
     ViewSet para gestionar movimientos de stock.
 
@@ -1414,8 +2157,66 @@ class MovimientosViewSet(viewsets.ModelViewSet):
     queryset = Movimientos.objects.all()
     serializer_class = MovimientosSerializer
     permission_classes = [IsAuthenticated]
+    acciones_replica = ("list", "tendencia")
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ["tipo", "sku"]
     search_fields = ["sku", "proveedor", "referencia", "comentarios"]
     ordering_fields = ["fecha", "cantidad"]
     ordering = ["-fecha"]
+
+    @action(detail=False, methods=["get"])
+    def tendencia(self, request):
+        """
+        Totales de entradas/salidas/ajustes por periodo, leídos desde los
+        rollups (no recorre el ledger completo).
+
+        GET /api/movimientos/tendencia/?periodo=semana&desde=2025-01-01&hasta=2025-03-31&sku=NB-1209,PC-0045
+          - periodo: dia | semana | mes (default: dia)
+          - desde / hasta: fechas YYYY-MM-DD (opcionales)
+          - sku: uno o varios SKU separados por coma (opcional)
+          - por_sku=true: desglosa además por SKU
+        """
+        periodo = request.query_params.get("periodo", "dia")
+        if periodo not in RollupMovimientosService.PERIODOS:
+            return Response(
+                {"error": "periodo debe ser 'dia', 'semana' o 'mes'"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        fechas = {}
+        for campo in ("desde", "hasta"):
+            valor = request.query_params.get(campo)
+            try:
+                fechas[campo] = parse_date(valor) if valor else None
+            except ValueError:  # bien formada pero inexistente (2025-02-30)
+                fechas[campo] = None
+            if valor and fechas[campo] is None:
+                return Response(
+                    {"error": f"'{campo}' debe tener formato YYYY-MM-DD"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+
+        skus = [s.strip() for s in request.query_params.get("sku", "").split(",") if s.strip()]
+        por_sku = request.query_params.get("por_sku") == "true"
+
+        filas = RollupMovimientosService.tendencia(
+            periodo, fechas["desde"], fechas["hasta"], skus, por_sku
+        )
+        return Response({"periodo": periodo, "resultados": filas})
+
+
+# ============= MÉTRICAS (PROMETHEUS) =============
+
+
+def metricas_prometheus(request):
+    """
+    GET /metrics en formato de texto de Prometheus (ver metricas.py).
+    Exige `Authorization: Bearer <METRICAS_TOKEN>`; sin token configurado
+    el endpoint queda cerrado (403).
+    """
+    token = getattr(settings, "METRICAS_TOKEN", "")
+    if not token:
+        return HttpResponse(status=403)
+    if not hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {token}"):
+        return HttpResponse(status=401)
+    return HttpResponse(metricas.exponer(), content_type="text/plain; version=0.0.4; charset=utf-8")
@@ -52,8 +52,10 @@ INSTALLED_APPS = [
 
 # Configuración de REST Framework
 REST_FRAMEWORK = {
+    # JWT sin consultar la BD por request: el usuario se arma con los claims
+    # del token (ver app_inventario/autenticacion.py)
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'app_inventario.autenticacion.JWTClaimsAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -68,12 +70,14 @@ REST_FRAMEWORK = {
 }
 
 MIDDLEWARE = [
+    'app_inventario.perfilado.PerfilMiddleware',  # primero: mide todo el request
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'app_inventario.replicas.ReplicaMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -102,13 +106,88 @@ WSGI_APPLICATION = 'inventario_project.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
+#
+# DB_ENGINE=sqlite (default, instalaciones de un solo nodo):
+#   - WAL: las lecturas no bloquean a la escritura ni viceversa.
+#   - transaction_mode IMMEDIATE: cada transacción toma el lock de escritura al
+#     empezar. Con el modo por defecto (DEFERRED) dos transacciones que leen y
+#     luego escriben (un save() con señales) se bloquean entre sí y una falla
+#     al instante con "database is locked", sin esperar el timeout.
+#   - SQLITE_OPTIMIZADO=0 vuelve a la configuración original (para comparar
+#     con `manage.py benchmark_escritura`).
+# DB_ENGINE=postgresql (producción): requiere `pip install "psycopg[binary,pool]"`.
+#   Con DB_POOL=1 (default) se usa el pool de psycopg; con DB_POOL=0, conexiones
+#   persistentes que se reutilizan durante DB_CONN_MAX_AGE segundos.
+DB_ENGINE = os.getenv("DB_ENGINE", "sqlite").lower()
+DB_CONN_MAX_AGE = int(os.getenv("DB_CONN_MAX_AGE", "60"))
+
+if DB_ENGINE in ("postgres", "postgresql"):
+    DB_POOL = os.getenv("DB_POOL", "1") == "1"
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.getenv("DB_NAME", "inventario"),
+            'USER': os.getenv("DB_USER", "inventario"),
+            'PASSWORD': os.getenv("DB_PASSWORD", ""),
+            'HOST': os.getenv("DB_HOST", "localhost"),
+            'PORT': os.getenv("DB_PORT", "5432"),
+            # El pool no admite conexiones persistentes: recicla él mismo las conexiones
+            'CONN_MAX_AGE': 0 if DB_POOL else DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'pool': {
+                    'min_size': int(os.getenv("DB_POOL_MIN", "2")),
+                    'max_size': int(os.getenv("DB_POOL_MAX", "10")),
+                    'timeout': int(os.getenv("DB_POOL_TIMEOUT", "10")),
+                },
+            } if DB_POOL else {},
+        }
+    }
+else:
+    SQLITE_OPTIMIZADO = os.getenv("SQLITE_OPTIMIZADO", "1") == "1"
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.getenv("SQLITE_PATH", BASE_DIR / 'db.sqlite3'),
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                # Segundos que una escritura espera el lock antes de fallar
+                'timeout': int(os.getenv("SQLITE_TIMEOUT", "20")),
+                'transaction_mode': 'IMMEDIATE',
+                'init_command': (
+                    "PRAGMA journal_mode=WAL;"
+                    "PRAGMA synchronous=NORMAL;"      # seguro con WAL; fsync sólo en checkpoints
+                    "PRAGMA temp_store=MEMORY;"
+                    "PRAGMA cache_size=-20000;"       # ~20 MB de páginas por conexión
+                    "PRAGMA mmap_size=134217728;"     # 128 MB
+                ),
+            } if SQLITE_OPTIMIZADO else {},
+        }
+    }
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# Réplica de lectura (opcional) para listados, reportes y exportaciones; ver
+# app_inventario/replicas.py. PostgreSQL: DB_REPLICA_HOST (streaming replication).
+# SQLite: SQLITE_REPLICA_PATH (copia replicada, p. ej. con Litestream/LiteFS).
+if DB_ENGINE in ("postgres", "postgresql") and os.getenv("DB_REPLICA_HOST"):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST': os.getenv("DB_REPLICA_HOST"),
+        'PORT': os.getenv("DB_REPLICA_PORT", DATABASES['default']['PORT']),
+        'TEST': {'MIRROR': 'default'},
     }
-}
+elif DB_ENGINE not in ("postgres", "postgresql") and os.getenv("SQLITE_REPLICA_PATH"):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': os.getenv("SQLITE_REPLICA_PATH"),
+        'TEST': {'MIRROR': 'default'},
+    }
+
+REPLICA_DB = 'replica' if 'replica' in DATABASES else None
+# Segundos que las lecturas de un usuario van a la primaria después de escribir
+# (debe cubrir el retraso normal de la réplica)
+REPLICA_STICKY_SEGUNDOS = int(os.getenv("REPLICA_STICKY_SEGUNDOS", "15"))
+DATABASE_ROUTERS = ['app_inventario.replicas.ReplicaRouter']
 
 
 # Password validation
@@ -164,8 +243,105 @@ SIMPLE_JWT = {
     "BLACKLIST_AFTER_ROTATION": True,
     "AUTH_HEADER_TYPES": ("Bearer",),
     "AUTH_TOKEN_CLASSES": ("rest_framework_simplejwt.tokens.AccessToken",),
+    "TOKEN_USER_CLASS": "app_inventario.autenticacion.UsuarioToken",
+    # Al renovar, los claims (rol, is_staff, perfil) se vuelven a leer de la BD
+    "TOKEN_REFRESH_SERIALIZER": "app_inventario.autenticacion.TokenRefreshClaimsSerializer",
+}
+
+# Cada proceso recuerda por estos segundos si un usuario tiene tokens revocados
+# (desactivado, cambio de contraseña/rol) antes de volver a la cache compartida
+REVOCACION_CACHE_LOCAL_SEGUNDOS = int(os.getenv("REVOCACION_CACHE_LOCAL_SEGUNDOS", "30"))
+
+# Cache (por defecto en memoria del proceso; en producción apuntar a Redis/Memcached
+# con CACHE_BACKEND + CACHE_LOCATION para compartirla entre workers)
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv("CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.getenv("CACHE_LOCATION", "inventario"),
+    }
 }
 
+# Segundos que se guarda el payload de GET /api/productos/{id}/
+DETALLE_PRODUCTO_CACHE_TTL = int(os.getenv("DETALLE_PRODUCTO_CACHE_TTL", "300"))
+
+# Listados HTML de productos: filas por página y segundos que se guarda cada
+# fila renderizada (la clave incluye el sello de versión del producto)
+PRODUCTOS_POR_PAGINA = int(os.getenv("PRODUCTOS_POR_PAGINA", "25"))
+FILAS_PRODUCTO_CACHE_TTL = int(os.getenv("FILAS_PRODUCTO_CACHE_TTL", "3600"))
+
+# Dashboard: segundos que se guardan los agregados de cada sucursal (las
+# señales borran la partición afectada; el TTL cubre los update masivos)
+DASHBOARD_CACHE_TTL = int(os.getenv("DASHBOARD_CACHE_TTL", "300"))
+
+# Sincronización incremental (GET /api/api/<recurso>/cambios/): días que se
+# guardan los registros de borrados (un cursor más antiguo debe recargar todo)
+# y segundos que el cursor se mantiene detrás del reloj para no saltarse
+# transacciones que aún no confirmaban
+SINCRONIZACION_RETENCION_DIAS = int(os.getenv("SINCRONIZACION_RETENCION_DIAS", "90"))
+SINCRONIZACION_MARGEN_SEGUNDOS = int(os.getenv("SINCRONIZACION_MARGEN_SEGUNDOS", "5"))
+
+# Códigos QR: URL del frontend que se codifica (se renderizan bajo demanda,
+# así que cambiarla no requiere regenerar nada) y cache en disco con LRU
+QR_BASE_URL = os.getenv("QR_BASE_URL", "http://localhost:5500/")
+QR_CACHE_DIR = os.getenv("QR_CACHE_DIR", os.path.join(MEDIA_ROOT, "qr_cache"))
+QR_CACHE_MAX_BYTES = int(os.getenv("QR_CACHE_MAX_BYTES", str(50 * 1024 * 1024)))
+
+# Procesos para renderizar hojas de etiquetas QR con generar_etiquetas (default: núcleos disponibles)
+ETIQUETAS_WORKERS = int(os.getenv("ETIQUETAS_WORKERS", str(os.cpu_count() or 1)))
+# Desde la API: procesos por request y máximo de etiquetas por documento
+# (lotes mayores, con el comando)
+ETIQUETAS_WORKERS_HTTP = int(os.getenv("ETIQUETAS_WORKERS_HTTP", "1"))
+ETIQUETAS_MAXIMO_HTTP = int(os.getenv("ETIQUETAS_MAXIMO_HTTP", "2000"))
+
+# Días hacia adelante que el scheduler materializa mantenciones preventivas
+MANTENCIONES_VENTANA_DIAS = int(os.getenv("MANTENCIONES_VENTANA_DIAS", "90"))
+
+# Perfilado por request (ver app_inventario/perfilado.py): cabecera Server-Timing
+# (sólo staff, o todos con DEBUG), log rotativo y presupuestos por endpoint
+# (nombre de URL; "*" = por defecto). Por defecto sólo con DEBUG.
+# Con PERFIL_ESTRICTO exceder el presupuesto de consultas lanza una excepción
+# (activo en settings_test: la prueba falla).
+PERFIL_ACTIVO = os.getenv("PERFIL_ACTIVO", "1" if DEBUG else "0") == "1"
+PERFIL_ESTRICTO = os.getenv("PERFIL_ESTRICTO", "0") == "1"
+PERFIL_PRESUPUESTOS = {
+    "productos-list": {"consultas": 8, "ms": 500},
+    "productos-detail": {"consultas": 6, "ms": 300},
+    "productos-timeline": {"consultas": 4, "ms": 300},
+    "productos-sugerencias": {"consultas": 3, "ms": 200},
+    "autocomplete-list": {"consultas": 6, "ms": 100},
+    "garantias-calendario": {"consultas": 4, "ms": 200},
+    "mantenciones-agenda": {"consultas": 6, "ms": 300},
+    "*": {"consultas": 60, "ms": 1000},
+}
+
+# El directorio lo crea PerfilMiddleware; el archivo se abre con la primera línea
+LOGS_DIR = os.getenv("LOGS_DIR", os.path.join(BASE_DIR, "logs"))
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "perfil": {
+            "class": "logging.handlers.RotatingFileHandler",
+            "filename": os.path.join(LOGS_DIR, "perfil.log"),
+            "maxBytes": 5 * 1024 * 1024,
+            "backupCount": 5,
+            "encoding": "utf-8",
+            "delay": True,
+        },
+    },
+    "loggers": {
+        "app_inventario.perfil": {"handlers": ["perfil"], "level": "INFO", "propagate": False},
+    },
+}
+
+# Token para GET /metrics (vacío = endpoint cerrado)
+METRICAS_TOKEN = os.getenv("METRICAS_TOKEN", "")
+
+# Segundos antes de reconstruir el índice de autocompletado en memoria
+# (acota el desfase entre workers; dentro de un proceso lo mantienen las señales)
+AUTOCOMPLETADO_TTL = int(os.getenv("AUTOCOMPLETADO_TTL", "300"))
+
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:5500",
     "http://127.0.0.1:5500",
@@ -0,0 +1,18 @@
+"""
+Settings para las pruebas: `manage.py test` las usa por defecto (ver
+manage.py); otros runners, con DJANGO_SETTINGS_MODULE=inventario_project.settings_test.
+"""
+from .settings import *  # noqa: F401,F403
+from .settings import BASE_DIR, DATABASES
+
+# Segunda BD real para probar el router; sin réplica configurada por entorno
+# se usa un SQLite aparte. Las pruebas activan REPLICA_DB explícitamente.
+DATABASES.setdefault('replica', {
+    'ENGINE': 'django.db.backends.sqlite3',
+    'NAME': BASE_DIR / 'db_replica.sqlite3',
+})
+REPLICA_DB = None
+
+# Perfilado siempre activo y estricto: exceder un presupuesto hace fallar la prueba
+PERFIL_ACTIVO = True
+PERFIL_ESTRICTO = True
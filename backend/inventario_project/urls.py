@@ -24,10 +24,11 @@ from rest_framework_simplejwt.views import (
     TokenRefreshView,
 )
 
-from app_inventario.views import MyTokenObtainPairView
+from app_inventario.views import MyTokenObtainPairView, metricas_prometheus
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('metrics', metricas_prometheus, name='metricas'),
     path('api/auth/token/', MyTokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('api/auth/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('api/auth/token/verify/', TokenVerifyView.as_view(), name='token_verify'),
@@ -6,7 +6,9 @@ import sys
 
 def main():
     """Run administrative tasks."""
-    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'inventario_project.settings')
+    # Las pruebas usan su propio módulo de settings (réplica de prueba, perfilado estricto)
+    por_defecto = 'settings_test' if sys.argv[1:2] == ['test'] else 'settings'
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', f'inventario_project.{por_defecto}')
     try:
         from django.core.management import execute_from_command_line
     except ImportError as exc:
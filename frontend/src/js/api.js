@@ -34,14 +34,39 @@ function clearTokens() {
   localStorage.removeItem("is_staff");
 }
 
+let saliendo = false;
+
 function forceLogout() {
+  // Varios requests pueden fallar a la vez: redirigimos una sola vez
+  if (saliendo) return;
+  saliendo = true;
   clearTokens();
+  invalidarCacheGet();
   // Ruta real de tu login
   window.location.href = "/paginas/login/login.html";
 }
 
 // -------------------- Refresh de token -------------------- //
 
+// Renovar este tiempo antes de que venza el access token (ACCESS_TOKEN_LIFETIME = 15 min)
+const MARGEN_REFRESH_MS = 60 * 1000;
+
+// Vencimiento (ms) leído del payload del JWT; null si no se puede leer
+function expiracionToken(token) {
+  try {
+    const payload = token.split(".")[1].replace(/-/g, "+").replace(/_/g, "/");
+    const { exp } = JSON.parse(atob(payload));
+    return exp ? exp * 1000 : null;
+  } catch (_) {
+    return null;
+  }
+}
+
+function tokenPorVencer(token) {
+  const exp = expiracionToken(token);
+  return exp !== null && exp - Date.now() < MARGEN_REFRESH_MS;
+}
+
 async function tryRefreshToken() {
   const refresh = getRefreshToken();
   if (!refresh) return false;
@@ -67,40 +92,60 @@ async function tryRefreshToken() {
   }
 }
 
+// Un solo refresh a la vez: los requests que lo necesiten esperan la misma promesa
+let refreshEnCurso = null;
+
+function refrescarToken() {
+  if (!refreshEnCurso) {
+    refreshEnCurso = tryRefreshToken().finally(() => {
+      refreshEnCurso = null;
+    });
+  }
+  return refreshEnCurso;
+}
+
 // -------------------- Fetch con JWT -------------------- //
 
-async function fetchWithAuth(url, options = {}, { skipAuth = false } = {}) {
+// `blob`: la respuesta es binaria (p. ej. la imagen del QR) y se devuelve como Blob
+async function fetchWithAuth(url, options = {}, { skipAuth = false, reintento = false, blob = false } = {}) {
   const headers = options.headers ? { ...options.headers } : {};
+  let token = null;
 
   if (!skipAuth) {
-    const token = getAccessToken();
+    token = getAccessToken();
     if (!token) {
       forceLogout();
       throw new Error("No hay token de acceso, debes iniciar sesión.");
     }
+    // Renovación anticipada: evita que cada request en curso reciba un 401
+    if (tokenPorVencer(token) && (await refrescarToken())) {
+      token = getAccessToken();
+    }
     headers["Authorization"] = `Bearer ${token}`;
   }
 
   // Si el body es un objeto plano, lo enviamos como JSON
-  if (options.body && !(options.body instanceof FormData)) {
+  // (sin modificar `options`: el reintento tras un 401 lo vuelve a usar)
+  let body = options.body;
+  if (body && !(body instanceof FormData)) {
     headers["Content-Type"] = headers["Content-Type"] || "application/json";
-    options.body = JSON.stringify(options.body);
+    body = JSON.stringify(body);
   }
 
   const response = await fetch(`${API_BASE_URL}${url}`, {
     ...options,
     headers,
+    body,
   });
 
-  // Si recibimos 401, intentamos refrescar el token una vez
+  // Si recibimos 401, renovamos el token (o usamos el que ya renovó otro request) y reintentamos una vez
   if (response.status === 401 && !skipAuth) {
-    const refreshed = await tryRefreshToken();
-    if (refreshed) {
-      return fetchWithAuth(url, options, { skipAuth });
-    } else {
-      forceLogout();
-      throw new Error("Sesión expirada. Vuelve a iniciar sesión.");
+    const renovado = !reintento && (getAccessToken() !== token || (await refrescarToken()));
+    if (renovado) {
+      return fetchWithAuth(url, options, { skipAuth, reintento: true, blob });
     }
+    forceLogout();
+    throw new Error("Sesión expirada. Vuelve a iniciar sesión.");
   }
 
   if (!response.ok) {
@@ -117,7 +162,53 @@ async function fetchWithAuth(url, options = {}, { skipAuth = false } = {}) {
   // 204 No Content
   if (response.status === 204) return null;
 
-  return response.json();
+  return blob ? response.blob() : response.json();
+}
+
+// -------------------- Cache de GET -------------------- //
+// Respuestas GET en memoria mientras dure la página:
+// - Dos GET iguales en paralelo comparten un solo request.
+// - Se reutilizan por GET_CACHE_TTL_MS; cualquier escritura (POST/PUT/PATCH/DELETE) vacía la cache.
+// - Sin cache: requests con `signal` (cancelables) o con `cache: "no-store"` (p. ej. polling).
+
+const GET_CACHE_TTL_MS = 30 * 1000;
+const cacheGet = new Map(); // url -> { promesa, expira }
+
+function invalidarCacheGet() {
+  cacheGet.clear();
+}
+
+// Cada llamador recibe su copia: así puede modificarla sin afectar a los demás
+function copiar(data) {
+  return data === null ? null : structuredClone(data);
+}
+
+function getConCache(url, options) {
+  if (options.signal || options.cache === "no-store") {
+    return fetchWithAuth(url, { method: "GET", ...options });
+  }
+
+  const ahora = Date.now();
+  const entrada = cacheGet.get(url);
+  if (entrada && entrada.expira > ahora) {
+    return entrada.promesa.then(copiar);
+  }
+
+  const promesa = fetchWithAuth(url, { method: "GET", ...options });
+  cacheGet.set(url, { promesa, expira: ahora + GET_CACHE_TTL_MS });
+  // Los errores no se cachean
+  promesa.catch(() => {
+    if (cacheGet.get(url)?.promesa === promesa) cacheGet.delete(url);
+  });
+  return promesa.then(copiar);
+}
+
+async function escritura(url, options) {
+  try {
+    return await fetchWithAuth(url, options);
+  } finally {
+    invalidarCacheGet();
+  }
 }
 
 // Construye la URL interna de la API a partir de un fragmento
@@ -131,12 +222,12 @@ function buildApiUrl(resource) {
 
 // -------------------- Métodos genéricos -------------------- //
 
-async function apiGet(resource, options = {}) {
-  return fetchWithAuth(buildApiUrl(resource), { method: "GET", ...options });
+function apiGet(resource, options = {}) {
+  return getConCache(buildApiUrl(resource), options);
 }
 
 async function apiPost(resource, body, options = {}) {
-  return fetchWithAuth(buildApiUrl(resource), {
+  return escritura(buildApiUrl(resource), {
     method: "POST",
     body,
     ...options,
@@ -144,7 +235,7 @@ async function apiPost(resource, body, options = {}) {
 }
 
 async function apiPut(resource, body, options = {}) {
-  return fetchWithAuth(buildApiUrl(resource), {
+  return escritura(buildApiUrl(resource), {
     method: "PUT",
     body,
     ...options,
@@ -152,7 +243,7 @@ async function apiPut(resource, body, options = {}) {
 }
 
 async function apiPatch(resource, body, options = {}) {
-  return fetchWithAuth(buildApiUrl(resource), {
+  return escritura(buildApiUrl(resource), {
     method: "PATCH",
     body,
     ...options,
@@ -160,12 +251,90 @@ async function apiPatch(resource, body, options = {}) {
 }
 
 async function apiDelete(resource, options = {}) {
-  return fetchWithAuth(buildApiUrl(resource), {
+  return escritura(buildApiUrl(resource), {
     method: "DELETE",
     ...options,
   });
 }
 
+// -------------------- Batch -------------------- //
+// Varios GET en un solo request (POST /api/api/batch/): para cargar una página
+// sin pagar la latencia de la red una vez por recurso.
+//   const { productos, notis } = await API.batch({ productos: "productos/", notis: "notificaciones/no_leidas/" });
+// - Devuelve { id: body }; un sub-request que falló queda en null (y se avisa en consola).
+// - Usa la cache de GET: lo que ya está en cache no se vuelve a pedir y lo que
+//   llega queda disponible para los apiGet siguientes.
+
+async function apiBatch(recursos) {
+  const ahora = Date.now();
+  const resultado = {};
+  const pendientes = {};
+
+  for (const [id, resource] of Object.entries(recursos)) {
+    const entrada = cacheGet.get(buildApiUrl(resource));
+    if (entrada && entrada.expira > ahora) {
+      resultado[id] = entrada.promesa.then(copiar).catch(() => null);
+    } else {
+      pendientes[id] = resource;
+    }
+  }
+
+  if (Object.keys(pendientes).length) {
+    // fetchWithAuth directo (no `escritura`): es un POST que sólo lee
+    const { responses } = await fetchWithAuth(buildApiUrl("batch/"), {
+      method: "POST",
+      body: { requests: pendientes },
+    });
+    const recibido = Date.now();
+
+    for (const [id, resource] of Object.entries(pendientes)) {
+      const { status, body } = responses[id] || {};
+      if (status >= 200 && status < 300) {
+        cacheGet.set(buildApiUrl(resource), {
+          promesa: Promise.resolve(body),
+          expira: recibido + GET_CACHE_TTL_MS,
+        });
+        resultado[id] = copiar(body);
+      } else {
+        console.warn(`Batch: ${resource} respondió ${status}`, body);
+        resultado[id] = null;
+      }
+    }
+  }
+
+  const ids = Object.keys(resultado);
+  const valores = await Promise.all(ids.map((id) => resultado[id]));
+  return Object.fromEntries(ids.map((id, i) => [id, valores[i]]));
+}
+
+// -------------------- Sincronización incremental -------------------- //
+// Para mantener una copia local de un recurso (GET /api/api/<recurso>/cambios/):
+//   let { cambios, eliminados, cursor } = await API.cambios("productos", cursorGuardado);
+// Sigue los lotes hasta el final. cursor = null → carga completa. Guardar el cursor
+// devuelto para la próxima llamada; si el servidor lo rechaza por antiguo, llamar con null.
+
+async function apiCambios(recurso, cursor = null, { limit } = {}) {
+  const cambios = [];
+  const eliminados = new Set();
+  let mas = true;
+
+  while (mas) {
+    const params = new URLSearchParams();
+    if (cursor) params.set("cursor", cursor);
+    if (limit) params.set("limit", limit);
+    const url = buildApiUrl(`${recurso.replace(/\/+$/, "")}/cambios/?${params}`);
+
+    // Sin la cache de GET: cada llamada debe ver los cambios recientes
+    const data = await fetchWithAuth(url, { method: "GET" });
+    cambios.push(...data.cambios);
+    data.eliminados.forEach((id) => eliminados.add(id));
+    cursor = data.cursor;
+    mas = data.mas;
+  }
+
+  return { cambios, eliminados: [...eliminados], cursor };
+}
+
 // -------------------- Login (sin JWT previo) -------------------- //
 // (Opcional, por si en algún lado quisieras loguear con esta API en vez de login.js)
 
@@ -187,9 +356,10 @@ async function login(username, password) {
 
   const data = await res.json();
 
-  // Guardamos tokens si vienen
+  // Guardamos tokens si vienen (y descartamos respuestas cacheadas de otra sesión)
   if (data.access || data.refresh) {
     setTokens({ access: data.access, refresh: data.refresh });
+    invalidarCacheGet();
   }
   // Guarda info de usuario si la mandas en el backend
   if (data.user) {
@@ -208,17 +378,26 @@ export const API = {
 
   // Genéricos
   get: apiGet,
+  invalidarCache: invalidarCacheGet,
   post: apiPost,
   put: apiPut,
   patch: apiPatch,
   delete: apiDelete,
+  batch: apiBatch,
+  cambios: apiCambios,
 
   // Conveniencia: productos
   getProductos: () => apiGet("productos/"),
   getProducto: (id) => apiGet(`productos/${id}/`),
+  // El QR exige token: se pide como Blob y se muestra con URL.createObjectURL
+  getQrProducto: (id, tamano = 300) =>
+    fetchWithAuth(buildApiUrl(`productos/${id}/qr/?tamano=${tamano}`), { method: "GET" }, { blob: true }),
   crearProducto: (payload) => apiPost("productos/", payload),
   actualizarProducto: (id, payload) => apiPut(`productos/${id}/`, payload),
   eliminarProducto: (id) => apiDelete(`productos/${id}/`),
+  // Un solo request y una transacción para muchos productos (historial y notificación incluidos)
+  cambiarEstadoProductos: (productos, estado, comentario = "") =>
+    apiPost("productos/cambiar_estado/", { productos, estado, comentario }),
 
   // Conveniencia: catálogos
   getSucursales: () => apiGet("sucursales/"),
@@ -226,6 +405,27 @@ export const API = {
   getEstados: () => apiGet("estados/"),
   getModelos: () => apiGet("modelos/"),
   getProveedores: () => apiGet("proveedores/"),
+
+  // Auditorías con lector QR: se descarga la foto de la sucursal, se lee sin
+  // conexión y se suben todas las lecturas juntas al cerrar
+  iniciarAuditoria: (sucursal) => apiPost("auditorias/", { sucursal }),
+  getFotoAuditoria: (id) => apiGet(`auditorias/${id}/foto/`),
+  subirLecturas: (id, lecturas) => apiPost(`auditorias/${id}/lecturas/`, { lecturas }),
+  cerrarAuditoria: (id, lecturas = []) => apiPost(`auditorias/${id}/cerrar/`, { lecturas }),
+
+  // Cierres mensuales: fotos precalculadas del inventario (desde/hasta = "YYYY-MM")
+  getSnapshotsInventario: () => apiGet("snapshots-inventario/"),
+  diferenciaInventario: (desde, hasta, limit = 1000) =>
+    apiGet(`snapshots-inventario/diferencia/?${new URLSearchParams({ desde, hasta, limit })}`),
+
+  // Typeahead: top-k por campo desde /autocomplete/ (índice de prefijos en el backend)
+  // campos: "nro_serie", "modelos", "proveedores", "usuarios"
+  autocomplete: (q, campos = [], { limit = 10, marca } = {}) => {
+    const params = new URLSearchParams({ q, limit: String(limit) });
+    if (campos.length) params.set("campos", campos.join(","));
+    if (marca) params.set("marca", marca);
+    return apiGet(`autocomplete/?${params.toString()}`);
+  },
 };
 
 // (Opcional) Exponer también en window para otros scripts no-módulo
@@ -30,19 +30,15 @@ function normalizarLista(resp) {
 // =============================
 async function cargarDatosDashboard() {
   try {
-    // Pedimos productos y notificaciones en paralelo
-    const [productosResp, notificacionesResp] = await Promise.all([
-      // GET /api/api/productos/
-      API.get("productos/").catch((err) => {
-        console.error("Error obteniendo productos:", err);
-        return null;
-      }),
-      // GET /api/api/notificaciones/
-      API.get("notificaciones/").catch((err) => {
-        console.error("Error obteniendo notificaciones:", err);
-        return null;
-      }),
-    ]);
+    // Productos y notificaciones en un solo request (POST /api/api/batch/);
+    // un recurso que falla llega como null
+    const { productos: productosResp, notificaciones: notificacionesResp } = await API.batch({
+      productos: "productos/",
+      notificaciones: "notificaciones/",
+    }).catch((err) => {
+      console.error("Error obteniendo datos del dashboard:", err);
+      return {};
+    });
 
     // ----- Procesar productos -----
     if (productosResp) {
@@ -69,19 +65,15 @@ async function cargarDatosDashboard() {
         if (estadoTexto.includes("uso")) enUso++;
         if (estadoTexto.includes("mant")) mantencion++;
 
-        const estadoGarantia = (p.estado_garantia || "")
-          .toString()
-          .toLowerCase();
+        // situacion_garantia la calcula el backend (GarantiaService)
+        const situacionGarantia =
+          p.situacion_garantia || (p.estado_garantia || "").toString().toLowerCase();
 
-        if (
-          estadoGarantia.includes("vigente") ||
-          estadoGarantia.includes("garant")
-        ) {
-          // Ej: "En garantía"
+        if (situacionGarantia === "vigente") {
           garantiaVigente++;
-        } else if (estadoGarantia.includes("por vencer")) {
+        } else if (situacionGarantia === "por_vencer") {
           porVencer++;
-        } else if (estadoGarantia.includes("vencid")) {
+        } else if (situacionGarantia === "vencida") {
           fueraGarantia++;
         }
 
@@ -261,7 +261,8 @@ function configurarMarcarLeidas() {
 // ---------------- Función para obtener conteo rápido de no leídas ----------------
 async function obtenerConteoRapidoNoLeidas() {
   try {
-    const data = await API.get('notificaciones/no_leidas/');
+    // Polling: siempre al servidor (no usar la respuesta cacheada por api.js)
+    const data = await API.get('notificaciones/no_leidas/', { cache: "no-store" });
     console.log(`Tienes ${data.count} notificaciones nuevas`);
     actualizarBadgeConConteo(data.count);
     return data.count;
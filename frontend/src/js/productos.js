@@ -18,7 +18,6 @@ function nombreProducto(prod) {
   return `${prod.modelo_nombre} - ${prod.nro_serie}`;
 }
 
-let productosCache = []; // lista completa desde la API
 let productoActualDetalle = null; // producto cargado en detalle para cambio de estado
 
 // -----------------------------------------------------------
@@ -44,6 +43,28 @@ document.addEventListener("DOMContentLoaded", () => {
 // -----------------------------------------------------------
 // LISTAR (listar.html)
 // -----------------------------------------------------------
+// Los filtros se resuelven en el servidor (filterset de ProductosViewSet y
+// ?search= con el índice de búsqueda), así que el resultado es correcto
+// aunque haya miles de productos. La tabla es virtual: en el DOM sólo
+// están las filas visibles y las páginas se piden a medida que se hace scroll.
+
+const LISTA_PAGE_SIZE = 100;
+const LISTA_ALTO_FILA = 49;     // px; fijo (.fila-virtual) para saber qué filas se ven
+const LISTA_BUFFER = 10;        // filas extra sobre y bajo el área visible
+const LISTA_MAX_PAGINAS = 20;   // páginas en memoria; se descartan las más lejanas
+const LISTA_DEBOUNCE_MS = 250;
+
+const listado = {
+  query: null,              // querystring de los filtros actuales
+  total: 0,
+  paginas: new Map(),       // nro de página -> productos
+  pendientes: new Map(),    // nro de página -> { controller, promesa }
+  generacion: 0,            // cambia con cada búsqueda: descarta respuestas viejas
+  version: 0,               // cambia al llegar una página: hay que repintar
+  pintado: "",              // rango pintado en la tabla (evita repintar igual)
+  tarjetas: 0,              // páginas ya pintadas en la vista de tarjetas
+  cargandoTarjetas: false,
+};
 
 function initListar() {
   const btnTabla = document.getElementById("btnTabla");
@@ -58,6 +79,7 @@ function initListar() {
       btnTarjetas.classList.remove("active");
       vistaTabla.classList.remove("d-none");
       vistaTarjetas.classList.add("d-none");
+      programarRenderTabla();
     });
 
     btnTarjetas.addEventListener("click", () => {
@@ -65,6 +87,7 @@ function initListar() {
       btnTabla.classList.remove("active");
       vistaTabla.classList.add("d-none");
       vistaTarjetas.classList.remove("d-none");
+      if (!listado.tarjetas) renderTarjetasSiguientes();
     });
   }
 
@@ -73,97 +96,71 @@ function initListar() {
   const filtroSucursal = document.getElementById("filtroSucursal");
   const filtroEstado = document.getElementById("filtroEstado");
 
-  const reCargar = () => aplicarFiltrosYRender();
+  // El texto espera a que se deje de escribir; los select consultan al tiro
+  let timer = null;
+  const reCargar = () => {
+    clearTimeout(timer);
+    recargarListado();
+  };
 
-  if (inputBuscar) inputBuscar.addEventListener("input", reCargar);
+  if (inputBuscar) {
+    inputBuscar.addEventListener("input", () => {
+      clearTimeout(timer);
+      timer = setTimeout(recargarListado, LISTA_DEBOUNCE_MS);
+    });
+  }
   if (filtroCategoria) filtroCategoria.addEventListener("change", reCargar);
   if (filtroSucursal) filtroSucursal.addEventListener("change", reCargar);
   if (filtroEstado) filtroEstado.addEventListener("change", reCargar);
 
-  cargarProductosLista();
-}
+  const scroll = document.getElementById("scrollProductos");
+  if (scroll) scroll.addEventListener("scroll", programarRenderTabla, { passive: true });
+  window.addEventListener("resize", programarRenderTabla);
 
-async function cargarProductosLista() {
-  const tbody = document.getElementById("tbodyProductos");
-  const cardsCont = document.getElementById("cardsProductos");
-
-  if (tbody) {
-    tbody.innerHTML = `<tr><td colspan="9">Cargando productos...</td></tr>`;
-  }
-  if (cardsCont) {
-    cardsCont.innerHTML = `<p>Cargando productos...</p>`;
-  }
+  initTarjetasInfinitas();
 
-  try {
-    const res = await API.get("productos/"); // GET /api/api/productos/
-    productosCache = Array.isArray(res) ? res : (res.results || []);
-
-    poblarFiltrosDesdeProductos();
-    aplicarFiltrosYRender();
-    aplicarFiltroDesdeURL();
+  cargarFiltros()
+    .then(aplicarFiltroDesdeURL)
+    .catch((err) => console.error("Error al cargar filtros:", err))
+    .finally(recargarListado);
+}
 
-  } catch (err) {
-    console.error("Error al cargar productos:", err);
-    if (tbody) {
-      tbody.innerHTML = `<tr><td colspan="9">Error al cargar productos</td></tr>`;
-    }
-    if (cardsCont) {
-      cardsCont.innerHTML = `<p>Error al cargar productos</p>`;
-    }
+// Recorre todas las páginas de un catálogo (categorías, sucursales, estados)
+async function cargarTodos(recurso) {
+  const items = [];
+  let url = recurso;
+  while (url) {
+    const res = await API.get(url);
+    if (Array.isArray(res)) return res;
+    items.push(...(res.results || []));
+    url = res.next ? `${recurso}${new URL(res.next).search}` : null;
   }
+  return items;
 }
 
-function poblarFiltrosDesdeProductos() {
-  function getNombreCampo(campo, fallback = "—") {
-    if (campo === null || campo === undefined) return fallback;
-    if (typeof campo === "object") {
-      if (campo.nombre) return campo.nombre;
-      if (campo.nombre_categoria) return campo.nombre_categoria;
-      if (campo.nombre_sucursal) return campo.nombre_sucursal;
-      if (campo.nombre_estado) return campo.nombre_estado;
-      if (campo.garantia_meses) return campo.garantia_meses;
-      return JSON.stringify(campo);
-    }
-    return campo;
-  }
+async function cargarFiltros() {
+  const [cats, sucs, ests] = await Promise.all([
+    cargarTodos("categorias/"),
+    cargarTodos("sucursales/"),
+    cargarTodos("estados/"),
+  ]);
 
-  if (!productosCache.length) return;
+  // value = id: es lo que recibe el filterset del backend
+  const opciones = (items) =>
+    items.map(i => `<option value="${i.id}">${getNombreCampo(i)}</option>`).join("");
 
   const filtroCategoria = document.getElementById("filtroCategoria");
   const filtroSucursal = document.getElementById("filtroSucursal");
   const filtroEstado = document.getElementById("filtroEstado");
 
-  const cats = [...new Set(
-    productosCache.map(p =>
-      p.categoria_nombre || getNombreCampo(p.categoria, null)
-    ).filter(Boolean)
-  )];
-
-  const sucs = [...new Set(
-    productosCache.map(p =>
-      p.sucursal_nombre || getNombreCampo(p.sucursal, null)
-    ).filter(Boolean)
-  )];
-
-  const ests = [...new Set(
-    productosCache.map(p =>
-      p.estado_nombre || getNombreCampo(p.estado, null)
-    ).filter(Boolean)
-  )];
-
   if (filtroCategoria) {
-    filtroCategoria.innerHTML = `<option value="">Categoría: Todas</option>` +
-      cats.map(c => `<option value="${c}">${c}</option>`).join("");
+    filtroCategoria.innerHTML = `<option value="">Categoría: Todas</option>` + opciones(cats);
   }
-
   if (filtroSucursal) {
-    filtroSucursal.innerHTML = `<option value="">Sucursal: Todas</option>` +
-      sucs.map(s => `<option value="${s}">${s}</option>`).join("");
+    filtroSucursal.innerHTML = `<option value="">Sucursal: Todas</option>` + opciones(sucs);
   }
-
   if (filtroEstado) {
-    filtroEstado.innerHTML = `<option value="">Estado: Todos</option>` +
-      ests.map(e => `<option value="${e}">${e}</option>`).join("");
+    filtroEstado.innerHTML = `<option value="">Estado: Todos</option>` + opciones(ests);
   }
 }
 
@@ -175,119 +172,318 @@ function aplicarFiltroDesdeURL() {
   const selectCat = document.getElementById("filtroCategoria");
   if (!selectCat) return;
 
-  let aplicado = false;
-
   // 1) Intentar por ID (value del option)
   if (categoriaId) {
     for (const opt of selectCat.options) {
       if (opt.value === categoriaId) {
         selectCat.value = categoriaId;
-        aplicado = true;
-        break;
+        return;
       }
     }
   }
 
   // 2) Si no se encontró por ID, intentamos por nombre de categoría
-  if (!aplicado && categoriaNombre) {
+  if (categoriaNombre) {
     for (const opt of selectCat.options) {
       if (opt.text.toLowerCase() === categoriaNombre.toLowerCase()) {
         selectCat.value = opt.value;
-        aplicado = true;
-        break;
+        return;
       }
     }
   }
+}
+
+function construirQuery() {
+  const params = new URLSearchParams({ page_size: String(LISTA_PAGE_SIZE) });
+  const texto = (document.getElementById("inputBuscar")?.value || "").trim();
+  if (texto) params.set("search", texto);
 
-  // Volvemos a filtrar con la función real
-  if (aplicado) {
-    aplicarFiltrosYRender();
+  const filtros = {
+    categoria: "filtroCategoria",
+    sucursal: "filtroSucursal",
+    estado: "filtroEstado",
+  };
+  for (const [campo, id] of Object.entries(filtros)) {
+    const valor = document.getElementById(id)?.value || "";
+    if (valor) params.set(campo, valor);
   }
+  return params.toString();
 }
 
-function aplicarFiltrosYRender() {
-  function getNombreCampo(campo, fallback = "—") {
-    if (campo === null || campo === undefined) return fallback;
-    if (typeof campo === "object") {
-      if (campo.nombre) return campo.nombre;
-      if (campo.nombre_categoria) return campo.nombre_categoria;
-      if (campo.nombre_sucursal) return campo.nombre_sucursal;
-      if (campo.nombre_estado) return campo.nombre_estado;
-      return JSON.stringify(campo);
-    }
-    return campo;
+function esCancelacion(err) {
+  return err && err.name === "AbortError";
+}
+
+function cancelarPendientes() {
+  listado.pendientes.forEach(({ controller }) => controller.abort());
+  listado.pendientes.clear();
+}
+
+async function recargarListado() {
+  const query = construirQuery();
+  if (query === listado.query) return;
+
+  // Lo que siga en vuelo corresponde a filtros viejos
+  cancelarPendientes();
+  listado.query = query;
+  listado.generacion += 1;
+  listado.total = 0;
+  listado.paginas.clear();
+  listado.pintado = "";
+  listado.tarjetas = 0;
+
+  const scroll = document.getElementById("scrollProductos");
+  if (scroll) scroll.scrollTop = 0;
+  const cardsCont = document.getElementById("cardsProductos");
+  if (cardsCont) cardsCont.innerHTML = "";
+  mostrarMensajeLista("Cargando productos...");
+
+  const generacion = listado.generacion;
+  try {
+    await cargarPagina(1);
+  } catch (err) {
+    if (esCancelacion(err) || generacion !== listado.generacion) return;
+    console.error("Error al cargar productos:", err);
+    mostrarMensajeLista("Error al cargar productos");
+    return;
   }
+  if (generacion !== listado.generacion) return;
 
-  const inputBuscar = document.getElementById("inputBuscar");
-  const filtroCategoria = document.getElementById("filtroCategoria");
-  const filtroSucursal = document.getElementById("filtroSucursal");
-  const filtroEstado = document.getElementById("filtroEstado");
+  actualizarTotal();
+  if (!listado.total) {
+    mostrarMensajeLista("No hay productos que coincidan con el filtro.");
+    return;
+  }
+  renderTablaVirtual();
+  if (!document.getElementById("vistaTarjetas")?.classList.contains("d-none")) {
+    renderTarjetasSiguientes();
+  }
+}
 
-  const texto = (inputBuscar?.value || "").toLowerCase();
-  const cat = filtroCategoria?.value || "";
-  const suc = filtroSucursal?.value || "";
-  const est = filtroEstado?.value || "";
+// Una página por request; pedir dos veces la misma reutiliza la promesa
+function cargarPagina(numero) {
+  if (listado.paginas.has(numero)) return Promise.resolve(listado.paginas.get(numero));
+  if (listado.pendientes.has(numero)) return listado.pendientes.get(numero).promesa;
+
+  const generacion = listado.generacion;
+  const controller = new AbortController();
+  const promesa = API.get(`productos/?${listado.query}&page=${numero}`, { signal: controller.signal })
+    .then((res) => {
+      if (generacion !== listado.generacion) return null;
+      const filas = Array.isArray(res) ? res : (res.results || []);
+      listado.total = res.count ?? filas.length;
+      listado.paginas.set(numero, filas);
+      listado.version += 1;
+      descartarPaginasLejanas();
+      return filas;
+    })
+    .finally(() => {
+      if (listado.pendientes.get(numero)?.controller === controller) {
+        listado.pendientes.delete(numero);
+      }
+    });
 
-  const filtrados = productosCache.filter(p => {
-    const t = texto.trim();
+  listado.pendientes.set(numero, { controller, promesa });
+  return promesa;
+}
 
-    const categoriaTexto =
-      p.categoria_nombre || getNombreCampo(p.categoria, "");
-    const sucursalTexto =
-      p.sucursal_nombre || getNombreCampo(p.sucursal, "");
-    const estadoTexto =
-      p.estado_nombre || getNombreCampo(p.estado, "");
+function rangoVisible() {
+  const scroll = document.getElementById("scrollProductos");
+  const arriba = scroll ? scroll.scrollTop : 0;
+  const alto = scroll && scroll.clientHeight ? scroll.clientHeight : 600;
+
+  const primera = Math.max(0, Math.floor(arriba / LISTA_ALTO_FILA) - LISTA_BUFFER);
+  const ultima = Math.min(listado.total, Math.ceil((arriba + alto) / LISTA_ALTO_FILA) + LISTA_BUFFER);
+  return { primera, ultima };
+}
+
+function paginaDeFila(indice) {
+  return Math.floor(indice / LISTA_PAGE_SIZE) + 1;
+}
 
-    const coincideTexto =
-      !t ||
-      (p.nro_serie || "").toLowerCase().includes(t) ||
-      nombreProducto(p).toLowerCase().includes(t) ||
-      categoriaTexto.toLowerCase().includes(t) ||
-      sucursalTexto.toLowerCase().includes(t);
+// Memoria acotada: se conservan las páginas más cercanas a lo que se ve
+function descartarPaginasLejanas() {
+  if (listado.paginas.size <= LISTA_MAX_PAGINAS) return;
+  const { primera } = rangoVisible();
+  const actual = paginaDeFila(primera);
+  const lejanas = [...listado.paginas.keys()]
+    .sort((a, b) => Math.abs(b - actual) - Math.abs(a - actual));
+  while (listado.paginas.size > LISTA_MAX_PAGINAS) {
+    listado.paginas.delete(lejanas.shift());
+  }
+}
 
-    const coincideCat = !cat || categoriaTexto === cat;
-    const coincideSuc = !suc || sucursalTexto === suc;
-    const coincideEst = !est || estadoTexto === est;
+let renderProgramado = false;
 
-    return coincideTexto && coincideCat && coincideSuc && coincideEst;
+function programarRenderTabla() {
+  if (renderProgramado) return;
+  renderProgramado = true;
+  requestAnimationFrame(() => {
+    renderProgramado = false;
+    renderTablaVirtual();
   });
+}
+
+function renderTablaVirtual() {
+  const tbody = document.getElementById("tbodyProductos");
+  if (!tbody || !listado.total) return;
 
-  renderTablaProductos(filtrados);
-  renderTarjetasProductos(filtrados);
+  const { primera, ultima } = rangoVisible();
+
+  // Pide las páginas que cubren el rango visible y aún no están
+  for (let pagina = paginaDeFila(primera); pagina <= paginaDeFila(ultima - 1); pagina++) {
+    if (!listado.paginas.has(pagina)) {
+      cargarPagina(pagina)
+        .then((filas) => filas && programarRenderTabla())
+        .catch((err) => {
+          if (!esCancelacion(err)) console.error("Error al cargar productos:", err);
+        });
+    }
+  }
+
+  const clave = `${listado.generacion}:${listado.version}:${primera}:${ultima}`;
+  if (clave === listado.pintado) return;
+  listado.pintado = clave;
+
+  const frag = document.createDocumentFragment();
+  frag.appendChild(filaEspaciadora(primera * LISTA_ALTO_FILA));
+  for (let i = primera; i < ultima; i++) {
+    const producto = listado.paginas.get(paginaDeFila(i))?.[i % LISTA_PAGE_SIZE];
+    frag.appendChild(producto ? filaProducto(producto) : filaCargando());
+  }
+  frag.appendChild(filaEspaciadora((listado.total - ultima) * LISTA_ALTO_FILA));
+  tbody.replaceChildren(frag);
+}
+
+function filaEspaciadora(alto) {
+  const tr = document.createElement("tr");
+  tr.className = "fila-espaciadora";
+  tr.innerHTML = `<td colspan="8" style="height:${alto}px"></td>`;
+  return tr;
+}
+
+function filaCargando() {
+  const tr = document.createElement("tr");
+  tr.className = "fila-virtual";
+  tr.innerHTML = `<td colspan="8" class="text-muted">Cargando...</td>`;
+  return tr;
 }
 
-function renderTablaProductos(lista) {
+function filaProducto(p) {
+  const tr = document.createElement("tr");
+  tr.className = "fila-virtual";
+
+  const sucursalTexto =
+    p.sucursal_nombre || getNombreCampo(p.sucursal, "—");
+  const estadoTexto =
+    p.estado_nombre || getNombreCampo(p.estado, "—");
+
+  const garantiaValor = p.garantia_meses ?? p.garantia ?? null;
+  const garantiaTexto =
+    garantiaValor === null || garantiaValor === "" ? "—" : `${garantiaValor} meses`;
+
+  tr.innerHTML = `
+    <td><input type="checkbox"></td>
+    <td>${p.nro_serie}</td>
+    <td>${nombreProducto(p)}</td>
+    <td>${sucursalTexto}</td>
+    <td>${p.documento_factura || "—"}</td>
+    <td>${garantiaTexto}</td>
+    <td>${estadoTexto}</td>
+    <td class="d-flex gap-1">
+      <a href="detalle.html?id=${p.id}" class="btn btn-sm btn-primary">
+        <i class="bi bi-eye"></i>
+      </a>
+      <a href="editar.html?id=${p.id}" class="btn btn-sm btn-warning">
+        <i class="bi bi-pencil"></i>
+      </a>
+      <a href="eliminar.html?id=${p.id}" class="btn btn-sm btn-danger">
+        <i class="bi bi-trash"></i>
+      </a>
+    </td>
+  `;
+  return tr;
+}
+
+function mostrarMensajeLista(texto) {
   const tbody = document.getElementById("tbodyProductos");
-  if (!tbody) return;
+  const cardsCont = document.getElementById("cardsProductos");
+  listado.pintado = "";
+  actualizarTotal();
 
-  if (!lista.length) {
-    tbody.innerHTML = `<tr><td colspan="9">No hay productos que coincidan con el filtro.</td></tr>`;
-    return;
+  if (tbody) {
+    tbody.innerHTML = `<tr><td colspan="8">${texto}</td></tr>`;
+  }
+  if (cardsCont) {
+    cardsCont.innerHTML = `<p class="text-muted">${texto}</p>`;
   }
+}
 
-  tbody.innerHTML = "";
+function actualizarTotal() {
+  const el = document.getElementById("totalProductos");
+  if (el) el.textContent = listado.total ? `${listado.total} productos` : "";
+}
 
-  lista.forEach(p => {
-    const tr = document.createElement("tr");
+// Tarjetas: scroll infinito (se agregan páginas al llegar al final)
+function initTarjetasInfinitas() {
+  const cardsCont = document.getElementById("cardsProductos");
+  if (!cardsCont || !("IntersectionObserver" in window)) return;
 
-    const sucursalTexto =
-      p.sucursal_nombre || getNombreCampo(p.sucursal, "—");
-    const estadoTexto =
-      p.estado_nombre || getNombreCampo(p.estado, "—");
-
-    const garantiaValor = p.garantia_meses ?? p.garantia ?? null;
-    const garantiaTexto =
-      garantiaValor === null || garantiaValor === "" ? "—" : `${garantiaValor} meses`;
-
-    tr.innerHTML = `
-      <td><input type="checkbox"></td>
-      <td>${p.nro_serie}</td>
-      <td>${nombreProducto(p)}</td>
-      <td>${sucursalTexto}</td>
-      <td>${p.documento_factura || "—"}</td>
-      <td>${garantiaTexto}</td>
-      <td>${estadoTexto}</td>
-      <td class="d-flex gap-1">
+  const sentinela = document.createElement("div");
+  sentinela.id = "cardsSentinela";
+  cardsCont.after(sentinela);
+
+  new IntersectionObserver((entradas) => {
+    if (entradas.some(e => e.isIntersecting)) renderTarjetasSiguientes();
+  }, { rootMargin: "400px" }).observe(sentinela);
+}
+
+async function renderTarjetasSiguientes() {
+  const cont = document.getElementById("cardsProductos");
+  const vista = document.getElementById("vistaTarjetas");
+  if (!cont || vista?.classList.contains("d-none")) return;
+  if (listado.cargandoTarjetas || !listado.total) return;
+  if (listado.tarjetas * LISTA_PAGE_SIZE >= listado.total) return;
+
+  const generacion = listado.generacion;
+  const pagina = listado.tarjetas + 1;
+  listado.cargandoTarjetas = true;
+  try {
+    const filas = await cargarPagina(pagina);
+    if (!filas || generacion !== listado.generacion) return;
+    if (pagina === 1) cont.innerHTML = "";
+    filas.forEach(p => cont.appendChild(tarjetaProducto(p)));
+    listado.tarjetas = pagina;
+  } catch (err) {
+    if (!esCancelacion(err)) console.error("Error al cargar productos:", err);
+  } finally {
+    listado.cargandoTarjetas = false;
+  }
+}
+
+function tarjetaProducto(p) {
+  const col = document.createElement("div");
+  col.className = "col-md-4 col-lg-3 mb-3";
+
+  const garantiaValor = p.garantia_meses ?? p.garantia ?? null;
+  const garantiaTexto =
+    garantiaValor === null || garantiaValor === "" ? "—" : `${garantiaValor} meses`;
+  const categoriaTexto =
+    p.categoria_nombre || getNombreCampo(p.categoria, "—");
+  const sucursalTexto =
+    p.sucursal_nombre || getNombreCampo(p.sucursal, "Sin sucursal");
+  const estadoTexto =
+    p.estado_nombre || getNombreCampo(p.estado, "—");
+
+  col.innerHTML = `
+    <div class="card p-3 h-100 text-center">
+      <h6 class="fw-bold mb-1">${nombreProducto(p)}</h6>
+      <small class="text-muted d-block mb-1">${categoriaTexto}</small>
+      <span class="badge bg-light text-dark mb-1">${sucursalTexto}</span>
+      <p class="small mb-1"><strong>Estado:</strong> ${estadoTexto}</p>
+      <p class="small mb-1"><strong>Garantía:</strong> ${garantiaTexto}</p>
+
+      <div class="d-flex justify-content-center gap-1 mt-2">
         <a href="detalle.html?id=${p.id}" class="btn btn-sm btn-primary">
           <i class="bi bi-eye"></i>
         </a>
@@ -297,74 +493,10 @@ function renderTablaProductos(lista) {
         <a href="eliminar.html?id=${p.id}" class="btn btn-sm btn-danger">
           <i class="bi bi-trash"></i>
         </a>
-      </td>
-    `;
-
-    tbody.appendChild(tr);
-  });
-}
-
-function renderTarjetasProductos(lista) {
-  function getNombreCampo(campo, fallback = "—") {
-    if (campo === null || campo === undefined) return fallback;
-    if (typeof campo === "object") {
-      if (campo.nombre) return campo.nombre;
-      if (campo.nombre_categoria) return campo.nombre_categoria;
-      if (campo.nombre_sucursal) return campo.nombre_sucursal;
-      if (campo.nombre_estado) return campo.nombre_estado;
-      return JSON.stringify(campo);
-    }
-    return campo;
-  }
-
-  const cont = document.getElementById("cardsProductos");
-  if (!cont) return;
-
-  if (!lista.length) {
-    cont.innerHTML = `<p class="text-muted">No hay productos que coincidan con el filtro.</p>`;
-    return;
-  }
-
-  cont.innerHTML = "";
-
-  lista.forEach(p => {
-    const col = document.createElement("div");
-    col.className = "col-md-4 col-lg-3 mb-3";
-
-    const garantiaValor = p.garantia_meses ?? p.garantia ?? null;
-    const garantiaTexto =
-      garantiaValor === null || garantiaValor === "" ? "—" : `${garantiaValor} meses`;
-    const categoriaTexto =
-      p.categoria_nombre || getNombreCampo(p.categoria, "—");
-    const sucursalTexto =
-      p.sucursal_nombre || getNombreCampo(p.sucursal, "Sin sucursal");
-    const estadoTexto =
-      p.estado_nombre || getNombreCampo(p.estado, "—");
-
-    col.innerHTML = `
-      <div class="card p-3 h-100 text-center">
-        <h6 class="fw-bold mb-1">${nombreProducto(p)}</h6>
-        <small class="text-muted d-block mb-1">${categoriaTexto}</small>
-        <span class="badge bg-light text-dark mb-1">${sucursalTexto}</span>
-        <p class="small mb-1"><strong>Estado:</strong> ${estadoTexto}</p>
-        <p class="small mb-1"><strong>Garantía:</strong> ${garantiaTexto}</p>
-
-        <div class="d-flex justify-content-center gap-1 mt-2">
-          <a href="detalle.html?id=${p.id}" class="btn btn-sm btn-primary">
-            <i class="bi bi-eye"></i>
-          </a>
-          <a href="editar.html?id=${p.id}" class="btn btn-sm btn-warning">
-            <i class="bi bi-pencil"></i>
-          </a>
-          <a href="eliminar.html?id=${p.id}" class="btn btn-sm btn-danger">
-            <i class="bi bi-trash"></i>
-          </a>
-        </div>
       </div>
-    `;
-
-    cont.appendChild(col);
-  });
+    </div>
+  `;
+  return col;
 }
 
 // -----------------------------------------------------------
@@ -604,26 +736,21 @@ async function cargarDetalleProducto(id) {
       elBtnEditar.href = `editar.html?id=${p.id}`;
     }
 
-    // Mostrar QR generado por Django
+    // Mostrar QR generado por Django (el endpoint exige token: se pide como Blob)
     const qrImg = document.getElementById("qr-img");
     if (qrImg && p.codigo_qr) {
-      const qrUrl = p.codigo_qr.imagen_qr_url || p.codigo_qr.imagen_qr;
-
-      if (qrUrl) {
-        if (qrUrl.startsWith("/media/")) {
-          qrImg.src = `http://127.0.0.1:8000${qrUrl}`;
-        } else {
-          qrImg.src = qrUrl;
-        }
-        console.log("URL del QR:", qrImg.src);
-      } else {
-        console.log("No hay imagen QR disponible para este producto");
+      try {
+        if (qrImg.src.startsWith("blob:")) URL.revokeObjectURL(qrImg.src);
+        qrImg.src = URL.createObjectURL(await API.getQrProducto(p.id));
+      } catch (err) {
+        console.log("No hay imagen QR disponible para este producto", err);
       }
     }
 
     if (p.nro_serie) {
       cargarMovimientosProducto(p.nro_serie);
     }
+    cargarTimelineProducto(p.id);
 
   } catch (err) {
     console.error("Error al cargar detalle:", err);
@@ -686,6 +813,57 @@ async function cargarMovimientosProducto(sku) {
   }
 }
 
+// Línea de tiempo del producto: /productos/<id>/timeline/ (paginada por cursor)
+const ETIQUETAS_TIMELINE = {
+  asignacion: "Asignación",
+  devolucion: "Devolución",
+  mantencion: "Mantención",
+  estado: "Cambio de estado",
+  movimiento: "Movimiento",
+  notificacion: "Notificación",
+};
+
+async function cargarTimelineProducto(id, cursor = null) {
+  const lista = document.getElementById("timelineProd");
+  const btnMas = document.getElementById("btnTimelineMas");
+  if (!lista || !id) return;
+
+  try {
+    const params = new URLSearchParams({ limit: "20" });
+    if (cursor) params.set("cursor", cursor);
+    const res = await API.get(`productos/${id}/timeline/?${params.toString()}`);
+    const eventos = res.results || [];
+
+    if (!cursor) lista.innerHTML = "";
+    if (!cursor && !eventos.length) {
+      lista.innerHTML = `<li class="list-group-item text-muted">Sin eventos registrados.</li>`;
+    }
+
+    eventos.forEach((ev) => {
+      const li = document.createElement("li");
+      li.className = "list-group-item";
+      const fecha = ev.momento ? new Date(ev.momento).toLocaleString() : "";
+      li.innerHTML = `
+        <span class="badge bg-light text-dark me-2">${ETIQUETAS_TIMELINE[ev.tipo] || ev.tipo}</span>
+        <strong>${ev.titulo || ""}</strong>
+        <span class="text-muted float-end">${fecha}</span>
+        ${ev.detalle ? `<div class="text-muted">${ev.detalle}</div>` : ""}
+      `;
+      lista.appendChild(li);
+    });
+
+    if (btnMas) {
+      btnMas.classList.toggle("d-none", !res.next_cursor);
+      btnMas.onclick = () => cargarTimelineProducto(id, res.next_cursor);
+    }
+  } catch (err) {
+    console.error("Error al cargar línea de tiempo:", err);
+    if (!cursor) {
+      lista.innerHTML = `<li class="list-group-item text-danger">No se pudo cargar el historial.</li>`;
+    }
+  }
+}
+
 // Cargar estados en el select del modal de cambio de estado
 async function cargarEstadosParaCambioEstado() {
   const select = document.getElementById("nuevoEstado");
@@ -55,9 +55,10 @@ const dataMovimientosDemo = [
 // -----------------------------
 let filtroSucursal, filtroGarantia, btnAplicarFiltro;
 let tbodyEquipos, tbodyMovimientos, tbodyResumenGarantias;
-let ctxEquiposSucursal, ctxGarantias;
+let ctxEquiposSucursal, ctxGarantias, ctxTendencia;
 let chartEquipos = null;
 let chartGarantias = null;
+let chartTendencia = null;
 
 let dataEquiposBase = []; // datos agregados por sucursal que vienen de productos
 
@@ -225,6 +226,46 @@ function renderChartGarantias(lista) {
   });
 }
 
+// Entradas vs salidas de los últimos 12 meses.
+// Usa /movimientos/tendencia/ (totales mensuales precalculados).
+async function renderChartTendencia() {
+  if (!ctxTendencia || !window.Chart) return;
+
+  const hoy = new Date();
+  const desde = `${hoy.getFullYear() - 1}-${String(hoy.getMonth() + 1).padStart(2, "0")}-01`;
+  const res = await API.get(`movimientos/tendencia/?periodo=mes&desde=${desde}`);
+  const filas = (res && res.resultados) || [];
+
+  const meses = [...new Set(filas.map((f) => f.periodo))];
+  const serie = (tipo) =>
+    meses.map((m) => {
+      const fila = filas.find((f) => f.periodo === m && f.tipo === tipo);
+      return fila ? fila.cantidad_total : 0;
+    });
+
+  if (chartTendencia) chartTendencia.destroy();
+  chartTendencia = new Chart(ctxTendencia, {
+    type: "bar",
+    data: {
+      labels: meses.map((m) => m.slice(0, 7)),
+      datasets: [
+        { label: "Entradas", data: serie("entrada"), borderWidth: 1 },
+        { label: "Salidas", data: serie("salida"), borderWidth: 1 },
+      ],
+    },
+    options: {
+      responsive: true,
+      maintainAspectRatio: false,
+      plugins: {
+        legend: { position: "bottom" },
+      },
+      scales: {
+        y: { beginAtZero: true },
+      },
+    },
+  });
+}
+
 // ============================================================
 //  CÁLCULO DE DATOS DESDE PRODUCTOS
 // ============================================================
@@ -259,10 +300,11 @@ function agruparEquiposPorSucursal(productos) {
     else if (estado.includes("bodega") || estado.includes("baja"))
       nodo.bodega++;
 
-    const estGarantia = (p.estado_garantia || "").toLowerCase();
-    if (estGarantia.startsWith("vigent")) nodo.garantiaVigente++;
-    else if (estGarantia.includes("vencer")) nodo.garantiaPorVencer++;
-    else if (estGarantia.startsWith("vencid")) nodo.garantiaVencida++;
+    // situacion_garantia la calcula el backend (GarantiaService): no recalcular aquí
+    const situacion = p.situacion_garantia || (p.estado_garantia || "").toLowerCase();
+    if (situacion === "vigente") nodo.garantiaVigente++;
+    else if (situacion === "por_vencer") nodo.garantiaPorVencer++;
+    else if (situacion === "vencida") nodo.garantiaVencida++;
   });
 
   return Object.values(mapa);
@@ -318,6 +360,7 @@ async function initReportesListar() {
 
   ctxEquiposSucursal = document.getElementById("chartEquiposSucursal");
   ctxGarantias = document.getElementById("chartGarantias");
+  ctxTendencia = document.getElementById("chartTendenciaMovimientos");
 
   // Loading en tablas
   if (tbodyEquipos) {
@@ -330,16 +373,22 @@ async function initReportesListar() {
   }
 
   try {
+    // Productos y movimientos en un solo request (POST /api/api/batch/)
+    const { productos: resProd, movimientos: resMov } = await API.batch({
+      productos: "productos/",
+      movimientos: "movimientos/",
+    });
+    if (!resProd) throw new Error("No se pudieron obtener los productos");
+
     // 1) Productos desde API para armar las métricas
-    const resProd = await API.get("productos/");
     const productos = normalizarLista(resProd);
 
     dataEquiposBase = agruparEquiposPorSucursal(productos);
 
-    // 2) Movimientos: intentamos desde API, si falla usamos demo
+    // 2) Movimientos: los del batch; si fallaron usamos demo
     let movimientos = [];
     try {
-      const resMov = await API.get("movimientos/");
+      if (!resMov) throw new Error("El batch no devolvió movimientos");
       const listaMov = normalizarLista(resMov);
       movimientos = listaMov.map((m) => ({
         fecha: m.fecha || m.fecha_movimiento || "",
@@ -363,6 +412,9 @@ async function initReportesListar() {
     renderTablaResumenGarantias(dataEquiposBase);
     renderChartEquipos(dataEquiposBase);
     renderChartGarantias(dataEquiposBase);
+    renderChartTendencia().catch((e) =>
+      console.warn("No se pudo cargar la tendencia de movimientos:", e)
+    );
 
     // Filtros
     btnAplicarFiltro?.addEventListener("click", aplicarFiltros);
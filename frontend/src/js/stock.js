@@ -44,6 +44,53 @@ function alertError(msg) {
 
 let chartSucursal = null;
 let chartEstado = null;
+let chartTendencia = null;
+
+// Fecha local en formato YYYY-MM-DD
+function isoFecha(d) {
+  const mm = String(d.getMonth() + 1).padStart(2, "0");
+  const dd = String(d.getDate()).padStart(2, "0");
+  return `${d.getFullYear()}-${mm}-${dd}`;
+}
+
+// Gráfico entradas vs salidas por semana.
+// Lee /movimientos/tendencia/ (totales precalculados), no el ledger completo.
+async function renderTendenciaMovimientos(canvas) {
+  if (!canvas || !window.Chart) return;
+
+  const desde = new Date();
+  desde.setDate(desde.getDate() - 7 * 12);
+
+  const res = await API.get(
+    `movimientos/tendencia/?periodo=semana&desde=${isoFecha(desde)}`
+  );
+  const filas = (res && res.resultados) || [];
+
+  const semanas = [...new Set(filas.map((f) => f.periodo))];
+  const serie = (tipo) =>
+    semanas.map((s) => {
+      const fila = filas.find((f) => f.periodo === s && f.tipo === tipo);
+      return fila ? fila.cantidad_total : 0;
+    });
+
+  if (chartTendencia) chartTendencia.destroy();
+  chartTendencia = new Chart(canvas, {
+    type: "line",
+    data: {
+      labels: semanas,
+      datasets: [
+        { label: "Entradas", data: serie("entrada"), tension: 0.3 },
+        { label: "Salidas", data: serie("salida"), tension: 0.3 },
+      ],
+    },
+    options: {
+      responsive: true,
+      maintainAspectRatio: false,
+      scales: { y: { beginAtZero: true } },
+      plugins: { legend: { position: "bottom" } },
+    },
+  });
+}
 
 async function initStockDashboard() {
   const dashboard = document.getElementById("stock-dashboard");
@@ -57,6 +104,7 @@ async function initStockDashboard() {
 
   const canvasSucursal = document.getElementById("chartStockSucursal");
   const canvasEstado = document.getElementById("chartStockEstado");
+  const canvasTendencia = document.getElementById("chartTendenciaStock");
 
   if (tbodyMov) {
     tbodyMov.innerHTML =
@@ -64,8 +112,14 @@ async function initStockDashboard() {
   }
 
   try {
+    // Productos y movimientos en un solo request (POST /api/api/batch/)
+    const { productos: resProd, movimientos: resMovBatch } = await API.batch({
+      productos: "productos/",
+      movimientos: "movimientos/",
+    });
+    if (!resProd) throw new Error("No se pudieron obtener los productos");
+
     // 1) Productos para tarjetas y gráficos
-    const resProd = await API.get("productos/");
     const productos = normalizarLista(resProd);
 
     const totales = {
@@ -158,11 +212,16 @@ async function initStockDashboard() {
       });
     }
 
+    // Tendencia semanal (no bloquea el resto del dashboard si falla)
+    renderTendenciaMovimientos(canvasTendencia).catch((e) =>
+      console.warn("No se pudo cargar la tendencia de movimientos:", e)
+    );
+
     // 2) Movimientos recientes (usa el modelo Movimientos del backend)
     if (tbodyMov) {
       try {
-        const resMov = await API.get("movimientos/");
-        const movimientos = normalizarLista(resMov);
+        if (!resMovBatch) throw new Error("El batch no devolvió movimientos");
+        const movimientos = normalizarLista(resMovBatch);
 
         if (!movimientos.length) {
           tbodyMov.innerHTML =
@@ -417,6 +476,48 @@ function initFormularioAjuste() {
   });
 }
 
+// ============================================================
+// AUTOCOMPLETADO DE SKU (entradas, salidas, ajustes)
+// ============================================================
+
+// Sugiere números de serie mientras se escribe, sin cargar la lista completa.
+function initAutocompletarSku() {
+  const input = document.getElementById("productoId");
+  if (!input) return;
+
+  const datalist = document.createElement("datalist");
+  datalist.id = "productoIdSugerencias";
+  input.setAttribute("list", datalist.id);
+  input.setAttribute("autocomplete", "off");
+  input.after(datalist);
+
+  let timer = null;
+  let ultimaConsulta = "";
+
+  input.addEventListener("input", () => {
+    clearTimeout(timer);
+    const q = input.value.trim();
+    if (q.length < 2 || q === ultimaConsulta) return;
+
+    timer = setTimeout(async () => {
+      ultimaConsulta = q;
+      try {
+        const res = await API.autocomplete(q, ["nro_serie"], { limit: 10 });
+        // Si el usuario siguió escribiendo, descartamos la respuesta vieja
+        if (input.value.trim() !== q) return;
+        datalist.innerHTML = "";
+        (res.resultados.nro_serie || []).forEach((p) => {
+          const opt = document.createElement("option");
+          opt.value = p.texto;
+          datalist.appendChild(opt);
+        });
+      } catch (e) {
+        console.warn("No se pudo autocompletar el SKU:", e);
+      }
+    }, 200);
+  });
+}
+
 // ============================================================
 // INICIALIZACIÓN GLOBAL
 // ============================================================
@@ -425,4 +526,5 @@ document.addEventListener("DOMContentLoaded", () => {
   initFormularioEntrada();
   initFormularioSalida();
   initFormularioAjuste();
+  initAutocompletarSku();
 });